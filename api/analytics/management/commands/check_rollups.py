@@ -0,0 +1,93 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from api.analytics.models import (
+    AppointmentDailyFact,
+    ContractDailyFact,
+    LeadDailyFact,
+    ReceiptDailyFact,
+    RollupFact,
+)
+from api.analytics.rollups import rebuild_facts
+from api.contracts.models import Contract
+from api.leads.models import Lead
+from api.payments.models import PaymentReceipt
+
+ZERO = Decimal("0.00")
+
+
+def _raw_by_day(qs, date_field, amount_field=None):
+    measures = {"n": Count("id")}
+    if amount_field:
+        measures["total"] = Sum(amount_field)
+    rows = qs.order_by().annotate(day=TruncDate(date_field)).values("day").annotate(**measures)
+    return {r["day"]: (r["n"], r.get("total") or ZERO) for r in rows}
+
+
+def _facts_by_day(model, count_field, amount_field=None):
+    measures = {"n": Sum(count_field)}
+    if amount_field:
+        measures["total"] = Sum(amount_field)
+    rows = model.objects.order_by().values("day").annotate(**measures)
+    return {r["day"]: (r["n"], r.get("total") or ZERO) for r in rows}
+
+
+class Command(BaseCommand):
+    help = "Compare les agrégats journaliers aux données brutes et signale les écarts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Limiter aux N derniers jours.")
+        parser.add_argument("--fix", action="store_true", help="Recalcule les jours en écart.")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["days"] is not None:
+            since = timezone.localdate() - timedelta(days=options["days"] - 1)
+
+        checks = {
+            RollupFact.LEADS: (
+                _raw_by_day(Lead.objects.all(), "created_at"),
+                _facts_by_day(LeadDailyFact, "leads_count"),
+            ),
+            RollupFact.APPOINTMENTS: (
+                _raw_by_day(Lead.objects.filter(appointment_date__isnull=False), "appointment_date"),
+                _facts_by_day(AppointmentDailyFact, "appointments_count"),
+            ),
+            RollupFact.CONTRACTS: (
+                _raw_by_day(Contract.objects.all(), "created_at", "amount_due"),
+                _facts_by_day(ContractDailyFact, "contracts_count", "amount_due_total"),
+            ),
+            RollupFact.RECEIPTS: (
+                _raw_by_day(PaymentReceipt.objects.all(), "payment_date", "amount"),
+                _facts_by_day(ReceiptDailyFact, "receipts_count", "amount_total"),
+            ),
+        }
+
+        total_mismatches = 0
+        for fact, (raw, facts) in checks.items():
+            mismatched = sorted(
+                day
+                for day in set(raw) | set(facts)
+                if (since is None or day >= since)
+                and raw.get(day, (0, ZERO)) != facts.get(day, (0, ZERO))
+            )
+            if not mismatched:
+                self.stdout.write(self.style.SUCCESS(f"✅ {fact}: cohérent"))
+                continue
+
+            total_mismatches += len(mismatched)
+            self.stdout.write(self.style.WARNING(f"⚠️ {fact}: {len(mismatched)} jour(s) en écart"))
+            for day in mismatched[:20]:
+                self.stdout.write(f"   {day} brut={raw.get(day)} agrégat={facts.get(day)}")
+
+            if options["fix"]:
+                rebuild_facts(fact, mismatched)
+                self.stdout.write(self.style.SUCCESS(f"   → {len(mismatched)} jour(s) recalculé(s)"))
+
+        if total_mismatches and not options["fix"]:
+            raise CommandError(f"{total_mismatches} jour(s) incohérent(s). Relancer avec --fix.")
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.analytics.rollups import FACT_BUILDERS, rebuild_facts
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les tables d'agrégats journaliers (leads, RDV, contrats, paiements)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Ne recalcule que les N derniers jours (par défaut : reconstruction complète).",
+        )
+        parser.add_argument(
+            "--fact",
+            choices=list(FACT_BUILDERS),
+            action="append",
+            help="Fait(s) à reconstruire (par défaut : tous).",
+        )
+
+    def handle(self, *args, **options):
+        days = None
+        if options["days"] is not None:
+            today = timezone.localdate()
+            days = [today - timedelta(days=i) for i in range(options["days"])]
+
+        for fact in options["fact"] or FACT_BUILDERS:
+            written = rebuild_facts(fact, days)
+            self.stdout.write(self.style.SUCCESS(f"{fact}: {written} ligne(s) écrite(s)"))
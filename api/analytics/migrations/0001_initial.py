@@ -0,0 +1,113 @@
+# Generated by Django 5.1.7 on 2026-10-19 01:25
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('services', '0004_alter_service_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentDailyFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='jour')),
+                ('status_code', models.CharField(blank=True, max_length=50, verbose_name='statut')),
+                ('appointment_type', models.CharField(blank=True, max_length=20, verbose_name='type de rendez-vous')),
+                ('source', models.CharField(blank=True, max_length=30, verbose_name='source')),
+                ('service', models.CharField(blank=True, max_length=30, verbose_name='service demandé')),
+                ('department_code', models.CharField(blank=True, max_length=10, verbose_name='département')),
+                ('appointments_count', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'agrégat journalier rendez-vous',
+                'verbose_name_plural': 'agrégats journaliers rendez-vous',
+                'indexes': [models.Index(fields=['day'], name='appointment_fact_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'status_code', 'appointment_type', 'source', 'service', 'department_code'), name='unique_appointment_daily_fact')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeadDailyFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='jour')),
+                ('status_code', models.CharField(blank=True, max_length=50, verbose_name='statut')),
+                ('appointment_type', models.CharField(blank=True, max_length=20, verbose_name='type de rendez-vous')),
+                ('source', models.CharField(blank=True, max_length=30, verbose_name='source')),
+                ('service', models.CharField(blank=True, max_length=30, verbose_name='service demandé')),
+                ('department_code', models.CharField(blank=True, max_length=10, verbose_name='département')),
+                ('leads_count', models.PositiveIntegerField(default=0)),
+                ('with_appointment_count', models.PositiveIntegerField(default=0)),
+                ('urgent_count', models.PositiveIntegerField(default=0)),
+                ('hot_count', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'agrégat journalier leads',
+                'verbose_name_plural': 'agrégats journaliers leads',
+                'indexes': [models.Index(fields=['day'], name='lead_fact_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'status_code', 'appointment_type', 'source', 'service', 'department_code'), name='unique_lead_daily_fact')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReceiptDailyFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='jour')),
+                ('mode', models.CharField(blank=True, max_length=20, verbose_name='mode de paiement')),
+                ('receipts_count', models.PositiveIntegerField(default=0)),
+                ('amount_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'agrégat journalier paiements',
+                'verbose_name_plural': 'agrégats journaliers paiements',
+                'indexes': [models.Index(fields=['day'], name='receipt_fact_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'mode'), name='unique_receipt_daily_fact')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupDirtyDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fact', models.CharField(choices=[('LEADS', 'Leads (par jour de création)'), ('APPOINTMENTS', 'Rendez-vous (par jour de RDV)'), ('CONTRACTS', 'Contrats (par jour de création)'), ('RECEIPTS', 'Paiements (par jour de paiement)')], max_length=20)),
+                ('day', models.DateField()),
+                ('marked_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'jour à recalculer',
+                'verbose_name_plural': 'jours à recalculer',
+                'constraints': [models.UniqueConstraint(fields=('fact', 'day'), name='unique_rollup_dirty_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ContractDailyFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='jour')),
+                ('lead_status_code', models.CharField(blank=True, max_length=50, verbose_name='statut du lead')),
+                ('appointment_type', models.CharField(blank=True, max_length=20, verbose_name='type de rendez-vous')),
+                ('is_signed', models.BooleanField(default=False)),
+                ('is_cancelled', models.BooleanField(default=False)),
+                ('is_refunded', models.BooleanField(default=False)),
+                ('contracts_count', models.PositiveIntegerField(default=0)),
+                ('amount_due_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='services.service', verbose_name='service')),
+            ],
+            options={
+                'verbose_name': 'agrégat journalier contrats',
+                'verbose_name_plural': 'agrégats journaliers contrats',
+                'indexes': [models.Index(fields=['day'], name='contract_fact_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'service', 'lead_status_code', 'appointment_type', 'is_signed', 'is_cancelled', 'is_refunded'), name='unique_contract_daily_fact')],
+            },
+        ),
+    ]
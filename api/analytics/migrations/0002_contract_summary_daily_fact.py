@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:57
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rollupdirtyday',
+            name='fact',
+            field=models.CharField(choices=[('LEADS', 'Leads (par jour de création)'), ('APPOINTMENTS', 'Rendez-vous (par jour de RDV)'), ('CONTRACTS', 'Contrats (par jour de création)'), ('RECEIPTS', 'Paiements (par jour de paiement)'), ('CONTRACT_SUMMARY', 'Synthèse financière des contrats (par jour de création)')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ContractSummaryDailyFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='jour')),
+                ('is_cancelled', models.BooleanField(default=False)),
+                ('contracts_count', models.PositiveIntegerField(default=0)),
+                ('amount_due_total', models.DecimalField(decimal_places=6, default=Decimal('0.00'), max_digits=18)),
+                ('real_amount_total', models.DecimalField(decimal_places=6, default=Decimal('0.00'), max_digits=18)),
+                ('amount_paid_total', models.DecimalField(decimal_places=6, default=Decimal('0.00'), max_digits=18)),
+                ('net_paid_total', models.DecimalField(decimal_places=6, default=Decimal('0.00'), max_digits=18)),
+                ('balance_due_total', models.DecimalField(decimal_places=6, default=Decimal('0.00'), max_digits=18)),
+                ('signed_count', models.PositiveIntegerField(default=0)),
+                ('refunded_count', models.PositiveIntegerField(default=0)),
+                ('reduced_count', models.PositiveIntegerField(default=0)),
+                ('fully_paid_count', models.PositiveIntegerField(default=0)),
+                ('with_balance_count', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'synthèse journalière contrats',
+                'verbose_name_plural': 'synthèses journalières contrats',
+                'indexes': [models.Index(fields=['day'], name='contract_summary_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'is_cancelled'), name='unique_contract_summary_fact')],
+            },
+        ),
+    ]
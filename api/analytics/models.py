@@ -0,0 +1,198 @@
+from decimal import Decimal
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class RollupFact(models.TextChoices):
+    LEADS = "LEADS", _("Leads (par jour de création)")
+    APPOINTMENTS = "APPOINTMENTS", _("Rendez-vous (par jour de RDV)")
+    CONTRACTS = "CONTRACTS", _("Contrats (par jour de création)")
+    RECEIPTS = "RECEIPTS", _("Paiements (par jour de paiement)")
+    CONTRACT_SUMMARY = "CONTRACT_SUMMARY", _("Synthèse financière des contrats (par jour de création)")
+
+
+class LeadDailyFact(models.Model):
+    """
+    Agrégat journalier des leads par jour de création (Europe/Paris).
+    Une ligne par combinaison jour × statut × type de RDV × source × service × département.
+    """
+
+    day = models.DateField(verbose_name=_("jour"))
+    status_code = models.CharField(max_length=50, blank=True, verbose_name=_("statut"))
+    appointment_type = models.CharField(max_length=20, blank=True, verbose_name=_("type de rendez-vous"))
+    source = models.CharField(max_length=30, blank=True, verbose_name=_("source"))
+    service = models.CharField(max_length=30, blank=True, verbose_name=_("service demandé"))
+    department_code = models.CharField(max_length=10, blank=True, verbose_name=_("département"))
+
+    leads_count = models.PositiveIntegerField(default=0)
+    with_appointment_count = models.PositiveIntegerField(default=0)
+    urgent_count = models.PositiveIntegerField(default=0)
+    hot_count = models.PositiveIntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("agrégat journalier leads")
+        verbose_name_plural = _("agrégats journaliers leads")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "status_code", "appointment_type", "source", "service", "department_code"],
+                name="unique_lead_daily_fact",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="lead_fact_day_idx"),
+        ]
+
+
+class AppointmentDailyFact(models.Model):
+    """
+    Agrégat journalier des rendez-vous par jour de RDV (Europe/Paris).
+    Mêmes dimensions que LeadDailyFact.
+    """
+
+    day = models.DateField(verbose_name=_("jour"))
+    status_code = models.CharField(max_length=50, blank=True, verbose_name=_("statut"))
+    appointment_type = models.CharField(max_length=20, blank=True, verbose_name=_("type de rendez-vous"))
+    source = models.CharField(max_length=30, blank=True, verbose_name=_("source"))
+    service = models.CharField(max_length=30, blank=True, verbose_name=_("service demandé"))
+    department_code = models.CharField(max_length=10, blank=True, verbose_name=_("département"))
+
+    appointments_count = models.PositiveIntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("agrégat journalier rendez-vous")
+        verbose_name_plural = _("agrégats journaliers rendez-vous")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "status_code", "appointment_type", "source", "service", "department_code"],
+                name="unique_appointment_daily_fact",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="appointment_fact_day_idx"),
+        ]
+
+
+class ContractDailyFact(models.Model):
+    """
+    Agrégat journalier des contrats par jour de création (Europe/Paris).
+    """
+
+    day = models.DateField(verbose_name=_("jour"))
+    service = models.ForeignKey(
+        "services.Service",
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("service"),
+    )
+    lead_status_code = models.CharField(max_length=50, blank=True, verbose_name=_("statut du lead"))
+    appointment_type = models.CharField(max_length=20, blank=True, verbose_name=_("type de rendez-vous"))
+    is_signed = models.BooleanField(default=False)
+    is_cancelled = models.BooleanField(default=False)
+    is_refunded = models.BooleanField(default=False)
+
+    contracts_count = models.PositiveIntegerField(default=0)
+    amount_due_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("agrégat journalier contrats")
+        verbose_name_plural = _("agrégats journaliers contrats")
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "day", "service", "lead_status_code", "appointment_type",
+                    "is_signed", "is_cancelled", "is_refunded",
+                ],
+                name="unique_contract_daily_fact",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="contract_fact_day_idx"),
+        ]
+
+
+class ReceiptDailyFact(models.Model):
+    """
+    Agrégat journalier des encaissements par jour de paiement (Europe/Paris).
+    """
+
+    day = models.DateField(verbose_name=_("jour"))
+    mode = models.CharField(max_length=20, blank=True, verbose_name=_("mode de paiement"))
+
+    receipts_count = models.PositiveIntegerField(default=0)
+    amount_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("agrégat journalier paiements")
+        verbose_name_plural = _("agrégats journaliers paiements")
+        constraints = [
+            models.UniqueConstraint(fields=["day", "mode"], name="unique_receipt_daily_fact")
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="receipt_fact_day_idx"),
+        ]
+
+
+class ContractSummaryDailyFact(models.Model):
+    """
+    Synthèse financière des contrats par jour de création (Europe/Paris) et
+    état d'annulation : mêmes mesures que la barre de synthèse de la recherche
+    contrats (ContractSearchService.calculate_aggregates), paiements inclus.
+    Un paiement re-marque le jour de création de son contrat.
+    """
+
+    day = models.DateField(verbose_name=_("jour"))
+    is_cancelled = models.BooleanField(default=False)
+
+    contracts_count = models.PositiveIntegerField(default=0)
+    amount_due_total = models.DecimalField(max_digits=18, decimal_places=6, default=Decimal("0.00"))
+    real_amount_total = models.DecimalField(max_digits=18, decimal_places=6, default=Decimal("0.00"))
+    amount_paid_total = models.DecimalField(max_digits=18, decimal_places=6, default=Decimal("0.00"))
+    net_paid_total = models.DecimalField(max_digits=18, decimal_places=6, default=Decimal("0.00"))
+    balance_due_total = models.DecimalField(max_digits=18, decimal_places=6, default=Decimal("0.00"))
+    signed_count = models.PositiveIntegerField(default=0)
+    refunded_count = models.PositiveIntegerField(default=0)
+    reduced_count = models.PositiveIntegerField(default=0)
+    fully_paid_count = models.PositiveIntegerField(default=0)
+    with_balance_count = models.PositiveIntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("synthèse journalière contrats")
+        verbose_name_plural = _("synthèses journalières contrats")
+        constraints = [
+            models.UniqueConstraint(fields=["day", "is_cancelled"], name="unique_contract_summary_fact")
+        ]
+        indexes = [
+            models.Index(fields=["day"], name="contract_summary_day_idx"),
+        ]
+
+
+class RollupDirtyDay(models.Model):
+    """
+    Jours à recalculer par le rafraîchissement incrémental.
+    Alimenté par les signaux Lead / Contract / PaymentReceipt.
+    """
+
+    fact = models.CharField(max_length=20, choices=RollupFact.choices)
+    day = models.DateField()
+    marked_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("jour à recalculer")
+        verbose_name_plural = _("jours à recalculer")
+        constraints = [
+            models.UniqueConstraint(fields=["fact", "day"], name="unique_rollup_dirty_day")
+        ]
+
+    def __str__(self):
+        return f"{self.fact} {self.day}"
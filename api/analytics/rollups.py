@@ -0,0 +1,302 @@
+"""
+Construction des tables d'agrégats journaliers (rollups).
+
+Chaque fait est recalculé par jour complet : suppression des lignes du jour
+puis réinsertion à partir d'un unique GROUP BY sur les données brutes.
+  - rebuild_facts(fact)            → reconstruction complète (job nocturne)
+  - rebuild_facts(fact, days=[…])  → reconstruction ciblée (rafraîchissement incrémental)
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from api.analytics.models import (
+    AppointmentDailyFact,
+    ContractDailyFact,
+    ContractSummaryDailyFact,
+    LeadDailyFact,
+    ReceiptDailyFact,
+    RollupDirtyDay,
+    RollupFact,
+)
+from api.contracts.models import Contract
+from api.leads.constants import HOT_BLOCKING_BUCKETS
+from api.leads.models import Lead
+from api.payments.models import PaymentReceipt
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def local_day(value: Optional[datetime]) -> Optional[date]:
+    """Jour calendaire (Europe/Paris) d'un datetime ; tolère les dates et datetimes naïfs."""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        return value
+    if timezone.is_naive(value):
+        return value.date()
+    return timezone.localtime(value).date()
+
+
+def _days_filter(field: str, days: Iterable[date]) -> Q:
+    """
+    Filtre "field tombe dans l'un des jours" sous forme d'intervalles
+    [00:00, 00:00 J+1[ pour rester exploitable par l'index du champ.
+    """
+    tz = timezone.get_current_timezone()
+    condition = Q(pk__in=[])
+    for d in sorted(set(days)):
+        start = timezone.make_aware(datetime.combine(d, time.min), tz)
+        end = timezone.make_aware(datetime.combine(d + timedelta(days=1), time.min), tz)
+        condition |= Q(**{f"{field}__gte": start, f"{field}__lt": end})
+    return condition
+
+
+def _count_if(condition: Q):
+    return Sum(Case(When(condition, then=Value(1)), default=Value(0), output_field=IntegerField()))
+
+
+def _lead_dimensions():
+    return {
+        "status_code": Coalesce(F("status__code"), Value("")),
+        "appointment_type_dim": Coalesce(F("appointment_type"), Value("")),
+        "source_dim": Coalesce(F("source"), Value("")),
+        "service_dim": Coalesce(F("service"), Value("")),
+        "department_dim": Coalesce(F("department_code"), Value("")),
+    }
+
+
+def _lead_rows(days):
+    qs = Lead.objects.all()
+    if days is not None:
+        qs = qs.filter(_days_filter("created_at", days))
+    rows = (
+        qs.order_by()
+        .annotate(day=TruncDate("created_at"), **_lead_dimensions())
+        .values("day", "status_code", "appointment_type_dim", "source_dim", "service_dim", "department_dim")
+        .annotate(
+            leads_count=Count("id"),
+            with_appointment_count=_count_if(Q(appointment_date__isnull=False)),
+            urgent_count=_count_if(Q(is_urgent=True)),
+            hot_count=_count_if(Q(is_urgent=True) | Q(blocking_duration_bucket__in=HOT_BLOCKING_BUCKETS)),
+        )
+    )
+    return [
+        LeadDailyFact(
+            day=r["day"],
+            status_code=r["status_code"],
+            appointment_type=r["appointment_type_dim"],
+            source=r["source_dim"],
+            service=r["service_dim"],
+            department_code=r["department_dim"],
+            leads_count=r["leads_count"],
+            with_appointment_count=r["with_appointment_count"],
+            urgent_count=r["urgent_count"],
+            hot_count=r["hot_count"],
+        )
+        for r in rows
+    ]
+
+
+def _appointment_rows(days):
+    qs = Lead.objects.filter(appointment_date__isnull=False)
+    if days is not None:
+        qs = qs.filter(_days_filter("appointment_date", days))
+    rows = (
+        qs.order_by()
+        .annotate(day=TruncDate("appointment_date"), **_lead_dimensions())
+        .values("day", "status_code", "appointment_type_dim", "source_dim", "service_dim", "department_dim")
+        .annotate(appointments_count=Count("id"))
+    )
+    return [
+        AppointmentDailyFact(
+            day=r["day"],
+            status_code=r["status_code"],
+            appointment_type=r["appointment_type_dim"],
+            source=r["source_dim"],
+            service=r["service_dim"],
+            department_code=r["department_dim"],
+            appointments_count=r["appointments_count"],
+        )
+        for r in rows
+    ]
+
+
+def _contract_rows(days):
+    qs = Contract.objects.all()
+    if days is not None:
+        qs = qs.filter(_days_filter("created_at", days))
+    rows = (
+        qs.order_by()
+        .annotate(
+            day=TruncDate("created_at"),
+            lead_status_code=Coalesce(F("client__lead__status__code"), Value("")),
+            lead_appointment_type=Coalesce(F("client__lead__appointment_type"), Value("")),
+        )
+        .values(
+            "day", "service_id", "lead_status_code", "lead_appointment_type",
+            "is_signed", "is_cancelled", "is_refunded",
+        )
+        .annotate(contracts_count=Count("id"), amount_due_total=Sum("amount_due"))
+    )
+    return [
+        ContractDailyFact(
+            day=r["day"],
+            service_id=r["service_id"],
+            lead_status_code=r["lead_status_code"],
+            appointment_type=r["lead_appointment_type"],
+            is_signed=r["is_signed"],
+            is_cancelled=r["is_cancelled"],
+            is_refunded=r["is_refunded"],
+            contracts_count=r["contracts_count"],
+            amount_due_total=r["amount_due_total"],
+        )
+        for r in rows
+    ]
+
+
+def _receipt_rows(days):
+    qs = PaymentReceipt.objects.all()
+    if days is not None:
+        qs = qs.filter(_days_filter("payment_date", days))
+    rows = (
+        qs.order_by()
+        .annotate(day=TruncDate("payment_date"))
+        .values("day", "mode")
+        .annotate(receipts_count=Count("id"), amount_total=Sum("amount"))
+    )
+    return [
+        ReceiptDailyFact(
+            day=r["day"],
+            mode=r["mode"] or "",
+            receipts_count=r["receipts_count"],
+            amount_total=r["amount_total"],
+        )
+        for r in rows
+    ]
+
+
+def _money(expression):
+    return ExpressionWrapper(expression, output_field=DecimalField(max_digits=18, decimal_places=6))
+
+
+def _contract_summary_rows(days):
+    """Mêmes formules que ContractSearchService.calculate_aggregates, par contrat puis par jour."""
+    zero = Value(Decimal("0.00"))
+    paid = Subquery(
+        PaymentReceipt.objects.filter(contract_id=OuterRef("pk"))
+        .order_by()
+        .values("contract_id")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    qs = Contract.objects.all()
+    if days is not None:
+        qs = qs.filter(_days_filter("created_at", days))
+    rows = (
+        qs.order_by()
+        .annotate(
+            day=TruncDate("created_at"),
+            paid=Coalesce(paid, zero, output_field=DecimalField(max_digits=14, decimal_places=2)),
+            real_amount=_money(
+                F("amount_due") * (Value(Decimal("1")) - Coalesce(F("discount_percent"), zero) / Value(Decimal("100")))
+            ),
+        )
+        .annotate(net_paid=_money(F("paid") - Coalesce(F("refund_amount"), zero)))
+        .annotate(balance=_money(F("real_amount") - F("net_paid")))
+        .values("day", "is_cancelled")
+        .annotate(
+            contracts_count=Count("id"),
+            amount_due_total=Sum("amount_due"),
+            real_amount_total=Sum("real_amount"),
+            amount_paid_total=Sum("paid"),
+            net_paid_total=Sum("net_paid"),
+            balance_due_total=Sum(_money(
+                Case(When(is_cancelled=False, balance__gt=0, then=F("balance")), default=zero)
+            )),
+            signed_count=_count_if(Q(is_signed=True)),
+            refunded_count=_count_if(Q(is_refunded=True)),
+            reduced_count=_count_if(Q(discount_percent__gt=0)),
+            fully_paid_count=_count_if(Q(is_cancelled=True) | Q(balance__lte=0)),
+            with_balance_count=_count_if(Q(is_cancelled=False, balance__gt=0)),
+        )
+    )
+    return [ContractSummaryDailyFact(**r) for r in rows]
+
+
+FACT_BUILDERS = {
+    RollupFact.LEADS: (LeadDailyFact, _lead_rows),
+    RollupFact.APPOINTMENTS: (AppointmentDailyFact, _appointment_rows),
+    RollupFact.CONTRACTS: (ContractDailyFact, _contract_rows),
+    RollupFact.RECEIPTS: (ReceiptDailyFact, _receipt_rows),
+    RollupFact.CONTRACT_SUMMARY: (ContractSummaryDailyFact, _contract_summary_rows),
+}
+
+
+def rebuild_facts(fact: str, days: Optional[Iterable[date]] = None) -> int:
+    """
+    Recalcule un fait pour les jours donnés (ou intégralement si days=None).
+    Retourne le nombre de lignes d'agrégat écrites.
+    """
+    model, build_rows = FACT_BUILDERS[fact]
+    if days is not None:
+        days = sorted(set(days))
+        if not days:
+            return 0
+
+    rows = build_rows(days)
+    with transaction.atomic():
+        existing = model.objects.all()
+        if days is not None:
+            existing = existing.filter(day__in=days)
+        existing.delete()
+        model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        if fact == RollupFact.CONTRACT_SUMMARY:
+            # Les agrégats mis en cache pendant le recalcul ne sont plus servis
+            from api.contracts.aggregates import bump_version
+            transaction.on_commit(bump_version)
+    return len(rows)
+
+
+def rebuild_all(days: Optional[Iterable[date]] = None) -> dict:
+    days = list(days) if days is not None else None
+    return {fact: rebuild_facts(fact, days) for fact in FACT_BUILDERS}
+
+
+def mark_dirty(fact: str, *days: Optional[date]) -> None:
+    """Signale des jours à recalculer lors du prochain rafraîchissement incrémental."""
+    entries = [RollupDirtyDay(fact=fact, day=d) for d in set(days) if d is not None]
+    if entries:
+        RollupDirtyDay.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def refresh_dirty() -> dict:
+    """
+    Recalcule les jours marqués "sales", fait par fait.
+    Les marqueurs d'un fait sont retirés dans la même transaction que son
+    recalcul : si le recalcul échoue, ils restent et le jour sera repris au
+    passage suivant. Une écriture concurrente re-marque le jour après commit.
+    """
+    written = {}
+    for fact in FACT_BUILDERS:
+        with transaction.atomic():
+            pending = list(
+                RollupDirtyDay.objects.filter(fact=fact).select_for_update(skip_locked=True).values_list("id", "day")
+            )
+            if not pending:
+                continue
+            days = {day for _, day in pending}
+            RollupDirtyDay.objects.filter(id__in=[p[0] for p in pending]).delete()
+            written[fact] = rebuild_facts(fact, days)
+        logger.info("📊 Rollup %s : %d jour(s) recalculé(s), %d ligne(s)", fact, len(days), written[fact])
+    return written
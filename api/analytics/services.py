@@ -0,0 +1,166 @@
+"""
+Lecture des agrégats journaliers pour les rapports et tableaux de bord.
+
+Toutes les méthodes lisent exclusivement les tables *DailyFact : le coût est
+proportionnel au nombre de jours × combinaisons de dimensions, pas au volume
+de leads / contrats / paiements.
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.db.models import Max, Min, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+from api.analytics.models import (
+    AppointmentDailyFact,
+    ContractDailyFact,
+    LeadDailyFact,
+    ReceiptDailyFact,
+)
+
+ZERO = Decimal("0.00")
+
+
+def _period(qs, start: Optional[date] = None, end: Optional[date] = None):
+    if start:
+        qs = qs.filter(day__gte=start)
+    if end:
+        qs = qs.filter(day__lte=end)
+    return qs
+
+
+def _grouped(qs, dimension: str, measure: str):
+    return {
+        row[dimension]: row["n"]
+        for row in qs.order_by().values(dimension).annotate(n=Sum(measure))
+    }
+
+
+class LeadRollupService:
+    """KPIs leads (par jour de création) et rendez-vous (par jour de RDV)."""
+
+    @staticmethod
+    def leads(start: Optional[date] = None, end: Optional[date] = None):
+        return _period(LeadDailyFact.objects.all(), start, end)
+
+    @classmethod
+    def totals(cls, start: Optional[date] = None, end: Optional[date] = None) -> dict:
+        agg = cls.leads(start, end).aggregate(
+            total=Coalesce(Sum("leads_count"), 0),
+            with_appointment=Coalesce(Sum("with_appointment_count"), 0),
+            urgent=Coalesce(Sum("urgent_count"), 0),
+            hot=Coalesce(Sum("hot_count"), 0),
+            first_day=Min("day"),
+            last_day=Max("day"),
+        )
+        return agg
+
+    @classmethod
+    def count(cls, start: Optional[date] = None, end: Optional[date] = None, **dimensions) -> int:
+        qs = cls.leads(start, end).filter(**dimensions)
+        return qs.aggregate(n=Coalesce(Sum("leads_count"), 0))["n"]
+
+    @classmethod
+    def by(cls, dimension: str, start: Optional[date] = None, end: Optional[date] = None, **filters) -> dict:
+        """Nombre de leads par valeur de dimension (status_code, source, service…)."""
+        return _grouped(cls.leads(start, end).filter(**filters), dimension, "leads_count")
+
+    @classmethod
+    def by_status_and_type(cls, start: Optional[date] = None, end: Optional[date] = None) -> dict:
+        """{(status_code, appointment_type): n}"""
+        rows = (
+            cls.leads(start, end)
+            .order_by()
+            .values("status_code", "appointment_type")
+            .annotate(n=Sum("leads_count"))
+        )
+        return {(r["status_code"], r["appointment_type"]): r["n"] for r in rows}
+
+    @classmethod
+    def with_appointment_by_type(cls, status_codes: Iterable[str]) -> dict:
+        """{appointment_type: n} des leads ayant un RDV, pour les statuts donnés."""
+        return _grouped(
+            LeadDailyFact.objects.filter(status_code__in=list(status_codes)),
+            "appointment_type",
+            "with_appointment_count",
+        )
+
+    @classmethod
+    def monthly(cls, start: Optional[date] = None, end: Optional[date] = None):
+        return list(
+            cls.leads(start, end)
+            .annotate(mois=TruncMonth("day"))
+            .values("mois")
+            .annotate(n=Sum("leads_count"))
+            .order_by("mois")
+        )
+
+    @staticmethod
+    def appointments_by_status(day: date) -> dict:
+        """{status_code: n} des rendez-vous du jour donné."""
+        return _grouped(AppointmentDailyFact.objects.filter(day=day), "status_code", "appointments_count")
+
+
+class ContractRollupService:
+    @staticmethod
+    def contracts(start: Optional[date] = None, end: Optional[date] = None):
+        return _period(ContractDailyFact.objects.all(), start, end)
+
+    @classmethod
+    def totals(cls, start: Optional[date] = None, end: Optional[date] = None, **filters) -> dict:
+        return cls.contracts(start, end).filter(**filters).aggregate(
+            n=Coalesce(Sum("contracts_count"), 0),
+            total=Coalesce(Sum("amount_due_total"), ZERO),
+        )
+
+    @classmethod
+    def by_service(cls, start: Optional[date] = None, end: Optional[date] = None):
+        return list(
+            cls.contracts(start, end)
+            .values("service__label")
+            .annotate(n=Sum("contracts_count"), total=Sum("amount_due_total"))
+            .order_by("-n")
+        )
+
+    @classmethod
+    def monthly(cls, start: Optional[date] = None, end: Optional[date] = None):
+        return list(
+            cls.contracts(start, end)
+            .annotate(mois=TruncMonth("day"))
+            .values("mois")
+            .annotate(n=Sum("contracts_count"), total=Sum("amount_due_total"))
+            .order_by("mois")
+        )
+
+
+class ReceiptRollupService:
+    @staticmethod
+    def receipts(start: Optional[date] = None, end: Optional[date] = None):
+        return _period(ReceiptDailyFact.objects.all(), start, end)
+
+    @classmethod
+    def totals(cls, start: Optional[date] = None, end: Optional[date] = None) -> dict:
+        return cls.receipts(start, end).aggregate(
+            n=Coalesce(Sum("receipts_count"), 0),
+            total=Coalesce(Sum("amount_total"), ZERO),
+        )
+
+    @classmethod
+    def by_mode(cls, start: Optional[date] = None, end: Optional[date] = None):
+        return list(
+            cls.receipts(start, end)
+            .values("mode")
+            .annotate(n=Sum("receipts_count"), total=Sum("amount_total"))
+            .order_by("-total")
+        )
+
+    @classmethod
+    def monthly(cls, start: Optional[date] = None, end: Optional[date] = None):
+        return list(
+            cls.receipts(start, end)
+            .annotate(mois=TruncMonth("day"))
+            .values("mois")
+            .annotate(n=Sum("receipts_count"), total=Sum("amount_total"))
+            .order_by("mois")
+        )
@@ -0,0 +1,62 @@
+"""
+Marquage des jours d'agrégats à recalculer.
+
+Les écritures ORM (save/delete) signalent les jours impactés ; les mises à jour
+en masse (QuerySet.update) doivent appeler mark_dirty explicitement ou
+attendre la reconstruction nocturne.
+"""
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from api.analytics.models import RollupFact
+from api.analytics.rollups import local_day, mark_dirty
+from api.contracts.models import Contract
+from api.leads.models import Lead
+from api.payments.models import PaymentReceipt
+
+
+def _snapshot(instance, *fields):
+    return {f: instance.__dict__.get(f) for f in fields}
+
+
+@receiver(post_init, sender=Lead)
+def lead_snapshot(sender, instance, **kwargs):
+    instance._rollup_initial = _snapshot(instance, "created_at", "appointment_date", "status_id")
+
+
+@receiver(post_save, sender=Lead)
+@receiver(post_delete, sender=Lead)
+def lead_mark_dirty(sender, instance, **kwargs):
+    initial = getattr(instance, "_rollup_initial", {})
+
+    mark_dirty(RollupFact.LEADS, local_day(instance.created_at), local_day(initial.get("created_at")))
+    mark_dirty(
+        RollupFact.APPOINTMENTS,
+        local_day(instance.appointment_date),
+        local_day(initial.get("appointment_date")),
+    )
+
+    # Le statut du lead est une dimension des contrats
+    if initial.get("status_id") not in (None, instance.status_id) and not kwargs.get("created"):
+        contract_dates = Contract.objects.filter(client__lead_id=instance.pk).values_list("created_at", flat=True)
+        mark_dirty(RollupFact.CONTRACTS, *(local_day(d) for d in contract_dates))
+
+    instance._rollup_initial = _snapshot(instance, "created_at", "appointment_date", "status_id")
+
+
+@receiver(post_save, sender=Contract)
+@receiver(post_delete, sender=Contract)
+def contract_mark_dirty(sender, instance, **kwargs):
+    mark_dirty(RollupFact.CONTRACTS, local_day(instance.created_at))
+    mark_dirty(RollupFact.CONTRACT_SUMMARY, local_day(instance.created_at))
+
+
+@receiver(post_save, sender=PaymentReceipt)
+@receiver(post_delete, sender=PaymentReceipt)
+def receipt_mark_dirty(sender, instance, **kwargs):
+    mark_dirty(RollupFact.RECEIPTS, local_day(instance.payment_date))
+
+    # Le montant payé est une mesure de la synthèse contrats (jour de création du contrat)
+    if instance.contract_id:
+        contract_dates = Contract.objects.filter(pk=instance.contract_id).values_list("created_at", flat=True)
+        mark_dirty(RollupFact.CONTRACT_SUMMARY, *(local_day(d) for d in contract_dates))
@@ -0,0 +1,24 @@
+import logging
+
+from api.analytics.rollups import rebuild_all, refresh_dirty
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_dirty_rollups():
+    """
+    Rafraîchissement incrémental : recalcule uniquement les jours touchés
+    depuis le dernier passage. Planifié toutes les minutes dans Django-Q.
+    """
+    written = refresh_dirty()
+    return f"{sum(written.values())} rollup rows refreshed"
+
+
+def rebuild_all_rollups():
+    """
+    Reconstruction nocturne complète : rattrape les mises à jour en masse
+    (QuerySet.update) qui ne déclenchent pas de signaux.
+    """
+    written = rebuild_all()
+    logger.info("📊 Rollups reconstruits : %s", written)
+    return f"Rollups rebuilt: {written}"
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from api.analytics.models import LeadDailyFact, RollupDirtyDay, RollupFact
+from api.analytics.rollups import FACT_BUILDERS, local_day, rebuild_all, refresh_dirty
+from api.analytics.services import ContractRollupService, LeadRollupService, ReceiptRollupService
+from api.clients.models import Client
+from api.contracts.models import Contract
+from api.lead_status.models import LeadStatus
+from api.leads.constants import ABSENT, BlockingDurationBucket, PRESENT, RDV_PRESENTIEL, RDV_TELEPHONE
+from api.leads.models import Lead
+from api.payments.enums import PaymentMode
+from api.payments.models import PaymentReceipt
+from api.services.models import Service
+from api.sms.tasks import mark_missed_appointments_as_absent
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def statuses():
+    present, _ = LeadStatus.objects.get_or_create(code=PRESENT, defaults={"label": "Présent"})
+    absent, _ = LeadStatus.objects.get_or_create(code=ABSENT, defaults={"label": "Absent"})
+    return {"present": present, "absent": absent}
+
+
+@pytest.fixture
+def dataset(statuses):
+    now = timezone.now()
+    leads = [
+        Lead.objects.create(
+            first_name="A", last_name="Present", phone="0600000001",
+            status=statuses["present"], appointment_type=RDV_PRESENTIEL,
+            appointment_date=now - timedelta(days=1), is_urgent=True,
+            created_at=now - timedelta(days=3),
+        ),
+        Lead.objects.create(
+            first_name="B", last_name="Present", phone="0600000002",
+            status=statuses["present"], appointment_type=RDV_TELEPHONE,
+            appointment_date=now, created_at=now - timedelta(days=3),
+            blocking_duration_bucket=BlockingDurationBucket.MORE_THAN_ONE_YEAR,
+        ),
+        Lead.objects.create(
+            first_name="C", last_name="Absent", phone="0600000003",
+            status=statuses["absent"], created_at=now,
+        ),
+    ]
+    service = Service.objects.create(code="ROLLUP_SERVICE", label="Service rollup", price=Decimal("500.00"))
+    client = Client.objects.create(lead=leads[0])
+    contract = Contract.objects.create(client=client, service=service, amount_due=Decimal("500.00"))
+    PaymentReceipt.objects.create(
+        client=client, contract=contract, amount=Decimal("200.00"), mode=PaymentMode.CB,
+    )
+    rebuild_all()
+    return leads
+
+
+def test_rollups_match_raw_data(dataset):
+    totals = LeadRollupService.totals()
+
+    assert totals["total"] == Lead.objects.count() == 3
+    assert totals["with_appointment"] == 2
+    assert totals["urgent"] == 1
+    assert totals["hot"] == sum(1 for lead in Lead.objects.all() if lead.is_hot) == 2
+    assert LeadRollupService.by("status_code") == {PRESENT: 2, ABSENT: 1}
+    assert LeadRollupService.appointments_by_status(timezone.localdate()) == {PRESENT: 1}
+
+    assert ContractRollupService.totals() == {"n": 1, "total": Decimal("500.00")}
+    assert ContractRollupService.totals(lead_status_code=PRESENT, appointment_type=RDV_PRESENTIEL)["n"] == 1
+    assert ReceiptRollupService.totals() == {"n": 1, "total": Decimal("200.00")}
+
+
+def test_incremental_refresh_only_rebuilds_dirty_days(dataset, statuses):
+    RollupDirtyDay.objects.all().delete()
+    untouched = LeadDailyFact.objects.filter(day=timezone.localdate() - timedelta(days=3)).first()
+
+    Lead.objects.create(first_name="D", last_name="New", phone="0600000004", status=statuses["absent"])
+    assert RollupDirtyDay.objects.filter(fact=RollupFact.LEADS, day=timezone.localdate()).exists()
+
+    refresh_dirty()
+
+    assert not RollupDirtyDay.objects.exists()
+    assert LeadRollupService.count() == 4
+    assert LeadDailyFact.objects.get(pk=untouched.pk).refreshed_at == untouched.refreshed_at
+
+
+
+def test_failed_rebuild_keeps_its_dirty_days(dataset, statuses):
+    RollupDirtyDay.objects.all().delete()
+    Lead.objects.create(first_name="D", last_name="New", phone="0600000004", status=statuses["absent"])
+
+    failing = (LeadDailyFact, MagicMock(side_effect=RuntimeError("boom")))
+    with patch.dict(FACT_BUILDERS, {RollupFact.LEADS: failing}), pytest.raises(RuntimeError):
+        refresh_dirty()
+    assert RollupDirtyDay.objects.filter(fact=RollupFact.LEADS, day=timezone.localdate()).exists()
+
+    refresh_dirty()
+    assert not RollupDirtyDay.objects.exists()
+    assert LeadRollupService.count() == 4
+
+
+def test_missed_appointments_mark_their_days_dirty(statuses):
+    lead = Lead.objects.create(
+        first_name="E", last_name="Missed", phone="0600000005", status=statuses["present"],
+        appointment_date=timezone.now() - timedelta(days=2),
+    )
+    Lead.objects.filter(pk=lead.pk).update(status=LeadStatus.objects.create(code="RDV_TEST", label="RDV"))
+    RollupDirtyDay.objects.all().delete()
+
+    mark_missed_appointments_as_absent()
+
+    dirty = set(RollupDirtyDay.objects.values_list("fact", "day"))
+    assert (RollupFact.LEADS, local_day(lead.created_at)) in dirty
+    assert (RollupFact.APPOINTMENTS, local_day(lead.appointment_date)) in dirty
+
+def test_check_rollups_detects_and_fixes_drift(dataset):
+    call_command("check_rollups")
+
+    Lead.objects.filter(pk=dataset[2].pk).update(created_at=timezone.now() - timedelta(days=10))
+    with pytest.raises(CommandError):
+        call_command("check_rollups")
+
+    call_command("check_rollups", fix=True)
+    call_command("check_rollups")
@@ -9,7 +9,7 @@ from rest_framework.response import Response
 
 from api.booking.services import list_slots_with_quota, try_book_slot
 from api.leads.constants import RDV_PLANIFIE
-from api.leads.models import LeadStatus
+from api.core.reference_data import lead_statuses
 from api.leads.serializers import LeadSerializer
 
 
@@ -59,7 +59,7 @@ def public_book(request):
         return Response({"detail": str(e)}, status=409)
 
     # 2) création du lead (tu peux réutiliser ta route public-create si tu y injectes try_book_slot)
-    status_pk = LeadStatus.objects.get(code=RDV_PLANIFIE).pk
+    status_pk = lead_statuses.get(RDV_PLANIFIE).pk
     ser = LeadSerializer(
         data={
             "first_name": payload.get("first_name"),
@@ -1,4 +1,8 @@
+from datetime import date
+
+from django.utils.text import slugify
 from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
@@ -7,6 +11,9 @@ from .serializers import CandidateSerializer
 from api.utils.cloud.storage import store_candidate_cv
 from api.job.models import Job
 
+CV_MAX_SIZE = 10 * 1024 * 1024
+CV_CONTENT_TYPE = "application/pdf"
+
 
 class CandidateViewSet(viewsets.ModelViewSet):
     """
@@ -19,7 +26,7 @@ class CandidateViewSet(viewsets.ModelViewSet):
         - first_name
         - last_name
         - email
-        - cv (fichier)
+        - cv (fichier) OU cv_upload_token (upload direct via /candidates/cv-upload-url/)
     """
 
     queryset = Candidate.objects.select_related("job")
@@ -50,6 +57,7 @@ class CandidateViewSet(viewsets.ModelViewSet):
 
         job_value = request.data.get("job")
         cv_file = request.FILES.get("cv")
+        cv_upload_token = request.data.get("cv_upload_token")
 
         if not job_value:
             return Response(
@@ -57,24 +65,42 @@ class CandidateViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if not cv_file:
+        if not cv_file and not cv_upload_token:
             return Response(
                 {"detail": "Le CV est requis"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         # Récupération de l'offre
-        try:
-            if str(job_value).isdigit():
-                job = Job.objects.get(pk=job_value)
-            else:
-                job = Job.objects.get(slug=job_value)
-        except Job.DoesNotExist:
+        job = self._get_job(job_value)
+        if job is None:
             return Response(
                 {"detail": "Offre d’emploi inexistante"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
+        # CV déjà déposé dans le bucket : vérification avant toute écriture
+        cv_url = None
+        if not cv_file:
+            from api.utils.cloud.scw.uploads import CV_UPLOAD, UploadError, claims_url, finalize_upload, read_token
+            try:
+                claims = read_token(cv_upload_token, CV_UPLOAD)
+            except UploadError as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            if claims.get("job") != job.pk:
+                return Response(
+                    {"detail": "Jeton d'upload émis pour une autre offre"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            # Jeton rejoué : la candidature existe déjà pour ce CV
+            existing = Candidate.objects.filter(cv_url=claims_url(claims)).first()
+            if existing is not None:
+                return Response(self.get_serializer(existing).data, status=status.HTTP_200_OK)
+            try:
+                cv_url = finalize_upload(claims)["url"]
+            except UploadError as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         # Création temporaire du candidat (sans CV)
         candidate = Candidate.objects.create(
             job=job,
@@ -84,17 +110,73 @@ class CandidateViewSet(viewsets.ModelViewSet):
         )
 
         # Upload du CV dans MinIO
-        try:
-            cv_url = store_candidate_cv(candidate, cv_file)
-        except Exception as e:
-            candidate.delete()
-            return Response(
-                {"detail": f"Erreur lors de l’upload du CV : {e}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        if cv_url is None:
+            try:
+                cv_url = store_candidate_cv(candidate, cv_file)
+            except Exception as e:
+                candidate.delete()
+                return Response(
+                    {"detail": f"Erreur lors de l’upload du CV : {e}"},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
 
         candidate.cv_url = cv_url
         candidate.save(update_fields=["cv_url"])
 
         serializer = self.get_serializer(candidate)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="cv-upload-url")
+    def cv_upload_url(self, request):
+        """
+        Autorisation d'upload direct du CV (POST présigné, PDF ≤ 10 Mo).
+        Body JSON : { "job", "first_name", "last_name", "size", "content_type" }
+        Le jeton retourné est ensuite transmis à la création (cv_upload_token).
+        """
+        from api.utils.cloud.scw.uploads import CV_UPLOAD, UploadError, issue_upload, unique_key
+
+        if not isinstance(request.data, dict):
+            return Response({"detail": "Corps JSON invalide"}, status=status.HTTP_400_BAD_REQUEST)
+        job = self._get_job(request.data.get("job"))
+        if job is None:
+            return Response(
+                {"detail": "Offre d’emploi inexistante"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        if str(request.data.get("content_type") or "").lower() != CV_CONTENT_TYPE:
+            return Response(
+                {"detail": "Le CV doit être un PDF"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Même organisation que store_candidate_cv : <slug-job>/cv-prenom-nom-YYYYMMDD.pdf
+        first_name = slugify(request.data.get("first_name", ""))
+        last_name = slugify(request.data.get("last_name", ""))
+        date_str = date.today().strftime("%Y%m%d")
+        key = unique_key(f"{job.slug}/cv-{first_name}-{last_name}-{date_str}.pdf")
+
+        try:
+            upload = issue_upload(
+                CV_UPLOAD,
+                key,
+                CV_CONTENT_TYPE,
+                int(request.data.get("size") or 0),
+                CV_MAX_SIZE,
+                payload={"job": job.pk},
+            )
+        except (UploadError, ValueError) as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(upload)
+
+    @staticmethod
+    def _get_job(job_value):
+        if not job_value:
+            return None
+        try:
+            if str(job_value).isdigit():
+                return Job.objects.get(pk=job_value)
+            return Job.objects.get(slug=job_value)
+        except Job.DoesNotExist:
+            return None
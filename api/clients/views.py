@@ -149,15 +149,14 @@ class ClientViewSet(viewsets.ModelViewSet):
             "total": 0,
         }
 
-        # 🔥 nettoyage S3
-        if client:
-            logger.info(f"🔥 Nettoyage S3 pour Client #{client.pk}...")
-            s3_stats = cleanup_client_cascade_s3(client)
-        else:
-            logger.warning(f"⚠️ Aucun client trouvé pour Lead #{lead_id}")
-
-        # 🔥 suppression DB
+        # 🔥 suppression DB + planification S3 (fichiers supprimés après commit)
         with transaction.atomic():
+            if client:
+                logger.info(f"🔥 Nettoyage S3 pour Client #{client.pk}...")
+                s3_stats = cleanup_client_cascade_s3(client)
+            else:
+                logger.warning(f"⚠️ Aucun client trouvé pour Lead #{lead_id}")
+
             lead.delete()
 
         logger.info(
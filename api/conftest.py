@@ -0,0 +1,73 @@
+"""
+Fixtures partagées :
+  - cache des tables de référence vidé à chaque test (les lignes créées dans
+    un test sont annulées au rollback, sans signal)
+  - caches Redis de la recherche de leads, des agrégats contrats et des
+    timelines de leads invalidés à chaque test, seaux du limiteur de débit remplis
+  - S3 local (moto server) pour les tests de stockage
+"""
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _clear_reference_data():
+    from api.core import reference_data
+    reference_data.clear()
+    yield
+    reference_data.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_lead_search_cache():
+    from api.leads import search_cache
+    search_cache.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def _clear_contract_aggregates_cache():
+    from api.contracts import aggregates
+    aggregates.bump_version()
+
+
+@pytest.fixture(autouse=True)
+def _clear_lead_timeline_cache():
+    from api.leads_events import timeline
+    timeline.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def _reset_rate_limits():
+    from api.core.rate_limit import RateLimiter
+    RateLimiter.reset()
+
+
+@pytest.fixture(scope="session")
+def s3_endpoint():
+    moto_server = pytest.importorskip("moto.server")
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f"http://{host}:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def s3(settings, s3_endpoint):
+    """Client boto3 branché sur moto ; chaque bucket de SCW_BUCKETS est recréé vide."""
+    settings.AWS_S3_ENDPOINT_URL = s3_endpoint
+    settings.AWS_ACCESS_KEY_ID = "testing"
+    settings.AWS_SECRET_ACCESS_KEY = "testing"
+    settings.AWS_S3_REGION_NAME = "us-east-1"
+    settings.AWS_S3_VERIFY = False
+    settings.SCW_BUCKETS = {key: f"test-{key}" for key in settings.SCW_BUCKETS}
+
+    from api.utils.cloud.scw.s3_client import get_s3_client
+    client = get_s3_client()
+    for bucket in settings.SCW_BUCKETS.values():
+        try:
+            objects = client.list_objects_v2(Bucket=bucket).get("Contents", [])
+            if objects:
+                client.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": o["Key"]} for o in objects]})
+        except client.exceptions.NoSuchBucket:
+            client.create_bucket(Bucket=bucket)
+    return client
@@ -0,0 +1,167 @@
+"""
+Agrégats de la barre de synthèse des contrats (liste et export PDF).
+
+ContractSearchService.calculate_aggregates parcourt tous les contrats filtrés
+et leurs paiements (quatre requêtes) à chaque affichage. Ici :
+
+  - cache Redis par jeu de filtres normalisé, estampillé d'une version
+    incrémentée à chaque écriture Contract / PaymentReceipt (signaux)
+  - sans filtre, ou avec seulement des filtres de date / d'annulation :
+    lecture des synthèses journalières ContractSummaryDailyFact (coût en
+    nombre de jours) ; les jours marqués « à recalculer » sont calculés en
+    direct sur les contrats de ces seuls jours, le résultat reste exact
+  - autres filtres : calcul direct (calculate_aggregates), mis en cache
+"""
+import hashlib
+import json
+import logging
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+
+from api.analytics.models import ContractSummaryDailyFact, RollupDirtyDay, RollupFact
+from api.analytics.rollups import _days_filter
+from api.contracts.contract_search import ContractSearchService
+from api.contracts.models import Contract
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES_CACHE_TTL = 600  # secondes ; la version invalide avant à chaque écriture
+KEY_PREFIX = "contracts:aggregates:"
+VERSION_KEY = f"{KEY_PREFIX}version"
+
+# Filtres couverts par les synthèses journalières
+ROLLUP_FILTERS = {"date_from", "date_to", "is_cancelled"}
+
+ZERO = Decimal("0.00")
+SUM_FIELDS = {
+    "sum_amount_due": "amount_due_total",
+    "sum_real_amount_due": "real_amount_total",
+    "sum_amount_paid": "amount_paid_total",
+    "sum_net_paid": "net_paid_total",
+    "sum_balance_due": "balance_due_total",
+}
+COUNT_FIELDS = {
+    "count_signed": "signed_count",
+    "count_refunded": "refunded_count",
+    "count_fully_paid": "fully_paid_count",
+    "count_with_balance": "with_balance_count",
+    "count_reduced": "reduced_count",
+}
+
+
+def bump_version() -> None:
+    """Rend obsolètes tous les agrégats en cache (web et workers)."""
+    try:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+    except Exception as e:
+        logger.warning(f"⚠️ Invalidation agrégats contrats impossible : {e}")
+
+
+class ContractAggregatesService:
+
+    @classmethod
+    def get(cls, filters: dict) -> dict:
+        """Agrégats de la synthèse pour `filters` (ContractSearchService.extract_filters_from_request)."""
+        key = cls._cache_key(filters)
+        if key is not None:
+            try:
+                cached = cache.get(key)
+            except Exception as e:
+                logger.warning(f"⚠️ Cache agrégats contrats indisponible : {e}")
+                cached = None
+            if cached is not None:
+                return cached
+
+        result = cls.from_rollups(filters) if cls.rollup_eligible(filters) else None
+        if result is None:
+            result = cls.live(filters)
+
+        if key is not None:
+            try:
+                cache.set(key, result, AGGREGATES_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"⚠️ Cache agrégats contrats indisponible : {e}")
+        return result
+
+    @staticmethod
+    def _cache_key(filters: dict) -> Optional[str]:
+        """Clé filtres normalisés + version ; None si Redis est indisponible (pas de cache)."""
+        try:
+            version = cache.get(VERSION_KEY) or 0
+        except Exception as e:
+            logger.warning(f"⚠️ Cache agrégats contrats indisponible : {e}")
+            return None
+        normalized = {name: value for name, value in filters.items() if value not in (None, "")}
+        digest = hashlib.sha1(
+            json.dumps(normalized, sort_keys=True, cls=DjangoJSONEncoder).encode()
+        ).hexdigest()
+        return f"{KEY_PREFIX}{version}:{digest}"
+
+    # ──────────────────────────────────────────────
+    # CALCUL DIRECT
+    # ──────────────────────────────────────────────
+
+    @staticmethod
+    def _stats_queryset(filters: dict):
+        # Les annulés sont exclus de la synthèse sauf filtre explicite
+        qs = ContractSearchService.build_base_queryset()
+        if filters.get("is_cancelled") != "avec":
+            qs = qs.filter(is_cancelled=False)
+        return qs
+
+    @classmethod
+    def live(cls, filters: dict, days: Optional[Iterable[date]] = None) -> dict:
+        qs = ContractSearchService.apply_filters(cls._stats_queryset(filters), filters)
+        if days is not None:
+            qs = qs.filter(_days_filter("created_at", days))
+        return ContractSearchService.calculate_aggregates(qs)
+
+    # ──────────────────────────────────────────────
+    # SYNTHÈSES JOURNALIÈRES
+    # ──────────────────────────────────────────────
+
+    @staticmethod
+    def rollup_eligible(filters: dict) -> bool:
+        return all(value is None for name, value in filters.items() if name not in ROLLUP_FILTERS)
+
+    @staticmethod
+    def _day_range(filters: dict):
+        """Bornes de jours équivalentes à apply_filters (date_from seule = ce jour-là)."""
+        date_from, date_to = filters.get("date_from"), filters.get("date_to")
+        start = date_from.date() if date_from else None
+        end = date_to.date() if date_to else (start if start else None)
+        return start, end
+
+    @classmethod
+    def from_rollups(cls, filters: dict) -> Optional[dict]:
+        """None si les synthèses n'ont jamais été construites (retour au calcul direct)."""
+        if not ContractSummaryDailyFact.objects.exists() and Contract.objects.exists():
+            return None
+
+        start, end = cls._day_range(filters)
+        dirty = RollupDirtyDay.objects.filter(fact=RollupFact.CONTRACT_SUMMARY)
+        facts = ContractSummaryDailyFact.objects.filter(is_cancelled=filters.get("is_cancelled") == "avec")
+        if start:
+            dirty, facts = dirty.filter(day__gte=start), facts.filter(day__gte=start)
+        if end:
+            dirty, facts = dirty.filter(day__lte=end), facts.filter(day__lte=end)
+        dirty_days: List[date] = list(dirty.values_list("day", flat=True))
+
+        agg = facts.exclude(day__in=dirty_days).aggregate(
+            **{name: Coalesce(Sum(field), ZERO) for name, field in SUM_FIELDS.items()},
+            **{name: Coalesce(Sum(field), 0) for name, field in COUNT_FIELDS.items()},
+            count_cancelled=Coalesce(Sum("contracts_count", filter=Q(is_cancelled=True)), 0),
+        )
+
+        if dirty_days:
+            fresh = cls.live(filters, days=dirty_days)
+            for name in agg:
+                agg[name] += fresh[name] or 0
+        return agg
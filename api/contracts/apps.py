@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class ContractsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "api.contracts"
\ No newline at end of file
+    name = "api.contracts"
+
+    def ready(self):
+        import api.contracts.signals  # noqa: F401
@@ -33,6 +33,8 @@ from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 
 from api.contracts.models import Contract
+from api.contracts.search_index import ContractSearchIndex
+from api.core.reference_data import services
 from rest_framework.renderers import BaseRenderer
 
 
@@ -305,7 +307,7 @@ class ContractSearchService:
         if filters.get("service_id"):
             qs = qs.filter(service_id=filters["service_id"])
         if filters.get("service_code"):
-            qs = qs.filter(service__code=filters["service_code"])
+            qs = qs.filter(service_id__in=services.ids_for(filters["service_code"]))
         if filters.get("client_id"):
             qs = qs.filter(client_id=filters["client_id"])
         if filters.get("created_by"):
@@ -525,23 +527,17 @@ class ContractSearchView(ViewSet):
         qs_base    = ContractSearchService.build_base_queryset()
         qs_display = ContractSearchService.apply_filters(qs_base, filters)
 
-        # Recherche textuelle
+        # Recherche : id exact pour les requêtes numériques, sinon index trigramme
         search_query = request.query_params.get("search", "").strip()
+        order_by = [ordering]
         if search_query:
-            qs_display = qs_display.filter(
-                Q(client__lead__first_name__icontains=search_query) |
-                Q(client__lead__last_name__icontains=search_query)  |
-                Q(client__lead__email__icontains=search_query)       |
-                Q(client__lead__phone__icontains=search_query)       |
-                Q(id__icontains=search_query)
-            )
+            qs_display, ranked = ContractSearchIndex.search(qs_display, search_query)
+            if ranked and "ordering" not in request.query_params:
+                order_by = ["-search_rank", ordering]
 
-        # Agrégats (hors annulés si non demandés explicitement)
-        qs_stats = ContractSearchService.build_base_queryset()
-        if filters.get("is_cancelled") != "avec":
-            qs_stats = qs_stats.filter(is_cancelled=False)
-        qs_stats = ContractSearchService.apply_filters(qs_stats, filters)
-        agg = ContractSearchService.calculate_aggregates(qs_stats)
+        # Agrégats (hors annulés si non demandés explicitement) : cache / synthèses journalières
+        from api.contracts.aggregates import ContractAggregatesService  # import local : aggregates importe ce module
+        agg = ContractAggregatesService.get(filters)
 
         # Pagination
         total = qs_display.count()
@@ -550,7 +546,7 @@ class ContractSearchView(ViewSet):
 
         # 🔥 values() utilise les noms _annotated — pas de clash avec les @property
         rows = list(
-            qs_display.order_by(ordering).values(
+            qs_display.order_by(*order_by).values(
                 # Identifiants
                 "id",
                 "client_id",
@@ -642,25 +638,8 @@ class ContractSearchView(ViewSet):
         qs_base    = ContractSearchService.build_base_queryset()
         qs_display = ContractSearchService.apply_filters(qs_base, filters)
 
-        qs_stats = ContractSearchService.build_base_queryset()
-        if filters.get("is_cancelled") != "avec":
-            qs_stats = qs_stats.filter(is_cancelled=False)
-        qs_stats = ContractSearchService.apply_filters(qs_stats, filters)
-
-        # 🔥 Agrégats sur les noms _annotated
-        agg = qs_stats.aggregate(
-            sum_amount_due=Coalesce(Sum("amount_due"), Value(Decimal("0.00"))),
-            sum_real_amount_due=Coalesce(Sum("real_amount_due"), Value(Decimal("0.00"))),
-            sum_amount_paid=Coalesce(Sum("amount_paid_annotated"), Value(Decimal("0.00"))),
-            sum_net_paid=Coalesce(Sum("net_paid_annotated"), Value(Decimal("0.00"))),
-            sum_balance_due=Coalesce(Sum("balance_due_annotated"), Value(Decimal("0.00"))),
-            count_signed=Count("id", filter=Q(is_signed=True)),
-            count_refunded=Count("id", filter=Q(is_refunded=True)),
-            count_fully_paid=Count("id", filter=Q(balance_due_annotated=Decimal("0.00"))),
-            count_with_balance=Count("id", filter=Q(balance_due_annotated__gt=Decimal("0.00"))),
-            count_reduced=Count("id", filter=Q(discount_abs__gt=Decimal("0.00"))),
-            count_cancelled=Count("id", filter=Q(is_cancelled=True)),
-        )
+        from api.contracts.aggregates import ContractAggregatesService  # import local : aggregates importe ce module
+        agg = ContractAggregatesService.get(filters)
 
         # 🔥 values() avec noms _annotated puis renommage
         rows_raw = list(
@@ -0,0 +1,116 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from api.clients.models import Client
+from api.contracts.contract_search import ContractSearchService
+from api.contracts.models import Contract
+from api.contracts.search_index import ContractSearchIndex, trigram_available
+from api.lead_status.models import LeadStatus
+from api.leads.models import Lead
+from api.services.models import Service
+
+FIRST_NAMES = ["Marc", "Amina", "Jean", "Fatou", "Lucas", "Chloé", "Mehdi", "Sofia", "Hugo", "Léa"]
+LAST_NAMES = ["Martin", "Diallo", "Bernard", "Nguyen", "Petit", "Durand", "Moreau", "Haddad", "Lefèvre", "Traoré"]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def legacy_search(qs, query):
+    """Implémentation précédente, conservée pour comparaison."""
+    return qs.filter(
+        Q(client__lead__first_name__icontains=query) |
+        Q(client__lead__last_name__icontains=query) |
+        Q(client__lead__email__icontains=query) |
+        Q(client__lead__phone__icontains=query) |
+        Q(id__icontains=query)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la recherche de contrats (icontains sur jointures vs index de recherche) "
+        "sur un jeu synthétique créé puis annulé dans une transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--contracts", type=int, default=200_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write("Jeu synthétique annulé.")
+
+    def _run(self, options):
+        n, batch_size = options["contracts"], options["batch_size"]
+        rng = random.Random(42)
+        self.stdout.write(f"Génération de {n} contrats…")
+
+        status, _ = LeadStatus.objects.get_or_create(code="BENCH", defaults={"label": "Bench", "color": "#000"})
+        service, _ = Service.objects.get_or_create(
+            code="BENCH", defaults={"label": "Titre de séjour", "price": Decimal("100.00")},
+        )
+        for start in range(0, n, batch_size):
+            size = min(batch_size, n - start)
+            leads = Lead.objects.bulk_create([
+                Lead(
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=f"{rng.choice(LAST_NAMES)}{i}",
+                    email=f"client{i}@example.com",
+                    phone=f"06{i:08d}",
+                    status=status,
+                )
+                for i in range(start, start + size)
+            ], batch_size=batch_size)
+            clients = Client.objects.bulk_create([Client(lead=lead) for lead in leads], batch_size=batch_size)
+            Contract.objects.bulk_create([
+                Contract(client=client, service=service, amount_due=Decimal("100.00")) for client in clients
+            ], batch_size=batch_size)
+
+        started = time.perf_counter()
+        ContractSearchIndex.rebuild()
+        self.stdout.write(f"Index construit en {time.perf_counter() - started:.1f}s "
+                          f"({'trigramme' if trigram_available() else 'LIKE, pg_trgm absent'})")
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        sample = Contract.objects.order_by("?").values_list("id", flat=True)[:1][0]
+        queries = {
+            "nom": "Diallo",
+            "nom partiel": f"traoré{n // 2}",
+            "email": f"client{n // 3}@",
+            "téléphone": f"06{n // 4:08d}",
+            "id": str(sample),
+        }
+
+        base = ContractSearchService.build_base_queryset
+        for label, query in queries.items():
+            legacy = self._time(lambda: list(legacy_search(base(), query).order_by("-created_at")[:20]), options["repeat"])
+            indexed = self._time(
+                lambda: list(ContractSearchIndex.search(base(), query)[0].order_by("-created_at")[:20]),
+                options["repeat"],
+            )
+            self.stdout.write(
+                f"{label:<12} {query!r:<24} avant {legacy:8.1f} ms   après {indexed:8.1f} ms   ×{legacy / indexed:.1f}"
+            )
+
+    @staticmethod
+    def _time(func, repeat) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
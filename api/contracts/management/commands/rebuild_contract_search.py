@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api.contracts.search_index import ContractSearchIndex, trigram_available
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche des contrats (après import ou mise à jour en masse)."
+
+    def handle(self, *args, **options):
+        count = ContractSearchIndex.rebuild()
+        mode = "trigramme" if trigram_available() else "LIKE (pg_trgm absent)"
+        self.stdout.write(self.style.SUCCESS(f"{count} document(s) de recherche reconstruit(s) — mode {mode}"))
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TRIGRAM_INDEX = "contract_search_doc_trgm_idx"
+
+
+def create_trigram_index(apps, schema_editor):
+    """pg_trgm est optionnel : sans l'extension, la recherche retombe sur LIKE."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')")
+        if not cursor.fetchone()[0]:
+            return
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} "
+            "ON contracts_contractsearchdocument USING gin (document gin_trgm_ops)"
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}")
+
+
+def backfill_documents(apps, schema_editor):
+    from api.contracts.search_index import BATCH_SIZE, _DOCUMENT_FIELDS, build_document
+
+    Contract = apps.get_model("contracts", "Contract")
+    ContractSearchDocument = apps.get_model("contracts", "ContractSearchDocument")
+    batch = []
+    for row in Contract.objects.order_by("id").values(*_DOCUMENT_FIELDS).iterator(chunk_size=BATCH_SIZE):
+        batch.append(ContractSearchDocument(contract_id=row["id"], document=build_document(row)))
+        if len(batch) >= BATCH_SIZE:
+            ContractSearchDocument.objects.bulk_create(batch)
+            batch = []
+    ContractSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0006_contract_invoice_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractSearchDocument',
+            fields=[
+                ('contract', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='contracts.contract')),
+                ('document', models.TextField(verbose_name='Document de recherche')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'document de recherche contrat',
+                'verbose_name_plural': 'documents de recherche contrats',
+            },
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -183,4 +183,25 @@ class Contract(models.Model):
             return invoice_url
         except Exception as e:
             print(f"❌ Erreur lors de la génération de la facture PDF : {e}")
-            return None
\ No newline at end of file
+            return None
+
+
+class ContractSearchDocument(models.Model):
+    """
+    Document de recherche dénormalisé d'un contrat (nom, email, téléphone,
+    référence, service), normalisé en minuscules sans accents.
+    Maintenu par api.contracts.search_index (signaux + commande de reconstruction).
+    """
+
+    contract = models.OneToOneField(
+        Contract, on_delete=models.CASCADE, primary_key=True, related_name="search_document"
+    )
+    document = models.TextField(_("Document de recherche"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("document de recherche contrat")
+        verbose_name_plural = _("documents de recherche contrats")
+
+    def __str__(self):
+        return f"Recherche contrat {self.contract_id}"
@@ -0,0 +1,193 @@
+"""
+Index de recherche des contrats.
+
+L'ancienne recherche appliquait `icontains` sur client__lead__first_name /
+last_name / email / phone et `id__icontains` : jointure contrat → client →
+lead parcourue en entier et PK castée en texte à chaque frappe.
+
+Chaque contrat a désormais un ContractSearchDocument : une ligne de texte
+normalisée (minuscules, sans accents) regroupant nom, email, téléphone
+(chiffres + format national), référence PAPEX-000123 et libellé du service.
+
+  - requête numérique courte ou référence (« 123 », « #123 », « PAPEX-000123 »)
+    → recherche exacte par id (+ fragment de téléphone à partir de 4 chiffres)
+  - requête texte → `LIKE '%…%'` ou similarité de mots trigramme, triés par
+    score (TrigramWordSimilarity) ; l'index GIN gin_trgm_ops sert les deux
+
+pg_trgm est optionnel : sans l'extension (base locale, hébergeur qui refuse
+CREATE EXTENSION), la migration ne crée pas l'index et la recherche se limite
+au `LIKE` sur la seule table des documents, sans score.
+
+Mise à jour : signaux Contract / Client / Lead / Service (après commit).
+Les QuerySet.update() et imports en masse passent par
+`manage.py rebuild_contract_search`.
+"""
+import logging
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Tuple
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, Q, QuerySet
+
+from api.contracts.models import Contract, ContractSearchDocument
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+ID_MAX_DIGITS = 9           # au-delà : numéro de téléphone
+PHONE_FRAGMENT_MIN_DIGITS = 4
+REFERENCE_RE = re.compile(rf"^(?:papex-?|#)?0*(\d{{1,{ID_MAX_DIGITS}}})$")
+
+_DOCUMENT_FIELDS = (
+    "id",
+    "client__lead__first_name",
+    "client__lead__last_name",
+    "client__lead__email",
+    "client__lead__phone",
+    "service__label",
+)
+
+_trigram_available: Optional[bool] = None
+
+
+def normalize(value) -> str:
+    """Minuscules, sans accents, espaces compactés."""
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def phone_variants(phone) -> List[str]:
+    """'+33 6 12 34 56 78' → ['33612345678', '0612345678']."""
+    digits = re.sub(r"\D", "", str(phone or ""))
+    if not digits:
+        return []
+    variants = [digits]
+    if digits.startswith("33") and len(digits) == 11:
+        variants.append(f"0{digits[2:]}")
+    elif digits.startswith("0") and len(digits) == 10:
+        variants.append(f"33{digits[1:]}")
+    return variants
+
+
+def reference(contract_id: int) -> str:
+    return f"PAPEX-{contract_id:06d}"  # même référence que les factures
+
+
+def build_document(row: dict) -> str:
+    """Ligne values(*_DOCUMENT_FIELDS) → document normalisé."""
+    parts = [
+        row["client__lead__first_name"],
+        row["client__lead__last_name"],
+        row["client__lead__email"],
+        *phone_variants(row["client__lead__phone"]),
+        reference(row["id"]),
+        row["service__label"],
+    ]
+    return normalize(" ".join(str(p) for p in parts if p))
+
+
+def trigram_available() -> bool:
+    """pg_trgm installé sur la base ? (vérifié une fois par process)"""
+    global _trigram_available
+    if _trigram_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+            _trigram_available = cursor.fetchone()[0]
+    return _trigram_available
+
+
+class ContractSearchIndex:
+
+    # ──────────────────────────────────────────────
+    # MISE À JOUR
+    # ──────────────────────────────────────────────
+
+    @staticmethod
+    def refresh_queryset(contracts: QuerySet) -> int:
+        """(Re)construit les documents des contrats du queryset, par lots d'upserts."""
+        rows = contracts.order_by("id").values(*_DOCUMENT_FIELDS).iterator(chunk_size=BATCH_SIZE)
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(ContractSearchDocument(contract_id=row["id"], document=build_document(row)))
+            if len(batch) >= BATCH_SIZE:
+                count += ContractSearchIndex._upsert(batch)
+                batch = []
+        if batch:
+            count += ContractSearchIndex._upsert(batch)
+        return count
+
+    @staticmethod
+    def _upsert(documents: List[ContractSearchDocument]) -> int:
+        ContractSearchDocument.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=["contract"],
+            update_fields=["document", "updated_at"],
+        )
+        return len(documents)
+
+    @classmethod
+    def refresh(cls, contract_ids: Iterable[int]) -> int:
+        return cls.refresh_queryset(Contract.objects.filter(id__in=list(contract_ids)))
+
+    @classmethod
+    def refresh_for_clients(cls, client_ids: Iterable[int]) -> int:
+        return cls.refresh_queryset(Contract.objects.filter(client_id__in=list(client_ids)))
+
+    @classmethod
+    def refresh_for_leads(cls, lead_ids: Iterable[int]) -> int:
+        return cls.refresh_queryset(Contract.objects.filter(client__lead_id__in=list(lead_ids)))
+
+    @classmethod
+    def refresh_for_services(cls, service_ids: Iterable[int]) -> int:
+        return cls.refresh_queryset(Contract.objects.filter(service_id__in=list(service_ids)))
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """Reconstruit tout l'index (après import ou QuerySet.update en masse)."""
+        return cls.refresh_queryset(Contract.objects.all())
+
+    # ──────────────────────────────────────────────
+    # RECHERCHE
+    # ──────────────────────────────────────────────
+
+    @staticmethod
+    def parse_id(query: str) -> Optional[int]:
+        """'123', '#123', 'PAPEX-000123' → 123 ; None sinon (ou numéro de téléphone)."""
+        match = REFERENCE_RE.match(query.strip().lower().replace(" ", ""))
+        return int(match.group(1)) if match else None
+
+    @classmethod
+    def search(cls, qs: QuerySet, query: str) -> Tuple[QuerySet, bool]:
+        """
+        Filtre `qs` (contrats) sur `query`.
+        Retourne (queryset, trié_par_score) : si True, le queryset porte une
+        annotation `search_rank` à utiliser comme premier critère de tri.
+        """
+        query = query.strip()
+        contract_id = cls.parse_id(query)
+        digits = re.sub(r"[\s.\-+]", "", query)
+
+        if digits.isdigit():
+            condition = Q(id=contract_id) if contract_id is not None else Q(pk__in=[])
+            if len(digits) >= PHONE_FRAGMENT_MIN_DIGITS:
+                condition |= Q(search_document__document__contains=digits)
+            return qs.filter(condition), False
+
+        if contract_id is not None:  # PAPEX-000123, #123
+            return qs.filter(id=contract_id), False
+
+        term = normalize(query)
+        condition = Q(search_document__document__contains=term)
+        if not trigram_available():
+            return qs.filter(condition), False
+
+        condition |= Q(search_document__document__trigram_word_similar=term)
+        qs = qs.filter(condition).annotate(
+            search_rank=TrigramWordSimilarity(term, F("search_document__document")),
+        )
+        return qs, True
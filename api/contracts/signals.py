@@ -0,0 +1,62 @@
+"""
+Mise à jour de l'index de recherche des contrats (api.contracts.search_index)
+et invalidation des agrégats de synthèse en cache (api.contracts.aggregates).
+
+Reconstruction après commit : les valeurs lues sont celles validées, et une
+transaction annulée ne laisse pas de document orphelin à jour.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.clients.models import Client
+from api.contracts import aggregates
+from api.contracts.models import Contract
+from api.contracts.search_index import ContractSearchIndex
+from api.leads.models import Lead
+from api.payments.models import PaymentReceipt
+from api.services.models import Service
+
+LEAD_SEARCH_FIELDS = {"first_name", "last_name", "email", "phone"}
+
+
+def _touches(update_fields, fields) -> bool:
+    return update_fields is None or bool(set(update_fields) & fields)
+
+
+@receiver(post_save, sender=Contract)
+def contract_refresh_search(sender, instance, created=False, update_fields=None, **kwargs):
+    if created or _touches(update_fields, {"client", "client_id", "service", "service_id"}):
+        transaction.on_commit(partial(ContractSearchIndex.refresh, [instance.pk]))
+
+
+@receiver(post_save, sender=Client)
+def client_refresh_search(sender, instance, created=False, update_fields=None, **kwargs):
+    if not created and _touches(update_fields, {"lead", "lead_id"}):
+        transaction.on_commit(partial(ContractSearchIndex.refresh_for_clients, [instance.pk]))
+
+
+@receiver(post_save, sender=Lead)
+def lead_refresh_search(sender, instance, created=False, update_fields=None, **kwargs):
+    # Un lead tout juste créé n'a pas encore de contrat
+    if not created and _touches(update_fields, LEAD_SEARCH_FIELDS):
+        transaction.on_commit(partial(ContractSearchIndex.refresh_for_leads, [instance.pk]))
+
+
+@receiver(post_save, sender=Service)
+def service_refresh_search(sender, instance, created=False, update_fields=None, **kwargs):
+    if not created and _touches(update_fields, {"label"}):
+        transaction.on_commit(partial(ContractSearchIndex.refresh_for_services, [instance.pk]))
+
+
+@receiver(post_save, sender=Contract)
+@receiver(post_delete, sender=Contract)
+@receiver(post_save, sender=PaymentReceipt)
+@receiver(post_delete, sender=PaymentReceipt)
+def invalidate_aggregates(sender, **kwargs):
+    # Immédiatement (lecture dans la même transaction) puis après commit
+    # (une lecture concurrente a pu remettre en cache l'état avant commit)
+    aggregates.bump_version()
+    transaction.on_commit(aggregates.bump_version)
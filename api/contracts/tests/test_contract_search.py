@@ -1,8 +1,9 @@
 from decimal import Decimal
 
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
-from django.utils.timezone import now, timedelta
+from django.utils.timezone import localdate, now, timedelta
 from rest_framework import status
 from rest_framework.test import APIClient
 
@@ -169,3 +170,155 @@ def test_pagination_and_ordering(auth_client, setup_contracts):
     assert len(data["items"]) <= 2
     assert data["page"] == 1
     assert data["page_size"] == 2
+
+
+# ─── Index de recherche ──────────────────────────────────────────────────────
+
+def test_search_document_is_normalized(setup_contracts):
+    from api.contracts.models import ContractSearchDocument
+    from api.contracts.search_index import ContractSearchIndex
+
+    contract = setup_contracts[0]
+    ContractSearchIndex.refresh([contract.pk])
+
+    document = ContractSearchDocument.objects.get(pk=contract.pk).document
+    assert "marc test marc@test.fr" in document
+    assert "0612345678" in document and "33612345678" in document
+    assert f"papex-{contract.pk:06d}" in document
+    assert "visa etudiant" in document
+
+
+@pytest.mark.parametrize("query", ["{id}", "#{id}", "PAPEX-{id:06d}"])
+def test_search_numeric_routes_to_exact_id(auth_client, setup_contracts, query):
+    target = setup_contracts[1]
+    response = auth_client.get(reverse("contract-search"), {"search": query.format(id=target.pk)})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["id"] for item in response.json()["items"]] == [target.pk]
+
+
+def test_search_text_and_phone_use_the_index(auth_client, setup_contracts):
+    from api.contracts.search_index import ContractSearchIndex
+
+    ContractSearchIndex.refresh(c.pk for c in setup_contracts)
+    url = reverse("contract-search")
+
+    assert auth_client.get(url, {"search": "MARC"}).json()["total"] == 3
+    assert auth_client.get(url, {"search": "étudiant"}).json()["total"] == 3
+    assert auth_client.get(url, {"search": "06 12 34"}).json()["total"] == 3
+    assert auth_client.get(url, {"search": "inconnu"}).json()["total"] == 0
+
+
+def test_lead_rename_refreshes_documents(setup_contracts, django_capture_on_commit_callbacks):
+    from api.contracts.models import ContractSearchDocument
+
+    lead = setup_contracts[0].client.lead
+    with django_capture_on_commit_callbacks(execute=True):
+        lead.last_name = "Dupré"
+        lead.save()
+
+    documents = ContractSearchDocument.objects.filter(contract__in=setup_contracts)
+    assert documents.count() == 3
+    assert all("marc dupre" in d.document for d in documents)
+
+
+# ─── Agrégats (cache + synthèses journalières) ───────────────────────────────
+
+def _filters(**params):
+    from types import SimpleNamespace
+
+    from api.contracts.contract_search import ContractSearchService
+    return ContractSearchService.extract_filters_from_request(SimpleNamespace(query_params=params))
+
+
+def _as_floats(agg):
+    return {name: pytest.approx(float(value or 0)) for name, value in agg.items()}
+
+
+@pytest.fixture
+def summary_facts(setup_contracts):
+    from api.analytics.models import RollupDirtyDay
+    from api.analytics.rollups import rebuild_all
+
+    # Contrat annulé la veille, hors synthèse sauf is_cancelled=avec
+    cancelled = Contract.objects.create(
+        client=setup_contracts[0].client,
+        service=setup_contracts[0].service,
+        amount_due=400,
+        is_cancelled=True,
+        created_at=now() - timedelta(days=1),
+    )
+    rebuild_all()
+    RollupDirtyDay.objects.all().delete()
+    return [*setup_contracts, cancelled]
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"is_cancelled": "avec"},
+    {"is_cancelled": "sans"},
+    {"date_from": (now() - timedelta(days=1)).date().isoformat()},
+    {"date_from": (now() - timedelta(days=1)).date().isoformat(), "date_to": now().date().isoformat()},
+    {"date_to": (now() - timedelta(days=1)).date().isoformat(), "is_cancelled": "avec"},
+])
+def test_rollup_aggregates_match_live(summary_facts, params):
+    from api.contracts.aggregates import ContractAggregatesService
+
+    filters = _filters(**params)
+    assert ContractAggregatesService.rollup_eligible(filters)
+    assert _as_floats(ContractAggregatesService.from_rollups(filters)) == _as_floats(
+        ContractAggregatesService.live(filters)
+    )
+
+
+def test_dirty_days_are_computed_live(summary_facts):
+    from api.analytics.models import ContractSummaryDailyFact, RollupDirtyDay, RollupFact
+    from api.contracts.aggregates import ContractAggregatesService
+
+    PaymentReceipt.objects.create(
+        contract=summary_facts[1], client=summary_facts[1].client, amount=130, mode="CB",
+    )
+    assert RollupDirtyDay.objects.filter(fact=RollupFact.CONTRACT_SUMMARY).exists()
+
+    agg = ContractAggregatesService.from_rollups(_filters())
+    assert agg["sum_amount_paid"] == Decimal("530.00")
+    assert agg["count_fully_paid"] == 2 and agg["count_with_balance"] == 1
+    # La synthèse stockée n'a pas encore été recalculée
+    assert ContractSummaryDailyFact.objects.get(day=localdate(), is_cancelled=False).amount_paid_total == 400
+
+
+def test_non_rollup_filters_use_live_aggregates(summary_facts):
+    from api.contracts.aggregates import ContractAggregatesService
+
+    filters = _filters(is_signed="avec")
+    assert not ContractAggregatesService.rollup_eligible(filters)
+    assert ContractAggregatesService.get(filters)["sum_amount_due"] == Decimal("500.00")
+
+
+def test_aggregates_cache_is_invalidated_by_payments(
+    auth_client, summary_facts, django_assert_num_queries, django_capture_on_commit_callbacks,
+):
+    from api.contracts.aggregates import ContractAggregatesService
+
+    filters = _filters()
+    assert ContractAggregatesService.get(filters)["sum_amount_paid"] == Decimal("400.00")
+    with django_assert_num_queries(0):
+        assert ContractAggregatesService.get(filters)["sum_amount_paid"] == Decimal("400.00")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        PaymentReceipt.objects.create(
+            contract=summary_facts[1], client=summary_facts[1].client, amount=130, mode="CB",
+        )
+    assert ContractAggregatesService.get(filters)["sum_amount_paid"] == Decimal("530.00")
+    assert auth_client.get(reverse("contract-search")).json()["aggregates"]["sum_amount_paid"] == 530.0
+
+
+def test_summary_rebuild_invalidates_cached_aggregates(summary_facts, django_capture_on_commit_callbacks):
+    from api.analytics.models import RollupFact
+    from api.analytics.rollups import rebuild_facts
+    from api.contracts.aggregates import VERSION_KEY
+
+    version = cache.get(VERSION_KEY)
+    with django_capture_on_commit_callbacks(execute=True):
+        rebuild_facts(RollupFact.CONTRACT_SUMMARY, [localdate()])
+    assert cache.get(VERSION_KEY) != version
@@ -12,6 +12,8 @@ urlpatterns = [
     path("search/", ContractSearchView.as_view({'get': 'list'}), name="contract-search"),
     # Export PDF des contrats filtrés
     path("search/export-pdf/", ContractSearchView.as_view({'get': 'export_pdf'}), name="contract-search-export-pdf"),
+    # Export CSV des contrats filtrés
+    path("search/export-csv/", ContractSearchView.as_view({'get': 'export_csv'}), name="contract-search-export-csv"),
 ]
 
 urlpatterns += router.urls
\ No newline at end of file
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api.core"
+
+    def ready(self):
+        from api.core import reference_data, task_telemetry
+        reference_data.connect_signals()
+        task_telemetry.connect_signals()
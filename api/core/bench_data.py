@@ -0,0 +1,614 @@
+"""
+Jeu de données synthétique au volume de la production (generate_bench_data).
+
+Les seeds existants (seeds.py, scripts/seed_crm.py, seedcreatorstats) créent
+quelques dizaines de lignes par create() : rien ne permet de reproduire les
+temps de réponse réels. BenchDataGenerator écrit par COPY (api.utils.bulk_copy)
+des volumes configurables, par défaut ceux de la production :
+
+  - 1 000 000 leads, 300 000 contrats, 1 000 000 paiements,
+    5 000 000 messages WhatsApp, 10 000 000 événements d'audit
+  - distributions réalistes : croissance du volume dans le temps, répartition
+    des statuts, RDV passés (PRESENT / ABSENT) et à venir (confirmés…),
+    conversion en client surtout après présence, remises, échéanciers,
+    annulations et remboursements, conversations WhatsApp concentrées sur une
+    partie des leads, numéros inconnus
+  - tirages reproductibles (graine), noms et villes issus de Faker (fr_FR)
+
+COPY ne déclenche aucun signal : l'audit, l'index de recherche des contrats
+et les synthèses journalières sont reconstruits à la fin (sauf --skip-derived).
+"""
+import bisect
+import itertools
+import logging
+import math
+import random
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Callable, Dict, List, Optional
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils import timezone
+from django.utils.text import slugify
+
+from api.clients.models import Client
+from api.contracts.models import Contract
+from api.core.partitioning import PARTITIONED_TABLES, PartitionManager
+from api.core.reference_data import lead_event_types, lead_statuses, services
+from api.creators.models import CreatorProfile, PromoCode
+from api.leads.constants import (
+    A_RAPPELER,
+    ABSENT,
+    ANNULE,
+    APPEL_NRP_1,
+    APPEL_NRP_2,
+    APPEL_NRP_3,
+    ARCHIVE,
+    AUCUNE_REPONSE,
+    NEW_FACEBOOK_LEAD,
+    PRESENT,
+    RDV_A_CONFIRMER,
+    RDV_CONFIRME,
+    RDV_PLANIFIE,
+    RDV_PRESENTIEL,
+    RDV_TELEPHONE,
+    RDV_VISIO_CONFERENCE,
+    WHATSAPP_ENVOYE,
+    BlockingDurationBucket,
+    LeadService,
+    LeadSource,
+)
+from api.leads.models import Lead
+from api.leads_events.models import LeadEvent
+from api.payments.enums import PaymentMode
+from api.payments.models import PaymentReceipt
+from api.users.models import User
+from api.users.roles import UserRoles
+from api.utils.bulk_copy import copy_in_batches, copy_instances, reserve_ids
+from api.whatsapp.models import WhatsAppMessage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COUNTS = {
+    "leads": 1_000_000,
+    "contracts": 300_000,
+    "receipts": 1_000_000,
+    "whatsapp_messages": 5_000_000,
+    "lead_events": 10_000_000,
+}
+
+# Poids relatifs (tirages pondérés)
+STATUS_WEIGHTS = {
+    PRESENT: 24, ABSENT: 11, RDV_CONFIRME: 6, RDV_A_CONFIRMER: 6, RDV_PLANIFIE: 2,
+    WHATSAPP_ENVOYE: 3, A_RAPPELER: 9, APPEL_NRP_1: 6, APPEL_NRP_2: 4, APPEL_NRP_3: 3,
+    AUCUNE_REPONSE: 7, NEW_FACEBOOK_LEAD: 3, ARCHIVE: 11, ANNULE: 5,
+}
+PAST_APPOINTMENT_STATUSES = {PRESENT, ABSENT}
+UPCOMING_APPOINTMENT_STATUSES = {RDV_CONFIRME, RDV_A_CONFIRMER, RDV_PLANIFIE, WHATSAPP_ENVOYE}
+APPOINTMENT_TYPE_WEIGHTS = {RDV_PRESENTIEL: 55, RDV_TELEPHONE: 30, RDV_VISIO_CONFERENCE: 15}
+SOURCE_WEIGHTS = {source: 1 for source in LeadSource.values} | {
+    LeadSource.WEBSITE: 30, LeadSource.GOOGLE_ADS: 15, LeadSource.GOOGLE_SEARCH: 10, LeadSource.LANDING_PAGE: 8,
+}
+DEPARTMENT_WEIGHTS = {f"{n:02d}": 0.3 for n in range(1, 96) if n != 20} | {
+    "75": 18, "93": 12, "92": 8, "94": 8, "95": 6, "91": 5, "77": 5, "78": 4,
+    "13": 5, "69": 5, "59": 4, "31": 2, "06": 2, "33": 2, "67": 2, "44": 2,
+}
+
+# Services : (poids, prix catalogue)
+SERVICE_CATALOG = {
+    LeadService.TITRE_SEJOUR: (35, "1490.00"),
+    LeadService.NATURALISATION: (18, "1890.00"),
+    LeadService.REGROUPEMENT_FAM: (8, "1690.00"),
+    LeadService.VISA: (7, "990.00"),
+    LeadService.SUIVI_PREFECTURE: (8, "490.00"),
+    LeadService.DUPLICATA_SEJOUR: (4, "390.00"),
+    LeadService.DCEM: (3, "590.00"),
+    LeadService.CREATION_ENTREPRISE: (3, "1290.00"),
+    LeadService.ASSISTANCE_JURIDIQUE: (6, "290.00"),
+    LeadService.OQTF: (5, "1990.00"),
+    LeadService.INSCRIPTION_UNIV: (2, "690.00"),
+    LeadService.CASIER: (1, "890.00"),
+}
+DISCOUNT_WEIGHTS = {Decimal("0.00"): 82, Decimal("5.00"): 6, Decimal("10.00"): 7, Decimal("15.00"): 3, Decimal("20.00"): 2}
+PAYMENT_MODE_WEIGHTS = {
+    PaymentMode.CB: 38, PaymentMode.VIREMENT: 22, PaymentMode.ESPECES: 12, PaymentMode.PNF: 8,
+    PaymentMode.SEPA: 8, PaymentMode.CHEQUE: 4, PaymentMode.KLARNA: 4, PaymentMode.PAYPAL: 2,
+    PaymentMode.STRIPE: 2,
+}
+OUTBOUND_STATUS_WEIGHTS = {"read": 62, "delivered": 28, "sent": 7, "failed": 3}
+
+EVENT_TYPES = {
+    # code : (poids, libellé)
+    "LEAD_UPDATED": (34, "Lead mis à jour"),
+    "COMMENT_ADDED": (18, "Commentaire ajouté"),
+    "TASK_CREATED": (10, "Tâche créée"),
+    "TASK_COMPLETED": (8, "Tâche terminée"),
+    "TASK_UPDATED": (6, "Tâche mise à jour"),
+    "LEAD_CREATED": (10, "Lead créé"),
+    "CLIENT_UPDATED": (5, "Dossier client mis à jour"),
+    "CONTRACT_GENERATED": (3, "Contrat généré"),
+    "CONTRACT_SIGNED": (2, "Contrat signé"),
+    "PAYMENT_RECEIVED": (4, "Paiement reçu"),
+}
+EVENT_NOTES = [
+    "", "", "Statut modifié", "Client rappelé, pas de réponse", "Documents reçus par email",
+    "Rendez-vous reprogrammé à la demande du client", "Dossier complet, en attente de dépôt",
+    "Relance envoyée par WhatsApp", "Client souhaite un devis", "Paiement en plusieurs fois demandé",
+]
+MESSAGE_BODIES = [
+    "Bonjour, je voudrais des informations sur le titre de séjour.",
+    "Merci pour votre retour.", "Quels documents dois-je apporter ?", "D'accord, à demain.",
+    "Votre rendez-vous est confirmé.", "Pouvez-vous me rappeler s'il vous plaît ?",
+    "J'ai envoyé les documents par email.", "Bonjour, où en est mon dossier ?",
+    "Le paiement a bien été reçu, merci.", "Je serai en retard de 10 minutes.",
+]
+
+# Répartition des utilisateurs internes
+STAFF_ROLES = {UserRoles.CONSEILLER: 24, UserRoles.JURISTE: 10, UserRoles.ACCUEIL: 8, UserRoles.ADMIN: 2}
+CONSEILLER_ASSIGNMENT_RATE = 0.7
+JURIST_ASSIGNMENT_RATE = 0.5
+CREATOR_LEAD_RATE = 0.12
+EMAIL_RATE = 0.75
+CONVERSATION_RATE = 0.4        # part des leads ayant une conversation WhatsApp
+UNKNOWN_PHONE_RATE = 0.02      # messages de numéros sans lead
+NAME_POOL_SIZE = 400
+
+DAY = 86400
+BENCH_EMAIL_DOMAIN = "bench.papiers-express.fr"
+
+
+def _cumulative(weights: Dict) -> tuple:
+    population = list(weights)
+    return population, list(itertools.accumulate(weights.values()))
+
+
+def scaled_counts(scale: float = 1.0, **overrides) -> Dict[str, int]:
+    """Volumes par défaut × `scale`, remplacés par les volumes explicitement demandés."""
+    counts = {name: max(1, int(count * scale)) for name, count in DEFAULT_COUNTS.items()}
+    counts.update({name: count for name, count in overrides.items() if count is not None})
+    return counts
+
+
+def _money(value) -> Decimal:
+    return Decimal(value).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+class BenchDataGenerator:
+
+    def __init__(
+        self,
+        counts: Dict[str, int],
+        days: int = 3 * 365,
+        seed: int = 42,
+        batch_size: int = 50_000,
+        log: Optional[Callable[[str], None]] = None,
+    ):
+        self.counts = counts
+        self.days = days
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.batch_size = batch_size
+        self.log = log or logger.info
+        self.now = timezone.now().timestamp()
+        self.start = self.now - days * DAY
+        self.run_id = f"{seed}{int(self.now)}"
+        self._weights = {
+            "status": _cumulative(STATUS_WEIGHTS),
+            "appointment_type": _cumulative(APPOINTMENT_TYPE_WEIGHTS),
+            "source": _cumulative(SOURCE_WEIGHTS),
+            "department": _cumulative(DEPARTMENT_WEIGHTS),
+            "service": _cumulative({code: weight for code, (weight, _) in SERVICE_CATALOG.items()}),
+            "discount": _cumulative(DISCOUNT_WEIGHTS),
+            "payment_mode": _cumulative(PAYMENT_MODE_WEIGHTS),
+            "outbound_status": _cumulative(OUTBOUND_STATUS_WEIGHTS),
+            "event_type": _cumulative({code: weight for code, (weight, _) in EVENT_TYPES.items()}),
+        }
+        # Leads générés : colonnes parallèles indexées par rang
+        self.lead_ids: List[int] = []
+        self.lead_created: List[float] = []
+        self.lead_status: List[str] = []
+
+    def _pick(self, name):
+        population, cum_weights = self._weights[name]
+        return population[bisect.bisect(cum_weights, self.rng.random() * cum_weights[-1])]
+
+    def _dt(self, ts: float) -> datetime:
+        return datetime.fromtimestamp(min(ts, self.now), tz=dt_timezone.utc)
+
+    def _after(self, ts: float, mean_days: float) -> float:
+        """Instant après `ts` (délai exponentiel), borné à maintenant."""
+        return min(ts + self.rng.expovariate(1 / (mean_days * DAY)), self.now)
+
+    def _timed(self, label: str, func) -> int:
+        started = time.perf_counter()
+        written = func()
+        self.log(f"{label} : {written} ligne(s) en {time.perf_counter() - started:.1f}s")
+        return written
+
+    # ──────────────────────────────────────────────
+    # ORCHESTRATION
+    # ──────────────────────────────────────────────
+
+    def run(self, derived: bool = True) -> Dict[str, int]:
+        self._reference_data()
+        self._names()
+        written = {
+            "users": self._timed("Utilisateurs", self._users),
+            "creators": self._timed("Créateurs", self._creators),
+            "leads": self._timed("Leads", self._leads),
+            "assignments": self._timed("Assignations", self._assignments),
+        }
+        written["clients"], written["contracts"], written["receipts"] = self._contracts()
+        self._partitions()
+        written["whatsapp_messages"] = self._timed("Messages WhatsApp", self._whatsapp_messages)
+        written["lead_events"] = self._timed("Événements", self._lead_events)
+        if derived:
+            self._derived()
+        return written
+
+    def _reference_data(self):
+        self.status_ids = {
+            code: lead_statuses.get_or_create(code, defaults={"label": code.replace("_", " ").capitalize()}).id
+            for code in STATUS_WEIGHTS
+        }
+        self.service_by_code = {
+            code: services.get_or_create(code, defaults={"label": LeadService(code).label, "price": Decimal(price)})
+            for code, (_, price) in SERVICE_CATALOG.items()
+        }
+        self.event_type_ids = {
+            code: lead_event_types.get_or_create(code, defaults={"label": label}).id
+            for code, (_, label) in EVENT_TYPES.items()
+        }
+
+    def _names(self):
+        from faker import Faker
+
+        fake = Faker("fr_FR")
+        fake.seed_instance(self.seed)
+        self.first_names = [fake.first_name() for _ in range(NAME_POOL_SIZE)]
+        self.last_names = [fake.last_name() for _ in range(NAME_POOL_SIZE)]
+        self.cities = [fake.city() for _ in range(NAME_POOL_SIZE // 4)]
+
+    # ──────────────────────────────────────────────
+    # UTILISATEURS ET CRÉATEURS
+    # ──────────────────────────────────────────────
+
+    def _users(self) -> int:
+        from api.leads_task.tasks import EMMA_EMAIL
+
+        password = make_password(None)
+        users = [
+            User(
+                email=f"{role.lower()}{i}.{self.run_id}@{BENCH_EMAIL_DOMAIN}",
+                first_name=self.rng.choice(self.first_names),
+                last_name=self.rng.choice(self.last_names),
+                role=role,
+                password=password,
+            )
+            for role, count in STAFF_ROLES.items()
+            for i in range(count)
+        ]
+        created = copy_instances(User, users)
+        # Destinataire des relances ABSENT (create_absent_followup_tasks)
+        _, emma_created = User.objects.get_or_create(
+            email=EMMA_EMAIL,
+            defaults={"first_name": "Emma", "last_name": "Jacquin", "role": UserRoles.ACCUEIL, "password": password},
+        )
+        self.conseiller_ids = [u.pk for u in users if u.role == UserRoles.CONSEILLER]
+        self.jurist_ids = [u.pk for u in users if u.role == UserRoles.JURISTE]
+        self.staff_ids = [u.pk for u in users]
+        return created + emma_created
+
+    def _creators(self) -> int:
+        count = max(5, self.counts["leads"] // 5000)
+        password = make_password(None)
+        users = [
+            User(
+                email=f"creator{i}.{self.run_id}@{BENCH_EMAIL_DOMAIN}",
+                first_name=self.rng.choice(self.first_names),
+                last_name=self.rng.choice(self.last_names),
+                role=UserRoles.CREATOR,
+                password=password,
+            )
+            for i in range(count)
+        ]
+        profiles = [
+            CreatorProfile(
+                user_id=user.pk, city=self.rng.choice(self.cities), country="France",
+                status=CreatorProfile.Status.ACTIVE,
+            )
+            for user in users
+        ]
+        promo_codes = [
+            PromoCode(
+                code=f"BENCH{self.run_id}{i}",
+                creator_id=profile.pk,
+                commission_rate=Decimal(self.rng.choice(["5.00", "10.00", "15.00"])),
+            )
+            for i, profile in enumerate(profiles)
+        ]
+        copy_instances(User, users)
+        copy_instances(CreatorProfile, profiles)
+        copy_instances(PromoCode, promo_codes)
+        # Audience très inégale entre créateurs (loi de Zipf)
+        self.creators = [(profile.pk, promo.pk) for profile, promo in zip(profiles, promo_codes)]
+        self.creator_cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, count + 1)))
+        return count
+
+    # ──────────────────────────────────────────────
+    # LEADS
+    # ──────────────────────────────────────────────
+
+    def _created_at(self) -> float:
+        # Densité croissante dans le temps (volume de leads en hausse), journée 8h-21h
+        day = int(self.days * math.sqrt(self.rng.random()))
+        day_start = self.start - self.start % DAY + day * DAY
+        return min(day_start + self.rng.uniform(8, 21) * 3600, self.now - 60)
+
+    def _appointment(self, status: str, created: float) -> Optional[float]:
+        if status in PAST_APPOINTMENT_STATUSES:
+            ts = created + self.rng.randint(1, 21) * DAY
+            if ts > self.now - 3600:
+                ts = self.now - self.rng.randint(1, 14) * DAY
+        elif status in UPCOMING_APPOINTMENT_STATUSES:
+            ts = self.now + self.rng.randint(0, 30) * DAY
+        else:
+            return None
+        day_start = ts - ts % DAY
+        return day_start + (9 * 60 + self.rng.randrange(0, 10 * 60)) * 60
+
+    def _lead(self, lead_id: int) -> Lead:
+        rng = self.rng
+        status = self._pick("status")
+        created = self._created_at()
+        appointment = self._appointment(status, created)
+        first_name, last_name = rng.choice(self.first_names), rng.choice(self.last_names)
+
+        creator_id = promo_id = None
+        if rng.random() < CREATOR_LEAD_RATE:
+            index = bisect.bisect(self.creator_cum_weights, rng.random() * self.creator_cum_weights[-1])
+            creator_id, promo_id = self.creators[index]
+
+        self.lead_ids.append(lead_id)
+        self.lead_created.append(created)
+        self.lead_status.append(status)
+        return Lead(
+            id=lead_id,
+            first_name=first_name,
+            last_name=last_name,
+            email=(
+                f"{slugify(first_name)}.{slugify(last_name)}{lead_id}@example.com"
+                if rng.random() < EMAIL_RATE else None
+            ),
+            phone=self.phone(lead_id),
+            status_id=self.status_ids[status],
+            appointment_date=self._dt(appointment) if appointment else None,
+            appointment_type=self._pick("appointment_type"),
+            service=self._pick("service") if rng.random() < 0.8 else None,
+            department_code=self._pick("department"),
+            is_urgent=rng.random() < 0.07,
+            blocking_duration_bucket=rng.choice(BlockingDurationBucket.values) if rng.random() < 0.4 else None,
+            source=self._pick("source"),
+            created_at=self._dt(created),
+            creator_profile_id=creator_id,
+            promo_code_id=promo_id,
+        )
+
+    @staticmethod
+    def phone(lead_id: int) -> str:
+        return f"06{lead_id % 10 ** 8:08d}"
+
+    def _leads(self) -> int:
+        written, total = 0, self.counts["leads"]
+        for start in range(0, total, self.batch_size):
+            ids = reserve_ids(Lead, min(self.batch_size, total - start))
+            written += copy_instances(Lead, [self._lead(lead_id) for lead_id in ids])
+        return written
+
+    def _assignments(self) -> int:
+        rng = self.rng
+        assigned_to = Lead.assigned_to.through
+        jurists = Lead.jurist_assigned.through
+
+        def conseillers():
+            for lead_id in self.lead_ids:
+                if rng.random() < CONSEILLER_ASSIGNMENT_RATE:
+                    yield assigned_to(lead_id=lead_id, user_id=rng.choice(self.conseiller_ids))
+
+        def juristes():
+            for lead_id, status in zip(self.lead_ids, self.lead_status):
+                if status in PAST_APPOINTMENT_STATUSES and rng.random() < JURIST_ASSIGNMENT_RATE:
+                    yield jurists(lead_id=lead_id, user_id=rng.choice(self.jurist_ids))
+
+        return (
+            copy_in_batches(assigned_to, conseillers(), self.batch_size)
+            + copy_in_batches(jurists, juristes(), self.batch_size)
+        )
+
+    # ──────────────────────────────────────────────
+    # CLIENTS, CONTRATS, PAIEMENTS
+    # ──────────────────────────────────────────────
+
+    def _contracts(self):
+        rng = self.rng
+        n_contracts = self.counts["contracts"]
+        n_clients = min(len(self.lead_ids), max(1, round(n_contracts / 1.2)))
+
+        # Conversion : d'abord les leads venus au RDV, puis les autres
+        present = [i for i, status in enumerate(self.lead_status) if status == PRESENT]
+        others = [i for i, status in enumerate(self.lead_status) if status != PRESENT]
+        rng.shuffle(present)
+        rng.shuffle(others)
+        converted = (present + others)[:n_clients]
+
+        started = time.perf_counter()
+        client_ids = reserve_ids(Client, len(converted))
+        clients = []
+        for client_id, rank in zip(client_ids, converted):
+            clients.append(Client(
+                id=client_id,
+                lead_id=self.lead_ids[rank],
+                ville=rng.choice(self.cities),
+                pays="France",
+                type_demande_id=self.service_by_code[self._pick("service")].id,
+            ))
+        written_clients = copy_in_batches(Client, iter(clients), self.batch_size)
+        self.log(f"Clients : {written_clients} ligne(s) en {time.perf_counter() - started:.1f}s")
+
+        # Un contrat par client, les contrats supplémentaires répartis au hasard
+        owners = list(range(len(clients))) + rng.choices(range(len(clients)), k=max(0, n_contracts - len(clients)))
+        owners = owners[:n_contracts]
+
+        # Nombre de paiements par contrat : au moins un, le reste réparti (multinomiale)
+        n_receipts = self.counts["receipts"]
+        installments = [1 if i < n_receipts else 0 for i in range(len(owners))]
+        for index in rng.choices(range(len(owners)), k=max(0, n_receipts - len(owners))):
+            installments[index] += 1
+
+        started = time.perf_counter()
+        written_contracts = written_receipts = 0
+        for start in range(0, len(owners), self.batch_size):
+            batch = owners[start:start + self.batch_size]
+            contract_ids = reserve_ids(Contract, len(batch))
+            contracts, receipts = [], []
+            for offset, (contract_id, owner) in enumerate(zip(contract_ids, batch)):
+                client = clients[owner]
+                contract, contract_receipts = self._contract(
+                    contract_id, client, self.lead_created[converted[owner]], installments[start + offset],
+                )
+                contracts.append(contract)
+                receipts.extend(contract_receipts)
+            written_contracts += copy_instances(Contract, contracts)
+            written_receipts += copy_in_batches(PaymentReceipt, iter(receipts), self.batch_size)
+        self.log(
+            f"Contrats : {written_contracts}, paiements : {written_receipts} "
+            f"en {time.perf_counter() - started:.1f}s"
+        )
+        return written_clients, written_contracts, written_receipts
+
+    def _contract(self, contract_id: int, client: Client, lead_created: float, installments: int):
+        rng = self.rng
+        service = self.service_by_code[self._pick("service")]
+        created = self._after(lead_created, 10)
+        discount = self._pick("discount")
+        amount_due = service.price
+        real_amount = _money(amount_due * (1 - discount / 100))
+
+        cancelled = rng.random() < 0.04
+        if cancelled:
+            paid_ratio = rng.choice([0, 0, 0.2, 0.3])
+        else:
+            paid_ratio = 1 if rng.random() < 0.6 else rng.uniform(0.1, 0.95)
+        paid = _money(real_amount * Decimal(paid_ratio))
+        refund = _money(paid * Decimal("0.5")) if paid_ratio == 1 and rng.random() < 0.03 else Decimal("0.00")
+
+        contract = Contract(
+            id=contract_id,
+            client_id=client.id,
+            service_id=service.id,
+            amount_due=amount_due,
+            discount_percent=discount,
+            created_at=self._dt(created),
+            created_by_id=rng.choice(self.conseiller_ids),
+            is_signed=not cancelled and rng.random() < 0.88,
+            is_cancelled=cancelled,
+            refund_amount=refund,
+            is_refunded=refund > 0,
+        )
+
+        receipts = []
+        if installments and paid > 0:
+            share = _money(paid / installments)
+            for i in range(installments):
+                amount = share if i < installments - 1 else paid - share * (installments - 1)
+                payment_ts = min(created + i * 30 * DAY + rng.uniform(0, 3) * DAY, self.now)
+                is_last = i == installments - 1
+                receipts.append(PaymentReceipt(
+                    client_id=client.id,
+                    contract_id=contract_id,
+                    amount=amount,
+                    mode=self._pick("payment_mode"),
+                    payment_date=self._dt(payment_ts),
+                    next_due_date=(
+                        self._dt(payment_ts + 30 * DAY).date() if is_last and paid < real_amount else None
+                    ),
+                    created_by_id=contract.created_by_id,
+                ))
+        return contract, receipts
+
+    # ──────────────────────────────────────────────
+    # WHATSAPP ET AUDIT
+    # ──────────────────────────────────────────────
+
+    def _partitions(self):
+        """Mois de l'historique créés avant le COPY : chaque ligne va directement dans sa partition."""
+        for spec in PARTITIONED_TABLES:
+            PartitionManager.ensure(spec, since=self._dt(self.start))
+
+    def _whatsapp_messages(self) -> int:
+        rng = self.rng
+        total = self.counts["whatsapp_messages"]
+        conversations = rng.sample(range(len(self.lead_ids)), max(1, int(len(self.lead_ids) * CONVERSATION_RATE)))
+        unknown_phones = [f"+4477{i:08d}" for i in range(max(1, total // 200))]
+        recent = self.now - 2 * DAY
+
+        def messages():
+            for seq in range(total):
+                if rng.random() < UNKNOWN_PHONE_RATE:
+                    lead_id, phone = None, rng.choice(unknown_phones)
+                    ts = self.now - rng.expovariate(1 / (30 * DAY))
+                else:
+                    rank = rng.choice(conversations)
+                    lead_id = self.lead_ids[rank]
+                    phone = self.phone(lead_id).replace("0", "+33", 1)
+                    ts = self._after(self.lead_created[rank], 12)
+                outbound = rng.random() < 0.55
+                yield WhatsAppMessage(
+                    wa_id=f"wamid.bench.{self.run_id}.{seq}",
+                    lead_id=lead_id,
+                    sender_phone=phone,
+                    body=rng.choice(MESSAGE_BODIES),
+                    is_outbound=outbound,
+                    is_read=outbound or ts < recent or rng.random() < 0.5,
+                    delivery_status=self._pick("outbound_status") if outbound else "received",
+                    timestamp=self._dt(ts),
+                )
+
+        return copy_in_batches(WhatsAppMessage, messages(), self.batch_size)
+
+    def _lead_events(self) -> int:
+        rng = self.rng
+        total, n_leads = self.counts["lead_events"], len(self.lead_ids)
+
+        def events():
+            for _ in range(total):
+                rank = rng.randrange(n_leads)
+                yield LeadEvent(
+                    lead_id=self.lead_ids[rank],
+                    event_type_id=self.event_type_ids[self._pick("event_type")],
+                    actor_id=rng.choice(self.staff_ids) if rng.random() < 0.7 else None,
+                    note=rng.choice(EVENT_NOTES),
+                    occurred_at=self._dt(self._after(self.lead_created[rank], 20)),
+                )
+
+        return copy_in_batches(LeadEvent, events(), self.batch_size)
+
+    # ──────────────────────────────────────────────
+    # DONNÉES DÉRIVÉES
+    # ──────────────────────────────────────────────
+
+    def _derived(self):
+        from api.analytics.rollups import rebuild_all
+        from api.contracts.aggregates import bump_version
+        from api.contracts.search_index import ContractSearchIndex
+        from api.leads import search_cache
+
+        self._timed("Index de recherche des contrats", ContractSearchIndex.rebuild)
+        self._timed("Synthèses journalières", lambda: sum(rebuild_all().values()))
+        bump_version()
+        search_cache.invalidate()
+        with connection.cursor() as cursor:
+            for model in (Lead, Client, Contract, PaymentReceipt, WhatsAppMessage, LeadEvent):
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
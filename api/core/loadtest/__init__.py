@@ -0,0 +1,22 @@
+"""
+Harnais de charge hors ligne.
+
+Les chemins lents sont dominés par les fournisseurs externes (Meta Graph API,
+OVH SMS, Gemini, SMTP Gmail) : impossible de les charger sans les solliciter
+réellement. Ce paquet fournit :
+
+  - fakes : faux serveurs HTTP Graph API / OVH / Gemini et puits SMTP, avec
+    latence (log-normale : médiane, p99) et taux d'erreur configurables
+  - scenario : utilisateurs virtuels façon locust (trafic webhook rejoué ou
+    synthétique, navigation CRM), percentiles de latence et profondeur de la
+    file Django-Q au cours du temps
+
+run_loadtest démarre lui-même les faux fournisseurs sur des ports fixes
+(DEFAULT_PORTS) ; run_fake_providers les lance seuls et affiche les variables
+à exporter pour le serveur et le qcluster :
+
+    manage.py run_fake_providers --webhook-url http://127.0.0.1:8000/api/whatsapp/webhook/
+    # serveur + qcluster lancés avec ces variables, puis :
+    manage.py run_loadtest --no-fakes --base-url http://127.0.0.1:8000 --users 20 --duration 120 \
+        --email admin@… --password … --report loadtest.json
+"""
@@ -0,0 +1,472 @@
+"""
+Faux fournisseurs externes, servis en local (threads) :
+
+  - FakeGraphAPI : envoi de messages WhatsApp, indicateur de saisie, médias ;
+    peut renvoyer au webhook les callbacks de statut sent → delivered → read
+    comme Meta (c'est l'essentiel du trafic webhook réel)
+  - FakeOVH : /auth/time et POST /sms/{service}/jobs (client python-ovh)
+  - FakeGemini : generateContent et cachedContents (client google-genai)
+  - SmtpSink : puits SMTP (EHLO, AUTH PLAIN, DATA), messages comptés puis jetés
+
+Chaque fournisseur applique un LatencyProfile : latence log-normale définie
+par sa médiane et son p99, taux d'erreur et statuts d'erreur tirés au hasard.
+FakeProviders.env() donne les variables d'environnement qui branchent le
+serveur Django et le qcluster sur ces faux serveurs.
+"""
+import itertools
+import json
+import logging
+import math
+import random
+import socketserver
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+Z_99 = 2.326  # quantile 99 % de la loi normale centrée réduite
+
+DEFAULT_PORTS = {"graph": 9101, "ovh": 9102, "gemini": 9103, "smtp": 9104}
+
+
+@dataclass
+class LatencyProfile:
+    median_ms: float
+    p99_ms: float
+    error_rate: float = 0.0
+    error_statuses: Tuple[int, ...] = (500, 503)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyProfile":
+        """« médiane:p99[:taux_erreur] » en ms, ex. « 180:1200:0.01 »."""
+        parts = [float(p) for p in spec.split(":")]
+        if len(parts) not in (2, 3):
+            raise ValueError(f"Profil de latence invalide : {spec!r} (attendu médiane:p99[:taux_erreur])")
+        return cls(parts[0], parts[1], parts[2] if len(parts) == 3 else 0.0)
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        sigma = max(math.log(max(self.p99_ms, self.median_ms) / self.median_ms), 0.0) / Z_99
+        return rng.lognormvariate(math.log(self.median_ms), sigma)
+
+    def sample_error(self, rng: random.Random) -> Optional[int]:
+        return rng.choice(self.error_statuses) if rng.random() < self.error_rate else None
+
+
+# Latences observées en production (ordre de grandeur)
+DEFAULT_PROFILES = {
+    "graph": LatencyProfile(180, 1200, 0.005),
+    "ovh": LatencyProfile(250, 1500, 0.005),
+    "gemini": LatencyProfile(2500, 9000, 0.01, (429, 500, 503)),
+    "smtp": LatencyProfile(60, 500, 0.002, (421, 451)),
+}
+
+
+@dataclass
+class ProviderStats:
+    requests: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> dict:
+        return {"requests": self.requests, "errors": self.errors}
+
+
+class _Provider:
+    name = ""
+
+    def __init__(self, profile: LatencyProfile, seed: Optional[int] = None):
+        self.profile = profile
+        self.stats = ProviderStats()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def _draw(self) -> Tuple[float, Optional[int]]:
+        with self._lock:
+            delay = self.profile.sample_ms(self._rng)
+            error = self.profile.sample_error(self._rng)
+            self.stats.requests += 1
+            self.stats.errors += error is not None
+        return delay, error
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"fake-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def env(self) -> Dict[str, str]:
+        raise NotImplementedError
+
+
+# ──────────────────────────────────────────────
+# HTTP
+# ──────────────────────────────────────────────
+
+class FakeHTTPProvider(_Provider):
+    """Serveur JSON ; les sous-classes implémentent handle(méthode, chemin, corps)."""
+
+    # Chemins servis sans latence ni erreur (poignée de main des clients)
+    instant_paths: Tuple[str, ...] = ()
+
+    def __init__(self, profile: LatencyProfile, host: str = "127.0.0.1", port: int = 0, seed: Optional[int] = None):
+        super().__init__(profile, seed)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle(self, method: str, path: str, payload: dict):
+        """Retourne (statut, corps JSON | bytes)."""
+        raise NotImplementedError
+
+    def error_body(self, status: int) -> dict:
+        return {"error": {"code": status, "message": f"Erreur simulée ({self.name})"}}
+
+    def _handler_class(self):
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    payload = json.loads(raw) if raw else {}
+                except ValueError:
+                    payload = {}
+
+                path = self.path.split("?", 1)[0]
+                if path.startswith(provider.instant_paths):
+                    status, body = provider.handle(self.command, path, payload)
+                else:
+                    delay_ms, error = provider._draw()
+                    time.sleep(delay_ms / 1000)
+                    status, body = (error, provider.error_body(error)) if error else \
+                        provider.handle(self.command, path, payload)
+
+                data = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/octet-stream" if isinstance(body, bytes) else "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class FakeGraphAPI(FakeHTTPProvider):
+    name = "graph"
+    API_VERSION = "v25.0"
+    PHONE_NUMBER_ID = "100000000000000"
+
+    # Délais (s) des callbacks de statut après l'envoi
+    STATUS_DELAYS = (("sent", 0.3), ("delivered", 1.5), ("read", 20.0))
+
+    def __init__(self, *args, webhook_url: Optional[str] = None, read_rate: float = 0.7, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.webhook_url = webhook_url
+        self.read_rate = read_rate
+        self.on_message: List[Callable[[str, str], None]] = []
+        self._ids = itertools.count(1)
+
+    def handle(self, method, path, payload):
+        if method == "POST" and path.endswith("/messages"):
+            if payload.get("status") == "read":  # indicateur de saisie / accusé de lecture
+                return 200, {"success": True}
+            to, wa_id = payload.get("to", ""), f"wamid.FAKE{next(self._ids):012d}"
+            for callback in self.on_message:
+                callback(to, wa_id)
+            if self.webhook_url:
+                self._schedule_statuses(to, wa_id)
+            return 200, {
+                "messaging_product": "whatsapp",
+                "contacts": [{"input": to, "wa_id": to}],
+                "messages": [{"id": wa_id}],
+            }
+        if method == "GET" and path.startswith("/media/"):
+            return 200, b"\xff\xd8\xff\xe0fake-media"
+        if method == "GET":
+            media_id = path.rstrip("/").rsplit("/", 1)[-1]
+            return 200, {"id": media_id, "url": f"{self.url}/media/{media_id}", "mime_type": "image/jpeg"}
+        return 404, self.error_body(404)
+
+    def _schedule_statuses(self, to: str, wa_id: str):
+        for status, delay in self.STATUS_DELAYS:
+            with self._lock:
+                unread = self._rng.random() > self.read_rate
+            if status == "read" and unread:
+                break
+            timer = threading.Timer(delay, self._post_status, args=(to, wa_id, status))
+            timer.daemon = True
+            timer.start()
+
+    def _post_status(self, to: str, wa_id: str, status: str):
+        body = status_webhook([{"id": wa_id, "status": status, "recipient_id": to}])
+        try:
+            requests.post(self.webhook_url, json=body, timeout=10)
+        except requests.RequestException as e:
+            logger.warning(f"⚠️ Callback de statut non livré ({status}) : {e}")
+
+    def env(self):
+        return {
+            "WHATSAPP_GRAPH_API_URL": f"{self.url}/{self.API_VERSION}",
+            "WHATSAPP_PHONE_NUMBER_ID": self.PHONE_NUMBER_ID,
+            "WHATSAPP_ACCESS_TOKEN": "fake-graph-token",
+        }
+
+
+class FakeOVH(FakeHTTPProvider):
+    name = "ovh"
+    SERVICE_NAME = "sms-fake-1"
+    instant_paths = ("/auth/time",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ids = itertools.count(1)
+
+    def handle(self, method, path, payload):
+        if path == "/auth/time":
+            return 200, int(time.time())
+        if method == "POST" and path.startswith("/sms/") and path.endswith("/jobs"):
+            receivers = payload.get("receivers") or []
+            return 200, {
+                "ids": [next(self._ids)],
+                "totalCreditsRemoved": len(receivers),
+                "validReceivers": receivers,
+                "invalidReceivers": [],
+                "tag": "",
+            }
+        return 404, self.error_body(404)
+
+    def error_body(self, status):
+        return {"message": f"Erreur simulée OVH ({status})", "class": "Server::InternalServerError"}
+
+    def env(self):
+        return {
+            "OVH_SMS_ENDPOINT": self.url,
+            "OVH_SMS_APP_KEY": "fake-app-key",
+            "OVH_SMS_APP_SECRET": "fake-app-secret",
+            "OVH_SMS_CONSUMER_KEY": "fake-consumer-key",
+            "OVH_SMS_SERVICE_NAME": self.SERVICE_NAME,
+        }
+
+
+class FakeGemini(FakeHTTPProvider):
+    name = "gemini"
+    REPLY = (
+        "Bonjour et merci pour votre message ! Un conseiller Papiers Express "
+        "revient vers vous très rapidement pour fixer un rendez-vous."
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ids = itertools.count(1)
+
+    def handle(self, method, path, payload):
+        if method == "POST" and path.endswith(":generateContent"):
+            prompt_tokens = len(json.dumps(payload)) // 4
+            return 200, {
+                "candidates": [{
+                    "content": {"role": "model", "parts": [{"text": self.REPLY}]},
+                    "finishReason": "STOP",
+                    "index": 0,
+                }],
+                "usageMetadata": {
+                    "promptTokenCount": prompt_tokens,
+                    "candidatesTokenCount": 40,
+                    "totalTokenCount": prompt_tokens + 40,
+                },
+                "modelVersion": path.rsplit("/", 1)[-1].split(":")[0],
+            }
+        if "cachedContents" in path:
+            expire = datetime.now(dt_timezone.utc) + timedelta(hours=1)
+            return 200, {
+                "name": f"cachedContents/fake-{next(self._ids)}",
+                "model": payload.get("model", ""),
+                "expireTime": expire.isoformat().replace("+00:00", "Z"),
+            }
+        return 404, self.error_body(404)
+
+    def error_body(self, status):
+        return {"error": {"code": status, "message": "Erreur simulée Gemini", "status": "UNAVAILABLE"}}
+
+    def env(self):
+        return {"GEMINI_BASE_URL": self.url, "GEMINI_API_KEY": "fake-gemini-key"}
+
+
+def status_webhook(statuses: List[dict]) -> dict:
+    """Corps de webhook Meta portant des callbacks de statut."""
+    now = str(int(time.time()))
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [{"changes": [{"field": "messages", "value": {
+            "messaging_product": "whatsapp",
+            "statuses": [{"timestamp": now, **status} for status in statuses],
+        }}]}],
+    }
+
+
+# ──────────────────────────────────────────────
+# SMTP
+# ──────────────────────────────────────────────
+
+class SmtpSink(_Provider):
+    """Puits SMTP minimal : accepte tout (AUTH PLAIN compris), sans TLS."""
+
+    name = "smtp"
+
+    def __init__(self, profile: LatencyProfile, host: str = "127.0.0.1", port: int = 0, seed: Optional[int] = None):
+        super().__init__(profile, seed)
+        self.messages: List[dict] = []
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+
+    def _handler_class(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str):
+                self.wfile.write(f"{line}\r\n".encode())
+
+            def handle(self):
+                self.reply("220 fake-smtp ESMTP")
+                envelope = {"from": None, "to": []}
+                for raw in self.rfile:
+                    command = raw.decode(errors="replace").strip()
+                    verb = command.split(" ", 1)[0].upper()
+                    if verb == "EHLO":
+                        self.wfile.write(b"250-fake-smtp\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n")
+                    elif verb == "HELO":
+                        self.reply("250 fake-smtp")
+                    elif verb == "AUTH":
+                        self.reply("235 2.7.0 Authentication successful")
+                    elif verb == "MAIL":
+                        envelope = {"from": command[10:].strip("<> "), "to": []}
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        envelope["to"].append(command[8:].strip("<> "))
+                        self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        size = 0
+                        for line in self.rfile:
+                            if line in (b".\r\n", b".\n"):
+                                break
+                            size += len(line)
+                        delay_ms, error = sink._draw()
+                        time.sleep(delay_ms / 1000)
+                        if error:
+                            self.reply(f"{error} Erreur simulée")
+                        else:
+                            with sink._lock:
+                                sink.messages.append({**envelope, "size": size})
+                            self.reply("250 OK queued")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:  # RSET, NOOP…
+                        self.reply("250 OK")
+
+        return Handler
+
+    def env(self):
+        host, port = self._server.server_address[:2]
+        return {
+            "EMAIL_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+            "EMAIL_HOST": host,
+            "EMAIL_PORT": str(port),
+            "EMAIL_USE_TLS": "false",
+            "EMAIL_HOST_USER": "loadtest@papiers-express.fr",
+            "EMAIL_HOST_PASSWORD": "fake-smtp-password",
+        }
+
+
+# ──────────────────────────────────────────────
+# ENSEMBLE
+# ──────────────────────────────────────────────
+
+class FakeProviders:
+    """Les quatre faux fournisseurs, démarrés ensemble."""
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, LatencyProfile]] = None,
+        ports: Optional[Dict[str, int]] = None,
+        host: str = "127.0.0.1",
+        webhook_url: Optional[str] = None,
+        seed: Optional[int] = None,
+    ):
+        profiles = {**DEFAULT_PROFILES, **(profiles or {})}
+        ports = {**dict.fromkeys(DEFAULT_PORTS, 0), **(ports or {})}
+        self.graph = FakeGraphAPI(profiles["graph"], host, ports["graph"], seed, webhook_url=webhook_url)
+        self.ovh = FakeOVH(profiles["ovh"], host, ports["ovh"], seed)
+        self.gemini = FakeGemini(profiles["gemini"], host, ports["gemini"], seed)
+        self.smtp = SmtpSink(profiles["smtp"], host, ports["smtp"], seed)
+
+    @property
+    def all(self) -> List[_Provider]:
+        return [self.graph, self.ovh, self.gemini, self.smtp]
+
+    def start(self) -> "FakeProviders":
+        for provider in self.all:
+            provider.start()
+        return self
+
+    def stop(self) -> None:
+        for provider in self.all:
+            provider.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def env(self) -> Dict[str, str]:
+        return {key: value for provider in self.all for key, value in provider.env().items()}
+
+    def stats(self) -> Dict[str, dict]:
+        return {provider.name: provider.stats.as_dict() for provider in self.all}
+
+
+def add_provider_arguments(parser) -> None:
+    """Options communes des commandes : profils de latence par fournisseur."""
+    for name in DEFAULT_PORTS:
+        default = DEFAULT_PROFILES[name]
+        parser.add_argument(
+            f"--{name}", type=LatencyProfile.parse, default=None, metavar="MEDIANE:P99[:ERREURS]",
+            help=(
+                f"Latence (ms) et taux d'erreur du faux {name} "
+                f"(par défaut {default.median_ms:g}:{default.p99_ms:g}:{default.error_rate:g})."
+            ),
+        )
+
+
+def profiles_from_options(options: dict) -> Dict[str, LatencyProfile]:
+    return {name: options[name] for name in DEFAULT_PORTS if options.get(name)}
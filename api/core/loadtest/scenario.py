@@ -0,0 +1,358 @@
+"""
+Scénario de charge façon locust, sans dépendance : des utilisateurs virtuels
+(threads, une session requests chacun) démarrés progressivement.
+
+  - WebhookUser : rejoue un fichier JSONL de webhooks Meta (une ligne = un
+    corps, ou {"path": …, "body": …}) ou, à défaut, envoie des messages
+    entrants synthétiques depuis les numéros de leads existants
+  - CrmUser : se connecte (/api/auth/login/) puis navigue dans le CRM
+    (recherches de leads v1 / v2, contrats, conversations, fiche lead)
+  - latence de bout en bout WhatsApp : d'un message entrant posté au webhook
+    jusqu'à la réponse de l'agent reçue par le faux Graph API (file Django-Q,
+    Gemini, envoi Meta compris)
+  - QueueDepthSampler : profondeur de la file Django-Q échantillonnée pendant
+    toute la durée du test
+
+Le rapport donne, par requête, le nombre d'appels, d'échecs, le débit et les
+percentiles p50 / p90 / p95 / p99 / max, plus la série de profondeur de file.
+"""
+import itertools
+import json
+import logging
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+from django.db import connection
+
+from api.core.loadtest.fakes import FakeProviders
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PATH = "/api/whatsapp/webhook/"
+E2E_WHATSAPP = "e2e WhatsApp → réponse agent"
+PERCENTILES = (50, 90, 95, 99)
+
+# (nom, poids, chemin, paramètres)
+CRM_PAGES = [
+    ("GET leads/search", 30, "/api/leads/search/", {}),
+    ("GET leads/search ?status", 15, "/api/leads/search/", {"status_code": "RDV_CONFIRME"}),
+    ("GET v2/leads/search/v2 ?q", 10, "/api/v2/leads/search/v2/", {"q": "martin"}),
+    ("GET contracts/search", 15, "/api/contracts/search/", {}),
+    ("GET whatsapp/conversations", 20, "/api/whatsapp/conversations/", {}),
+    ("GET leads/{id}", 10, "/api/leads/{lead_id}/", {}),
+]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentile au rang le plus proche (liste triée)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class LatencyStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = defaultdict(list)
+        self._failures: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, ms: float, ok: bool = True) -> None:
+        with self._lock:
+            self._samples[name].append(ms)
+            if not ok:
+                self._failures[name] += 1
+
+    def summary(self, elapsed_s: float) -> List[dict]:
+        with self._lock:
+            items = {name: sorted(values) for name, values in self._samples.items()}
+            failures = dict(self._failures)
+        rows = []
+        for name, values in sorted(items.items()):
+            rows.append({
+                "name": name,
+                "requests": len(values),
+                "failures": failures.get(name, 0),
+                "rps": round(len(values) / elapsed_s, 2) if elapsed_s else 0.0,
+                **{f"p{q}": round(percentile(values, q), 1) for q in PERCENTILES},
+                "max": round(values[-1], 1),
+            })
+        return rows
+
+
+class QueueDepthSampler(threading.Thread):
+    """Profondeur des files Django-Q (toutes voies confondues) toutes les `interval` secondes."""
+
+    def __init__(self, interval: float = 5.0):
+        super().__init__(name="queue-depth", daemon=True)
+        self.interval = interval
+        self.samples: List[Tuple[float, Optional[int]]] = []
+        self._stopped = threading.Event()
+
+    def run(self):
+        from django_q.brokers import get_broker
+
+        from api.core.task_lanes import clusters
+
+        brokers, started = [get_broker(cluster) for cluster in clusters()], time.monotonic()
+        try:
+            while True:
+                try:
+                    depth = sum(broker.queue_size() for broker in brokers)
+                except Exception as e:
+                    logger.warning(f"⚠️ Profondeur de file illisible : {e}")
+                    depth = None
+                self.samples.append((round(time.monotonic() - started, 1), depth))
+                if self._stopped.wait(self.interval):
+                    break
+        finally:
+            connection.close()
+
+    def stop(self):
+        self._stopped.set()
+
+
+# ──────────────────────────────────────────────
+# TRAFIC WEBHOOK
+# ──────────────────────────────────────────────
+
+def load_webhook_file(path: str) -> List[Tuple[str, dict]]:
+    """Lignes JSONL : corps de webhook Meta, ou {"path": …, "body": …}."""
+    replay = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "body" in item and isinstance(item["body"], dict):
+                replay.append((item.get("path", WEBHOOK_PATH), item["body"]))
+            else:
+                replay.append((WEBHOOK_PATH, item))
+    return replay
+
+
+def inbound_webhook(phone: str, wa_id: str, text: str) -> dict:
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [{"changes": [{"field": "messages", "value": {
+            "messaging_product": "whatsapp",
+            "contacts": [{"wa_id": phone, "profile": {"name": "Loadtest"}}],
+            "messages": [{
+                "from": phone, "id": wa_id, "timestamp": str(int(time.time())),
+                "type": "text", "text": {"body": text},
+            }],
+        }}]}],
+    }
+
+
+class WebhookTraffic:
+    """Source partagée des webhooks à envoyer (rejeu cyclique ou synthétique)."""
+
+    MESSAGES = [
+        "Bonjour, je voudrais un rendez-vous pour mon titre de séjour",
+        "Oui je confirme le rendez-vous", "Quels documents dois-je apporter ?",
+        "Bonjour, où en est mon dossier ?", "Merci beaucoup",
+    ]
+
+    def __init__(self, replay: Optional[List[Tuple[str, dict]]] = None, phones: Optional[List[str]] = None,
+                 seed: Optional[int] = None):
+        self._replay = itertools.cycle(replay) if replay else None
+        self._phones = phones or [f"3367{i:07d}" for i in range(1000)]
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._run = f"{int(time.time())}"
+        self._lock = threading.Lock()
+        self.inbound_at: Dict[str, float] = {}
+
+    def next(self) -> Tuple[str, dict, Optional[str]]:
+        """(chemin, corps, numéro de l'expéditeur si message entrant synthétique)."""
+        with self._lock:
+            if self._replay:
+                path, body = next(self._replay)
+                return path, body, None
+            phone = self._rng.choice(self._phones)
+            wa_id = f"wamid.LOADTEST.{self._run}.{next(self._ids)}"
+            return WEBHOOK_PATH, inbound_webhook(phone, wa_id, self._rng.choice(self.MESSAGES)), phone
+
+    def mark_inbound(self, phone: str) -> None:
+        with self._lock:
+            self.inbound_at.setdefault(phone, time.monotonic())
+
+    def reply_received(self, phone: str) -> Optional[float]:
+        """Délai (ms) depuis le premier message entrant sans réponse de ce numéro."""
+        with self._lock:
+            started = self.inbound_at.pop(phone, None)
+        return (time.monotonic() - started) * 1000 if started is not None else None
+
+
+# ──────────────────────────────────────────────
+# UTILISATEURS VIRTUELS
+# ──────────────────────────────────────────────
+
+class VirtualUser(threading.Thread):
+
+    def __init__(self, runner: "LoadRunner", index: int):
+        super().__init__(name=f"{type(self).__name__}-{index}", daemon=True)
+        self.runner = runner
+        self.session = requests.Session()
+        self.rng = random.Random(index)
+
+    def request(self, name: str, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.runner.base_url + path, timeout=60, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.runner.stats.record(name, (time.perf_counter() - started) * 1000, ok)
+        return response
+
+    def run(self):
+        try:
+            self.on_start()
+            while not self.runner.stopping.is_set():
+                self.task()
+                self.runner.stopping.wait(self.rng.uniform(*self.runner.wait))
+        except Exception as e:
+            logger.error(f"❌ Utilisateur virtuel {self.name} arrêté : {e}")
+
+    def on_start(self):
+        pass
+
+    def task(self):
+        raise NotImplementedError
+
+
+class WebhookUser(VirtualUser):
+
+    def task(self):
+        path, body, phone = self.runner.webhooks.next()
+        if phone:
+            self.runner.webhooks.mark_inbound(phone)
+        self.request("POST whatsapp/webhook", "POST", path, json=body)
+
+
+class CrmUser(VirtualUser):
+
+    def on_start(self):
+        response = self.request("POST auth/login", "POST", "/api/auth/login/", json=self.runner.credentials)
+        if response is None or response.status_code != 200:
+            raise RuntimeError("connexion impossible (identifiants --email / --password)")
+
+    def task(self):
+        name, _, path, params = self.rng.choices(CRM_PAGES, weights=[page[1] for page in CRM_PAGES])[0]
+        if "{lead_id}" in path:
+            if not self.runner.lead_ids:
+                return
+            path = path.format(lead_id=self.rng.choice(self.runner.lead_ids))
+        self.request(name, "GET", path, params=params)
+
+
+class LoadRunner:
+
+    def __init__(
+        self,
+        base_url: str,
+        credentials: Optional[dict] = None,
+        users: int = 10,
+        spawn_rate: float = 2.0,
+        duration: float = 60.0,
+        webhook_share: float = 0.5,
+        wait: Tuple[float, float] = (0.5, 2.0),
+        webhooks: Optional[WebhookTraffic] = None,
+        lead_ids: Optional[List[int]] = None,
+        providers: Optional[FakeProviders] = None,
+        sample_interval: float = 5.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.credentials = credentials or {}
+        self.users, self.spawn_rate, self.duration = users, spawn_rate, duration
+        self.webhook_share = webhook_share if self.credentials else 1.0
+        self.wait = wait
+        self.webhooks = webhooks or WebhookTraffic()
+        self.lead_ids = lead_ids or []
+        self.providers = providers
+        self.stats = LatencyStats()
+        self.stopping = threading.Event()
+        self.sampler = QueueDepthSampler(sample_interval)
+
+        if providers is not None:
+            providers.graph.on_message.append(self._on_agent_reply)
+
+    def _on_agent_reply(self, to: str, wa_id: str) -> None:
+        elapsed = self.webhooks.reply_received(to)
+        if elapsed is not None:
+            self.stats.record(E2E_WHATSAPP, elapsed)
+
+    def _user_classes(self) -> Iterator[type]:
+        webhook_users = round(self.users * self.webhook_share)
+        for index in range(self.users):
+            yield WebhookUser if index < webhook_users else CrmUser
+
+    def run(self) -> dict:
+        started = time.monotonic()
+        self.sampler.start()
+        threads = []
+        for index, user_class in enumerate(self._user_classes()):
+            if self.stopping.wait(0) or time.monotonic() - started >= self.duration:
+                break
+            thread = user_class(self, index)
+            thread.start()
+            threads.append(thread)
+            time.sleep(1 / self.spawn_rate)
+
+        remaining = self.duration - (time.monotonic() - started)
+        if remaining > 0:
+            self.stopping.wait(remaining)
+        self.stopping.set()
+        for thread in threads:
+            thread.join(timeout=65)
+        self.sampler.stop()
+        self.sampler.join(timeout=10)
+
+        elapsed = time.monotonic() - started
+        depths = [depth for _, depth in self.sampler.samples if depth is not None]
+        return {
+            "config": {
+                "base_url": self.base_url,
+                "users": self.users,
+                "spawn_rate": self.spawn_rate,
+                "duration_s": self.duration,
+                "webhook_share": self.webhook_share,
+            },
+            "elapsed_s": round(elapsed, 1),
+            "requests": self.stats.summary(elapsed),
+            "queue_depth": {
+                "samples": self.sampler.samples,
+                "max": max(depths, default=None),
+                "final": depths[-1] if depths else None,
+            },
+            "providers": self.providers.stats() if self.providers else {},
+        }
+
+
+def format_report(report: dict) -> str:
+    header = f"{'requête':<34}{'n':>8}{'échecs':>8}{'req/s':>8}" + "".join(
+        f"{f'p{q}':>9}" for q in PERCENTILES
+    ) + f"{'max':>9}"
+    lines = [f"Durée : {report['elapsed_s']} s", "", header, "-" * len(header)]
+    for row in report["requests"]:
+        lines.append(
+            f"{row['name'][:33]:<34}{row['requests']:>8}{row['failures']:>8}{row['rps']:>8}"
+            + "".join(f"{row[f'p{q}']:>9}" for q in PERCENTILES)
+            + f"{row['max']:>9}"
+        )
+    queue = report["queue_depth"]
+    lines += ["", f"File Django-Q : max={queue['max']} fin={queue['final']}"]
+    lines += [f"  t={at:>7}s  {depth}" for at, depth in queue["samples"]]
+    if report["providers"]:
+        lines += ["", "Faux fournisseurs : " + ", ".join(
+            f"{name} {stats['requests']} req / {stats['errors']} err" for name, stats in report["providers"].items()
+        )]
+    return "\n".join(lines)
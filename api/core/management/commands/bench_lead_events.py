@@ -0,0 +1,95 @@
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.core.loadtest.scenario import PERCENTILES, percentile
+from api.core.partitioning import PARTITIONED_TABLES, PartitionManager
+from api.leads_events.models import LeadEvent
+from api.leads_events.services import LeadEventService
+from api.utils.bulk_copy import copy_instances
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure, sur le volume présent en base (ex : generate_bench_data --lead-events 50000000 "
+        "puis manage_partitions), la latence d'insertion des événements et de la timeline par lead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--inserts", type=int, default=2000, help="Insertions unitaires mesurées.")
+        parser.add_argument("--copy-rows", type=int, default=100_000, help="Lignes du COPY mesuré.")
+        parser.add_argument("--timelines", type=int, default=200, help="Leads tirés pour la timeline.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--force", action="store_true", help="Autorise l'exécution quand ENV=production.")
+
+    def handle(self, *args, **options):
+        if getattr(settings, "ENV", "production") == "production" and not options["force"]:
+            raise CommandError("ENV=production : relancer avec --force sur une base dédiée aux benchmarks.")
+
+        rng = random.Random(options["seed"])
+        for spec in PARTITIONED_TABLES:
+            partitions = PartitionManager.partitions(spec)
+            self.stdout.write(
+                f"{spec.table}: {len(partitions)} partition(s), ~{sum(p.rows for p in partitions):_} ligne(s)"
+            )
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT lead_id, event_type_id FROM leads_events_leadevent TABLESAMPLE SYSTEM (1) LIMIT 10000")
+            sample = cursor.fetchall()
+        if not sample:
+            raise CommandError("Aucun événement : générer d'abord le jeu de données (generate_bench_data).")
+        lead_ids = list({lead_id for lead_id, _ in sample})
+        event_type_ids = list({event_type_id for _, event_type_id in sample})
+
+        header = f"{'opération':<22}" + "".join(f"{f'p{q} ms':>10}" for q in PERCENTILES) + f"{'max ms':>10}"
+        self.stdout.write(header)
+
+        try:
+            with transaction.atomic():
+                self._report("insertion", [
+                    self._time(lambda: LeadEvent.objects.create(
+                        lead_id=rng.choice(lead_ids), event_type_id=rng.choice(event_type_ids),
+                    ))
+                    for _ in range(options["inserts"])
+                ])
+                rows = [
+                    LeadEvent(lead_id=rng.choice(lead_ids), event_type_id=rng.choice(event_type_ids))
+                    for _ in range(options["copy_rows"])
+                ]
+                elapsed = self._time(lambda: copy_instances(LeadEvent, rows))
+                raise _Rollback(elapsed)
+        except _Rollback as e:
+            self.stdout.write(f"{'COPY':<22}{options['copy_rows'] / (e.args[0] / 1000):>10,.0f} lignes/s (annulé)")
+
+        since = timezone.now() - timedelta(days=7)
+        self._report("timeline par lead", [
+            self._time(lambda: LeadEventService.get_timeline_for_react_flow(rng.choice(lead_ids)))
+            for _ in range(options["timelines"])
+        ])
+        self._report("7 derniers jours", [
+            self._time(lambda: list(
+                LeadEvent.objects.filter(occurred_at__gte=since).order_by("-occurred_at")[:50]
+            ))
+            for _ in range(options["timelines"])
+        ])
+
+    def _report(self, label: str, timings: list) -> None:
+        timings = sorted(timings)
+        self.stdout.write(
+            f"{label:<22}" + "".join(f"{percentile(timings, q):>10.1f}" for q in PERCENTILES) + f"{timings[-1]:>10.1f}"
+        )
+
+    @staticmethod
+    def _time(func) -> float:
+        started = time.perf_counter()
+        func()
+        return (time.perf_counter() - started) * 1000
@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from django_q.brokers.orm import ORM
+from django_q.signing import SignedPackage
+
+from api.core.loadtest.scenario import PERCENTILES, percentile
+from api.core.redis_broker import RedisBroker
+from api.core.task_lanes import async_task
+
+
+def noop():
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la latence mise en file → démarrage des tâches Django-Q, broker ORM (polling) "
+        "et broker Redis (pop bloquant), sur une file dédiée et sans worker réel."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--broker", choices=("orm", "redis", "both"), default="both")
+        parser.add_argument("--tasks", type=int, default=200)
+        parser.add_argument("--rate", type=float, default=20.0, help="Tâches enfilées par seconde.")
+
+    def handle(self, *args, **options):
+        names = ("orm", "redis") if options["broker"] == "both" else (options["broker"],)
+        self.stdout.write(
+            f"{options['tasks']} tâches à {options['rate']:g}/s, poll ORM = {settings.Q_CLUSTER.get('poll')} s"
+        )
+        header = f"{'broker':<8}" + "".join(f"{f'p{q} ms':>10}" for q in PERCENTILES) + f"{'max ms':>10}"
+        self.stdout.write(header)
+        for name in names:
+            latencies = sorted(self.measure(name, options["tasks"], options["rate"]))
+            self.stdout.write(
+                f"{name:<8}" + "".join(f"{percentile(latencies, q):>10.1f}" for q in PERCENTILES)
+                + f"{latencies[-1]:>10.1f}"
+            )
+
+    @staticmethod
+    def measure(name: str, tasks: int, rate: float) -> list:
+        list_key = f"bench-{name}-{os.getpid()}"
+        broker = ORM(list_key=list_key) if name == "orm" else RedisBroker(list_key=list_key)
+        latencies = []
+
+        def consume():
+            # Boucle du pusher django_q : dequeue, décodage, acquittement
+            try:
+                while len(latencies) < tasks:
+                    for ack_id, payload in broker.dequeue() or ():
+                        task = SignedPackage.loads(payload)
+                        latencies.append((timezone.now() - task["started"]).total_seconds() * 1000)
+                        broker.acknowledge(ack_id)
+            finally:
+                connection.close()
+
+        consumer = threading.Thread(target=consume, daemon=True)
+        consumer.start()
+        try:
+            for _ in range(tasks):
+                async_task(noop, broker=broker)
+                time.sleep(1 / rate)
+            consumer.join(timeout=60)
+        finally:
+            broker.delete_queue()
+        return latencies
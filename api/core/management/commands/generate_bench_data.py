@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.core.bench_data import DEFAULT_COUNTS, BenchDataGenerator, scaled_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère par COPY un jeu de données synthétique réaliste au volume de la production "
+        "(leads, contrats, paiements, messages WhatsApp, événements), pour les benchmarks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", type=float, default=1.0,
+            help="Multiplicateur des volumes par défaut (ex : 0.01 pour 10 000 leads).",
+        )
+        for name, count in DEFAULT_COUNTS.items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}", type=int, default=None, dest=name,
+                help=f"Volume exact (par défaut {count:_} × scale).",
+            )
+        parser.add_argument("--days", type=int, default=3 * 365, help="Historique couvert, en jours.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=50_000)
+        parser.add_argument(
+            "--skip-derived", action="store_true",
+            help="Ne reconstruit pas l'index de recherche des contrats ni les synthèses journalières.",
+        )
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Autorise l'exécution quand ENV=production.",
+        )
+
+    def handle(self, *args, **options):
+        if getattr(settings, "ENV", "production") == "production" and not options["force"]:
+            raise CommandError("ENV=production : relancer avec --force sur une base dédiée aux benchmarks.")
+
+        counts = scaled_counts(options["scale"], **{name: options[name] for name in DEFAULT_COUNTS})
+        self.stdout.write("Volumes : " + ", ".join(f"{name}={count:_}" for name, count in counts.items()))
+
+        started = time.perf_counter()
+        generator = BenchDataGenerator(
+            counts,
+            days=options["days"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            log=self.stdout.write,
+        )
+        written = generator.run(derived=not options["skip_derived"])
+
+        for name, count in written.items():
+            self.stdout.write(f"  {name:<18} {count:>12_}")
+        self.stdout.write(self.style.SUCCESS(f"Jeu de données généré en {time.perf_counter() - started:.0f}s"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from api.core.partitioning import PARTITIONED_TABLES, PartitionManager
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée à l'avance les partitions mensuelles de LeadEvent / WhatsAppMessage et "
+        "compacte dans les tables d'archive les mois au-delà de la rétention."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=None,
+                            help="Mois à créer à l'avance (par défaut PARTITIONS_AHEAD_MONTHS).")
+        parser.add_argument("--retention", type=int, default=None,
+                            help="Mois conservés à chaud (par défaut PARTITION_RETENTION_MONTHS).")
+        parser.add_argument("--no-archive", action="store_true", help="Crée les partitions sans rien archiver.")
+
+    def handle(self, *args, **options):
+        for spec in PARTITIONED_TABLES:
+            created = PartitionManager.ensure(spec, ahead=options["ahead"])
+            archived = {} if options["no_archive"] else PartitionManager.archive(spec, retention=options["retention"])
+            self.stdout.write(self.style.SUCCESS(
+                f"{spec.table}: {len(created)} partition(s) créée(s), {len(archived)} archivée(s) "
+                f"({sum(archived.values())} ligne(s))"
+            ))
+            for partition in PartitionManager.partitions(spec):
+                bounds = "défaut" if partition.is_default else (
+                    f"{partition.lower:%Y-%m} → {partition.upper:%Y-%m}" if partition.lower
+                    else f"… → {partition.upper:%Y-%m}"
+                )
+                self.stdout.write(
+                    f"  {partition.name:<40} {bounds:<20} ~{partition.rows:>12_} ligne(s) "
+                    f"{partition.size_bytes / 2**20:>10.1f} Mo"
+                )
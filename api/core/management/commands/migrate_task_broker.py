@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django_q.brokers.orm import ORM
+from django_q.models import OrmQ
+
+from api.core.redis_broker import RedisBroker
+from api.core.task_lanes import LANES, default_cluster
+
+
+class Command(BaseCommand):
+    help = (
+        "Déplace les tâches Django-Q en attente (et celles d'un worker arrêté) d'un broker à l'autre, "
+        "pour chaque cluster et chaque voie. À lancer qcluster arrêtés, avant de changer TASK_BROKER."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--to", choices=("redis", "orm"), required=True)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        moved = 0
+        for cluster in (default_cluster(), *LANES):
+            orm, redis = ORM(list_key=cluster), RedisBroker(list_key=cluster)
+            if options["to"] == "redis":
+                count = self._orm_to_redis(cluster, redis, options["dry_run"])
+            else:
+                count = self._redis_to_orm(orm, redis, options["dry_run"])
+            if count:
+                self.stdout.write(f"  {cluster:<24} {count:>6} tâche(s)")
+            moved += count
+        verb = "à déplacer" if options["dry_run"] else "déplacée(s)"
+        self.stdout.write(self.style.SUCCESS(f"{moved} tâche(s) {verb} vers {options['to']}"))
+
+    @staticmethod
+    def _orm_to_redis(cluster: str, redis: RedisBroker, dry_run: bool) -> int:
+        # Ordre d'enfilage conservé ; une ligne n'est supprimée qu'une fois poussée dans Redis
+        rows = OrmQ.objects.filter(key=cluster).order_by("id")
+        if dry_run:
+            return rows.count()
+        count = 0
+        for row in rows.iterator():
+            with transaction.atomic():
+                if OrmQ.objects.filter(pk=row.pk).delete()[0]:
+                    redis.enqueue(row.payload)
+                    count += 1
+        return count
+
+    @staticmethod
+    def _redis_to_orm(orm: ORM, redis: RedisBroker, dry_run: bool) -> int:
+        pending = redis.pending()
+        if dry_run:
+            return len(pending)
+        for task_id, payload in pending:
+            orm.enqueue(payload)
+            redis.delete(task_id)
+        return len(pending)
@@ -3,6 +3,7 @@ from django.utils import timezone
 
 from api.leads.constants import RDV_A_CONFIRMER, RDV_CONFIRME
 from api.leads.models import Lead
+from api.core.reference_data import lead_statuses
 from api.utils.email.leads.tasks import send_appointment_confirmation_task
 from api.sms.notifications.leads import send_appointment_confirmation_sms_task
 
@@ -18,7 +19,7 @@ class Command(BaseCommand):
 
         leads = Lead.objects.filter(
             created_at__date=today,
-            status__code__in=[RDV_A_CONFIRMER, RDV_CONFIRME],
+            status_id__in=lead_statuses.ids_for(RDV_A_CONFIRMER, RDV_CONFIRME),
         )
 
         total = leads.count()
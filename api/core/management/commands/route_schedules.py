@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django_q.models import Schedule
+
+from api.core.task_lanes import enabled, lane_for
+
+
+class Command(BaseCommand):
+    help = (
+        "Affecte à chaque tâche planifiée (Schedule) la voie Django-Q de sa fonction "
+        "(api.core.task_lanes.ROUTES) ; --reset les remet sur le cluster par défaut."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if not enabled() and not options["reset"]:
+            self.stdout.write(self.style.WARNING("TASK_LANES_ENABLED=False : aucune voie n'est consommée."))
+            return
+
+        changed = 0
+        for schedule in Schedule.objects.order_by("id"):
+            cluster = None if options["reset"] else lane_for(schedule.func)
+            if schedule.cluster == cluster:
+                continue
+            self.stdout.write(f"  {schedule.name or schedule.func:<50} {schedule.cluster or '-'} → {cluster or '-'}")
+            if not options["dry_run"]:
+                Schedule.objects.filter(pk=schedule.pk).update(cluster=cluster)
+            changed += 1
+        self.stdout.write(self.style.SUCCESS(f"{changed} tâche(s) planifiée(s) réaffectée(s)"))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.core.loadtest.fakes import DEFAULT_PORTS, FakeProviders, add_provider_arguments, profiles_from_options
+
+
+class Command(BaseCommand):
+    help = (
+        "Démarre les faux fournisseurs (Graph API, OVH, Gemini, SMTP) et affiche les variables "
+        "d'environnement à exporter pour le serveur et le qcluster. Ctrl-C pour arrêter."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument(
+            "--webhook-url", default=None,
+            help="Webhook WhatsApp du serveur testé : le faux Graph API y renvoie les statuts sent/delivered/read.",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+        add_provider_arguments(parser)
+
+    def handle(self, *args, **options):
+        providers = FakeProviders(
+            profiles_from_options(options),
+            ports=DEFAULT_PORTS,
+            host=options["host"],
+            webhook_url=options["webhook_url"],
+            seed=options["seed"],
+        ).start()
+        for key, value in providers.env().items():
+            self.stdout.write(f"export {key}={value}")
+        self.stdout.write(self.style.SUCCESS("Faux fournisseurs démarrés (Ctrl-C pour arrêter)"))
+
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            providers.stop()
+            for name, stats in providers.stats().items():
+                self.stdout.write(f"  {name:<8} {stats['requests']:>8} requêtes  {stats['errors']:>6} erreurs")
@@ -0,0 +1,94 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.core.loadtest.fakes import DEFAULT_PORTS, FakeProviders, add_provider_arguments, profiles_from_options
+from api.core.loadtest.scenario import LoadRunner, WebhookTraffic, format_report, load_webhook_file
+from api.leads.models import Lead
+from api.whatsapp.utils import normalize_phone_for_meta
+
+
+class Command(BaseCommand):
+    help = (
+        "Test de charge d'un serveur en cours d'exécution : trafic webhook WhatsApp (rejoué ou synthétique) "
+        "et navigation CRM, avec percentiles de latence et profondeur de la file Django-Q."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--users", type=int, default=10, help="Utilisateurs virtuels simultanés.")
+        parser.add_argument("--spawn-rate", type=float, default=2.0, help="Utilisateurs démarrés par seconde.")
+        parser.add_argument("--duration", type=float, default=60.0, help="Durée du test, en secondes.")
+        parser.add_argument(
+            "--webhook-share", type=float, default=0.5,
+            help="Part des utilisateurs qui postent des webhooks (le reste navigue dans le CRM).",
+        )
+        parser.add_argument(
+            "--webhooks", default=None, metavar="FICHIER.jsonl",
+            help="Webhooks à rejouer (un corps Meta par ligne, ou {\"path\", \"body\"}). Synthétiques sinon.",
+        )
+        parser.add_argument("--wait", default="0.5:2", metavar="MIN:MAX", help="Temps de réflexion (s).")
+        parser.add_argument("--email", default=os.getenv("LOADTEST_EMAIL"))
+        parser.add_argument("--password", default=os.getenv("LOADTEST_PASSWORD"))
+        parser.add_argument("--sample-interval", type=float, default=5.0, help="Pas d'échantillonnage de la file.")
+        parser.add_argument(
+            "--no-fakes", action="store_true",
+            help="Ne démarre pas les faux fournisseurs (déjà lancés par run_fake_providers).",
+        )
+        parser.add_argument("--report", default=None, metavar="FICHIER.json", help="Rapport complet en JSON.")
+        parser.add_argument("--seed", type=int, default=None)
+        add_provider_arguments(parser)
+
+    def handle(self, *args, **options):
+        try:
+            wait = tuple(float(part) for part in options["wait"].split(":"))
+            assert len(wait) == 2
+        except (ValueError, AssertionError):
+            raise CommandError("--wait attend MIN:MAX en secondes, ex. 0.5:2")
+
+        credentials = None
+        if options["email"] and options["password"]:
+            credentials = {"email": options["email"], "password": options["password"]}
+        elif options["webhook_share"] < 1:
+            self.stdout.write(self.style.WARNING("Sans --email / --password : trafic webhook uniquement."))
+
+        # Numéros et fiches réels : les messages entrants retrouvent leur lead
+        leads = list(Lead.objects.order_by("-id").values_list("id", "phone")[:2000])
+        phones = [normalize_phone_for_meta(phone) for _, phone in leads if phone] or None
+        replay = load_webhook_file(options["webhooks"]) if options["webhooks"] else None
+
+        providers = None
+        if not options["no_fakes"]:
+            webhook_url = options["base_url"].rstrip("/") + "/api/whatsapp/webhook/"
+            providers = FakeProviders(
+                profiles_from_options(options), ports=DEFAULT_PORTS, webhook_url=webhook_url, seed=options["seed"],
+            ).start()
+            self.stdout.write("Faux fournisseurs démarrés ; le serveur et le qcluster doivent tourner avec :")
+            for key, value in providers.env().items():
+                self.stdout.write(f"  export {key}={value}")
+
+        runner = LoadRunner(
+            options["base_url"],
+            credentials=credentials,
+            users=options["users"],
+            spawn_rate=options["spawn_rate"],
+            duration=options["duration"],
+            webhook_share=options["webhook_share"],
+            wait=wait,
+            webhooks=WebhookTraffic(replay, phones, seed=options["seed"]),
+            lead_ids=[lead_id for lead_id, _ in leads],
+            providers=providers,
+            sample_interval=options["sample_interval"],
+        )
+        try:
+            report = runner.run()
+        finally:
+            if providers:
+                providers.stop()
+
+        self.stdout.write(format_report(report))
+        if options["report"]:
+            with open(options["report"], "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['report']}"))
@@ -0,0 +1,382 @@
+"""
+Partitionnement mensuel des tables d'historique (PostgreSQL, RANGE).
+
+LeadEvent (occurred_at) et WhatsAppMessage (timestamp) ne font que croître,
+alors que les lectures portent sur le récent ou sur un lead. Chaque table est
+partitionnée par mois (UTC) sur sa date :
+
+  - <table>_legacy   : lignes antérieures au partitionnement, attachées telles
+                       quelles (MINVALUE → mois suivant la migration), sans copie
+  - <table>_pAAAA_MM : un mois, créé à l'avance (PARTITIONS_AHEAD_MONTHS)
+  - <table>_default  : filet de sécurité pour les dates hors des mois créés ;
+                       ses lignes rejoignent leur mois à la création de celui-ci
+
+Au-delà de PARTITION_RETENTION_MONTHS, une partition est compactée dans la
+table d'archive du modèle (seul l'index par lead y est conservé) : copie par
+lots idempotente, puis DETACH + DROP. Les lectures par lead lisent d'abord les
+partitions chaudes, puis l'archive ; pendant la copie, la ligne chaude prime.
+
+Contraintes PostgreSQL : la clé primaire inclut la date (id, date) et aucune
+clé étrangère ne peut viser la table partitionnée (db_constraint=False).
+
+Maintenance quotidienne : api.core.tasks.maintain_partitions (Django-Q) ou
+manage.py manage_partitions. État : /api/perf/partitions/.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 50_000
+
+_BOUNDS = re.compile(r"FROM \((?P<lower>.+?)\) TO \((?P<upper>.+?)\)")
+
+
+@dataclass(frozen=True)
+class PartitionedTable:
+    model: str      # "app_label.Model"
+    column: str     # colonne de partitionnement
+    archive: str    # modèle d'archive (mêmes noms de colonnes)
+
+    @property
+    def table(self) -> str:
+        return apps.get_model(self.model)._meta.db_table
+
+    @property
+    def archive_model(self):
+        return apps.get_model(self.archive)
+
+
+@dataclass
+class Partition:
+    name: str
+    lower: Optional[datetime]   # None : MINVALUE (ou partition par défaut)
+    upper: Optional[datetime]
+    rows: int                   # estimation (pg_class.reltuples)
+    size_bytes: int
+    is_default: bool = False
+
+
+PARTITIONED_TABLES = [
+    PartitionedTable("leads_events.LeadEvent", "occurred_at", "leads_events.LeadEventArchive"),
+    PartitionedTable("whatsapp.WhatsAppMessage", "timestamp", "whatsapp.WhatsAppMessageArchive"),
+]
+
+
+def month_start(dt: datetime) -> datetime:
+    return dt.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(dt: datetime, months: int) -> datetime:
+    month = dt.month - 1 + months
+    return dt.replace(year=dt.year + month // 12, month=month % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def _literal(dt: datetime) -> str:
+    return f"'{dt.isoformat()}'"
+
+
+def _legacy_name(name: str) -> str:
+    return f"{name[:56]}_legacy"
+
+
+# ─────────────────────────────────────
+# CONVERSION (migrations)
+# ─────────────────────────────────────
+
+def convert_to_partitioned(conn, table: str, column: str, ahead: Optional[int] = None) -> None:
+    """
+    Convertit `table` en table partitionnée par mois sur `column`.
+
+    Les lignes existantes restent en place : l'ancienne table devient la
+    partition <table>_legacy (ses index équivalents sont réutilisés) ; vide,
+    elle est supprimée. Crée ensuite la partition par défaut et les mois à venir.
+    """
+    q = conn.ops.quote_name
+    legacy = f"{table}_legacy"
+    now = timezone.now()
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')",
+            [table],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+            [table],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(f"SELECT max({q(column)}), count(*) > 0 FROM {q(table)}")
+        max_date, has_rows = cursor.fetchone()
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        (sequence,) = cursor.fetchone()
+        cursor.execute(f"SELECT CASE WHEN is_called THEN last_value + 1 ELSE last_value END FROM {sequence}")
+        (next_id,) = cursor.fetchone()
+
+        # 1. L'ancienne table devient <table>_legacy ; la séquence des id lui est retirée
+        cursor.execute(f"ALTER TABLE {q(table)} RENAME TO {q(legacy)}")
+        for name, _ in indexes:
+            cursor.execute(f"ALTER INDEX {q(name)} RENAME TO {q(_legacy_name(name))}")
+        for name, kind, _ in constraints:
+            if kind == "p":  # remplacée par la clé primaire (id, date) de la table partitionnée
+                cursor.execute(f"ALTER TABLE {q(legacy)} DROP CONSTRAINT {q(_legacy_name(name))}")
+        cursor.execute(f"ALTER TABLE {q(legacy)} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+        cursor.execute(f"ALTER TABLE {q(legacy)} ALTER COLUMN id DROP DEFAULT")
+
+        # 2. Table partitionnée : mêmes colonnes, clé primaire (id, date), mêmes index et FK
+        cursor.execute(
+            f"CREATE TABLE {q(table)} (LIKE {q(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+            f"PARTITION BY RANGE ({q(column)})"
+        )
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [sequence])
+        if cursor.fetchone()[0]:
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {q(table)}.id")
+        else:
+            cursor.execute(f"CREATE SEQUENCE {sequence} OWNED BY {q(table)}.id")
+        cursor.execute("SELECT setval(%s, %s, false)", [sequence, next_id])
+        cursor.execute(f"ALTER TABLE {q(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}'::regclass)")
+
+        for name, kind, definition in constraints:
+            if kind == "p":
+                definition = f"PRIMARY KEY (id, {q(column)})"
+            cursor.execute(f"ALTER TABLE {q(table)} ADD CONSTRAINT {q(name)} {definition}")
+        constraint_names = {name for name, _, _ in constraints}
+        for name, definition in indexes:
+            if name not in constraint_names:
+                cursor.execute(definition)
+
+        # 3. Lignes existantes : partition legacy, sans copie
+        first_month = month_start(now)
+        if has_rows:
+            first_month = add_months(month_start(max(now, max_date)), 1)
+            cursor.execute(
+                f"ALTER TABLE {q(table)} ATTACH PARTITION {q(legacy)} "
+                f"FOR VALUES FROM (MINVALUE) TO ({_literal(first_month)})"
+            )
+        else:
+            cursor.execute(f"DROP TABLE {q(legacy)}")
+
+        cursor.execute(f"CREATE TABLE {q(table + '_default')} PARTITION OF {q(table)} DEFAULT")
+        month, last = first_month, add_months(month_start(now), _ahead(ahead))
+        while month <= last:
+            cursor.execute(
+                f"CREATE TABLE {q(partition_name(table, month))} PARTITION OF {q(table)} "
+                f"FOR VALUES FROM ({_literal(month)}) TO ({_literal(add_months(month, 1))})"
+            )
+            month = add_months(month, 1)
+
+
+def _ahead(ahead: Optional[int] = None) -> int:
+    return ahead if ahead is not None else getattr(settings, "PARTITIONS_AHEAD_MONTHS", 3)
+
+
+def _retention(retention: Optional[int] = None) -> int:
+    return retention if retention is not None else getattr(settings, "PARTITION_RETENTION_MONTHS", 24)
+
+
+class PartitionManager:
+
+    @staticmethod
+    def partitions(spec: PartitionedTable) -> List[Partition]:
+        """Partitions de la table, triées par borne inférieure (défaut en dernier)."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), "
+                "       greatest(c.reltuples, 0)::bigint, pg_total_relation_size(c.oid) "
+                "  FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                " WHERE i.inhparent = %s::regclass",
+                [spec.table],
+            )
+            rows = cursor.fetchall()
+
+        partitions = []
+        for name, bound, estimate, size in rows:
+            match = _BOUNDS.search(bound)
+            if not match:
+                partitions.append(Partition(name, None, None, estimate, size, is_default=True))
+                continue
+            lower, upper = (
+                None if value == "MINVALUE" else parse_datetime(value.strip("'"))
+                for value in (match["lower"], match["upper"])
+            )
+            partitions.append(Partition(name, lower, upper, estimate, size))
+        return sorted(partitions, key=lambda p: (p.is_default, p.lower or datetime.min.replace(tzinfo=dt_timezone.utc)))
+
+    # ─────────────────────────────────────
+    # CRÉATION À L'AVANCE
+    # ─────────────────────────────────────
+
+    @classmethod
+    def ensure(cls, spec: PartitionedTable, ahead: Optional[int] = None, now: Optional[datetime] = None,
+               since: Optional[datetime] = None) -> List[str]:
+        """
+        Crée les mois manquants, du mois courant (ou de `since`) à `ahead` mois,
+        ainsi que ceux des lignes tombées dans la partition par défaut.
+        Retourne les partitions créées.
+        """
+        now = now or timezone.now()
+        q = connection.ops.quote_name
+        default = f"{spec.table}_default"
+
+        months = set()
+        month, last = month_start(min(since or now, now)), add_months(month_start(now), _ahead(ahead))
+        while month <= last:
+            months.add(month)
+            month = add_months(month, 1)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT DISTINCT date_trunc('month', {q(spec.column)} AT TIME ZONE 'UTC') FROM {q(default)}"
+            )
+            months.update(row[0].replace(tzinfo=dt_timezone.utc) for row in cursor.fetchall())
+
+        ranges = [(p.lower, p.upper) for p in cls.partitions(spec) if not p.is_default]
+        created = []
+        for month in sorted(months):
+            covered = any((lower is None or lower <= month) and month < upper for lower, upper in ranges)
+            if not covered:
+                cls._create(spec, month)
+                created.append(partition_name(spec.table, month))
+        if created:
+            logger.info("🗂️ Partitions créées (%s) : %s", spec.table, ", ".join(created))
+        return created
+
+    @staticmethod
+    def _create(spec: PartitionedTable, month: datetime) -> None:
+        """Crée le mois ; les lignes de la partition par défaut qui en relèvent y sont déplacées."""
+        q = connection.ops.quote_name
+        table, column = q(spec.table), q(spec.column)
+        name, default = q(partition_name(spec.table, month)), q(f"{spec.table}_default")
+        bounds = f"FOR VALUES FROM ({_literal(month)}) TO ({_literal(add_months(month, 1))})"
+        lower, upper = month, add_months(month, 1)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {column} >= %s AND {column} < %s)",
+                [lower, upper],
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(f"CREATE TABLE {name} PARTITION OF {table} {bounds}")
+                return
+            cursor.execute(
+                f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+            )
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {default} WHERE {column} >= %s AND {column} < %s RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved",
+                [lower, upper],
+            )
+            cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}")
+
+    # ─────────────────────────────────────
+    # ARCHIVAGE
+    # ─────────────────────────────────────
+
+    @classmethod
+    def archive(cls, spec: PartitionedTable, retention: Optional[int] = None,
+                now: Optional[datetime] = None, batch_size: int = ARCHIVE_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Compacte dans l'archive les partitions entièrement antérieures à
+        `retention` mois. Retourne {partition: lignes archivées}.
+        """
+        cutoff = add_months(month_start(now or timezone.now()), -_retention(retention))
+        archived = {}
+        for partition in cls.partitions(spec):
+            if not partition.is_default and partition.upper <= cutoff:
+                archived[partition.name] = cls._archive_partition(spec, partition.name, batch_size)
+        if archived:
+            logger.info("📦 Partitions archivées (%s) : %s", spec.table, archived)
+        return archived
+
+    @staticmethod
+    def _archive_partition(spec: PartitionedTable, name: str, batch_size: int) -> int:
+        """
+        Copie par lots d'id (ON CONFLICT DO NOTHING : reprise sans doublon),
+        puis, dans une transaction courte : rattrapage, DETACH et DROP.
+        """
+        q = connection.ops.quote_name
+        archive = spec.archive_model._meta.db_table
+        columns = ", ".join(q(field.column) for field in spec.archive_model._meta.concrete_fields)
+        insert = (
+            f"INSERT INTO {q(archive)} ({columns}) SELECT {columns} FROM {q(name)} "
+            f"WHERE id > %s AND id <= %s ON CONFLICT (id) DO NOTHING"
+        )
+
+        copied, last_id = 0, 0
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute(
+                    f"SELECT max(id) FROM (SELECT id FROM {q(name)} WHERE id > %s ORDER BY id LIMIT %s) AS batch",
+                    [last_id, batch_size],
+                )
+                (upto,) = cursor.fetchone()
+                if upto is None:
+                    break
+                cursor.execute(insert, [last_id, upto])
+                copied += cursor.rowcount
+                last_id = upto
+
+            with transaction.atomic():
+                cursor.execute(f"ALTER TABLE {q(spec.table)} DETACH PARTITION {q(name)}")
+                cursor.execute(insert.replace("AND id <= %s ", ""), [last_id])
+                copied += cursor.rowcount
+                cursor.execute(f"DROP TABLE {q(name)}")
+        return copied
+
+    # ─────────────────────────────────────
+    # MAINTENANCE / ÉTAT
+    # ─────────────────────────────────────
+
+    @classmethod
+    def maintain(cls, ahead: Optional[int] = None, retention: Optional[int] = None) -> Dict[str, dict]:
+        """Crée les mois à venir puis archive les mois expirés, pour chaque table."""
+        return {
+            spec.table: {
+                "created": cls.ensure(spec, ahead=ahead),
+                "archived": cls.archive(spec, retention=retention),
+            }
+            for spec in PARTITIONED_TABLES
+        }
+
+    @classmethod
+    def summary(cls) -> Dict[str, dict]:
+        """Par table : partitions (bornes, lignes et taille estimées), lignes hors mois et archivées."""
+        summary = {}
+        for spec in PARTITIONED_TABLES:
+            partitions = cls.partitions(spec)
+            summary[spec.table] = {
+                "partitions": [
+                    {
+                        "name": p.name,
+                        "from": p.lower.isoformat() if p.lower else None,
+                        "to": p.upper.isoformat() if p.upper else None,
+                        "rows": p.rows,
+                        "size_bytes": p.size_bytes,
+                    }
+                    for p in partitions if not p.is_default
+                ],
+                "default_rows": sum(p.rows for p in partitions if p.is_default),
+                "archived_rows": _estimate(spec.archive_model._meta.db_table),
+            }
+        return summary
+
+
+def _estimate(table: str) -> int:
+    """Nombre de lignes estimé (pg_class.reltuples) : pas de COUNT(*) sur l'archive."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT greatest(reltuples, 0)::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        return cursor.fetchone()[0]
@@ -0,0 +1,239 @@
+"""
+Instrumentation SQL par requête HTTP (QueryInstrumentationMiddleware).
+
+  - chaque requête SQL passe par `record_query`, un execute_wrapper installé
+    sur chaque connexion (connexion de la requête + connexions créées par la
+    suite, ex. threads sync_to_async des vues async) ; il ne mesure que si un
+    QueryProfile est actif dans le contexte courant
+  - QueryProfile : nombre de requêtes, temps DB, requêtes lentes et
+    empreintes (SQL normalisé : littéraux, listes IN / VALUES compactés) ;
+    une empreinte répétée au-delà de QUERY_N_PLUS_ONE_THRESHOLD est suspecte
+    de N+1
+  - RouteStats : synthèse glissante par route dans Redis (un hash par heure,
+    QUERY_STATS_HOURS heures conservées), lue par /api/perf/routes/
+
+Désactivé (QUERY_INSTRUMENTATION_ENABLED=False, défaut) : le middleware lève
+MiddlewareNotUsed et aucun wrapper n'est installé, coût nul.
+
+Les threads du pool de gather_queries s'exécutent dans une copie du contexte
+de la requête : leurs requêtes sont comptées dans son QueryProfile.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY_PREFIX = "perf:routes:"
+SUSPECTS_KEY_PREFIX = "perf:suspects:"
+FINGERPRINTS_KEY = "perf:fingerprints"
+FIELD_SEP = "\t"
+SAMPLE_MAX_LENGTH = 500
+
+_current_profile: ContextVar[Optional["QueryProfile"]] = ContextVar("query_profile", default=None)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s|NULL)\s*,?)+\)", re.IGNORECASE)
+_VALUES_RE = re.compile(r"\bVALUES\s*(\((?:[^()]|\([^()]*\))*\)\s*,?\s*)+", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def slow_query_ms() -> float:
+    return getattr(settings, "QUERY_SLOW_MS", 100)
+
+
+def n_plus_one_threshold() -> int:
+    return getattr(settings, "QUERY_N_PLUS_ONE_THRESHOLD", 10)
+
+
+def stats_hours() -> int:
+    return getattr(settings, "QUERY_STATS_HOURS", 24)
+
+
+def normalize_sql(sql: str) -> str:
+    """Forme du SQL indépendante des valeurs : `WHERE id = 12` et `WHERE id = 13` → même texte."""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    sql = _VALUES_RE.sub("VALUES (...) ", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def _digest(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def fingerprint(sql: str) -> str:
+    return _digest(normalize_sql(sql))
+
+
+class QueryProfile:
+    """Mesures SQL d'une requête HTTP (alimentées en parallèle par gather_queries)."""
+
+    __slots__ = ("count", "db_ms", "slow", "shapes", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.db_ms = 0.0
+        self.slow: List[dict] = []
+        self.shapes: Dict[str, list] = {}  # empreinte → [nombre, ms, SQL normalisé]
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, duration_ms: float) -> None:
+        normalized = normalize_sql(sql)
+        key = _digest(normalized)
+        slow = duration_ms >= slow_query_ms()
+        with self._lock:
+            self.count += 1
+            self.db_ms += duration_ms
+            shape = self.shapes.get(key)
+            if shape is None:
+                self.shapes[key] = [1, duration_ms, normalized[:SAMPLE_MAX_LENGTH]]
+            else:
+                shape[0] += 1
+                shape[1] += duration_ms
+            if slow:
+                self.slow.append({"fingerprint": key, "ms": round(duration_ms, 1), "sql": normalized[:SAMPLE_MAX_LENGTH]})
+
+    def n_plus_one_suspects(self) -> List[dict]:
+        threshold = n_plus_one_threshold()
+        return sorted(
+            (
+                {"fingerprint": key, "count": count, "ms": round(ms, 1), "sql": sql}
+                for key, (count, ms, sql) in self.shapes.items()
+                if count >= threshold
+            ),
+            key=lambda s: s["count"],
+            reverse=True,
+        )
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper : mesure la requête si un profil est actif, sinon passe-plat."""
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record(sql, (time.perf_counter() - started) * 1000)
+
+
+def install(connection) -> None:
+    """Équivalent permanent (et idempotent) de `connection.execute_wrapper(record_query)`."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_on_connection_created(sender, connection, **kwargs):
+    install(connection)
+
+
+def start_profile():
+    """Active un profil dans le contexte courant ; retourne (profil, jeton pour stop_profile)."""
+    profile = QueryProfile()
+    return profile, _current_profile.set(profile)
+
+
+def stop_profile(token) -> None:
+    _current_profile.reset(token)
+
+
+# ──────────────────────────────────────────────
+# SYNTHÈSE PAR ROUTE (Redis)
+# ──────────────────────────────────────────────
+
+class RouteStats:
+
+    METRICS = ("requests", "queries", "db_ms", "total_ms", "slow_queries", "n_plus_one")
+
+    @staticmethod
+    def _hour(moment=None) -> str:
+        return (moment or timezone.now()).strftime("%Y%m%d%H")
+
+    @classmethod
+    def record(cls, route: str, profile: QueryProfile, total_ms: float, suspects: List[dict]) -> None:
+        hour = cls._hour()
+        stats_key, suspects_key = f"{STATS_KEY_PREFIX}{hour}", f"{SUSPECTS_KEY_PREFIX}{hour}"
+        ttl = int(timedelta(hours=stats_hours() + 1).total_seconds())
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.hincrby(stats_key, f"{route}{FIELD_SEP}requests", 1)
+            pipe.hincrby(stats_key, f"{route}{FIELD_SEP}queries", profile.count)
+            pipe.hincrbyfloat(stats_key, f"{route}{FIELD_SEP}db_ms", round(profile.db_ms, 3))
+            pipe.hincrbyfloat(stats_key, f"{route}{FIELD_SEP}total_ms", round(total_ms, 3))
+            if profile.slow:
+                pipe.hincrby(stats_key, f"{route}{FIELD_SEP}slow_queries", len(profile.slow))
+            if suspects:
+                pipe.hincrby(stats_key, f"{route}{FIELD_SEP}n_plus_one", 1)
+                for suspect in suspects:
+                    pipe.hincrby(suspects_key, f"{route}{FIELD_SEP}{suspect['fingerprint']}", suspect["count"])
+                    pipe.hset(FINGERPRINTS_KEY, suspect["fingerprint"], suspect["sql"])
+                pipe.expire(suspects_key, ttl)
+                pipe.expire(FINGERPRINTS_KEY, ttl)
+            pipe.expire(stats_key, ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Statistiques SQL par route non enregistrées : {e}")
+
+    @classmethod
+    def summary(cls, hours: Optional[int] = None) -> List[dict]:
+        """Synthèse des `hours` dernières heures, routes triées par temps DB cumulé."""
+        hours = min(hours or stats_hours(), stats_hours())
+        now = timezone.now()
+        client = get_redis()
+        pipe = client.pipeline(transaction=False)
+        for offset in range(hours):
+            hour = cls._hour(now - timedelta(hours=offset))
+            pipe.hgetall(f"{STATS_KEY_PREFIX}{hour}")
+            pipe.hgetall(f"{SUSPECTS_KEY_PREFIX}{hour}")
+        results = pipe.execute()
+
+        totals: Dict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(cls.METRICS, 0))
+        suspects: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for stats, hour_suspects in zip(results[::2], results[1::2]):
+            for field, value in stats.items():
+                route, metric = field.decode().rsplit(FIELD_SEP, 1)
+                totals[route][metric] += float(value)
+            for field, value in hour_suspects.items():
+                route, key = field.decode().rsplit(FIELD_SEP, 1)
+                suspects[route][key] += int(value)
+
+        keys = {key for by_key in suspects.values() for key in by_key}
+        samples = dict(zip(keys, client.hmget(FINGERPRINTS_KEY, list(keys)))) if keys else {}
+
+        rows = []
+        for route, metrics in totals.items():
+            requests = int(metrics["requests"]) or 1
+            rows.append({
+                "route": route,
+                "requests": int(metrics["requests"]),
+                "avg_queries": round(metrics["queries"] / requests, 1),
+                "avg_db_ms": round(metrics["db_ms"] / requests, 1),
+                "avg_total_ms": round(metrics["total_ms"] / requests, 1),
+                "db_ms": round(metrics["db_ms"], 1),
+                "slow_queries": int(metrics["slow_queries"]),
+                "n_plus_one_requests": int(metrics["n_plus_one"]),
+                "n_plus_one_suspects": [
+                    {
+                        "fingerprint": key,
+                        "queries": count,
+                        "sql": samples[key].decode() if samples.get(key) else None,
+                    }
+                    for key, count in sorted(suspects[route].items(), key=lambda item: item[1], reverse=True)[:5]
+                ],
+            })
+        return sorted(rows, key=lambda row: row["db_ms"], reverse=True)
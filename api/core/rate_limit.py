@@ -0,0 +1,208 @@
+"""
+Limiteur de débit distribué des fournisseurs d'envoi (seaux à jetons Redis).
+
+Chaque fournisseur (PROVIDER_RATE_LIMITS : OVH SMS, Meta WhatsApp) a un seau
+global et un seau par destinataire. `reserve` prend un jeton dans chacun, de
+façon atomique (script Lua) et avant l'appel au fournisseur : s'il en manque
+un, rien n'est consommé et RateLimited porte l'attente avant le prochain
+jeton. Les appelants reportent l'envoi au lieu d'échouer :
+
+  - relais de l'outbox : la notification est replanifiée à l'échéance,
+    sans compter de tentative
+  - workers Django-Q (@defer_when_limited) : Schedule ONCE à l'échéance
+  - réponses de l'agent Kemia : envoi replanifié (@defer_when_limited)
+  - envoi depuis le CRM : 429 immédiat avec Retry-After
+
+`reserve` n'attend jamais : il ne bloque ni une requête ni un worker. Redis
+indisponible, l'envoi passe sans limite plutôt que d'échouer.
+
+Niveau des seaux, réservations refusées et reports : /api/perf/rate-limits/
+et /api/perf/tasks/metrics/.
+"""
+import logging
+import math
+import time
+from datetime import timedelta
+from functools import wraps
+from typing import Dict, Optional
+
+import redis
+from django.conf import settings
+from django.utils import timezone
+
+from api.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+OVH_SMS = "ovh_sms"
+META_WHATSAPP = "meta_whatsapp"
+
+STATS_KEY = "perf:ratelimit"
+
+# KEYS[1] = compteurs, KEYS[2..] = seaux ; ARGV = maintenant, fournisseur, puis (débit, capacité) par seau.
+# Tout ou rien : sans jeton dans l'un des seaux, aucun n'est débité.
+_RESERVE = """
+local now = tonumber(ARGV[1])
+local levels, wait = {}, 0
+for i = 2, #KEYS do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local elapsed = math.max(0, now - (tonumber(state[2]) or now))
+    tokens = math.min(burst, tokens + elapsed * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+end
+if wait > 0 then
+    redis.call('HINCRBY', KEYS[1], ARGV[2] .. '\\tthrottled', 1)
+    return tostring(wait)
+end
+for i = 2, #KEYS do
+    local rate, burst = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    redis.call('HSET', KEYS[i], 'tokens', levels[i] - 1, 'ts', now)
+    redis.call('EXPIRE', KEYS[i], math.ceil(burst / rate) + 60)
+end
+redis.call('HINCRBY', KEYS[1], ARGV[2] .. '\\tgranted', 1)
+return '0'
+"""
+
+
+class RateLimited(Exception):
+    """Plus de jeton : l'envoi doit être reporté de `retry_after` secondes."""
+
+    def __init__(self, provider: str, retry_after: float):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(f"débit {provider} atteint, nouvel essai dans {retry_after:.1f} s")
+
+
+def enabled() -> bool:
+    return getattr(settings, "RATE_LIMIT_ENABLED", True)
+
+
+def _limits(provider: str) -> Optional[dict]:
+    return getattr(settings, "PROVIDER_RATE_LIMITS", {}).get(provider)
+
+
+def _bucket_key(provider: str, destination: str = None) -> str:
+    return f"ratelimit:{provider}" if destination is None else f"ratelimit:{provider}:dest:{destination}"
+
+
+class RateLimiter:
+
+    @staticmethod
+    def reserve(provider: str, *destinations: str) -> None:
+        """Réserve un envoi vers `destinations` ; sans jeton disponible, lève RateLimited."""
+        limits = _limits(provider)
+        if not enabled() or not limits:
+            return
+
+        keys, args = [STATS_KEY, _bucket_key(provider)], [limits["rate"], limits["burst"]]
+        if limits.get("destination_rate"):
+            for destination in destinations:
+                keys.append(_bucket_key(provider, destination))
+                args.extend([limits["destination_rate"], limits["destination_burst"]])
+
+        try:
+            wait = float(get_redis().eval(_RESERVE, len(keys), *keys, time.time(), provider, *args))
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Limiteur de débit {provider} indisponible, envoi non limité : {e}")
+            return
+        if wait:
+            raise RateLimited(provider, wait)
+
+    @staticmethod
+    def record_deferral(provider: str) -> None:
+        get_redis().hincrby(STATS_KEY, f"{provider}\tdeferred", 1)
+
+    @staticmethod
+    def reset() -> None:
+        redis = get_redis()
+        keys = list(redis.scan_iter(match="ratelimit:*"))
+        redis.delete(STATS_KEY, *keys)
+
+    # ─────────────────────────────────────
+    # MÉTRIQUES
+    # ─────────────────────────────────────
+
+    @staticmethod
+    def summary() -> Dict[str, dict]:
+        """Par fournisseur : jetons disponibles (seau global), capacité, compteurs."""
+        redis = get_redis()
+        providers = list(getattr(settings, "PROVIDER_RATE_LIMITS", {}).items())
+        pipe = redis.pipeline()
+        for provider, _ in providers:
+            pipe.hmget(_bucket_key(provider), "tokens", "ts")
+        pipe.hgetall(STATS_KEY)
+        *states, counters = pipe.execute()
+        counters = {field.decode(): int(value) for field, value in counters.items()}
+
+        now, summary = time.time(), {}
+        for (provider, limits), (tokens, ts) in zip(providers, states):
+            if tokens is None:
+                level = limits["burst"]
+            else:
+                level = min(limits["burst"], float(tokens) + max(0.0, now - float(ts)) * limits["rate"])
+            summary[provider] = {
+                "tokens": round(level, 2),
+                "capacity": limits["burst"],
+                "rate_per_second": limits["rate"],
+                "granted": counters.get(f"{provider}\tgranted", 0),
+                "throttled": counters.get(f"{provider}\tthrottled", 0),
+                "deferred": counters.get(f"{provider}\tdeferred", 0),
+            }
+        return summary
+
+    @classmethod
+    def prometheus(cls, summary: Optional[Dict[str, dict]] = None) -> str:
+        summary = summary if summary is not None else cls.summary()
+        lines = []
+        for metric, help_text, key in [
+            ("papex_rate_limit_tokens", "Jetons disponibles dans le seau du fournisseur.", "tokens"),
+            ("papex_rate_limit_capacity", "Capacité du seau du fournisseur.", "capacity"),
+        ]:
+            lines.extend([f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"])
+            lines.extend(f'{metric}{{provider="{provider}"}} {state[key]}' for provider, state in summary.items())
+        lines.extend(["# HELP papex_rate_limit_reservations_total Réservations de jetons, par issue.",
+                      "# TYPE papex_rate_limit_reservations_total counter"])
+        for provider, state in summary.items():
+            for outcome in ("granted", "throttled"):
+                lines.append(f'papex_rate_limit_reservations_total{{provider="{provider}",outcome="{outcome}"}} '
+                             f'{state[outcome]}')
+        lines.extend(["# HELP papex_rate_limit_deferrals_total Envois reportés faute de jeton.",
+                      "# TYPE papex_rate_limit_deferrals_total counter"])
+        lines.extend(f'papex_rate_limit_deferrals_total{{provider="{provider}"}} {state["deferred"]}'
+                     for provider, state in summary.items())
+        return "\n".join(lines) + "\n"
+
+
+def defer_when_limited(func):
+    """
+    Worker Django-Q : un envoi limité est replanifié à l'échéance du prochain
+    jeton (Schedule ONCE, sur la voie de la fonction) au lieu d'échouer.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except RateLimited as e:
+            from django_q.models import Schedule
+            from django_q.tasks import schedule
+
+            from api.core import task_lanes
+
+            path = f"{func.__module__}.{func.__name__}"
+            schedule(
+                path, *args,
+                schedule_type=Schedule.ONCE,
+                next_run=timezone.now() + timedelta(seconds=math.ceil(e.retry_after)),
+                cluster=task_lanes.lane_for(path) if task_lanes.enabled() else None,
+                **kwargs,
+            )
+            RateLimiter.record_deferral(e.provider)
+            logger.warning("⏳ %s reporté de %.0f s (%s)", path, math.ceil(e.retry_after), e.provider)
+            return f"deferred {math.ceil(e.retry_after)}s ({e.provider})"
+
+    return wrapper
@@ -0,0 +1,161 @@
+"""
+Broker Django-Q sur Redis, fiable (Q_CLUSTER["broker_class"], TASK_BROKER=redis).
+
+Le broker ORM sonde Postgres toutes les `poll` secondes : jusqu'à 1 s de
+latence par tâche et un SELECT/UPDATE permanent sur la base principale. Le
+broker Redis fourni par django_q dépile par BLPOP mais perd la tâche si le
+worker meurt (pas d'acquittement). Celui-ci garde la sémantique du broker
+ORM :
+
+  - enqueue : charge utile dans un hash, identifiant poussé dans la file
+  - dequeue : BRPOPLPUSH bloquant (≤ BLOCK_TIMEOUT s) de la file vers la
+    liste « en cours », plus un bail de `retry` secondes (ZSET des échéances)
+  - acknowledge : retire l'identifiant et la charge utile
+  - bail expiré (worker tué, timeout) : la tâche revient en tête de file,
+    comme un lock ORM échu ; max_attempts reste appliqué par le moniteur
+
+Les résultats (Success / Failure) et le scheduler restent en base : seul
+l'acheminement des tâches change. Bascule d'un broker à l'autre, tâches en
+attente comprises : manage.py migrate_task_broker.
+"""
+import time
+from typing import List, Optional, Tuple
+
+from django_q.brokers import Broker
+from django_q.conf import Conf
+
+from api.utils.redis_client import get_redis
+
+BLOCK_TIMEOUT = 1  # s, < socket_timeout du client partagé
+REQUEUE_INTERVAL = 5  # s entre deux remises en file des baux expirés
+
+# Baux échus → tête de file ; identifiants « en cours » sans bail (worker tué
+# entre BRPOPLPUSH et ZADD) → bail posé, remis en file à son échéance
+_REQUEUE_EXPIRED = """
+local now, lease = tonumber(ARGV[1]), tonumber(ARGV[2])
+for _, id in ipairs(redis.call('LRANGE', KEYS[2], 0, -1)) do
+    if not redis.call('ZSCORE', KEYS[3], id) then
+        redis.call('ZADD', KEYS[3], now + lease, id)
+    end
+end
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[3], id)
+    redis.call('LREM', KEYS[2], 1, id)
+    if redis.call('HEXISTS', KEYS[4], id) == 1 then
+        redis.call('RPUSH', KEYS[1], id)
+    end
+end
+return #expired
+"""
+
+
+class RedisBroker(Broker):
+
+    def __init__(self, list_key: str = None):
+        super().__init__(list_key=list_key or Conf.CLUSTER_NAME)
+        prefix = f"django_q:{self.list_key}"
+        self.queue_key = f"{prefix}:q"
+        self.processing_key = f"{prefix}:processing"
+        self.leases_key = f"{prefix}:leases"
+        self.payloads_key = f"{prefix}:payloads"
+        self.enqueued_key = f"{prefix}:enqueued"
+        self.sequence_key = f"{prefix}:seq"
+        self._requeued_at = 0.0
+
+    @staticmethod
+    def get_connection(list_key: str = None):
+        return get_redis()
+
+    @property
+    def _keys(self) -> List[str]:
+        return [self.queue_key, self.processing_key, self.leases_key, self.payloads_key, self.enqueued_key]
+
+    def enqueue(self, task) -> str:
+        task_id = str(self.connection.incr(self.sequence_key))
+        pipe = self.connection.pipeline()
+        pipe.hset(self.payloads_key, task_id, task)
+        pipe.hset(self.enqueued_key, task_id, time.time())
+        pipe.lpush(self.queue_key, task_id)
+        pipe.execute()
+        return task_id
+
+    def dequeue(self) -> Optional[List[Tuple[str, str]]]:
+        if time.monotonic() - self._requeued_at >= REQUEUE_INTERVAL:
+            self.requeue_expired()
+        task_id = self.connection.brpoplpush(self.queue_key, self.processing_key, BLOCK_TIMEOUT)
+        if task_id is None:
+            return None
+        task_id = task_id.decode()
+        pipe = self.connection.pipeline()
+        pipe.zadd(self.leases_key, {task_id: time.time() + Conf.RETRY})
+        pipe.hget(self.payloads_key, task_id)
+        payload = pipe.execute()[1]
+        if payload is None:  # acquittée entre-temps (bail expiré puis tâche terminée)
+            self.acknowledge(task_id)
+            return None
+        return [(task_id, payload.decode())]
+
+    def requeue_expired(self) -> int:
+        self._requeued_at = time.monotonic()
+        return self.connection.eval(_REQUEUE_EXPIRED, 4, *self._keys[:4], time.time(), Conf.RETRY)
+
+    def acknowledge(self, task_id):
+        pipe = self.connection.pipeline()
+        pipe.lrem(self.processing_key, 1, task_id)
+        pipe.zrem(self.leases_key, task_id)
+        pipe.hdel(self.payloads_key, task_id)
+        pipe.hdel(self.enqueued_key, task_id)
+        pipe.execute()
+
+    def delete(self, task_id):
+        """Retire la tâche où qu'elle soit (file comprise, parcours O(n))."""
+        self.connection.lrem(self.queue_key, 1, task_id)
+        self.acknowledge(task_id)
+
+    def fail(self, task_id):
+        self.acknowledge(task_id)
+
+    def queue_size(self) -> int:
+        return self.connection.llen(self.queue_key)
+
+    def lock_size(self) -> int:
+        return self.connection.llen(self.processing_key)
+
+    def oldest_age_seconds(self) -> Optional[float]:
+        """Attente de la tâche en tête de file (la prochaine servie)."""
+        task_id = self.connection.lindex(self.queue_key, -1)
+        enqueued = self.connection.hget(self.enqueued_key, task_id) if task_id else None
+        return round(time.time() - float(enqueued), 1) if enqueued else None
+
+    def pending(self) -> List[Tuple[str, str]]:
+        """(identifiant, charge utile) en attente puis en cours, dans l'ordre de service."""
+        queued = reversed(self.connection.lrange(self.queue_key, 0, -1))
+        ids = [*queued, *self.connection.lrange(self.processing_key, 0, -1)]
+        payloads = self.connection.hmget(self.payloads_key, ids) if ids else []
+        return [(task_id.decode(), payload.decode()) for task_id, payload in zip(ids, payloads) if payload]
+
+    def purge_queue(self):
+        return self.connection.delete(*self._keys)
+
+    def delete_queue(self):
+        return self.connection.delete(*self._keys, self.sequence_key)
+
+    def ping(self) -> bool:
+        return self.connection.ping()
+
+    def info(self) -> str:
+        if not self._info:
+            self._info = f"Redis fiable {self.connection.connection_pool.connection_kwargs.get('host', '')}"
+        return self._info
+
+    def set_stat(self, key: str, value: str, timeout: int):
+        self.connection.set(key, value, timeout)
+
+    def get_stat(self, key: str):
+        return self.connection.get(key)
+
+    def get_stats(self, pattern: str):
+        keys = list(self.connection.scan_iter(match=pattern))
+        if keys:
+            return self.connection.mget(keys)
@@ -0,0 +1,191 @@
+"""
+Cache process des tables de référence (statuts, services, types…).
+
+Ces tables sont minuscules et ne changent presque jamais, mais sont relues à
+chaque Lead.save, LeadEvent.log, tâche planifiée ou filtre `status__code`.
+Chaque table est chargée en mémoire (par id et par code) et versionnée dans
+Redis :
+
+  - écriture (post_save / post_delete) → version incrémentée dans Redis,
+    immédiatement puis après commit
+  - lecture → la version Redis est revérifiée au plus toutes les
+    VERSION_CHECK_INTERVAL secondes ; si elle a changé, la table est rechargée
+    (web et workers Django-Q convergent en quelques secondes)
+  - les écritures en masse (bulk_create, QuerySet.update) ne déclenchent pas
+    de signal : appeler `<table>.bump()` explicitement
+
+Les instances retournées sont des copies : les modifier n'altère pas le cache.
+
+Exemples :
+    lead_statuses.get(ABSENT)                        # DoesNotExist si absent
+    Lead.objects.filter(status_id__in=lead_statuses.ids_for(RDV_CONFIRME, RDV_PLANIFIE))
+    lead_event_types.get_or_create("DOCUMENT_SENT", defaults={"label": "..."})
+"""
+import copy
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+VERSION_CHECK_INTERVAL = 5  # secondes
+VERSION_KEY_PREFIX = "refdata:version:"
+
+
+class ReferenceTable:
+
+    def __init__(self, model_label: str, code_field: str = "code"):
+        self.model_label = model_label
+        self.code_field = code_field
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._data: Optional[Tuple[Dict, Dict]] = None  # (par id, par code), remplacé d'un bloc
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def version_key(self) -> str:
+        return f"{VERSION_KEY_PREFIX}{self.model_label}"
+
+    # ──────────────────────────────────────────────
+    # LECTURE
+    # ──────────────────────────────────────────────
+
+    def get(self, code):
+        """Comme Model.objects.get(code=...) ; lève Model.DoesNotExist."""
+        instance = self.get_or_none(code)
+        if instance is None:
+            raise self.model.DoesNotExist(f"{self.model.__name__} {self.code_field}={code!r} introuvable")
+        return instance
+
+    def get_or_none(self, code):
+        instance = self._tables()[1].get(code)
+        return copy.copy(instance) if instance is not None else None
+
+    def get_by_id(self, pk):
+        """Comme Model.objects.get(pk=...) ; lève Model.DoesNotExist."""
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise self.model.DoesNotExist(f"{self.model.__name__} pk={pk!r} introuvable")
+        instance = self._tables()[0].get(pk)
+        if instance is None:
+            # Id fourni par un client : ligne peut-être créée depuis la dernière vérification
+            instance = self.model.objects.get(pk=pk)
+            self.invalidate_local()
+        return copy.copy(instance)
+
+    def id_for(self, code) -> Optional[int]:
+        instance = self.get_or_none(code)
+        return instance.pk if instance is not None else None
+
+    def ids_for(self, *codes) -> List[int]:
+        """Ids des codes existants : `xxx_id__in=ids_for(...)` remplace le filtre `xxx__code__in` (sans jointure)."""
+        by_code = self._tables()[1]
+        return [by_code[code].pk for code in codes if code in by_code]
+
+    # Variantes async (vues ASGI) : pas de saut de thread tant que le cache est frais
+
+    async def aget_or_none(self, code):
+        instance = (await self._atables())[1].get(code)
+        return copy.copy(instance) if instance is not None else None
+
+    async def aids_for(self, *codes) -> List[int]:
+        by_code = (await self._atables())[1]
+        return [by_code[code].pk for code in codes if code in by_code]
+
+    def all(self) -> list:
+        return [copy.copy(instance) for instance in self._tables()[0].values()]
+
+    def get_or_create(self, code, defaults=None):
+        """Comme Model.objects.get_or_create(code=...) ; retourne l'instance seule."""
+        instance = self.get_or_none(code)
+        if instance is None:
+            instance, _ = self.model.objects.get_or_create(**{self.code_field: code}, defaults=defaults or {})
+        return instance
+
+    # ──────────────────────────────────────────────
+    # CHARGEMENT / VERSION
+    # ──────────────────────────────────────────────
+
+    def _remote_version(self):
+        try:
+            return cache.get(self.version_key)
+        except Exception as e:  # Redis indisponible : rechargement à chaque intervalle
+            logger.warning(f"⚠️ Version {self.model_label} illisible : {e}")
+            return object()
+
+    def _tables(self) -> Tuple[Dict, Dict]:
+        now = time.monotonic()
+        data = self._data
+        if data is not None and now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return data
+
+        with self._lock:
+            version = self._remote_version()
+            if self._data is None or version != self._version:
+                rows = list(self.model.objects.all())
+                self._data = (
+                    {row.pk: row for row in rows},
+                    {getattr(row, self.code_field): row for row in rows},
+                )
+                self._version = version
+            self._checked_at = now
+            return self._data
+
+    async def _atables(self) -> Tuple[Dict, Dict]:
+        data = self._data
+        if data is not None and time.monotonic() - self._checked_at < VERSION_CHECK_INTERVAL:
+            return data
+        return await sync_to_async(self._tables)()
+
+    def invalidate_local(self) -> None:
+        self._data = None
+
+    def bump(self) -> None:
+        """Invalide la table dans ce process et, via Redis, dans tous les autres."""
+        self.invalidate_local()
+        try:
+            cache.set(self.version_key, time.time_ns(), None)
+        except Exception as e:
+            logger.warning(f"⚠️ Invalidation {self.model_label} non propagée : {e}")
+
+
+lead_statuses = ReferenceTable("lead_status.LeadStatus")
+statuts_dossier = ReferenceTable("statut_dossier.StatutDossier")
+statuts_dossier_interne = ReferenceTable("statut_dossier_interne.StatutDossierInterne")
+services = ReferenceTable("services.Service")
+document_types = ReferenceTable("document_types.DocumentType", code_field="name")
+lead_event_types = ReferenceTable("leads_event_type.LeadEventType")
+lead_task_types = ReferenceTable("leads_task_type.LeadTaskType")
+
+TABLES = [
+    lead_statuses, statuts_dossier, statuts_dossier_interne, services,
+    document_types, lead_event_types, lead_task_types,
+]
+
+
+def clear() -> None:
+    """Vide le cache local de toutes les tables (tests, shell)."""
+    for table in TABLES:
+        table.invalidate_local()
+
+
+def connect_signals() -> None:
+    for table in TABLES:
+        def on_write(sender, table=table, **kwargs):
+            table.bump()
+            transaction.on_commit(table.bump)
+
+        post_save.connect(on_write, sender=table.model, weak=False, dispatch_uid=f"refdata-save-{table.model_label}")
+        post_delete.connect(on_write, sender=table.model, weak=False, dispatch_uid=f"refdata-delete-{table.model_label}")
@@ -0,0 +1,97 @@
+"""
+Voies (lanes) Django-Q : un cluster par famille de tâches, chacun avec sa
+file, ses workers, son timeout et sa politique de relance
+(Q_CLUSTER["ALT_CLUSTERS"]).
+
+  - realtime-notifications : relais de l'outbox des notifications aux leads,
+    autres SMS / e-mails transactionnels et vidage des statuts WhatsApp ;
+    courts, relancés vite
+  - agent : Kemia (Gemini jusqu'à 120 s) et création de leads WhatsApp
+  - documents : e-mails avec PDF en pièce jointe (contrats, reçus tirés de
+    S3) et purge S3
+  - batch-reports : traitements de masse (relances, envois groupés, tâches
+    planifiées)
+
+Le nombre de workers d'une voie plafonne les appels simultanés au
+fournisseur qu'elle sert (agent : 4 appels Gemini au plus, quelle que soit la
+file de messages entrants).
+
+`async_task` remplace celui de django_q : même signature, cluster choisi par
+ROUTES (motifs fnmatch sur le chemin de la fonction, premier qui correspond)
+sauf `cluster` explicite. Sans TASK_LANES_ENABLED, tout reste sur le cluster
+par défaut : les voies ne sont activées qu'une fois leurs qcluster démarrés
+(Q_CLUSTER_NAME=<voie> python manage.py qcluster), sinon leurs tâches
+attendraient indéfiniment.
+
+Les tâches planifiées (Schedule) sont enfilées par le scheduler de django_q :
+manage.py route_schedules leur affecte la voie de leur fonction.
+"""
+from fnmatch import fnmatchcase
+from typing import List, Optional
+
+from django.conf import settings
+from django_q import tasks as django_q_tasks
+from django_q.utils import get_func_repr
+
+REALTIME = "realtime-notifications"
+AGENT = "agent"
+DOCUMENTS = "documents"
+BATCH = "batch-reports"
+LANES = (REALTIME, AGENT, DOCUMENTS, BATCH)
+
+# Du plus spécifique au plus général
+ROUTES = [
+    ("api.whatsapp.agent.*", AGENT),
+    ("api.whatsapp.lead_service.*", AGENT),
+    ("api.utils.email.contracts.*", DOCUMENTS),
+    ("api.utils.email.recus.*", DOCUMENTS),
+    ("api.payments.tasks._run_send_contract_email", DOCUMENTS),
+    ("api.payments.tasks._run_send_receipts_email", DOCUMENTS),
+    ("api.storage_cleanup.*", DOCUMENTS),
+    ("api.core.tasks.*", BATCH),
+    ("*_batch", BATCH),
+    ("api.payments.tasks._run_send_payment_due_reminders", BATCH),
+    ("api.whatsapp.tasks.flush_status_updates", REALTIME),
+    ("api.whatsapp.tasks.*", BATCH),
+    ("api.leads.tasks.*", BATCH),
+    ("api.leads_task.tasks.*", BATCH),
+    ("api.notification_outbox.tasks.purge_*", BATCH),
+    ("api.notification_outbox.*", REALTIME),
+    ("api.sms.*", REALTIME),
+    ("api.utils.email.*", REALTIME),
+    ("api.appointment.*", REALTIME),
+    ("api.payments.tasks.*", REALTIME),
+    ("api.utils.communication.*", REALTIME),
+]
+
+
+def enabled() -> bool:
+    return getattr(settings, "TASK_LANES_ENABLED", False)
+
+
+def default_cluster() -> str:
+    return settings.Q_CLUSTER.get("cluster_name") or settings.Q_CLUSTER["name"]
+
+
+def lane_for(func) -> Optional[str]:
+    """Voie de la fonction (objet ou chemin pointé), None = cluster par défaut."""
+    path = func if isinstance(func, str) else get_func_repr(func)
+    for pattern, lane in ROUTES:
+        if path and fnmatchcase(path, pattern):
+            return lane
+    return None
+
+
+def clusters() -> List[str]:
+    """Clusters alimentés : le cluster par défaut, plus les voies si elles sont actives."""
+    return [default_cluster(), *(LANES if enabled() else ())]
+
+
+def async_task(func, *args, **kwargs):
+    """django_q.tasks.async_task, routé vers la voie de `func`."""
+    q_options = kwargs.get("q_options") or {}
+    if enabled() and "cluster" not in kwargs and "cluster" not in q_options:
+        lane = lane_for(func)
+        if lane:
+            kwargs["cluster"] = lane
+    return django_q_tasks.async_task(func, *args, **kwargs)
@@ -0,0 +1,326 @@
+"""
+Télémétrie des tâches Django-Q, par fonction et par groupe.
+
+  - pre_execute (worker) : attente entre la mise en file et le démarrage
+    (task["started"] est posé par async_task), tentatives successives d'une
+    même tâche (= relances après `retry`) ; l'heure de démarrage est glissée
+    dans le paquet de la tâche, qui repart vers le moniteur
+  - post_execute (moniteur) : durée d'exécution et issue (success, failure,
+    timeout), puis contrôle périodique du SLO des files
+  - compteurs cumulés dans un hash Redis (les workers et le moniteur sont des
+    process distincts) ; les durées sont des histogrammes à seaux fixes, au
+    sens Prometheus
+  - file (une par cluster, voies de api.core.task_lanes comprises) :
+    profondeur, tâches en cours et âge de la plus ancienne tâche en attente,
+    lus au moment de la collecte ; au-delà du SLO de la voie
+    (TASK_LANE_LATENCY_SLO_SECONDS, TASK_QUEUE_LATENCY_SLO_SECONDS à défaut),
+    alerte (log + e-mail aux
+    TASK_QUEUE_ALERT_EMAILS, une fois par TASK_QUEUE_ALERT_COOLDOWN secondes)
+
+Le contrôle du SLO tourne dans le moniteur de chaque cluster (post_execute,
+au plus une fois par SLO_CHECK_INTERVAL secondes, tous clusters confondus) :
+le moniteur est un process distinct des workers, et les requêtes web ne
+paient ni les requêtes du broker ni l'envoi de l'alerte. Un arrêt complet
+de tous les clusters se voit sur les jauges Prometheus.
+
+Exposition : /api/perf/tasks/ (synthèse JSON, admin) et /api/perf/tasks/metrics/
+(format texte Prometheus).
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db.models import Min
+from django.utils import timezone
+
+from api.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "perf:tasks"
+ATTEMPTS_KEY_PREFIX = "perf:tasks:attempts:"
+SLO_CHECK_KEY = "perf:tasks:slo_check"
+SLO_ALERT_KEY = "perf:tasks:slo_alerted"
+FIELD_SEP = "\t"
+EXECUTION_STARTED = "telemetry_started"
+
+SLO_CHECK_INTERVAL = 30
+ATTEMPTS_TTL = 24 * 3600
+
+# Seaux (secondes) : attente en file (poll 1 s → minutes) et exécution (Kemia jusqu'à 120 s)
+WAIT_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600)
+RUNTIME_BUCKETS = (0.1, 0.5, 1, 2, 5, 10, 30, 60, 90, 120, 300)
+OUTCOMES = ("success", "failure", "timeout")
+
+
+def enabled() -> bool:
+    return getattr(settings, "TASK_TELEMETRY_ENABLED", True)
+
+
+def latency_slo(cluster: Optional[str] = None) -> float:
+    """SLO d'attente de la voie `cluster` (TASK_LANE_LATENCY_SLO_SECONDS), sinon le SLO global."""
+    default = getattr(settings, "TASK_QUEUE_LATENCY_SLO_SECONDS", 60)
+    return getattr(settings, "TASK_LANE_LATENCY_SLO_SECONDS", {}).get(cluster, default)
+
+
+def task_labels(task: dict) -> tuple:
+    from django_q.utils import get_func_repr
+
+    return get_func_repr(task.get("func")) or "?", task.get("group") or ""
+
+
+def _field(func: str, group: str, metric: str) -> str:
+    return FIELD_SEP.join((func, group, metric))
+
+
+def _observe(pipe, func: str, group: str, name: str, buckets: tuple, seconds: float) -> None:
+    seconds = max(seconds, 0.0)
+    for bound in buckets:
+        if seconds <= bound:
+            pipe.hincrby(STATS_KEY, _field(func, group, f"{name}_bucket:{bound}"), 1)
+            break
+    pipe.hincrby(STATS_KEY, _field(func, group, f"{name}_count"), 1)
+    pipe.hincrbyfloat(STATS_KEY, _field(func, group, f"{name}_sum"), round(seconds, 4))
+
+
+def _seconds_since(moment) -> Optional[float]:
+    if not isinstance(moment, datetime):
+        return None
+    return (timezone.now() - moment).total_seconds()
+
+
+# ──────────────────────────────────────────────
+# SIGNAUX DJANGO-Q
+# ──────────────────────────────────────────────
+
+def on_pre_execute(sender, func, task, **kwargs):
+    if not enabled():
+        return
+    task[EXECUTION_STARTED] = timezone.now()
+    name, group = task_labels(task)
+    wait = _seconds_since(task.get("started"))
+    try:
+        client = get_redis()
+        attempts_key = f"{ATTEMPTS_KEY_PREFIX}{task.get('id')}"
+        pipe = client.pipeline(transaction=False)
+        pipe.incr(attempts_key)
+        pipe.expire(attempts_key, ATTEMPTS_TTL)
+        if wait is not None:
+            _observe(pipe, name, group, "wait", WAIT_BUCKETS, wait)
+        attempt = pipe.execute()[0]
+        if attempt > 1:
+            client.hincrby(STATS_KEY, _field(name, group, "retries"), 1)
+    except Exception as e:
+        logger.warning(f"⚠️ Télémétrie de démarrage non enregistrée ({name}) : {e}")
+
+
+def on_post_execute(sender, task, **kwargs):
+    if not enabled():
+        return
+    name, group = task_labels(task)
+    if task.get("success"):
+        outcome = "success"
+    elif "TimeoutException" in str(task.get("result", "")):
+        outcome = "timeout"
+    else:
+        outcome = "failure"
+
+    started, stopped = task.get(EXECUTION_STARTED), task.get("stopped")
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hincrby(STATS_KEY, _field(name, group, f"outcome:{outcome}"), 1)
+        if isinstance(started, datetime) and isinstance(stopped, datetime):
+            _observe(pipe, name, group, "runtime", RUNTIME_BUCKETS, (stopped - started).total_seconds())
+        if outcome == "success":
+            pipe.delete(f"{ATTEMPTS_KEY_PREFIX}{task.get('id')}")
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"⚠️ Télémétrie d'exécution non enregistrée ({name}) : {e}")
+
+    check_queue_slo()
+
+
+def check_queue_slo() -> None:
+    """Contrôle du SLO de toutes les files, au plus une fois par SLO_CHECK_INTERVAL (moniteur)."""
+    try:
+        if get_redis().set(SLO_CHECK_KEY, 1, nx=True, ex=SLO_CHECK_INTERVAL):
+            for cluster, state in QueueHealth.snapshots().items():
+                QueueHealth.check_slo(state, cluster)
+    except Exception as e:
+        logger.warning(f"⚠️ Contrôle du SLO de file impossible : {e}")
+
+
+def connect_signals():
+    from django_q.signals import post_execute, pre_execute
+
+    pre_execute.connect(on_pre_execute, dispatch_uid="task_telemetry_pre_execute")
+    post_execute.connect(on_post_execute, dispatch_uid="task_telemetry_post_execute")
+
+
+# ──────────────────────────────────────────────
+# ÉTAT DE LA FILE
+# ──────────────────────────────────────────────
+
+class QueueHealth:
+
+    @staticmethod
+    def snapshot(cluster: Optional[str] = None) -> dict:
+        """Profondeur, tâches verrouillées (en cours) et âge de la plus ancienne tâche en attente."""
+        from django_q.brokers import get_broker
+
+        broker = get_broker(cluster)
+        state = {"depth": broker.queue_size(), "in_flight": broker.lock_size(), "oldest_age_seconds": None}
+
+        # Broker ORM : une tâche en attente a lock ≤ maintenant (date d'enfilage ou
+        # de fin du délai de relance) ; le plus ancien lock donne l'attente maximale.
+        # Broker Redis (api.core.redis_broker) : date d'enfilage de la tête de file
+        if type(broker).__name__ == "ORM":
+            oldest = broker.get_connection().filter(
+                key=broker.list_key, lock__lte=timezone.now()
+            ).aggregate(oldest=Min("lock"))["oldest"]
+            if oldest is not None:
+                state["oldest_age_seconds"] = round(_seconds_since(oldest), 1)
+        elif hasattr(broker, "oldest_age_seconds"):
+            state["oldest_age_seconds"] = broker.oldest_age_seconds()
+        return state
+
+    @classmethod
+    def snapshots(cls) -> Dict[str, dict]:
+        """État de chaque cluster alimenté (cluster par défaut + voies actives)."""
+        from api.core.task_lanes import clusters
+
+        return {cluster: cls.snapshot(cluster) for cluster in clusters()}
+
+    @classmethod
+    def check_slo(cls, state: Optional[dict] = None, cluster: Optional[str] = None) -> bool:
+        """Vrai si la plus ancienne tâche en attente dépasse le SLO ; alerte (avec délai de grâce)."""
+        state = state or cls.snapshot(cluster)
+        age, slo = state["oldest_age_seconds"], latency_slo(cluster)
+        if age is None or age <= slo:
+            return False
+
+        cooldown = getattr(settings, "TASK_QUEUE_ALERT_COOLDOWN", 15 * 60)
+        if not get_redis().set(f"{SLO_ALERT_KEY}:{cluster or ''}", 1, nx=True, ex=cooldown):
+            return True
+        message = (
+            f"File Django-Q « {cluster or 'défaut'} » : la plus ancienne tâche attend depuis {age:.0f} s "
+            f"(SLO {slo:.0f} s) ; {state['depth']} en attente, {state['in_flight']} en cours."
+        )
+        logger.error(f"🚨 {message}")
+        recipients = getattr(settings, "TASK_QUEUE_ALERT_EMAILS", [])
+        if recipients:
+            send_mail(
+                "🚨 File Django-Q hors SLO", message, settings.DEFAULT_FROM_EMAIL, recipients, fail_silently=True
+            )
+        return True
+
+
+# ──────────────────────────────────────────────
+# LECTURE
+# ──────────────────────────────────────────────
+
+class TaskStats:
+
+    @staticmethod
+    def _load() -> Dict[tuple, Dict[str, float]]:
+        families: Dict[tuple, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for field, value in get_redis().hgetall(STATS_KEY).items():
+            name, group, metric = field.decode().split(FIELD_SEP)
+            families[(name, group)][metric] += float(value)
+        return families
+
+    @staticmethod
+    def _quantile(metrics: Dict[str, float], name: str, buckets: tuple, q: float) -> Optional[float]:
+        """Borne supérieure du seau contenant le quantile q (estimation façon histogram_quantile)."""
+        count = metrics.get(f"{name}_count", 0)
+        if not count:
+            return None
+        seen = 0
+        for bound in buckets:
+            seen += metrics.get(f"{name}_bucket:{bound}", 0)
+            if seen >= q * count:
+                return bound
+        return float("inf")
+
+    @classmethod
+    def summary(cls) -> List[dict]:
+        """Par fonction / groupe, familles triées par temps d'exécution cumulé."""
+        rows = []
+        for (name, group), metrics in cls._load().items():
+            executions = sum(metrics.get(f"outcome:{outcome}", 0) for outcome in OUTCOMES)
+            waits, runs = metrics.get("wait_count", 0), metrics.get("runtime_count", 0)
+            rows.append({
+                "func": name,
+                "group": group or None,
+                "executions": int(executions),
+                **{outcome: int(metrics.get(f"outcome:{outcome}", 0)) for outcome in OUTCOMES},
+                "retries": int(metrics.get("retries", 0)),
+                "avg_wait_s": round(metrics.get("wait_sum", 0) / waits, 2) if waits else None,
+                "p95_wait_s": cls._quantile(metrics, "wait", WAIT_BUCKETS, 0.95),
+                "avg_runtime_s": round(metrics.get("runtime_sum", 0) / runs, 2) if runs else None,
+                "p95_runtime_s": cls._quantile(metrics, "runtime", RUNTIME_BUCKETS, 0.95),
+                "runtime_s": round(metrics.get("runtime_sum", 0), 1),
+            })
+        return sorted(rows, key=lambda row: row["runtime_s"], reverse=True)
+
+    @classmethod
+    def prometheus(cls, queues: Optional[Dict[str, dict]] = None) -> str:
+        lines = []
+
+        def label(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"')
+
+        def histogram(metric: str, help_text: str, name: str, buckets: tuple, families) -> None:
+            lines.extend([f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"])
+            for (func, group), metrics in families:
+                labels = f'func="{label(func)}",group="{label(group)}"'
+                cumulative = 0
+                for bound in buckets:
+                    cumulative += int(metrics.get(f"{name}_bucket:{bound}", 0))
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {int(metrics.get(f"{name}_count", 0))}')
+                lines.append(f"{metric}_sum{{{labels}}} {metrics.get(f'{name}_sum', 0):.4f}")
+                lines.append(f"{metric}_count{{{labels}}} {int(metrics.get(f'{name}_count', 0))}")
+
+        families = sorted(cls._load().items())
+        histogram("papex_task_wait_seconds", "Attente entre la mise en file et le démarrage.",
+                  "wait", WAIT_BUCKETS, families)
+        histogram("papex_task_runtime_seconds", "Durée d'exécution des tâches.",
+                  "runtime", RUNTIME_BUCKETS, families)
+
+        lines.extend(["# HELP papex_task_executions_total Tâches terminées, par issue.",
+                      "# TYPE papex_task_executions_total counter"])
+        for (func, group), metrics in families:
+            for outcome in OUTCOMES:
+                lines.append(
+                    f'papex_task_executions_total{{func="{label(func)}",group="{label(group)}",'
+                    f'outcome="{outcome}"}} {int(metrics.get(f"outcome:{outcome}", 0))}'
+                )
+        lines.extend(["# HELP papex_task_retries_total Redémarrages d'une tâche déjà commencée.",
+                      "# TYPE papex_task_retries_total counter"])
+        for (func, group), metrics in families:
+            lines.append(
+                f'papex_task_retries_total{{func="{label(func)}",group="{label(group)}"}} '
+                f'{int(metrics.get("retries", 0))}'
+            )
+
+        queues = queues if queues is not None else QueueHealth.snapshots()
+        gauges = [
+            ("papex_task_queue_depth", "Tâches en attente dans la file.", "depth"),
+            ("papex_task_queue_in_flight", "Tâches prises par un worker.", "in_flight"),
+            ("papex_task_queue_oldest_age_seconds", "Attente de la plus ancienne tâche en file.", "oldest_age_seconds"),
+        ]
+        for metric, help_text, key in gauges:
+            lines.extend([f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"])
+            for cluster, state in queues.items():
+                value = state[key] if key != "oldest_age_seconds" else state[key] or 0
+                if value is not None:
+                    lines.append(f'{metric}{{cluster="{label(cluster)}"}} {value}')
+        lines.extend(["# HELP papex_task_queue_latency_slo_seconds SLO d'attente en file.",
+                      "# TYPE papex_task_queue_latency_slo_seconds gauge"])
+        for cluster in queues:
+            lines.append(f'papex_task_queue_latency_slo_seconds{{cluster="{label(cluster)}"}} {latency_slo(cluster)}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,16 @@
+import logging
+
+from api.core.partitioning import PartitionManager
+
+logger = logging.getLogger(__name__)
+
+
+def maintain_partitions():
+    """
+    Maintenance quotidienne des tables partitionnées : crée les mois à venir,
+    compacte dans l'archive les mois au-delà de la rétention.
+    """
+    result = PartitionManager.maintain()
+    created = sum(len(r["created"]) for r in result.values())
+    archived = sum(len(r["archived"]) for r in result.values())
+    return f"{created} partitions created, {archived} archived"
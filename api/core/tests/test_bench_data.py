@@ -0,0 +1,71 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from api.clients.models import Client
+from api.contracts.models import Contract, ContractSearchDocument
+from api.leads.constants import ABSENT, PRESENT, RDV_CONFIRME
+from api.leads.models import Lead
+from api.leads_events.models import LeadEvent
+from api.payments.models import PaymentReceipt
+from api.utils.bulk_copy import copy_instances
+from api.whatsapp.models import WhatsAppMessage
+
+pytestmark = pytest.mark.django_db
+
+
+def test_copy_instances_applies_field_defaults_and_escaping():
+    from api.lead_status.models import LeadStatus
+
+    status = LeadStatus.objects.create(code="NOUVEAU", label="Nouveau")
+    copy_instances(Lead, [
+        Lead(first_name="Anne\tMarie", last_name="O'Neil\\", phone="0600000000", status=status),
+        Lead(first_name="Jean", last_name="Ligne\nDeux", phone="0600000001", status=status, email=None),
+    ])
+
+    anne, jean = Lead.objects.order_by("phone")
+    assert (anne.first_name, anne.last_name) == ("Anne\tMarie", "O'Neil\\")
+    assert jean.last_name == "Ligne\nDeux" and jean.email is None
+    assert anne.source == "WEBSITE" and anne.is_urgent is False
+    assert anne.created_at is not None
+
+
+def test_generate_bench_data_writes_requested_volumes():
+    call_command(
+        "generate_bench_data", force=True, leads=300, contracts=90, receipts=250,
+        whatsapp_messages=1200, lead_events=2000, batch_size=100, days=120,
+    )
+
+    assert Lead.objects.count() == 300
+    assert Contract.objects.count() == 90
+    assert PaymentReceipt.objects.count() <= 250
+    assert WhatsAppMessage.objects.count() == 1200
+    assert LeadEvent.objects.count() == 2000
+
+    # Conversion après présence au RDV, RDV passés pour PRESENT / ABSENT, à venir pour les confirmés
+    now = timezone.now()
+    converted = Client.objects.values_list("lead__status__code", flat=True)
+    assert list(converted).count(PRESENT) >= len(converted) // 2
+    assert not Lead.objects.filter(status__code__in=[PRESENT, ABSENT], appointment_date__gt=now).exists()
+    assert not Lead.objects.filter(status__code=RDV_CONFIRME, appointment_date__lt=now - timedelta(days=1)).exists()
+    assert not Lead.objects.filter(created_at__gt=now).exists()
+
+    # Les paiements ne dépassent jamais le montant dû après remise
+    for contract in Contract.objects.annotate(paid=Sum("receipts__amount")):
+        assert (contract.paid or Decimal("0")) <= contract.real_amount
+        assert contract.refund_amount <= (contract.paid or Decimal("0"))
+
+    # Données dérivées reconstruites (COPY ne déclenche pas les signaux)
+    assert ContractSearchDocument.objects.count() == 90
+    assert WhatsAppMessage.objects.filter(lead__isnull=True).exists()
+    assert Lead.objects.annotate(n=Count("assigned_to")).filter(n=1).exists()
+
+
+def test_generate_bench_data_refuses_production_without_force(settings):
+    settings.ENV = "production"
+    with pytest.raises(CommandError):
+        call_command("generate_bench_data", scale=0.0001)
@@ -0,0 +1,86 @@
+import json
+import random
+
+import pytest
+from django.core.mail import send_mail
+
+from api.core.loadtest.fakes import FakeProviders, LatencyProfile, status_webhook
+from api.core.loadtest.scenario import LatencyStats, LoadRunner, WebhookTraffic, load_webhook_file, percentile
+from api.gemini.gemini_service import ask_gemini
+from api.sms.sender import send_sms
+from api.whatsapp.utils import send_whatsapp_message
+
+pytestmark = pytest.mark.django_db
+
+INSTANT = LatencyProfile(0, 0)
+
+
+@pytest.fixture
+def providers(settings):
+    with FakeProviders(dict.fromkeys(("graph", "ovh", "gemini", "smtp"), INSTANT)) as fakes:
+        for key, value in fakes.env().items():
+            setattr(settings, key, value)
+        settings.EMAIL_PORT = int(settings.EMAIL_PORT)
+        settings.EMAIL_USE_TLS = False
+        yield fakes
+
+
+def test_latency_profile_parse_and_sampling():
+    profile = LatencyProfile.parse("100:1000:0.5")
+    assert (profile.median_ms, profile.p99_ms, profile.error_rate) == (100, 1000, 0.5)
+    with pytest.raises(ValueError):
+        LatencyProfile.parse("100")
+
+    rng = random.Random(1)
+    samples = sorted(profile.sample_ms(rng) for _ in range(20_000))
+    assert 90 < percentile(samples, 50) < 110
+    assert 800 < percentile(samples, 99) < 1250
+    errors = sum(profile.sample_error(rng) is not None for _ in range(2000))
+    assert 850 < errors < 1150
+
+
+def test_providers_are_reached_through_settings(providers):
+    replies = []
+    providers.graph.on_message.append(lambda to, wa_id: replies.append(to))
+
+    data = send_whatsapp_message("33612345678", "Bonjour")
+    assert data["messages"][0]["id"].startswith("wamid.FAKE")
+    assert replies == ["33612345678"]
+
+    result = send_sms(message="Rappel RDV", receivers=["+33612345678"])
+    assert result["ids"]
+
+    assert ask_gemini("Bonjour ?")
+
+    send_mail("Sujet", "Corps", "loadtest@papiers-express.fr", ["client@example.com"])
+    assert providers.smtp.messages[-1]["to"] == ["client@example.com"]
+
+    assert {name: stats["errors"] for name, stats in providers.stats().items()} == dict.fromkeys(
+        ("graph", "ovh", "gemini", "smtp"), 0
+    )
+
+
+def test_latency_stats_summary():
+    stats = LatencyStats()
+    for ms in range(1, 101):
+        stats.record("GET x", ms, ok=ms % 10 != 0)
+    (row,) = stats.summary(elapsed_s=10)
+    assert row["requests"] == 100 and row["failures"] == 10 and row["rps"] == 10
+    assert (row["p50"], row["p99"], row["max"]) == (50, 99, 100)
+
+
+def test_runner_replays_webhooks_and_samples_queue(live_server, tmp_path):
+    path = tmp_path / "webhooks.jsonl"
+    statuses = status_webhook([{"id": "wamid.INCONNU", "status": "delivered", "recipient_id": "33600000000"}])
+    path.write_text(json.dumps(statuses) + "\n" + json.dumps({"path": "/api/whatsapp/webhook/", "body": statuses}))
+    assert len(load_webhook_file(path)) == 2
+
+    runner = LoadRunner(
+        live_server.url, users=2, spawn_rate=10, duration=1.5, wait=(0.05, 0.1),
+        webhooks=WebhookTraffic(load_webhook_file(path)), sample_interval=0.5,
+    )
+    report = runner.run()
+
+    (row,) = report["requests"]
+    assert row["name"] == "POST whatsapp/webhook" and row["requests"] > 2 and row["failures"] == 0
+    assert report["queue_depth"]["samples"] and report["queue_depth"]["max"] is not None
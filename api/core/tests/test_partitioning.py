@@ -0,0 +1,141 @@
+"""
+Tests du partitionnement mensuel de LeadEvent / WhatsAppMessage (api.core.partitioning).
+"""
+from datetime import timedelta
+
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.core.partitioning import PARTITIONED_TABLES, PartitionManager, add_months, month_start, partition_name
+from api.lead_status.models import LeadStatus
+from api.leads.models import Lead
+from api.leads_events.models import LeadEvent, LeadEventArchive
+from api.leads_events.services import LeadEventService
+from api.users.models import User
+from api.whatsapp.models import WhatsAppMessage, WhatsAppMessageArchive
+
+pytestmark = pytest.mark.django_db
+
+EVENTS, MESSAGES = PARTITIONED_TABLES
+
+
+@pytest.fixture
+def lead():
+    status = LeadStatus.objects.create(code="PARTITION_TEST", label="Partition")
+    return Lead.objects.create(first_name="Awa", last_name="Diallo", phone="0612345678", status=status)
+
+
+def _partition_of(model, pk) -> str:
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT tableoid::regclass::text FROM {model._meta.db_table} WHERE id = %s", [pk])
+        return cursor.fetchone()[0]
+
+
+def _flush_deferred_constraints():
+    """Les FK différées de la transaction du test bloqueraient DETACH PARTITION."""
+    with connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+def test_rows_go_to_their_month(lead):
+    event = LeadEvent.log(lead, "PARTITION_TEST")
+    message = WhatsAppMessage.objects.create(wa_id="wamid.1", lead=lead, sender_phone="33612345678")
+
+    assert _partition_of(LeadEvent, event.id) == partition_name(EVENTS.table, month_start(event.occurred_at))
+    assert _partition_of(WhatsAppMessage, message.id) == partition_name(MESSAGES.table, month_start(message.timestamp))
+
+    upcoming = partition_name(EVENTS.table, add_months(month_start(timezone.now()), 3))
+    assert upcoming in {p.name for p in PartitionManager.partitions(EVENTS)}
+
+
+def test_ensure_moves_out_of_range_rows_into_their_month(lead):
+    old = LeadEvent.log(lead, "PARTITION_TEST")
+    LeadEvent.objects.filter(id=old.id).update(occurred_at=timezone.now() - timedelta(days=5 * 365))
+    old.refresh_from_db()
+    assert _partition_of(LeadEvent, old.id) == f"{EVENTS.table}_default"
+
+    created = PartitionManager.ensure(EVENTS)
+
+    month = partition_name(EVENTS.table, month_start(old.occurred_at))
+    assert created == [month]
+    assert _partition_of(LeadEvent, old.id) == month
+    assert PartitionManager.ensure(EVENTS) == []
+
+
+def test_expired_months_are_archived_and_still_read_by_the_timeline(lead):
+    root = LeadEvent.log(lead, "PARTITION_ROOT")
+    child = LeadEvent.log(lead, "PARTITION_CHILD", parent_event=root)
+    recent = LeadEvent.log(lead, "PARTITION_RECENT")
+    LeadEvent.objects.filter(id__in=[root.id, child.id]).update(occurred_at=timezone.now() - timedelta(days=4 * 365))
+    PartitionManager.ensure(EVENTS)
+    _flush_deferred_constraints()
+
+    archived = PartitionManager.archive(EVENTS, retention=24)
+
+    assert sum(archived.values()) == 2
+    assert not LeadEvent.objects.filter(id__in=[root.id, child.id]).exists()
+    assert LeadEvent.objects.filter(id=recent.id).exists()
+    assert set(LeadEventArchive.objects.values_list("id", flat=True)) == {root.id, child.id}
+    assert not set(archived) & {p.name for p in PartitionManager.partitions(EVENTS)}
+
+    timeline = LeadEventService.get_timeline_for_react_flow(lead.id)
+    codes = [n["data"]["eventCode"] for n in timeline["nodes"] if n["data"]["eventCode"].startswith("PARTITION_")]
+    assert codes == ["PARTITION_ROOT", "PARTITION_CHILD", "PARTITION_RECENT"]
+    assert {"source": str(root.id), "target": str(child.id)}.items() <= timeline["edges"][0].items()
+
+    LeadEventService.update_node_position(root.id, 10.0, 20.0)
+    assert LeadEventArchive.objects.values_list("position_x", "position_y").get(id=root.id) == (10.0, 20.0)
+
+
+def test_archiving_resumes_without_duplicates(lead):
+    old = LeadEvent.log(lead, "PARTITION_TEST")
+    LeadEvent.objects.filter(id=old.id).update(occurred_at=timezone.now() - timedelta(days=4 * 365))
+    PartitionManager.ensure(EVENTS)
+    _flush_deferred_constraints()
+    # Copie interrompue avant DETACH : la ligne est déjà dans l'archive
+    LeadEventArchive.objects.create(
+        id=old.id, lead=lead, event_type_id=old.event_type_id, occurred_at=timezone.now() - timedelta(days=4 * 365),
+    )
+
+    assert sum(PartitionManager.archive(EVENTS, retention=24).values()) == 0
+    assert LeadEventArchive.objects.count() == 1 and not LeadEvent.objects.filter(id=old.id).exists()
+
+
+def test_whatsapp_message_uniqueness_includes_the_timestamp(lead):
+    sent_at = timezone.now()
+    WhatsAppMessage.objects.create(wa_id="wamid.dup", sender_phone="33612345678", timestamp=sent_at)
+
+    with pytest.raises(IntegrityError), transaction.atomic():
+        WhatsAppMessage.objects.create(wa_id="wamid.dup", sender_phone="33612345678", timestamp=sent_at)
+
+
+def test_expired_whatsapp_months_are_archived(lead):
+    old = WhatsAppMessage.objects.create(
+        wa_id="wamid.old", lead=lead, sender_phone="33612345678", media_url="https://signed",
+        timestamp=timezone.now() - timedelta(days=4 * 365),
+    )
+    PartitionManager.ensure(MESSAGES)
+    _flush_deferred_constraints()
+
+    PartitionManager.archive(MESSAGES, retention=24)
+
+    archived = WhatsAppMessageArchive.objects.get()
+    assert (archived.id, archived.wa_id, archived.lead_id) == (old.id, "wamid.old", lead.id)
+    assert archived.as_message().media_url is None
+    assert not WhatsAppMessage.objects.exists()
+
+
+def test_perf_endpoint():
+    admin = User.objects.create_user(email="partitions@test.com", password="pwd", role="ADMIN",
+                                     first_name="A", last_name="B")
+    client = APIClient()
+    client.force_authenticate(user=admin)
+
+    data = client.get(reverse("perf-partitions")).data
+
+    current = partition_name(EVENTS.table, month_start(timezone.now()))
+    assert current in [p["name"] for p in data[EVENTS.table]["partitions"]]
+    assert data[MESSAGES.table]["default_rows"] == 0
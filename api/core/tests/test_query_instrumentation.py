@@ -0,0 +1,117 @@
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.core import query_instrumentation
+from api.core.query_instrumentation import RouteStats, fingerprint, normalize_sql
+from api.lead_status.models import LeadStatus
+from api.middleware import QueryInstrumentationMiddleware
+from api.users.models import User
+from api.utils.redis_client import get_redis
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def instrumentation(settings):
+    settings.QUERY_INSTRUMENTATION_ENABLED = True
+    settings.QUERY_N_PLUS_ONE_THRESHOLD = 5
+    client = get_redis()
+    keys = lambda: list(client.scan_iter("perf:*"))  # noqa: E731
+    if keys():
+        client.delete(*keys())
+    yield settings
+    if keys():
+        client.delete(*keys())
+    if query_instrumentation.record_query in connection.execute_wrappers:
+        connection.execute_wrappers.remove(query_instrumentation.record_query)
+
+
+def _n_plus_one_view(request):
+    statuses = list(LeadStatus.objects.all())
+    for status in statuses:
+        LeadStatus.objects.filter(pk=status.pk).exists()  # une requête par ligne
+    return HttpResponse("ok")
+
+
+def test_fingerprint_ignores_values():
+    assert normalize_sql("SELECT * FROM t WHERE id = 12 AND name = 'o''neil'") == \
+        "SELECT * FROM t WHERE id = ? AND name = ?"
+    assert fingerprint('SELECT "a" FROM "t" WHERE "id" IN (%s, %s, %s)') == \
+        fingerprint('SELECT "a" FROM "t" WHERE "id" IN (%s)')
+    assert fingerprint("INSERT INTO t VALUES (%s, %s), (%s, %s)") == fingerprint("INSERT INTO t VALUES (%s, %s)")
+    assert fingerprint("SELECT 1 FROM a") != fingerprint("SELECT 1 FROM b")
+
+
+def test_disabled_middleware_is_removed(settings):
+    settings.QUERY_INSTRUMENTATION_ENABLED = False
+    with pytest.raises(MiddlewareNotUsed):
+        QueryInstrumentationMiddleware(_n_plus_one_view)
+
+
+def test_middleware_flags_n_plus_one(instrumentation, caplog):
+    LeadStatus.objects.bulk_create([LeadStatus(code=f"S{i}", label=f"S{i}") for i in range(6)])
+    middleware = QueryInstrumentationMiddleware(_n_plus_one_view)
+
+    with caplog.at_level("INFO", logger="api.perf"):
+        response = middleware(RequestFactory().get("/leads/"))
+
+    assert 'db;dur=' in response["Server-Timing"]
+    assert 'desc="7 queries"' in response["Server-Timing"]
+    assert "nplusone" in response["Server-Timing"]
+
+    record = next(r for r in caplog.records if hasattr(r, "perf"))
+    assert record.perf["queries"] == 7
+    [suspect] = record.perf["n_plus_one"]
+    assert suspect["count"] == 6
+    assert any("N+1" in r.getMessage() for r in caplog.records)
+
+    # Hors requête HTTP : le wrapper installé ne mesure rien
+    LeadStatus.objects.count()
+    [row] = RouteStats.summary()
+    assert row["route"] == "GET <non résolue>"
+    assert row["requests"] == 1 and row["avg_queries"] == 7
+    assert row["n_plus_one_requests"] == 1
+    assert row["n_plus_one_suspects"][0]["queries"] == 6
+
+
+def test_route_summary_endpoint_is_admin_only(instrumentation):
+    admin = User.objects.create_user(
+        email="admin@tds.fr", first_name="Ada", last_name="Min", password="x", role="ADMIN",
+    )
+    agent = User.objects.create_user(
+        email="agent@tds.fr", first_name="Con", last_name="Seil", password="x", role="CONSEILLER",
+    )
+    client = APIClient()
+
+    client.force_authenticate(agent)
+    assert client.get(reverse("perf-routes")).status_code == 403
+
+    client.force_authenticate(admin)
+    first = client.get(reverse("perf-routes"))
+    assert "Server-Timing" in first
+    rows = client.get(reverse("perf-routes")).json()
+    routes = {row["route"]: row for row in rows}
+    assert routes["GET /api/perf/routes/"]["requests"] >= 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_gather_queries_are_recorded_in_the_request_profile(instrumentation):
+    from asgiref.sync import async_to_sync
+
+    from api.utils.async_views import close_query_pool_connections, gather_queries
+
+    QueryInstrumentationMiddleware(_n_plus_one_view)  # branche le wrapper sur les nouvelles connexions
+    close_query_pool_connections()
+    profile, token = query_instrumentation.start_profile()
+    try:
+        async_to_sync(gather_queries)(*[LeadStatus.objects.count for _ in range(4)])
+    finally:
+        query_instrumentation.stop_profile(token)
+        close_query_pool_connections()
+
+    assert profile.shapes[fingerprint('SELECT COUNT(*) AS "__count" FROM "lead_status_leadstatus"')][0] == 4
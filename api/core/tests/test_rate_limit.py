@@ -0,0 +1,173 @@
+"""
+Tests du limiteur de débit des fournisseurs (seaux à jetons Redis, api.core.rate_limit).
+"""
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+import redis
+from django.urls import reverse
+from django.utils import timezone
+from django_q.models import Schedule
+from rest_framework.test import APIClient
+
+from api.core.rate_limit import META_WHATSAPP, OVH_SMS, RateLimited, RateLimiter, defer_when_limited
+from api.lead_status.models import LeadStatus
+from api.leads.models import Lead
+from api.notification_outbox.models import OutboxMessage
+from api.notification_outbox.services import NotificationOutbox
+from api.sms.tasks import send_appointment_confirmation_sms_task
+from api.users.models import User
+from api.whatsapp.agent.handler import send_agent_reply
+from api.whatsapp.models import WhatsAppMessage
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def limits(settings):
+    settings.RATE_LIMIT_ENABLED = True
+    settings.PROVIDER_RATE_LIMITS = {
+        OVH_SMS: {"rate": 1, "burst": 3, "destination_rate": 0.5, "destination_burst": 2},
+        META_WHATSAPP: {"rate": 1, "burst": 1},
+    }
+    return settings.PROVIDER_RATE_LIMITS
+
+
+@pytest.fixture
+def admin_client():
+    admin = User.objects.create_user(email="ratelimit@test.com", password="pwd", role="ADMIN",
+                                     first_name="A", last_name="B")
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    return client
+
+
+@defer_when_limited
+def _limited_worker(lead_id):
+    raise RateLimited(OVH_SMS, 4.2)
+
+
+def test_provider_bucket_throttles_once_the_burst_is_spent(limits):
+    for i in range(3):
+        RateLimiter.reserve(OVH_SMS, f"+3361234567{i}")
+
+    with pytest.raises(RateLimited) as exc:
+        RateLimiter.reserve(OVH_SMS, "+33612345679")
+    assert exc.value.provider == OVH_SMS
+    assert 0 < exc.value.retry_after <= 1
+
+    summary = RateLimiter.summary()[OVH_SMS]
+    assert (summary["granted"], summary["throttled"], summary["capacity"]) == (3, 1, 3)
+    assert summary["tokens"] < 1
+
+
+def test_destination_bucket_is_independent_and_all_or_nothing(limits):
+    RateLimiter.reserve(OVH_SMS, "+33600000001")
+    RateLimiter.reserve(OVH_SMS, "+33600000001")
+
+    with pytest.raises(RateLimited) as exc:
+        RateLimiter.reserve(OVH_SMS, "+33600000001")
+    assert 1 < exc.value.retry_after <= 2  # 1 jeton toutes les 2 s par destinataire
+
+    # Le refus n'a pas débité le seau global : il reste un jeton pour un autre destinataire
+    RateLimiter.reserve(OVH_SMS, "+33600000002")
+    assert RateLimiter.summary()[OVH_SMS]["granted"] == 3
+
+
+def test_reserve_never_sleeps(limits, settings):
+    settings.PROVIDER_RATE_LIMITS = {META_WHATSAPP: {"rate": 20, "burst": 1}}
+    RateLimiter.reserve(META_WHATSAPP, "+33600000001")
+
+    with patch("time.sleep") as sleep, pytest.raises(RateLimited) as exc:
+        RateLimiter.reserve(META_WHATSAPP, "+33600000001")
+    assert exc.value.retry_after <= 0.05
+    sleep.assert_not_called()
+
+
+def test_unavailable_redis_lets_the_send_through(limits, caplog):
+    client = MagicMock()
+    client.eval.side_effect = redis.ConnectionError("Redis indisponible")
+    with patch("api.core.rate_limit.get_redis", return_value=client):
+        RateLimiter.reserve(OVH_SMS, "+33600000001")
+
+    assert "Limiteur de débit ovh_sms indisponible" in caplog.text
+
+
+def test_disabled_limiter_never_throttles(limits, settings):
+    settings.RATE_LIMIT_ENABLED = False
+    for _ in range(10):
+        RateLimiter.reserve(META_WHATSAPP, "+33600000001")
+    assert RateLimiter.summary()[META_WHATSAPP]["granted"] == 0
+
+
+def test_outbox_relay_defers_throttled_sms_without_counting_an_attempt(limits):
+    status = LeadStatus.objects.create(code="RATE_LIMIT_TEST", label="Rate limit", color="#C1E8FF")
+    leads = [
+        Lead.objects.create(first_name="Lead", last_name=str(i), phone=f"061234567{i}", status=status,
+                            appointment_date=timezone.now() + timedelta(days=3))
+        for i in range(4)
+    ]
+    for lead in leads:
+        send_appointment_confirmation_sms_task(lead.id)
+
+    client = MagicMock()
+    client.post.return_value = {"ids": [123]}
+    with patch("api.sms.sender.get_ovh_sms_client", return_value=client):
+        assert NotificationOutbox.relay() == {"sent": 3, "skipped": 0, "deferred": 1, "retried": 0, "failed": 0}
+
+    assert client.post.call_count == 3
+    deferred = OutboxMessage.objects.get(status="pending")
+    assert deferred.attempts == 0 and deferred.locked_until is None
+    assert deferred.available_at > timezone.now()
+    assert RateLimiter.summary()[OVH_SMS]["deferred"] == 1
+
+
+def test_worker_is_rescheduled_when_limited(limits):
+    assert _limited_worker(42) == f"deferred 5s ({OVH_SMS})"
+
+    scheduled = Schedule.objects.get()
+    assert scheduled.func == f"{__name__}._limited_worker"
+    assert scheduled.args == "(42,)"
+    assert scheduled.schedule_type == Schedule.ONCE
+    assert scheduled.next_run > timezone.now() + timedelta(seconds=3)
+    assert RateLimiter.summary()[OVH_SMS]["deferred"] == 1
+
+
+def test_manual_whatsapp_send_returns_429_when_limited(limits, settings, admin_client):
+    settings.WHATSAPP_PHONE_NUMBER_ID, settings.WHATSAPP_ACCESS_TOKEN = "123", "token"
+    RateLimiter.reserve(META_WHATSAPP, "33612345678")
+
+    with patch("api.whatsapp.utils.requests.post") as post:
+        response = admin_client.post(reverse("whatsapp_send"), {"phone": "0612345678", "body": "Bonjour"},
+                                     format="json")
+
+    assert response.status_code == 429
+    assert int(response["Retry-After"]) >= 1
+    post.assert_not_called()
+
+
+def test_limited_agent_reply_is_rescheduled_instead_of_blocking_the_worker(limits, settings):
+    settings.WHATSAPP_PHONE_NUMBER_ID, settings.WHATSAPP_ACCESS_TOKEN = "123", "token"
+    RateLimiter.reserve(META_WHATSAPP, "33612345678")
+
+    with patch("time.sleep") as sleep, patch("api.whatsapp.utils.requests.post") as post:
+        assert send_agent_reply("33612345678", "Bonjour").startswith("deferred")
+
+    sleep.assert_not_called()
+    post.assert_not_called()
+    assert not WhatsAppMessage.objects.exists()
+    scheduled = Schedule.objects.get()
+    assert scheduled.func == "api.whatsapp.agent.handler.send_agent_reply"
+    assert scheduled.args == "('33612345678', 'Bonjour')"
+
+
+def test_perf_endpoints(limits, admin_client):
+    RateLimiter.reserve(OVH_SMS, "+33600000001")
+
+    data = admin_client.get(reverse("perf-rate-limits")).data
+    assert data[OVH_SMS]["granted"] == 1 and data[META_WHATSAPP]["tokens"] == 1
+
+    metrics = admin_client.get(reverse("perf-tasks-metrics")).content.decode()
+    assert f'papex_rate_limit_reservations_total{{provider="{OVH_SMS}",outcome="granted"}} 1' in metrics
+    assert f'papex_rate_limit_capacity{{provider="{META_WHATSAPP}"}} 1' in metrics
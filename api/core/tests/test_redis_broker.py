@@ -0,0 +1,84 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django_q.brokers.orm import ORM
+from django_q.models import OrmQ
+from django_q.signing import SignedPackage
+from django_q.tasks import async_task
+
+from api.core import redis_broker
+from api.core.management.commands.bench_task_broker import Command as BenchCommand
+from api.core.redis_broker import RedisBroker
+from api.core.task_telemetry import QueueHealth
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def broker():
+    broker = RedisBroker(list_key="test-lane")
+    broker.delete_queue()
+    yield broker
+    broker.delete_queue()
+
+
+def _func(payload):
+    return SignedPackage.loads(payload)["func"]
+
+
+def test_dequeue_leases_and_acknowledge_removes(broker):
+    async_task("api.sms.tasks.first", broker=broker)
+    async_task("api.sms.tasks.second", broker=broker)
+    assert broker.queue_size() == 2 and broker.oldest_age_seconds() is not None
+
+    [(task_id, payload)] = broker.dequeue()
+    assert _func(payload) == "api.sms.tasks.first"
+    assert (broker.queue_size(), broker.lock_size()) == (1, 1)
+
+    broker.acknowledge(task_id)
+    assert broker.lock_size() == 0
+    assert [_func(p) for _, p in broker.pending()] == ["api.sms.tasks.second"]
+
+
+def test_expired_lease_puts_task_back_at_the_head(broker):
+    async_task("api.sms.tasks.first", broker=broker)
+    async_task("api.sms.tasks.second", broker=broker)
+    broker.dequeue()  # worker tué pendant l'exécution
+
+    with patch.object(redis_broker.time, "time", return_value=redis_broker.time.time() + 10_000):
+        assert broker.requeue_expired() == 1
+    [(_, payload)] = broker.dequeue()
+    assert _func(payload) == "api.sms.tasks.first"
+
+
+def test_migrate_task_broker_keeps_order_both_ways(broker, settings):
+    orm = ORM(list_key=settings.Q_CLUSTER["name"])
+    for name in ("a", "b", "c"):
+        async_task(f"api.sms.tasks.{name}", broker=orm)
+    target = RedisBroker(list_key=settings.Q_CLUSTER["name"])
+    target.delete_queue()
+
+    try:
+        call_command("migrate_task_broker", to="redis")
+        assert not OrmQ.objects.exists()
+        assert [_func(p) for _, p in target.pending()] == ["api.sms.tasks.a", "api.sms.tasks.b", "api.sms.tasks.c"]
+
+        call_command("migrate_task_broker", to="orm")
+        assert target.queue_size() == 0
+        assert [_func(q.payload) for q in OrmQ.objects.order_by("id")] == [
+            "api.sms.tasks.a", "api.sms.tasks.b", "api.sms.tasks.c",
+        ]
+    finally:
+        target.delete_queue()
+
+
+def test_queue_health_and_latency_bench_on_redis(broker):
+    async_task("api.sms.tasks.first", broker=broker)
+    with patch("django_q.brokers.get_broker", return_value=broker):
+        state = QueueHealth.snapshot("test-lane")
+    assert (state["depth"], state["in_flight"]) == (1, 0)
+    assert state["oldest_age_seconds"] is not None
+
+    latencies = BenchCommand.measure("redis", tasks=5, rate=100)
+    assert len(latencies) == 5 and max(latencies) < 1000
@@ -0,0 +1,76 @@
+import pytest
+from django.core.cache import cache
+
+from api.core import reference_data
+from api.core.reference_data import lead_event_types, lead_statuses
+from api.lead_status.models import LeadStatus
+from api.leads.constants import ABSENT, RDV_CONFIRME
+from api.leads.models import Lead
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def statuses():
+    return (
+        LeadStatus.objects.create(code=ABSENT, label="Absent"),
+        LeadStatus.objects.create(code=RDV_CONFIRME, label="Confirmé"),
+    )
+
+
+def test_lookups_are_served_from_memory(statuses, django_assert_num_queries):
+    absent, confirme = statuses
+    lead_statuses.get(ABSENT)  # chargement
+
+    with django_assert_num_queries(0):
+        assert lead_statuses.get(ABSENT).pk == absent.pk
+        assert lead_statuses.get_by_id(confirme.pk).code == RDV_CONFIRME
+        assert lead_statuses.ids_for(ABSENT, RDV_CONFIRME, "INCONNU") == [absent.pk, confirme.pk]
+        assert lead_statuses.get_or_none("INCONNU") is None
+
+    with pytest.raises(LeadStatus.DoesNotExist):
+        lead_statuses.get("INCONNU")
+
+
+def test_returned_instances_are_copies(statuses):
+    lead_statuses.get(ABSENT).label = "modifié"
+
+    assert lead_statuses.get(ABSENT).label == "Absent"
+
+
+def test_save_invalidates_and_bumps_version(statuses):
+    absent, _ = statuses
+    lead_statuses.get(ABSENT)
+    version = cache.get(lead_statuses.version_key)
+
+    absent.label = "Absent (no-show)"
+    absent.save()
+
+    assert lead_statuses.get(ABSENT).label == "Absent (no-show)"
+    assert cache.get(lead_statuses.version_key) != version
+
+
+def test_other_process_write_is_picked_up_after_version_check(statuses, monkeypatch):
+    lead_statuses.get(ABSENT)
+    # Écriture « ailleurs » : ligne modifiée sans signal, version bumpée dans Redis
+    LeadStatus.objects.filter(code=ABSENT).update(label="Renommé ailleurs")
+    cache.set(lead_statuses.version_key, "autre-process", None)
+
+    assert lead_statuses.get(ABSENT).label == "Absent"  # intervalle non écoulé
+
+    monkeypatch.setattr(reference_data, "VERSION_CHECK_INTERVAL", 0)
+    assert lead_statuses.get(ABSENT).label == "Renommé ailleurs"
+
+
+def test_code_filters_resolve_to_ids_without_join(statuses):
+    sql = str(Lead.objects.filter(status_id__in=lead_statuses.ids_for(ABSENT)).query)
+
+    assert "lead_status" not in sql.lower().replace("leads_lead", "")
+
+
+def test_event_type_get_or_create_is_cached(django_assert_num_queries):
+    created = lead_event_types.get_or_create("BENCH_EVENT", defaults={"label": "Bench"})
+    lead_event_types.get_or_create("BENCH_EVENT")  # rechargement après l'invalidation du post_save
+
+    with django_assert_num_queries(0):
+        assert lead_event_types.get_or_create("BENCH_EVENT").pk == created.pk
@@ -0,0 +1,101 @@
+import heapq
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django_q.brokers import get_broker
+from django_q.models import OrmQ
+from django_q.signing import SignedPackage
+
+from api.core import task_lanes
+from api.core.task_lanes import AGENT, BATCH, DOCUMENTS, REALTIME, async_task, lane_for
+from api.core.task_telemetry import QueueHealth, latency_slo
+
+pytestmark = pytest.mark.django_db
+
+AGENT_TASK = "api.whatsapp.agent.handler.trigger_agent_response"
+SMS_TASK = "api.sms.tasks._run_send_appointment_confirmation_sms"
+
+# Durées d'exécution typiques (s) : Kemia ~8 s (Gemini + Meta), SMS OVH < 1 s
+RUNTIMES = {AGENT_TASK: 8.0, SMS_TASK: 0.5}
+
+
+@pytest.fixture
+def lanes(settings):
+    settings.TASK_LANES_ENABLED = True
+    return settings
+
+
+def _saturate_agent_lane(count=40):
+    for n in range(count):
+        async_task(AGENT_TASK, incoming_body="Bonjour", sender_phone=f"3361234{n:04d}", group="kemora")
+
+
+def _start_delay(cluster, workers, func):
+    """
+    Délai simulé avant le démarrage de `func`, pour `workers` workers
+    consommant la file `cluster` dans l'ordre réel du broker (dequeue) avec
+    les durées RUNTIMES.
+    """
+    broker, free_at, delay = get_broker(cluster), [0.0] * workers, None
+    while True:
+        packages = broker.dequeue()
+        if not packages:
+            return delay
+        for _, payload in packages:
+            task = SignedPackage.loads(payload)
+            started = heapq.heappop(free_at)
+            if task["func"] == func and delay is None:
+                delay = started
+            heapq.heappush(free_at, started + RUNTIMES[task["func"]])
+
+
+def test_routing_table():
+    assert lane_for(AGENT_TASK) == AGENT
+    assert lane_for("api.whatsapp.lead_service.create_lead_async") == AGENT
+    assert lane_for(SMS_TASK) == REALTIME
+    assert lane_for("api.utils.email.leads.tasks._run_send_appointment_confirmation") == REALTIME
+    assert lane_for("api.utils.email.leads.tasks._run_send_avocat_assigned_notification_batch") == BATCH
+    assert lane_for("api.payments.tasks._run_send_contract_email") == DOCUMENTS
+    assert lane_for("api.whatsapp.tasks.flush_status_updates") == REALTIME
+    assert lane_for(task_lanes.lane_for) is None
+
+
+def test_async_task_routes_only_when_lanes_are_enabled(settings):
+    settings.TASK_LANES_ENABLED = False
+    async_task(SMS_TASK, 1, group="sms")
+    assert list(OrmQ.objects.values_list("key", flat=True)) == ["papex"]
+
+    settings.TASK_LANES_ENABLED = True
+    async_task(SMS_TASK, 1, group="sms")
+    async_task(SMS_TASK, 1, cluster=BATCH)
+    assert sorted(OrmQ.objects.values_list("key", flat=True)) == [BATCH, "papex", REALTIME]
+
+
+def test_simulated_dequeue_puts_sms_behind_agent_backlog_only_without_lanes(settings, lanes):
+    # Pas de cluster réel : ordre de sortie réel du broker, durées d'exécution
+    # simulées (RUNTIMES) sur `workers` workers par file
+    realtime_workers = settings.Q_CLUSTER["ALT_CLUSTERS"][REALTIME]["workers"]
+    agent_workers = settings.Q_CLUSTER["ALT_CLUSTERS"][AGENT]["workers"]
+
+    # Une seule file : la confirmation SMS passe derrière 40 réponses Kemia
+    settings.TASK_LANES_ENABLED = False
+    _saturate_agent_lane()
+    async_task(SMS_TASK, 1, group="sms")
+    shared_delay = _start_delay("papex", settings.Q_CLUSTER["workers"], SMS_TASK)
+    assert shared_delay > latency_slo(REALTIME)
+
+    # Voies : la file « agent » déborde, les notifications n'attendent personne
+    settings.TASK_LANES_ENABLED = True
+    _saturate_agent_lane()
+    OrmQ.objects.filter(key=AGENT).update(lock=timezone.now() - timedelta(minutes=5))
+    async_task(SMS_TASK, 1, group="sms")
+
+    queues = QueueHealth.snapshots()
+    assert queues[AGENT]["depth"] == 40
+    assert queues[AGENT]["oldest_age_seconds"] > latency_slo(AGENT)
+    assert queues[REALTIME]["depth"] == 1
+    assert queues[REALTIME]["oldest_age_seconds"] < latency_slo(REALTIME)
+
+    assert _start_delay(REALTIME, realtime_workers, SMS_TASK) == 0
+    assert _start_delay(AGENT, agent_workers, AGENT_TASK) == 0
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.urls import reverse
+from django.utils import timezone
+from django_q.models import OrmQ
+from django_q.signals import post_execute, pre_execute
+from rest_framework.test import APIClient
+
+from api.core.task_telemetry import QueueHealth, TaskStats
+from api.users.models import User
+from api.utils.redis_client import get_redis
+
+pytestmark = pytest.mark.django_db
+
+FUNC = "api.core.tests.test_task_telemetry"
+
+
+def succeed(value):
+    return value
+
+
+def explode():
+    raise RuntimeError("boom")
+
+
+def _run(func, *args, group=None, task_id="t1", waited=1.5):
+    """Parcours worker → moniteur d'une tâche, signaux compris, sans cluster."""
+    task = {"id": task_id, "func": func, "args": args, "kwargs": {},
+            "started": timezone.now() - timedelta(seconds=waited)}
+    if group:
+        task["group"] = group
+    pre_execute.send(sender="django_q", func=func, task=task)
+    try:
+        task["result"], task["success"] = func(*args), True
+    except Exception as e:
+        task["result"], task["success"] = str(e), False
+    task["stopped"] = timezone.now()
+    post_execute.send(sender="django_q", task=task)
+
+
+@pytest.fixture
+def telemetry(settings):
+    settings.TASK_TELEMETRY_ENABLED = True
+    settings.TASK_QUEUE_LATENCY_SLO_SECONDS = 60
+    client = get_redis()
+    keys = lambda: list(client.scan_iter("perf:tasks*"))  # noqa: E731
+    if keys():
+        client.delete(*keys())
+    yield settings
+    if keys():
+        client.delete(*keys())
+
+
+def test_executions_are_recorded_per_function_and_group(telemetry):
+    _run(succeed, 1, group="notifications", task_id="a")
+    _run(succeed, 2, group="notifications", task_id="b")
+    _run(explode, task_id="c")
+    _run(explode, task_id="c")  # relance de la même tâche
+
+    rows = {(row["func"], row["group"]): row for row in TaskStats.summary()}
+    ok = rows[(f"{FUNC}.succeed", "notifications")]
+    assert (ok["executions"], ok["success"], ok["failure"], ok["retries"]) == (2, 2, 0, 0)
+    assert ok["avg_wait_s"] == 1.5 and ok["p95_wait_s"] == 2 and ok["p95_runtime_s"] == 0.1
+    failed = rows[(f"{FUNC}.explode", None)]
+    assert (failed["failure"], failed["retries"]) == (2, 1)
+
+    text = TaskStats.prometheus(queues={"papex": {"depth": 3, "in_flight": 1, "oldest_age_seconds": 12.5}})
+    labels = f'func="{FUNC}.succeed",group="notifications"'
+    assert f'papex_task_runtime_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f'papex_task_executions_total{{{labels},outcome="success"}} 2' in text
+    assert f'papex_task_executions_total{{func="{FUNC}.explode",group="",outcome="failure"}} 2' in text
+    assert 'papex_task_queue_oldest_age_seconds{cluster="papex"} 12.5' in text
+
+
+def test_oldest_queued_task_breaching_slo_alerts_once(telemetry, caplog):
+    telemetry.TASK_QUEUE_ALERT_EMAILS = ["ops@papiers-express.fr"]
+    telemetry.EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+    now = timezone.now()
+    OrmQ.objects.create(key=telemetry.Q_CLUSTER["name"], payload="x", lock=now - timedelta(seconds=300))
+    OrmQ.objects.create(key=telemetry.Q_CLUSTER["name"], payload="y", lock=now + timedelta(seconds=60))
+
+    state = QueueHealth.snapshot()
+    assert state["depth"] == 1 and state["in_flight"] == 1
+    assert state["oldest_age_seconds"] >= 300
+
+    assert QueueHealth.check_slo(state, "papex") is True
+    assert QueueHealth.check_slo(state, "papex") is True
+    assert len(mail.outbox) == 1
+    assert any("SLO" in r.getMessage() for r in caplog.records if r.levelname == "ERROR")
+
+
+def test_slo_is_checked_by_the_monitor_not_on_enqueue(telemetry):
+    from django_q.tasks import async_task
+
+    telemetry.TASK_QUEUE_ALERT_EMAILS = ["ops@papiers-express.fr"]
+    telemetry.EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+    OrmQ.objects.create(key=telemetry.Q_CLUSTER["name"], payload="x", lock=timezone.now() - timedelta(seconds=300))
+
+    async_task(succeed, 1)  # enfilage côté web : aucun contrôle
+    assert not mail.outbox
+
+    _run(succeed, 1, task_id="m1")  # post_execute (moniteur)
+    _run(succeed, 2, task_id="m2")  # même intervalle : pas de second contrôle
+    assert len(mail.outbox) == 1
+
+
+def test_metrics_endpoint_accepts_token_or_admin(telemetry):
+    telemetry.METRICS_TOKEN = "s3cret"
+    client = APIClient()
+    url = reverse("perf-tasks-metrics")
+
+    assert client.get(url).status_code in (401, 403)
+    assert client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code in (401, 403)
+    response = client.get(url, HTTP_AUTHORIZATION="Bearer s3cret")
+    assert response.status_code == 200 and response["Content-Type"].startswith("text/plain")
+    assert b"papex_task_queue_depth" in response.content
+
+    admin = User.objects.create_user(
+        email="admin@tds.fr", first_name="Ada", last_name="Min", password="x", role="ADMIN",
+    )
+    client.force_authenticate(admin)
+    body = client.get(reverse("perf-tasks")).json()
+    assert body["queues"]["papex"]["latency_slo_seconds"] == 60
+    assert body["queues"]["papex"]["slo_breached"] is False
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from api.core.views import (
+    OutboxStatsView,
+    PartitionStatsView,
+    QueryStatsView,
+    RateLimitStatsView,
+    TaskMetricsView,
+    TaskStatsView,
+)
+
+urlpatterns = [
+    path("routes/", QueryStatsView.as_view(), name="perf-routes"),
+    path("tasks/", TaskStatsView.as_view(), name="perf-tasks"),
+    path("tasks/metrics/", TaskMetricsView.as_view(), name="perf-tasks-metrics"),
+    path("outbox/", OutboxStatsView.as_view(), name="perf-outbox"),
+    path("rate-limits/", RateLimitStatsView.as_view(), name="perf-rate-limits"),
+    path("partitions/", PartitionStatsView.as_view(), name="perf-partitions"),
+]
@@ -1,3 +1,104 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.core.partitioning import PartitionManager
+from api.core.query_instrumentation import RouteStats
+from api.core.rate_limit import RateLimiter
+from api.core.task_telemetry import QueueHealth, TaskStats, latency_slo
+from api.notification_outbox.services import NotificationOutbox
+from api.users.permissions import IsAdminRole
+
+
+class QueryStatsView(APIView):
+    """
+    Synthèse SQL par route (QueryInstrumentationMiddleware) : requêtes et temps
+    DB moyens, requêtes lentes, suspicions de N+1. ?hours=N (24 par défaut).
+    """
+
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        try:
+            hours = max(int(request.query_params.get("hours", 0)), 0)
+        except ValueError:
+            hours = 0
+        return Response(RouteStats.summary(hours or None))
+
+
+class HasMetricsToken(BasePermission):
+    """`Authorization: Bearer <METRICS_TOKEN>` (collecteur Prometheus, sans session)."""
+
+    def has_permission(self, request, view):
+        token = getattr(settings, "METRICS_TOKEN", None)
+        header = request.META.get("HTTP_AUTHORIZATION", "")
+        return bool(token) and hmac.compare_digest(header, f"Bearer {token}")
+
+
+class TaskStatsView(APIView):
+    """
+    Télémétrie Django-Q (api.core.task_telemetry) : état de la file de chaque
+    cluster (voies comprises) et, par fonction / groupe, exécutions, issues,
+    relances, attentes et durées.
+    """
+
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        queues = {}
+        for cluster, state in QueueHealth.snapshots().items():
+            slo, age = latency_slo(cluster), state["oldest_age_seconds"]
+            queues[cluster] = {**state, "latency_slo_seconds": slo, "slo_breached": bool(age and age > slo)}
+        return Response({"queues": queues, "tasks": TaskStats.summary()})
+
+
+class TaskMetricsView(APIView):
+    """Mêmes mesures au format texte Prometheus, outbox et limiteur de débit compris."""
+
+    permission_classes = [HasMetricsToken | IsAdminRole]
+
+    def get(self, request):
+        return HttpResponse(
+            TaskStats.prometheus() + NotificationOutbox.prometheus() + RateLimiter.prometheus(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
+class OutboxStatsView(APIView):
+    """
+    Retard de l'outbox des notifications (api.notification_outbox), par canal :
+    notifications dues, âge de la plus ancienne, échecs, débit de l'heure.
+    """
+
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        return Response(NotificationOutbox.lag())
+
+
+class RateLimitStatsView(APIView):
+    """
+    Limiteur de débit des fournisseurs (api.core.rate_limit) : jetons
+    disponibles, réservations accordées / refusées, envois reportés.
+    """
+
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        return Response(RateLimiter.summary())
+
+
+class PartitionStatsView(APIView):
+    """
+    Tables partitionnées par mois (api.core.partitioning) : bornes, lignes et
+    taille estimées de chaque partition, lignes hors mois et lignes archivées.
+    """
+
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        return Response(PartitionManager.summary())
@@ -0,0 +1,179 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+
+from api.contracts.models import Contract
+from api.leads.models import Lead
+
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+# Durée de vie courte : les KPIs créateurs tolèrent quelques minutes de retard
+KPI_CACHE_TIMEOUT = 120
+KPI_CACHE_PREFIX = "creators:kpis"
+
+
+def _day_bounds(start_date: Optional[date], end_date: Optional[date]):
+    """
+    Convertit un intervalle de dates (bornes incluses) en intervalle
+    [début, fin[ de datetimes aware dans le fuseau courant (Europe/Paris).
+    Équivalent à created_at__date__gte / __lte, mais exploitable par l'index.
+    """
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz) if start_date else None
+    end = (
+        timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+        if end_date
+        else None
+    )
+    return start, end
+
+
+def _empty_kpis() -> dict:
+    return {
+        "total_leads": 0,
+        "total_contracts": 0,
+        "total_revenue": ZERO,
+        "total_commissions": ZERO,
+        "conversion_rate": 0.0,
+    }
+
+
+class CreatorKpiService:
+    """
+    Calcul ensembliste des KPIs créateurs (leads, contrats, CA, commissions, conversion).
+
+    Deux requêtes GROUP BY, quel que soit le nombre de contrats :
+      - leads par créateur (Lead.creator_profile)
+      - contrats non annulés par créateur (Contract → Client → Lead.creator_profile),
+        avec la commission calculée en SQL : real_amount * commission_rate / 100 + bonus_amount
+
+    Les résultats sont mis en cache par intervalle de dates.
+    """
+
+    @staticmethod
+    def cache_key(start_date: Optional[date], end_date: Optional[date]) -> str:
+        start = start_date.isoformat() if start_date else "-"
+        end = end_date.isoformat() if end_date else "-"
+        return f"{KPI_CACHE_PREFIX}:{start}:{end}"
+
+    @staticmethod
+    def _commission_expression():
+        # Même arrondi que Contract.real_amount (ROUND_HALF_UP au centime)
+        real_amount = Round(
+            F("amount_due") * (Value(Decimal("1.00")) - F("discount_percent") / Value(Decimal("100.00"))),
+            2,
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+        return ExpressionWrapper(
+            real_amount
+            * Coalesce(F("client__lead__promo_code__commission_rate"), Value(ZERO))
+            / Value(Decimal("100.00"))
+            + Coalesce(F("client__lead__promo_code__bonus_amount"), Value(ZERO)),
+            output_field=DecimalField(max_digits=14, decimal_places=4),
+        )
+
+    @classmethod
+    def _compute(cls, start_date: Optional[date], end_date: Optional[date]) -> Dict:
+        start, end = _day_bounds(start_date, end_date)
+
+        leads = Lead.objects.filter(creator_profile__isnull=False)
+        contracts = Contract.objects.filter(
+            is_cancelled=False,
+            client__lead__creator_profile__isnull=False,
+        )
+        if start:
+            leads = leads.filter(created_at__gte=start)
+            contracts = contracts.filter(created_at__gte=start)
+        if end:
+            leads = leads.filter(created_at__lt=end)
+            contracts = contracts.filter(created_at__lt=end)
+
+        kpis: Dict = {}
+
+        lead_rows = (
+            leads.order_by()
+            .values("creator_profile_id")
+            .annotate(total=Count("id"))
+        )
+        for row in lead_rows:
+            kpis.setdefault(row["creator_profile_id"], _empty_kpis())["total_leads"] = row["total"]
+
+        contract_rows = (
+            contracts.order_by()
+            .values(creator_id=F("client__lead__creator_profile_id"))
+            .annotate(
+                total=Count("id"),
+                revenue=Sum("amount_due"),
+                commissions=Sum(cls._commission_expression()),
+            )
+        )
+        for row in contract_rows:
+            kpi = kpis.setdefault(row["creator_id"], _empty_kpis())
+            kpi["total_contracts"] = row["total"]
+            kpi["total_revenue"] = (row["revenue"] or ZERO).quantize(CENT)
+            kpi["total_commissions"] = (row["commissions"] or ZERO).quantize(CENT)
+
+        for kpi in kpis.values():
+            if kpi["total_leads"] > 0:
+                kpi["conversion_rate"] = round(kpi["total_contracts"] / kpi["total_leads"] * 100, 2)
+
+        return kpis
+
+    @classmethod
+    def for_period(cls, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict:
+        """
+        Retourne {creator_id: kpis} pour tous les créateurs ayant une activité
+        sur la période. Les créateurs absents du dict n'ont ni lead ni contrat.
+        """
+        key = cls.cache_key(start_date, end_date)
+        kpis = cache.get(key)
+        if kpis is None:
+            kpis = cls._compute(start_date, end_date)
+            cache.set(key, kpis, timeout=KPI_CACHE_TIMEOUT)
+        return kpis
+
+    @classmethod
+    def for_creator(cls, creator_id, start_date: Optional[date] = None, end_date: Optional[date] = None) -> dict:
+        return dict(cls.for_period(start_date, end_date).get(creator_id) or _empty_kpis())
+
+    @classmethod
+    def for_creators(cls, creators: Iterable, start_date: Optional[date] = None, end_date: Optional[date] = None):
+        """
+        KPIs pour une liste de CreatorProfile (user pré-chargé de préférence),
+        créateurs sans activité inclus avec des valeurs nulles.
+        """
+        kpis = cls.for_period(start_date, end_date)
+        rows = []
+        for creator in creators:
+            row = dict(kpis.get(creator.id) or _empty_kpis())
+            row.update(
+                {
+                    "creator_id": creator.id,
+                    "creator_full_name": creator.user.get_full_name(),
+                    "creator_currency": creator.currency or "EUR",
+                }
+            )
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def summarize(rows) -> dict:
+        summary = {
+            "total_leads": sum(r["total_leads"] for r in rows),
+            "total_contracts": sum(r["total_contracts"] for r in rows),
+            "total_revenue": sum((r["total_revenue"] for r in rows), ZERO),
+            "total_commissions": sum((r["total_commissions"] for r in rows), ZERO),
+        }
+        if summary["total_leads"] > 0:
+            summary["average_conversion_rate"] = round(
+                summary["total_contracts"] / summary["total_leads"] * 100, 2
+            )
+        else:
+            summary["average_conversion_rate"] = 0.0
+        return summary
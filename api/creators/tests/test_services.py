@@ -0,0 +1,127 @@
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from api.clients.models import Client
+from api.contracts.models import Contract
+from api.creators.models import CreatorProfile, PromoCode
+from api.creators.services import CreatorKpiService
+from api.lead_status.models import LeadStatus
+from api.leads.models import Lead
+from api.services.models import Service
+from api.users.models import User
+from api.users.roles import UserRoles
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_kpi_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def kpi_setup(admin_user):
+    lead_status = LeadStatus.objects.create(label="KPI Status", code="KPI_TEST")
+    service = Service.objects.create(code="KPI_SERVICE", label="Service KPI", price=Decimal("1000.00"))
+    user = User.objects.create_user(
+        email="kpi.creator@test.com",
+        password="password123",
+        role=UserRoles.CREATOR,
+        first_name="Kpi",
+        last_name="Creator",
+    )
+    creator = CreatorProfile.objects.create(user=user, status=CreatorProfile.Status.ACTIVE)
+    promo = PromoCode.objects.create(
+        code="KPI10",
+        creator=creator,
+        commission_rate=Decimal("10.00"),
+        bonus_amount=Decimal("5.00"),
+    )
+    return {"status": lead_status, "service": service, "creator": creator, "promo": promo}
+
+
+def _add_contracts(setup, count, offset=0):
+    for i in range(offset, offset + count):
+        lead = Lead.objects.create(
+            first_name=f"Lead{i}",
+            last_name="Kpi",
+            phone=f"06000000{i:02d}",
+            status=setup["status"],
+            creator_profile=setup["creator"],
+            promo_code=setup["promo"],
+        )
+        client = Client.objects.create(lead=lead)
+        Contract.objects.create(
+            client=client,
+            service=setup["service"],
+            amount_due=Decimal("1000.00"),
+            discount_percent=Decimal("10.00"),
+        )
+
+
+def test_kpis_match_decimal_computation(kpi_setup):
+    _add_contracts(kpi_setup, 3)
+    Lead.objects.create(
+        first_name="Sans",
+        last_name="Contrat",
+        phone="0611111111",
+        status=kpi_setup["status"],
+        creator_profile=kpi_setup["creator"],
+        promo_code=kpi_setup["promo"],
+    )
+
+    kpis = CreatorKpiService.for_creator(kpi_setup["creator"].id)
+
+    assert kpis["total_leads"] == 4
+    assert kpis["total_contracts"] == 3
+    assert kpis["total_revenue"] == Decimal("3000.00")
+    # real_amount = 900.00 → 900 * 10 / 100 + 5 = 95.00 par contrat
+    assert kpis["total_commissions"] == Decimal("285.00")
+    assert kpis["conversion_rate"] == 75.0
+
+
+def test_cancelled_contracts_are_excluded(kpi_setup):
+    _add_contracts(kpi_setup, 2)
+    Contract.objects.filter(pk=Contract.objects.first().pk).update(is_cancelled=True)
+
+    kpis = CreatorKpiService.for_creator(kpi_setup["creator"].id)
+
+    assert kpis["total_contracts"] == 1
+    assert kpis["total_commissions"] == Decimal("95.00")
+
+
+def test_aggregate_kpis_query_count_is_constant(api_client, admin_user, kpi_setup):
+    api_client.force_authenticate(user=admin_user)
+
+    _add_contracts(kpi_setup, 2)
+    cache.clear()
+    with CaptureQueriesContext(connection) as few:
+        response = api_client.get("/api/creators/aggregate-kpis/")
+    assert response.status_code == status.HTTP_200_OK
+
+    _add_contracts(kpi_setup, 8, offset=2)
+    cache.clear()
+    with CaptureQueriesContext(connection) as many:
+        response = api_client.get("/api/creators/aggregate-kpis/")
+    assert response.status_code == status.HTTP_200_OK
+
+    assert len(many.captured_queries) == len(few.captured_queries)
+    assert response.data["summary"]["total_contracts"] == 10
+
+
+def test_kpis_are_cached_per_date_range(kpi_setup):
+    _add_contracts(kpi_setup, 1)
+    creator_id = kpi_setup["creator"].id
+
+    CreatorKpiService.for_creator(creator_id)
+    with CaptureQueriesContext(connection) as ctx:
+        kpis = CreatorKpiService.for_creator(creator_id)
+    assert len(ctx.captured_queries) == 0
+    assert kpis["total_contracts"] == 1
@@ -1,14 +1,12 @@
 from datetime import datetime
-from decimal import Decimal
 
-from django.db.models import Count, Sum, F, ExpressionWrapper, DecimalField, Q
+from django.db.models import Count
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.response import Response
 
-from api.contracts.models import Contract
 from api.creators.filters import CreatorProfileFilter, SocialAccountLeadFilter, CreatorKpiFilter
 from api.creators.models import CreatorProfile, SocialAccountLead, PromoCode, CreatorContract
 from api.creators.pagination import StandardResultsSetPagination
@@ -21,7 +19,7 @@ from api.creators.serializers import (
     SocialAccountLeadSerializer, CreatorKpiSerializer, PromoCodeSerializer, CreatorAggregateKpiSerializer,
     CreatorContractSerializer,
 )
-from api.leads.models import Lead
+from api.creators.services import CreatorKpiService
 from api.users.roles import UserRoles
 
 
@@ -100,54 +98,17 @@ class CreatorProfileViewSet(viewsets.ModelViewSet):
         start_date_str = request.query_params.get("start_date")
         end_date_str = request.query_params.get("end_date")
 
-        leads_queryset = creator.leads.all()
-        contracts_queryset = Contract.objects.filter(client__lead__creator_profile=creator, is_cancelled=False)
-
         try:
-            if start_date_str:
-                start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-                leads_queryset = leads_queryset.filter(created_at__date__gte=start_date)
-                contracts_queryset = contracts_queryset.filter(created_at__date__gte=start_date)
-
-            if end_date_str:
-                end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
-                leads_queryset = leads_queryset.filter(created_at__date__lte=end_date)
-                contracts_queryset = contracts_queryset.filter(created_at__date__lte=end_date)
-
+            start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date() if start_date_str else None
+            end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date() if end_date_str else None
         except ValueError:
             return Response(
                 {"error": "Invalid date format. Please use YYYY-MM-DD."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        total_leads = leads_queryset.count()
-        total_contracts = contracts_queryset.count()
-
-        aggregation = contracts_queryset.aggregate(total=Sum('amount_due'))
-        total_revenue = aggregation['total'] or Decimal("0.00")
-        
-        total_commissions = Decimal("0.00")
-
-        if total_contracts > 0:
-            for contract in contracts_queryset.select_related('client__lead__promo_code'):
-                # Using the real_amount property from the Contract model
-                real_amount = contract.real_amount
-                promo_code = contract.client.lead.promo_code
-                if promo_code:
-                    commission_rate = promo_code.commission_rate or Decimal("0.00")
-                    bonus_amount = promo_code.bonus_amount or Decimal("0.00")
-                    total_commissions += (real_amount * commission_rate / Decimal("100.00")) + bonus_amount
-
-        conversion_rate = (total_contracts / total_leads * 100) if total_leads > 0 else 0.0
-
-        data = {
-            "total_leads": total_leads,
-            "total_contracts": total_contracts,
-            "conversion_rate": round(float(conversion_rate), 2),
-            "total_revenue": total_revenue,
-            "total_commissions": total_commissions.quantize(Decimal('0.01')),
-            "currency": creator.currency or "EUR",
-        }
+        data = CreatorKpiService.for_creator(creator.id, start_date, end_date)
+        data["currency"] = creator.currency or "EUR"
 
         # Use data as the instance for the serializer to ensure read_only fields are populated
         serializer = CreatorKpiSerializer(data)
@@ -157,123 +118,22 @@ class CreatorProfileViewSet(viewsets.ModelViewSet):
     def aggregate_kpis(self, request):
         self.filterset_class = CreatorKpiFilter
         # Get all creators for stats, ignoring the status filter from the request for the base queryset
-        queryset = CreatorProfile.objects.all()
-        
+        queryset = CreatorProfile.objects.select_related("user")
+
         # Instantiate filterset manually to get cleaned_data
         filterset = self.filterset_class(request.GET, queryset=queryset)
         if not filterset.is_valid():
             return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
-        
-        filtered_queryset = filterset.qs
 
         date_range = filterset.form.cleaned_data.get("leads_date_range")
         start_date = date_range.start if date_range else None
         end_date = date_range.stop if date_range else None
 
-        contracts_filter = Q(client__lead__promo_code__isnull=False, is_cancelled=False)
-        if start_date:
-            contracts_filter &= Q(created_at__date__gte=start_date)
-        if end_date:
-            contracts_filter &= Q(created_at__date__lte=end_date)
-
-        contracts = Contract.objects.filter(contracts_filter).select_related('client__lead__promo_code__creator__user')
-        
-        creator_kpis = {}
-
-        for contract in contracts:
-            creator = contract.client.lead.promo_code.creator
-            # Check if this creator is in our filtered queryset of creators
-            if not filtered_queryset.filter(id=creator.id).exists():
-                continue
-
-            if creator.id not in creator_kpis:
-                creator_kpis[creator.id] = {
-                    "creator_id": creator.id,
-                    "creator_full_name": creator.user.get_full_name(),
-                    "creator_currency": creator.currency,
-                    "total_leads": 0,
-                    "total_contracts": 0,
-                    "total_revenue": Decimal("0.00"),
-                    "total_commissions": Decimal("0.00"),
-                }
-            
-            promo_code = contract.client.lead.promo_code
-            real_amount = contract.real_amount
-            commission = (real_amount * promo_code.commission_rate / Decimal("100.00")) + promo_code.bonus_amount
-
-            creator_kpis[creator.id]["total_contracts"] += 1
-            creator_kpis[creator.id]["total_revenue"] += contract.amount_due
-            creator_kpis[creator.id]["total_commissions"] += commission
-
-        leads_filter = Q(creator_profile__in=filtered_queryset)
-        if start_date:
-            leads_filter &= Q(created_at__date__gte=start_date)
-        if end_date:
-            leads_filter &= Q(created_at__date__lte=end_date)
-            
-        leads = Lead.objects.filter(leads_filter)
-        leads_per_creator = leads.values('creator_profile').annotate(total=Count('id'))
-
-        for lead_data in leads_per_creator:
-            creator_id = lead_data['creator_profile']
-            if creator_id in creator_kpis:
-                creator_kpis[creator_id]['total_leads'] = lead_data['total']
-            else:
-                # If the creator had leads but no contracts, we still want to show them if they match filters
-                try:
-                    creator = filtered_queryset.get(id=creator_id)
-                    creator_kpis[creator_id] = {
-                        "creator_id": creator.id,
-                        "creator_full_name": creator.user.get_full_name(),
-                        "creator_currency": creator.currency,
-                        "total_leads": lead_data['total'],
-                        "total_contracts": 0,
-                        "total_revenue": Decimal("0.00"),
-                        "total_commissions": Decimal("0.00"),
-                    }
-                except CreatorProfile.DoesNotExist:
-                    continue
-
-        # Ensure creators with NO leads and NO contracts but matching filters are also included if they exist in filtered_queryset
-        for creator in filtered_queryset:
-            if creator.id not in creator_kpis:
-                creator_kpis[creator.id] = {
-                    "creator_id": creator.id,
-                    "creator_full_name": creator.user.get_full_name(),
-                    "creator_currency": creator.currency or "EUR",
-                    "total_leads": 0,
-                    "total_contracts": 0,
-                    "total_revenue": Decimal("0.00"),
-                    "total_commissions": Decimal("0.00"),
-                }
-
-        final_creator_kpis = []
-        for kpi in creator_kpis.values():
-            if kpi['total_leads'] > 0:
-                kpi['conversion_rate'] = round((kpi['total_contracts'] / kpi['total_leads']) * 100, 2)
-            else:
-                kpi['conversion_rate'] = 0.0
-            
-            # Formattage des décimaux
-            kpi['total_revenue'] = kpi['total_revenue'].quantize(Decimal('0.01'))
-            kpi['total_commissions'] = kpi['total_commissions'].quantize(Decimal('0.01'))
-            final_creator_kpis.append(kpi)
-
-        summary = {
-            "total_leads": sum(kpi['total_leads'] for kpi in final_creator_kpis),
-            "total_contracts": sum(kpi['total_contracts'] for kpi in final_creator_kpis),
-            "total_revenue": sum(kpi['total_revenue'] for kpi in final_creator_kpis),
-            "total_commissions": sum(kpi['total_commissions'] for kpi in final_creator_kpis),
-        }
-
-        if summary['total_leads'] > 0:
-            summary['average_conversion_rate'] = round((summary['total_contracts'] / summary['total_leads']) * 100, 2)
-        else:
-            summary['average_conversion_rate'] = 0.0
+        creator_kpis = CreatorKpiService.for_creators(filterset.qs, start_date, end_date)
 
         response_data = {
-            "summary": summary,
-            "creators": CreatorAggregateKpiSerializer(final_creator_kpis, many=True).data,
+            "summary": CreatorKpiService.summarize(creator_kpis),
+            "creators": CreatorAggregateKpiSerializer(creator_kpis, many=True).data,
         }
 
         return Response(response_data)
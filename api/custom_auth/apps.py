@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class CustomAuthConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "api.custom_auth"
\ No newline at end of file
+    name = "api.custom_auth"
+
+    def ready(self):
+        import api.custom_auth.signals
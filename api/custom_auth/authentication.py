@@ -1,6 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from api.custom_auth.user_cache import get_cached_user
 
 User = get_user_model()
 
@@ -23,6 +29,32 @@ class CookieJWTAuthentication(JWTAuthentication):
         except Exception:
             raise AuthenticationFailed("Token invalide ou expiré (via cookie)")
 
+    def get_user(self, validated_token):
+        """
+        Comme JWTAuthentication.get_user, mais l'utilisateur est lu depuis le
+        cache court (api.custom_auth.user_cache) plutôt qu'en base à chaque appel.
+        """
+        if api_settings.USER_ID_FIELD not in ("id", "pk"):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
 
 class EmailBackend:
     def authenticate(self, request, username=None, password=None, **kwargs):
@@ -42,7 +74,5 @@ class EmailBackend:
         return None
 
     def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
\ No newline at end of file
+        # Appelé à chaque requête authentifiée par session : servi par le cache
+        return get_cached_user(user_id)
@@ -0,0 +1,24 @@
+"""
+Invalidation du cache utilisateur (api.custom_auth.user_cache).
+
+Invalidation immédiate, puis à nouveau après commit : une requête concurrente
+qui relirait l'ancienne ligne avant le commit ne peut pas remettre une
+version périmée en cache.
+"""
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.custom_auth.user_cache import invalidate_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_invalidate_cache(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+    transaction.on_commit(partial(invalidate_user, instance.pk))
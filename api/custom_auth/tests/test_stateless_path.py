@@ -0,0 +1,101 @@
+"""
+Chemin de requête authentifié : ni écriture de session ni SELECT users_user
+par appel API, une fois la session et l'utilisateur en cache.
+"""
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.custom_auth import authentication
+from api.custom_auth.authentication import CookieJWTAuthentication
+from api.custom_auth.user_cache import USER_CACHE_PREFIX, get_cached_user
+from api.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+BENCH_REQUESTS = 30
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(
+        email="lean@example.com", password="pwd", first_name="Lean", last_name="Path", role="ADMIN",
+    )
+
+
+def _session_writes(queries):
+    return [
+        q["sql"] for q in queries
+        if '"django_session"' in q["sql"] and not q["sql"].lstrip().upper().startswith("SELECT")
+    ]
+
+
+def _user_lookups(queries):
+    return [q["sql"] for q in queries if 'FROM "users_user" WHERE "users_user"."id" =' in q["sql"]]
+
+
+def _bench(http, url):
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(BENCH_REQUESTS):
+            assert http.get(url).status_code == 200
+    return ctx.captured_queries
+
+
+def test_list_endpoint_skips_session_writes_and_user_lookups(user, settings, monkeypatch):
+    url = reverse("lead-list")
+    http = Client()
+    http.force_login(user)
+    http.get(url)  # amorçage des caches
+
+    queries = _bench(http, url)
+    assert _session_writes(queries) == []
+    assert _user_lookups(queries) == []
+
+    # Profil précédent : session réécrite à chaque requête, utilisateur lu en base
+    settings.SESSION_SAVE_EVERY_REQUEST = True
+    monkeypatch.setattr(authentication, "get_cached_user", lambda pk: User.objects.filter(pk=pk).first())
+    legacy_queries = _bench(http, url)
+    assert len(_session_writes(legacy_queries)) == BENCH_REQUESTS
+    assert len(_user_lookups(legacy_queries)) == BENCH_REQUESTS
+    assert len(queries) <= len(legacy_queries) - 2 * BENCH_REQUESTS
+
+
+def test_session_is_renewed_once_per_interval(user, settings):
+    settings.SESSION_RENEW_INTERVAL = 0
+    url = reverse("lead-list")
+    http = Client()
+    http.force_login(user)
+
+    with CaptureQueriesContext(connection) as ctx:
+        http.get(url)
+    assert len(_session_writes(ctx.captured_queries)) == 1
+
+    settings.SESSION_RENEW_INTERVAL = 3600
+    with CaptureQueriesContext(connection) as ctx:
+        http.get(url)
+    assert _session_writes(ctx.captured_queries) == []
+
+
+def test_user_cache_invalidated_on_save(user):
+    cache.delete(f"{USER_CACHE_PREFIX}{user.pk}")
+    assert get_cached_user(user.pk).is_active
+
+    user.is_active = False
+    user.save()  # toggle_active passe par save()
+
+    assert not get_cached_user(user.pk).is_active
+    with pytest.raises(Exception):
+        CookieJWTAuthentication().get_user(AccessToken.for_user(user))
+
+
+def test_jwt_user_served_from_cache(user, django_assert_num_queries):
+    token = AccessToken.for_user(user)
+    auth = CookieJWTAuthentication()
+    auth.get_user(token)
+
+    with django_assert_num_queries(0):
+        assert auth.get_user(token).pk == user.pk
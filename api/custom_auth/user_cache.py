@@ -0,0 +1,59 @@
+"""
+Cache court des utilisateurs authentifiés.
+
+Chaque requête authentifiée (session, JWT, WebSocket) résout son utilisateur
+par clé primaire : sans cache, c'est un SELECT sur users_user par appel API.
+L'instance est conservée quelques secondes dans Redis (partagé entre les
+process web et les workers) et invalidée à chaque save/delete du User
+(toggle_active, changement de mot de passe, update_last_login…).
+
+⚠️ Les QuerySet.update() sur User ne déclenchent pas de signal : appeler
+invalidate_user() explicitement.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_TTL = 60  # secondes
+USER_CACHE_PREFIX = "auth:user:"
+
+
+def _key(user_id) -> str:
+    return f"{USER_CACHE_PREFIX}{user_id}"
+
+
+def get_cached_user(user_id):
+    """Retourne l'utilisateur (cache puis base) ou None s'il n'existe pas."""
+    if user_id is None:
+        return None
+
+    key = _key(user_id)
+    try:
+        user = cache.get(key)
+    except Exception as e:  # Redis indisponible : on retombe sur la base
+        logger.warning(f"⚠️ Cache utilisateur indisponible : {e}")
+        user = None
+    if user is not None:
+        return user
+
+    User = get_user_model()
+    try:
+        user = User.objects.get(pk=user_id)
+    except (User.DoesNotExist, ValueError, TypeError):
+        return None
+
+    try:
+        cache.set(key, user, USER_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache utilisateur indisponible : {e}")
+    return user
+
+
+def invalidate_user(user_id) -> None:
+    try:
+        cache.delete(_key(user_id))
+    except Exception as e:
+        logger.warning(f"⚠️ Invalidation cache utilisateur {user_id} impossible : {e}")
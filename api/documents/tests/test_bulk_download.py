@@ -0,0 +1,172 @@
+import asyncio
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+import pytest
+from asgiref.sync import async_to_sync
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import Client as DjangoClient
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.clients.models import Client
+from api.documents.models import Document
+from api.lead_status.models import LeadStatus
+from api.leads.models import Lead
+from api.users.models import User
+from api.utils.cloud.zip_stream import stream_zip
+
+
+class FakeS3:
+    """Client S3 factice : contenu déterministe par clé, 'missing/*' introuvable."""
+
+    def __init__(self, size=1024):
+        self.size = size
+
+    def get_object(self, Bucket, Key):
+        if Key.startswith("missing/"):
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": StreamingBody(_LazyContent(Key.encode(), self.size), self.size)}
+
+
+class _LazyContent(io.RawIOBase):
+    """Contenu 'clé' complété par des points, produit à la lecture (rien n'est préalloué)."""
+
+    def __init__(self, head: bytes, size: int):
+        self.head, self.size, self.pos = head, size, 0
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        n = self.size - self.pos if n is None or n < 0 else min(n, self.size - self.pos)
+        data = (self.head[self.pos:self.pos + n]).ljust(n, b".")
+        self.pos += n
+        return data
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(
+        email="zip@user.com", first_name="Zip", last_name="User", password="pwd", role="ADMIN",
+    )
+
+
+@pytest.fixture
+def client_obj(db):
+    status = LeadStatus.objects.create(code="NOUVEAU", label="Nouveau", color="#C1E8FF")
+    lead = Lead.objects.create(first_name="Marc", last_name="Nkue", status=status)
+    return Client.objects.create(lead=lead)
+
+
+@pytest.mark.django_db
+def test_bulk_download_streams_entries_in_order(user, client_obj, monkeypatch):
+    monkeypatch.setattr("api.utils.cloud.scw.bucket_utils.get_s3_client", lambda: FakeS3())
+    docs = [
+        Document.objects.create(client=client_obj, url="https://s3.example.com/documents/a/scan.pdf"),
+        Document.objects.create(client=client_obj, url="https://s3.example.com/documents/missing/x.pdf"),
+        Document.objects.create(client=client_obj, url="https://s3.example.com/documents/b/notes.txt"),
+    ]
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+
+    resp = api_client.get(reverse("document-bulk-download") + "?ids=" + ",".join(str(d.pk) for d in docs))
+
+    assert resp.status_code == 200
+    assert resp.streaming
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(resp.streaming_content)))
+    expected = [d.url.split("/documents/")[1] for d in Document.objects.filter(pk__in=[d.pk for d in docs])]
+    expected = [key for key in expected if not key.startswith("missing/")]
+    infos = archive.infolist()
+    assert [archive.read(i).rstrip(b".").decode() for i in infos] == expected
+    modes = {i.filename.rsplit(".", 1)[-1]: i.compress_type for i in infos}
+    assert modes == {"pdf": zipfile.ZIP_STORED, "txt": zipfile.ZIP_DEFLATED}
+    assert archive.testzip() is None
+
+
+def test_stream_zip_memory_is_bounded_by_entry_not_archive():
+    entry_size = 1024 * 1024
+    n_entries = 50  # 50 Mo d'archive
+    payload = os.urandom(entry_size)
+
+    def entries():
+        for i in range(n_entries):
+            yield f"doc_{i}.pdf", payload
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    total = sum(len(chunk) for chunk in stream_zip(entries()))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert total > n_entries * entry_size
+    assert peak < 5 * entry_size, f"pic mémoire {peak / 1e6:.1f} Mo en {elapsed:.2f}s"
+
+
+@pytest.mark.django_db
+def test_bulk_download_streams_under_asgi_with_bounded_memory(user, client_obj, monkeypatch):
+    """Par le vrai ASGIHandler (production : uvicorn) : l'archive part morceau par morceau."""
+    entry_size = 4 * 1024 * 1024
+    monkeypatch.setattr("api.utils.cloud.scw.bucket_utils.get_s3_client", lambda: FakeS3(size=entry_size))
+    docs = [
+        Document.objects.create(client=client_obj, url=f"https://s3.example.com/documents/big/{i}.pdf")
+        for i in range(10)
+    ]
+    browser = DjangoClient()
+    browser.force_login(user)
+    path = reverse("document-bulk-download")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": ("ids=" + ",".join(str(d.pk) for d in docs)).encode(),
+        "headers": [
+            (b"host", b"testserver"),
+            (b"cookie", f"sessionid={browser.cookies['sessionid'].value}".encode()),
+        ],
+        "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }
+    messages = []
+    body = tempfile.TemporaryFile()  # hors du tas Python : seul le flux est mesuré
+    peak_during_stream = []
+    requested = []
+
+    async def receive():
+        if requested:
+            await asyncio.Event().wait()  # le client reste connecté
+        requested.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.write(message.get("body", b""))
+            peak_during_stream.append(tracemalloc.get_traced_memory()[1])
+            message = {**message, "body": b""}
+        messages.append(message)
+
+    # Comme le client de test Django : la connexion de la transaction de test reste ouverte
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    tracemalloc.start()
+    try:
+        async_to_sync(ASGIHandler())(scope, receive, send)
+    finally:
+        tracemalloc.stop()
+        request_started.connect(close_old_connections)
+        request_finished.connect(close_old_connections)
+
+    assert messages[0]["status"] == 200
+    chunks = [m for m in messages if m["type"] == "http.response.body"]
+    assert len(chunks) > 10 and all(m["more_body"] for m in chunks[:-1])
+    archive = zipfile.ZipFile(body)
+    assert len(archive.infolist()) == 10 and archive.testzip() is None
+    # 40 Mo d'archive : le pic reste de l'ordre de quelques morceaux de 1 Mo
+    assert max(peak_during_stream) < 3 * entry_size
@@ -0,0 +1,186 @@
+"""
+Upload direct navigateur → bucket, vérifié contre un S3 local (moto server).
+"""
+import pytest
+import requests
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.clients.models import Client
+from api.documents.models import Document
+from api.lead_status.models import LeadStatus
+from api.leads.models import Lead
+from api.leads_events.models import LeadEvent
+from api.users.models import User
+from api.utils.cloud.scw import uploads
+
+BUCKET = "test-documents"
+
+
+@pytest.fixture
+def api_client(db):
+    user = User.objects.create_user(
+        email="upload@user.com", first_name="Up", last_name="Load", password="pwd", role="ADMIN",
+    )
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture
+def client_obj(db):
+    status = LeadStatus.objects.create(code="NOUVEAU", label="Nouveau", color="#C1E8FF")
+    lead = Lead.objects.create(first_name="Marc", last_name="Nkue", status=status)
+    return Client.objects.create(lead=lead)
+
+
+@pytest.mark.django_db
+def test_presigned_post_then_finalize_creates_documents(s3, api_client, client_obj):
+    content = b"%PDF-1.4 scan"
+    resp = api_client.post(
+        reverse("document-upload-urls"),
+        {"client": client_obj.pk, "files": [
+            {"name": "scan.pdf", "size": len(content), "content_type": "application/pdf"},
+            {"name": "photo.png", "size": 3, "content_type": "image/png"},
+        ]},
+        format="json",
+    )
+    assert resp.status_code == 200
+    first, second = resp.data["uploads"]
+    assert first["method"] == "POST"
+
+    upload = requests.post(first["url"], data=first["fields"], files={"file": ("scan.pdf", content)})
+    assert upload.status_code in (200, 204)
+
+    # Le second fichier n'est jamais téléversé : HEAD échoue, le premier est créé
+    resp = api_client.post(
+        reverse("document-finalize-upload"),
+        {"uploads": [{"token": first["token"]}, {"token": second["token"]}]},
+        format="json",
+    )
+    assert resp.status_code == 207
+    assert len(resp.data["errors"]) == 1
+    doc = Document.objects.get(client=client_obj)
+    assert doc.url.endswith(f"/{BUCKET}/{first['key']}")
+    assert s3.get_object(Bucket=BUCKET, Key=first["key"])["Body"].read() == content
+    assert LeadEvent.objects.filter(lead=client_obj.lead, event_type__code="DOCUMENT_UPLOADED").count() == 1
+
+
+@pytest.mark.django_db
+def test_multipart_upload_for_large_scans(s3, api_client, client_obj, monkeypatch):
+    monkeypatch.setattr(uploads, "MULTIPART_THRESHOLD", 1024)
+    monkeypatch.setattr(uploads, "PART_SIZE", 5 * 1024 * 1024)
+    content = b"x" * (5 * 1024 * 1024 + 10)
+
+    resp = api_client.post(
+        reverse("document-upload-urls"),
+        {"client": client_obj.pk, "files": [
+            {"name": "big.pdf", "size": len(content), "content_type": "application/pdf"},
+        ]},
+        format="json",
+    )
+    (upload,) = resp.data["uploads"]
+    assert upload["method"] == "MULTIPART"
+    assert len(upload["parts"]) == 2
+
+    parts = []
+    for part in upload["parts"]:
+        start = (part["part_number"] - 1) * upload["part_size"]
+        put = requests.put(part["url"], data=content[start:start + upload["part_size"]])
+        assert put.status_code == 200
+        parts.append({"part_number": part["part_number"], "etag": put.headers["ETag"]})
+
+    resp = api_client.post(
+        reverse("document-finalize-upload"),
+        {"uploads": [{"token": upload["token"], "parts": parts}]},
+        format="json",
+    )
+    assert resp.status_code == 201
+    assert s3.head_object(Bucket=BUCKET, Key=upload["key"])["ContentLength"] == len(content)
+
+
+@pytest.mark.django_db
+def test_upload_authorisation_rejects_oversize_and_bad_type(s3, api_client, client_obj):
+    url = reverse("document-upload-urls")
+    too_big = {"name": "a.pdf", "size": 10 ** 12, "content_type": "application/pdf"}
+    bad_type = {"name": "a.exe", "size": 10, "content_type": "application/x-msdownload"}
+
+    assert api_client.post(url, {"client": client_obj.pk, "files": [too_big]}, format="json").status_code == 400
+    assert api_client.post(url, {"client": client_obj.pk, "files": [bad_type]}, format="json").status_code == 400
+
+    resp = api_client.post(
+        reverse("document-finalize-upload"), {"uploads": [{"token": "forged"}]}, format="json",
+    )
+    assert resp.status_code == 400
+    assert not Document.objects.exists()
+
+
+def _uploaded_scan(s3, api_client, client_obj, content=b"%PDF-1.4 scan"):
+    resp = api_client.post(
+        reverse("document-upload-urls"),
+        {"client": client_obj.pk, "files": [
+            {"name": "scan.pdf", "size": len(content), "content_type": "application/pdf"},
+        ]},
+        format="json",
+    )
+    (upload,) = resp.data["uploads"]
+    requests.post(upload["url"], data=upload["fields"], files={"file": ("scan.pdf", content)})
+    return upload
+
+
+@pytest.mark.django_db
+def test_replayed_finalize_returns_the_existing_document(s3, api_client, client_obj):
+    upload = _uploaded_scan(s3, api_client, client_obj)
+    body = {"uploads": [{"token": upload["token"]}]}
+
+    first = api_client.post(reverse("document-finalize-upload"), body, format="json")
+    replay = api_client.post(reverse("document-finalize-upload"), body, format="json")
+
+    assert first.status_code == 201
+    assert replay.status_code == 200
+    assert [d["id"] for d in replay.data] == [d["id"] for d in first.data]
+    assert Document.objects.filter(client=client_obj).count() == 1
+    assert LeadEvent.objects.filter(lead=client_obj.lead, event_type__code="DOCUMENT_UPLOADED").count() == 1
+
+
+@pytest.mark.django_db
+def test_finalize_rejects_tokens_issued_for_another_purpose(s3, api_client, client_obj):
+    cv = uploads.issue_upload(
+        uploads.CV_UPLOAD, "job/cv.pdf", "application/pdf", 10, 10 * 1024 * 1024, payload={"job": 1},
+    )
+    resp = api_client.post(
+        reverse("document-finalize-upload"), {"uploads": [{"token": cv["token"]}]}, format="json",
+    )
+    assert resp.status_code == 400
+    assert not Document.objects.exists()
+
+
+@pytest.mark.django_db
+def test_malformed_bodies_are_rejected(s3, api_client, client_obj):
+    for url in (reverse("document-finalize-upload"), reverse("document-upload-urls")):
+        assert api_client.post(url, ["not", "a", "dict"], format="json").status_code == 400
+    resp = api_client.post(reverse("document-finalize-upload"), {"uploads": ["token"]}, format="json")
+    assert resp.status_code == 400
+    resp = api_client.post(
+        reverse("document-upload-urls"), {"client": client_obj.pk, "files": ["scan.pdf"]}, format="json",
+    )
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_abort_releases_a_multipart_upload(s3, api_client, client_obj, monkeypatch):
+    monkeypatch.setattr(uploads, "MULTIPART_THRESHOLD", 1024)
+    resp = api_client.post(
+        reverse("document-upload-urls"),
+        {"client": client_obj.pk, "files": [
+            {"name": "big.pdf", "size": 4096, "content_type": "application/pdf"},
+        ]},
+        format="json",
+    )
+    (upload,) = resp.data["uploads"]
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+
+    resp = api_client.post(reverse("document-abort-upload"), {"token": upload["token"]}, format="json")
+
+    assert resp.status_code == 204
+    assert not s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
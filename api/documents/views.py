@@ -1,9 +1,9 @@
-import io
 import unicodedata
 import re
-import zipfile
+from urllib.parse import unquote, urlparse
 
-import requests
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
 from django.http import StreamingHttpResponse
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
@@ -12,6 +12,22 @@ from rest_framework.response import Response
 from api.documents.models import Document
 from api.documents.serializers import DocumentSerializer
 from api.utils.cloud.storage import store_client_document
+from api.utils.cloud.zip_stream import aiter_in_thread, stream_zip
+
+# Téléchargements S3 simultanés pour le ZIP multiple
+BULK_DOWNLOAD_WORKERS = 4
+
+# Upload direct navigateur → bucket
+DIRECT_UPLOAD_MAX_SIZE = 500 * 1024 * 1024
+DIRECT_UPLOAD_CONTENT_TYPES = {
+    "application/pdf",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+    "image/heic",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
 
 
 # ──────────────────────────────────────────────────────────────
@@ -54,10 +70,28 @@ def _extract_s3_key(url: str) -> str:
     return "/".join(parts[1:]) if len(parts) > 1 else parts[0]
 
 
-def _delete_from_bucket(url: str) -> None:
-    from api.utils.cloud.scw.bucket_utils import delete_object
-    key = _extract_s3_key(url)
-    delete_object("documents", key)
+def _fetch_zip_entries(entries):
+    """(nom, clé S3) → (nom, morceaux du contenu), dans l'ordre ; les objets illisibles sont ignorés."""
+    from api.utils.cloud.scw.bucket_utils import iter_objects
+    names = [name for name, _ in entries]
+    keys  = [key for _, key in entries]
+    for name, (_, content) in zip(names, iter_objects("documents", keys, BULK_DOWNLOAD_WORKERS)):
+        if content is not None:
+            yield name, content
+
+
+def _lock_upload_urls(urls) -> None:
+    """Verrous transactionnels (advisory) par URL d'objet, dans un ordre stable."""
+    from django.db import connection
+    with connection.cursor() as cursor:
+        for url in sorted(set(urls)):
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [url])
+
+
+def _delete_from_bucket(*urls: str) -> None:
+    """Planifie la suppression S3 (par lots, après le commit de la transaction en cours)."""
+    from api.storage_cleanup.services import S3DeletionService
+    S3DeletionService.schedule({"documents": urls})
 
 
 # ──────────────────────────────────────────────────────────────
@@ -70,6 +104,9 @@ class DocumentViewSet(viewsets.ModelViewSet):
 
       GET    /documents/                   → liste (?client= ?document_type=)
       POST   /documents/                   → upload multi-fichiers
+      POST   /documents/upload-urls/       → autorisations d'upload direct (présignées)
+      POST   /documents/finalize-upload/   → vérification + création après upload direct
+      POST   /documents/abort-upload/      → abandon d'un upload multipart
       GET    /documents/{id}/              → détail
       PUT    /documents/{id}/              → remplacement (nettoie S3)
       PATCH  /documents/{id}/              → mise à jour partielle
@@ -95,28 +132,39 @@ class DocumentViewSet(viewsets.ModelViewSet):
         return qs
 
     # ──────────────────────────────────────────────
-    # CREATE — upload multi-fichiers
+    # Helper commun : client + type de document de la requête
     # ──────────────────────────────────────────────
-    def create(self, request, *args, **kwargs):
+    def _resolve_client_and_type(self, request):
         client_id        = request.data.get("client") or request.query_params.get("client")
         document_type_id = request.data.get("document_type")
 
         if not client_id:
-            return Response({"detail": "client ID requis"}, status=400)
+            return None, None, Response({"detail": "client ID requis"}, status=400)
 
         from api.clients.models import Client
         try:
             client = Client.objects.get(pk=client_id)
         except Client.DoesNotExist:
-            return Response({"detail": "Client inexistant"}, status=404)
+            return None, None, Response({"detail": "Client inexistant"}, status=404)
 
         document_type = None
         if document_type_id:
+            from api.core.reference_data import document_types
             from api.document_types.models import DocumentType
             try:
-                document_type = DocumentType.objects.get(pk=document_type_id)
+                document_type = document_types.get_by_id(document_type_id)
             except DocumentType.DoesNotExist:
-                return Response({"detail": "Type de document invalide"}, status=400)
+                return None, None, Response({"detail": "Type de document invalide"}, status=400)
+
+        return client, document_type, None
+
+    # ──────────────────────────────────────────────
+    # CREATE — upload multi-fichiers
+    # ──────────────────────────────────────────────
+    def create(self, request, *args, **kwargs):
+        client, document_type, error = self._resolve_client_and_type(request)
+        if error:
+            return error
 
         files = request.FILES.getlist("files") or [request.FILES.get("file")]
         files = [f for f in files if f]
@@ -138,6 +186,158 @@ class DocumentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(documents, many=True)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    # ──────────────────────────────────────────────
+    # ACTION : upload direct (1/2) — autorisations présignées
+    # ──────────────────────────────────────────────
+    @action(detail=False, methods=["post"], url_path="upload-urls")
+    def upload_urls(self, request):
+        """
+        POST /documents/upload-urls/
+        Body JSON : { "client": 1, "document_type": 2,
+                      "files": [{ "name": "scan.pdf", "size": 123, "content_type": "application/pdf" }] }
+        Retourne une autorisation par fichier : POST présigné (url + fields)
+        ou multipart (upload_id + URL PUT par part), avec son jeton de finalisation.
+        """
+        from api.utils.cloud.scw.uploads import DOCUMENT_UPLOAD, UploadError, issue_upload, unique_key
+
+        if not isinstance(request.data, dict):
+            return Response({"detail": "Corps JSON invalide"}, status=400)
+        client, document_type, error = self._resolve_client_and_type(request)
+        if error:
+            return error
+
+        files = request.data.get("files") or []
+        if not isinstance(files, list) or not files or not all(isinstance(spec, dict) for spec in files):
+            return Response({"detail": "Aucun fichier fourni"}, status=400)
+
+        uploads = []
+        for index, spec in enumerate(files):
+            content_type = str(spec.get("content_type") or "").lower()
+            if content_type not in DIRECT_UPLOAD_CONTENT_TYPES:
+                return Response({"detail": f"Type de fichier non autorisé : {content_type or '?'}"}, status=400)
+
+            filename = _build_filename(client, document_type, str(spec.get("name") or ""), index)
+            try:
+                uploads.append(issue_upload(
+                    DOCUMENT_UPLOAD,
+                    unique_key(filename),
+                    content_type,
+                    int(spec.get("size") or 0),
+                    DIRECT_UPLOAD_MAX_SIZE,
+                    payload={
+                        "client": client.pk,
+                        "document_type": document_type.pk if document_type else None,
+                    },
+                ))
+            except (UploadError, ValueError) as e:
+                return Response({"detail": str(e)}, status=400)
+
+        return Response({"uploads": uploads})
+
+    # ──────────────────────────────────────────────
+    # ACTION : upload direct (2/2) — vérification + création en masse
+    # ──────────────────────────────────────────────
+    @action(detail=False, methods=["post"], url_path="finalize-upload")
+    def finalize_upload(self, request):
+        """
+        POST /documents/finalize-upload/
+        Body JSON : { "uploads": [{ "token": "...", "parts": [{ "part_number": 1, "etag": "..." }] }] }
+        Vérifie chaque objet (HEAD) puis crée les Document en une seule insertion.
+        Idempotent : un jeton rejoué renvoie le Document déjà créé pour son objet.
+        """
+        from api.utils.cloud.scw.uploads import (
+            DOCUMENT_UPLOAD, UploadError, claims_url, finalize_upload, read_token,
+        )
+
+        items = request.data.get("uploads") if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+            return Response({"detail": "uploads requis"}, status=400)
+
+        errors   = []
+        verified = []
+        urls     = []
+        for item in items:
+            try:
+                claims = read_token(item.get("token"), DOCUMENT_UPLOAD)
+            except UploadError as e:
+                errors.append({"token": item.get("token"), "error": str(e)})
+                continue
+            urls.append(claims_url(claims))
+            verified.append((item, claims))
+
+        # Objets déjà finalisés (jeton rejoué) : pas de nouvel appel S3
+        existing = set(Document.objects.filter(url__in=urls).values_list("url", flat=True))
+        checked = []
+        for item, claims in verified:
+            if claims_url(claims) in existing:
+                checked.append(claims)
+                continue
+            try:
+                checked.append(finalize_upload(claims, item.get("parts")))
+            except UploadError as e:
+                errors.append({"token": item.get("token"), "error": str(e)})
+
+        if not checked:
+            return Response({"detail": "Aucun upload valide", "errors": errors}, status=400)
+
+        with transaction.atomic():
+            # Verrou par objet : deux finalisations concurrentes du même jeton ne créent qu'un Document
+            _lock_upload_urls(claims_url(claims) for claims in checked)
+            existing = set(Document.objects.filter(url__in=urls).values_list("url", flat=True))
+            created = Document.objects.bulk_create([
+                Document(
+                    client_id=claims["client"],
+                    document_type_id=claims["document_type"],
+                    url=claims["url"],
+                )
+                for claims in {claims_url(claims): claims for claims in checked}.values()
+                if claims_url(claims) not in existing
+            ])
+            self._log_uploaded(created)
+
+        data = self.get_serializer(
+            Document.objects.filter(url__in=[claims_url(claims) for claims in checked])
+            .select_related("client", "document_type"),
+            many=True,
+        ).data
+        if errors:
+            return Response(
+                {"detail": "Créés avec erreurs", "documents": data, "errors": errors},
+                status=status.HTTP_207_MULTI_STATUS,
+            )
+        return Response(data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"], url_path="abort-upload")
+    def abort_upload(self, request):
+        """
+        POST /documents/abort-upload/
+        Body JSON : { "token": "..." }
+        Abandonne un upload multipart interrompu (les parts déjà stockées sont libérées).
+        """
+        from api.utils.cloud.scw.uploads import DOCUMENT_UPLOAD, UploadError, abort_upload, read_token
+
+        if not isinstance(request.data, dict):
+            return Response({"detail": "Corps JSON invalide"}, status=400)
+        try:
+            abort_upload(read_token(request.data.get("token"), DOCUMENT_UPLOAD))
+        except UploadError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def _log_uploaded(self, documents):
+        """bulk_create ne passe pas par les signaux d'audit : on trace DOCUMENT_UPLOADED en lot."""
+        from api.clients.models import Client
+        from api.leads_events.models import LeadEvent
+
+        leads = dict(
+            Client.objects.filter(pk__in={d.client_id for d in documents}).values_list("pk", "lead_id")
+        )
+        LeadEvent.bulk_log(
+            "DOCUMENT_UPLOADED",
+            ((leads[d.client_id], {"document_id": d.pk}) for d in documents if leads.get(d.client_id)),
+            actor=self.request.user,
+        )
+
     # ──────────────────────────────────────────────
     # UPDATE / PARTIAL_UPDATE — nettoie l'ancien fichier S3
     # ──────────────────────────────────────────────
@@ -150,9 +350,10 @@ class DocumentViewSet(viewsets.ModelViewSet):
             document_type = instance.document_type
             type_id       = request.data.get("document_type")
             if type_id:
+                from api.core.reference_data import document_types
                 from api.document_types.models import DocumentType
                 try:
-                    document_type = DocumentType.objects.get(pk=type_id)
+                    document_type = document_types.get_by_id(type_id)
                 except DocumentType.DoesNotExist:
                     pass
 
@@ -160,9 +361,27 @@ class DocumentViewSet(viewsets.ModelViewSet):
             new_url             = store_client_document(instance.client, new_file, filename)
             request.data["url"] = new_url
 
+        # Remplacement par upload direct : jeton issu de /documents/upload-urls/
+        upload_token = None if new_file else request.data.get("upload_token")
+        if upload_token:
+            from api.utils.cloud.scw.uploads import (
+                DOCUMENT_UPLOAD, UploadError, claims_url, finalize_upload, read_token,
+            )
+            try:
+                claims = read_token(upload_token, DOCUMENT_UPLOAD)
+                if claims["client"] != instance.client_id:
+                    raise UploadError("Jeton d'upload émis pour un autre client")
+                if Document.objects.filter(url=claims_url(claims)).exclude(pk=instance.pk).exists():
+                    raise UploadError("Jeton d'upload déjà utilisé")
+                if claims_url(claims) != old_url:  # jeton rejoué : objet déjà vérifié et en place
+                    claims = finalize_upload(claims, request.data.get("parts"))
+            except UploadError as e:
+                return Response({"detail": str(e)}, status=400)
+            request.data["url"] = claims_url(claims)
+
         response = super().update(request, *args, **kwargs)
 
-        if new_file and old_url:
+        if (new_file or upload_token) and old_url and old_url != request.data.get("url"):
             try:
                 _delete_from_bucket(old_url)
             except Exception as e:
@@ -173,14 +392,11 @@ class DocumentViewSet(viewsets.ModelViewSet):
     # ──────────────────────────────────────────────
     # DESTROY — suppression DB + bucket
     # ──────────────────────────────────────────────
+    @transaction.atomic
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        file_url = instance.url
-        if file_url:
-            try:
-                _delete_from_bucket(file_url)
-            except Exception as e:
-                print(f"Erreur suppression document du storage : {e}")
+        if instance.url:
+            _delete_from_bucket(instance.url)
         return super().destroy(request, *args, **kwargs)
 
     # ──────────────────────────────────────────────
@@ -261,23 +477,12 @@ class DocumentViewSet(viewsets.ModelViewSet):
         if not ids:
             return Response({"detail": "ids requis"}, status=400)
 
-        documents = Document.objects.filter(pk__in=ids).select_related("client", "document_type")
-        errors    = []
+        documents = Document.objects.filter(pk__in=ids)
 
-        for doc in documents:
-            if doc.url:
-                try:
-                    _delete_from_bucket(doc.url)
-                except Exception as e:
-                    errors.append({"id": doc.pk, "error": str(e)})
+        with transaction.atomic():
+            _delete_from_bucket(*documents.values_list("url", flat=True))
+            documents.delete()
 
-        documents.delete()
-
-        if errors:
-            return Response(
-                {"detail": "Supprimés avec erreurs S3", "errors": errors},
-                status=status.HTTP_207_MULTI_STATUS,
-            )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     # ──────────────────────────────────────────────
@@ -287,7 +492,8 @@ class DocumentViewSet(viewsets.ModelViewSet):
     def bulk_download(self, request):
         """
         GET /documents/bulk-download/?ids=1,2,3
-        Retourne un fichier ZIP contenant tous les documents demandés.
+        Retourne un fichier ZIP contenant tous les documents demandés, écrit
+        au fil de la lecture S3 (mémoire bornée par un morceau par document).
         """
         ids_param = request.query_params.get("ids", "")
         ids       = [i for i in ids_param.split(",") if i.strip().isdigit()]
@@ -301,33 +507,29 @@ class DocumentViewSet(viewsets.ModelViewSet):
             .select_related("client", "document_type")
         )
 
-        buffer     = io.BytesIO()
         seen_names: dict[str, int] = {}
+        entries: list[tuple[str, str]] = []
 
-        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-            for doc in documents:
-                if not doc.url:
-                    continue
-
-                from urllib.parse import unquote, urlparse
-                original_name = unquote(urlparse(doc.url).path).split("/")[-1]
-                filename      = _build_filename(doc.client, doc.document_type, original_name)
-
-                # Anti-collision
-                count = seen_names.get(filename, 0)
-                seen_names[filename] = count + 1
-                if count:
-                    base, ext = filename.rsplit(".", 1) if "." in filename else (filename, "")
-                    filename  = f"{base}_{count}.{ext}" if ext else f"{base}_{count}"
-
-                try:
-                    s3_resp = requests.get(doc.url, timeout=30)
-                    s3_resp.raise_for_status()
-                    zf.writestr(filename, s3_resp.content)
-                except requests.RequestException:
-                    pass
-
-        buffer.seek(0)
-        response = StreamingHttpResponse(buffer, content_type="application/zip")
+        for doc in documents:
+            if not doc.url:
+                continue
+
+            original_name = unquote(urlparse(doc.url).path).split("/")[-1]
+            filename      = _build_filename(doc.client, doc.document_type, original_name)
+
+            # Anti-collision
+            count = seen_names.get(filename, 0)
+            seen_names[filename] = count + 1
+            if count:
+                base, ext = filename.rsplit(".", 1) if "." in filename else (filename, "")
+                filename  = f"{base}_{count}.{ext}" if ext else f"{base}_{count}"
+
+            entries.append((filename, _extract_s3_key(doc.url)))
+
+        stream = stream_zip(_fetch_zip_entries(entries))
+        if isinstance(request._request, ASGIRequest):
+            # Sous ASGI un itérateur synchrone serait lu en entier avant l'envoi
+            stream = aiter_in_thread(stream)
+        response = StreamingHttpResponse(stream, content_type="application/zip")
         response["Content-Disposition"] = 'attachment; filename="documents.zip"'
         return response
\ No newline at end of file
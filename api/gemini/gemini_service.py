@@ -2,11 +2,20 @@ from django.conf import settings
 from google import genai
 
 
+def client_options() -> dict:
+    """Arguments supplémentaires de genai.Client : GEMINI_BASE_URL redirige l'API (harnais de charge)."""
+    base_url = getattr(settings, "GEMINI_BASE_URL", None)
+    if not base_url:
+        return {}
+    from google.genai import types
+    return {"http_options": types.HttpOptions(base_url=base_url)}
+
+
 def ask_gemini(prompt: str) -> str:
     if not settings.GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY manquante dans les variables d'environnement.")
 
-    client = genai.Client(api_key=settings.GEMINI_API_KEY)
+    client = genai.Client(api_key=settings.GEMINI_API_KEY, **client_options())
 
     response = client.models.generate_content(
         model=settings.GEMINI_MODEL,
@@ -0,0 +1,158 @@
+"""
+Assignation en masse des leads (avocats / juristes).
+
+Remplace la boucle `lead.<m2m>.set(user_ids)` (un SELECT + DELETE/INSERT par lead)
+par un nombre de requêtes constant, quel que soit le nombre de leads :
+  1. lecture des liens existants de la table de jointure (1 SELECT)
+  2. suppression des liens retirés (1 DELETE)
+  3. insertion des liens ajoutés (bulk_create ignore_conflicts)
+  4. horodatage juriste_assigned_at (1 UPDATE, juristes uniquement)
+  5. un événement d'audit par lead modifié (1 INSERT) + un broadcast WebSocket agrégé
+Les notifications sont écrites dans l'outbox (api.notification_outbox) dans la même
+transaction, en un INSERT par canal.
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from django.db import transaction
+from django.utils import timezone
+
+from api.core.reference_data import lead_event_types
+from api.leads.models import Lead
+from api.leads_events import timeline
+from api.leads_events.models import LeadEvent
+from api.users.models import User
+from api.users.roles import UserRoles
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+AVOCATS = "assigned_to"
+JURISTES = "jurist_assigned"
+
+EVENT_CODES = {
+    AVOCATS: "LEAD_ASSIGNED",
+    JURISTES: "LEAD_JURISTS_ASSIGNED",
+}
+
+
+@dataclass
+class AssignmentResult:
+    lead_ids: List[int] = field(default_factory=list)
+    added: List[Tuple[int, UUID]] = field(default_factory=list)
+    removed: List[Tuple[int, UUID]] = field(default_factory=list)
+
+    @property
+    def updated(self) -> int:
+        return len(self.lead_ids)
+
+
+class BulkAssignmentService:
+    """Applique la même liste d'utilisateurs à un ensemble de leads (sémantique de `.set()`)."""
+
+    @classmethod
+    def assign(
+        cls,
+        leads,
+        user_ids: Iterable,
+        relation: str = AVOCATS,
+        actor: Optional[User] = None,
+    ) -> AssignmentResult:
+        through = getattr(Lead, relation).through
+
+        lead_ids = list(leads.order_by().values_list("id", flat=True).distinct())
+        if not lead_ids:
+            return AssignmentResult()
+
+        users = dict(User.objects.filter(id__in=set(user_ids)).values_list("id", "role"))
+        target = set(users)
+
+        with transaction.atomic():
+            existing = set(
+                through.objects.filter(lead_id__in=lead_ids).values_list("lead_id", "user_id")
+            )
+            added = [(lead_id, user_id) for lead_id in lead_ids for user_id in target
+                     if (lead_id, user_id) not in existing]
+            removed = [pair for pair in existing if pair[1] not in target]
+
+            if removed:
+                through.objects.filter(lead_id__in=lead_ids).exclude(user_id__in=target).delete()
+            if added:
+                through.objects.bulk_create(
+                    [through(lead_id=lead_id, user_id=user_id) for lead_id, user_id in added],
+                    batch_size=BATCH_SIZE,
+                    ignore_conflicts=True,
+                )
+            if relation == JURISTES:
+                Lead.objects.filter(id__in=lead_ids).update(juriste_assigned_at=timezone.now())
+
+            result = AssignmentResult(lead_ids=lead_ids, added=added, removed=removed)
+            cls._log_events(result, relation, sorted(target), actor)
+
+            if relation == AVOCATS:
+                avocat_pairs = [pair for pair in added if users.get(pair[1]) == UserRoles.AVOCAT]
+                if avocat_pairs:
+                    cls._notify_avocats(avocat_pairs)
+
+        transaction.on_commit(lambda: cls._broadcast(result, relation))
+
+        logger.info(
+            "👥 Assignation %s : %d lead(s), +%d / -%d lien(s)",
+            relation, len(lead_ids), len(added), len(removed),
+        )
+        return result
+
+    # ─────────────────────────────────────
+    # AUDIT / BROADCAST / NOTIFICATIONS
+    # ─────────────────────────────────────
+
+    @staticmethod
+    def _log_events(result: AssignmentResult, relation: str, user_ids: List[UUID], actor) -> None:
+        """Un événement par lead réellement modifié, inséré en une seule requête (sans automatisations)."""
+        if relation == JURISTES:
+            # juriste_assigned_at est réhorodaté sur tous les leads du lot
+            changed = set(result.lead_ids)
+        else:
+            changed = {lead_id for lead_id, _ in result.added + result.removed}
+        if not changed:
+            return
+
+        code = EVENT_CODES[relation]
+        event_type = lead_event_types.get_or_create(
+            code, defaults={"label": code.replace("_", " ").title()},
+        )
+        actor = actor if actor and actor.is_authenticated else None
+        data = {"user_ids": [str(user_id) for user_id in user_ids], "bulk": True}
+        LeadEvent.objects.bulk_create(
+            [
+                LeadEvent(lead_id=lead_id, event_type=event_type, actor=actor, data=data)
+                for lead_id in sorted(changed)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        transaction.on_commit(lambda: timeline.invalidate(*changed))
+
+    @staticmethod
+    def _broadcast(result: AssignmentResult, relation: str) -> None:
+        from api.websocket.signals.base import broadcast
+
+        try:
+            broadcast(["leads"], {
+                "event": "leads_bulk_assigned",
+                "data": {"lead_ids": result.lead_ids, "relation": relation},
+                "extra": {"added": len(result.added), "removed": len(result.removed)},
+            })
+        except Exception as e:
+            logger.error("❌ Broadcast assignation en masse : %s", e)
+
+    @staticmethod
+    def _notify_avocats(pairs: List[Tuple[int, UUID]]) -> None:
+        """Notifications SMS + e-mail dans l'outbox, dans la transaction de l'assignation."""
+        from api.sms.tasks import send_avocat_assigned_sms_batch_task
+        from api.utils.email.leads.tasks import send_avocat_assigned_notification_batch_task
+
+        send_avocat_assigned_sms_batch_task(pairs)
+        send_avocat_assigned_notification_batch_task(pairs)
@@ -2,6 +2,7 @@ import logging
 
 from api.utils.email import send_html_email
 from api.leads_events.models import LeadEvent
+from api.core.reference_data import lead_event_types
 
 logger = logging.getLogger(__name__)
 
@@ -84,7 +85,7 @@ def send_appointment_confirmation_if_needed(lead, event):
 
     already_sent = LeadEvent.objects.filter(
         lead=lead,
-        event_type__code="APPOINTMENT_CONFIRMATION_SENT",
+        event_type_id__in=lead_event_types.ids_for("APPOINTMENT_CONFIRMATION_SENT"),
         data__appointment_date=appointment_date_str,
     ).exists()
 
@@ -2,7 +2,7 @@
 
 import logging
 from api.leads.constants import RDV_A_CONFIRMER
-from api.lead_status.models import LeadStatus
+from api.core.reference_data import lead_statuses
 from api.sms.tasks import (
     send_appointment_confirmation_sms_task,
     send_confirm_presence_sms_task
@@ -17,7 +17,7 @@ def handle_lead_created(event):
     event_data = event.data or {}
 
     # 1. Mise à jour du statut vers "RDV à confirmer"
-    status = LeadStatus.objects.get(code=RDV_A_CONFIRMER)
+    status = lead_statuses.get(RDV_A_CONFIRMER)
     lead.status = status
     lead.save(update_fields=["status"])
 
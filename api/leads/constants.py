@@ -163,4 +163,12 @@ class BlockingDurationBucket(models.TextChoices):
     ONE_TO_THREE_MONTHS = "ONE_TO_THREE_MONTHS", _("1 à 3 mois")
     THREE_TO_SIX_MONTHS = "THREE_TO_SIX_MONTHS", _("3 à 6 mois")
     SIX_TO_TWELVE_MONTHS = "SIX_TO_TWELVE_MONTHS", _("6 à 12 mois")
-    MORE_THAN_ONE_YEAR = "MORE_THAN_ONE_YEAR", _("Plus d’un an")
\ No newline at end of file
+    MORE_THAN_ONE_YEAR = "MORE_THAN_ONE_YEAR", _("Plus d’un an")
+
+
+# Durées de blocage qui rendent un lead "chaud" (cf. Lead.is_hot)
+HOT_BLOCKING_BUCKETS = [
+    BlockingDurationBucket.THREE_TO_SIX_MONTHS,
+    BlockingDurationBucket.SIX_TO_TWELVE_MONTHS,
+    BlockingDurationBucket.MORE_THAN_ONE_YEAR,
+]
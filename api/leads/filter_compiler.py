@@ -0,0 +1,90 @@
+"""
+Compilation des filtres de leads en prédicats exploitables par les index.
+
+  - dates : `champ__date__gte/lte` applique DATE(champ AT TIME ZONE …) et
+    empêche l'usage des index B-tree (lead_created_idx, lead_appointment_idx…).
+    On produit à la place un intervalle semi-ouvert [début, fin[ de datetimes
+    aware dans le fuseau courant (Europe/Paris) : mêmes lignes, index utilisé.
+  - appartenance M2M (assigned_to, jurist_assigned) : EXISTS sur la table de
+    liaison au lieu d'une jointure + DISTINCT.
+
+Les tests EXPLAIN (tests/test_filter_compiler.py) vérifient l'usage des index.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional, Tuple, Union
+
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from api.leads.models import Lead
+
+DateLike = Union[date, datetime, str, None]
+
+
+def to_day(value: DateLike) -> Optional[date]:
+    """
+    '2025-08-25', '2025-08-25T10:30:00', date ou datetime → date locale (ou None).
+    Chaîne mal formée ou date impossible (2025-02-30) → ValidationError (400).
+    """
+    if value in (None, ""):
+        return None
+    if isinstance(value, str):
+        try:
+            parsed = parse_datetime(value) or parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError(f"Date invalide : {value}")
+        value = parsed
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+    return value
+
+
+def day_bounds(start: DateLike, end: DateLike) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Jours inclus [start, end] → datetimes aware [début de start, début de end + 1[."""
+    tz = timezone.get_current_timezone()
+    start_day, end_day = to_day(start), to_day(end)
+    lower = timezone.make_aware(datetime.combine(start_day, time.min), tz) if start_day else None
+    upper = timezone.make_aware(datetime.combine(end_day + timedelta(days=1), time.min), tz) if end_day else None
+    return lower, upper
+
+
+class LeadFilterCompiler:
+
+    @staticmethod
+    def date_range(field: str, start: DateLike = None, end: DateLike = None) -> Q:
+        """Équivalent sargable de `field__date__gte=start` / `field__date__lte=end`."""
+        lower, upper = day_bounds(start, end)
+        q = Q()
+        if lower:
+            q &= Q(**{f"{field}__gte": lower})
+        if upper:
+            q &= Q(**{f"{field}__lt": upper})
+        return q
+
+    @staticmethod
+    def on_day(field: str, day: DateLike) -> Q:
+        """Équivalent sargable de `field__date=day`."""
+        return LeadFilterCompiler.date_range(field, day, day) if to_day(day) else Q(pk__in=[])
+
+    @staticmethod
+    def has_member(relation: str, user_ids: Optional[Iterable] = None) -> Exists:
+        """EXISTS sur la table de liaison `Lead.<relation>` (éventuellement restreint à user_ids)."""
+        through = getattr(Lead, relation).through.objects.filter(lead_id=OuterRef("pk"))
+        if user_ids is not None:
+            through = through.filter(user_id__in=list(user_ids))
+        return Exists(through)
+
+    @classmethod
+    def assigned_to_any(cls, user_ids: Iterable, relations=("assigned_to", "jurist_assigned")) -> Q:
+        """Leads dont un des utilisateurs est membre d'une des relations (sans DISTINCT)."""
+        user_ids = list(user_ids)
+        q = Q()
+        for relation in relations:
+            q |= Q(cls.has_member(relation, user_ids))
+        return q
@@ -3,11 +3,11 @@ from django.db.models import (
     Count, Exists, OuterRef,
     Case, When, F,
     DateTimeField, IntegerField,
-    Q,
 )
 from django.utils import timezone
 
 from api.core.pagination import CRMLeadPagination
+from api.leads.filter_compiler import LeadFilterCompiler
 from api.leads.models import Lead
 from api.leads.serializers import LeadSerializer
 from api.contracts.models import Contract
@@ -31,17 +31,15 @@ class LeadFilterView(generics.ListAPIView):
 
         # ── 1. Filtres Lead de base ──────────────────────────────────────────
 
-        # Dates de création
-        if p.get("created_from"):
-            qs = qs.filter(created_at__date__gte=p.get("created_from"))
-        if p.get("created_to"):
-            qs = qs.filter(created_at__date__lte=p.get("created_to"))
+        # Dates de création (intervalle semi-ouvert : lead_created_idx utilisable)
+        qs = qs.filter(LeadFilterCompiler.date_range(
+            "created_at", p.get("created_from"), p.get("created_to"),
+        ))
 
         # ✅ FIX : Dates de rendez-vous (manquaient complètement)
-        if p.get("appointment_from"):
-            qs = qs.filter(appointment_date__date__gte=p.get("appointment_from"))
-        if p.get("appointment_to"):
-            qs = qs.filter(appointment_date__date__lte=p.get("appointment_to"))
+        qs = qs.filter(LeadFilterCompiler.date_range(
+            "appointment_date", p.get("appointment_from"), p.get("appointment_to"),
+        ))
 
         # ✅ FIX : Type de rendez-vous (manquait)
         if p.get("appointment_type"):
@@ -56,12 +54,10 @@ class LeadFilterView(generics.ListAPIView):
         if p.get("dossier_status"):
             qs = qs.filter(statut_dossier_id=p.get("dossier_status"))
 
-        # Assignés lead (multi)
+        # Assignés lead (multi) : EXISTS sur les tables de liaison, sans DISTINCT
         as_ids = [v for v in p.getlist("assigned_to") if v]
         if as_ids:
-            qs = qs.filter(
-                Q(assigned_to__id__in=as_ids) | Q(jurist_assigned__id__in=as_ids)
-            ).distinct()
+            qs = qs.filter(LeadFilterCompiler.assigned_to_any(as_ids))
 
         # ── 2. Filtres Contrats ──────────────────────────────────────────────
 
@@ -150,10 +146,7 @@ class LeadFilterView(generics.ListAPIView):
         elif has_task_filters or has_tasks_param == "true":
             task_qs = LeadTask.objects.filter(lead=OuterRef("pk"))
 
-            if t_due_from:
-                task_qs = task_qs.filter(due_at__date__gte=t_due_from)
-            if t_due_to:
-                task_qs = task_qs.filter(due_at__date__lte=t_due_to)
+            task_qs = task_qs.filter(LeadFilterCompiler.date_range("due_at", t_due_from, t_due_to))
 
             if t_status:
                 task_qs = task_qs.filter(status__in=t_status)
@@ -1,18 +1,23 @@
 from datetime import date, datetime, time
 from typing import Optional
 
-from django.db.models import Exists, F, OuterRef, Subquery
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery
 from django.utils.dateparse import parse_date, parse_datetime
-from django.utils.timezone import get_current_timezone, is_naive, make_aware, now
+from django.utils.timezone import get_current_timezone, is_naive, localdate, make_aware
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
-from rest_framework.views import APIView
 
 from api.clients.models import Client
+from api.leads import search_cache
+from api.leads.filter_compiler import LeadFilterCompiler, day_bounds, to_day
 from api.leads.models import Lead
 from api.contracts.models import Contract
+from api.core.reference_data import lead_statuses, statuts_dossier
 from api.leads.constants import RDV_CONFIRME, RDV_PLANIFIE
 from api.users.roles import UserRoles
+from api.utils.async_views import AsyncAPIView, JSONResponse, gather_queries
 
 
 # ---------- Utils ----------
@@ -20,7 +25,13 @@ from api.users.roles import UserRoles
 def _parse_iso_any(value: Optional[str]) -> Optional[object]:
     if not value:
         return None
-    return parse_datetime(value) or parse_date(value)
+    try:
+        parsed = parse_datetime(value) or parse_date(value)
+    except ValueError:  # date impossible (2025-02-30)
+        parsed = None
+    if parsed is None:
+        raise ValidationError(f"Date invalide : {value}")
+    return parsed
 
 
 def _to_aware(value: Optional[object], *, end_of_day: bool = False) -> Optional[datetime]:
@@ -51,13 +62,54 @@ def _to_int_or_none(value: Optional[str]) -> Optional[int]:
         return None
 
 
+def _kpis(qs, day: date, rdv_status_ids) -> dict:
+    """
+    total, rdv_today et contracts_today en une requête : les leads filtrés
+    sont matérialisés une fois (CTE), comptés, puis rapprochés des contrats
+    du jour.
+    """
+    start, end = day_bounds(day, day)
+    try:
+        filtered_sql, filtered_params = (
+            qs.order_by().values("id", "appointment_date", "status_id").query.sql_with_params()
+        )
+    except EmptyResultSet:  # filtre impossible (ex. code de statut inconnu)
+        return {"total": 0, "rdv_today": 0, "contracts_today": 0}
+
+    sql = f"""
+        WITH filtered AS ({filtered_sql})
+        SELECT
+            COUNT(*),
+            COUNT(*) FILTER (
+                WHERE appointment_date >= %s AND appointment_date < %s AND status_id = ANY(%s)
+            ),
+            (
+                SELECT COUNT(*)
+                FROM {Contract._meta.db_table} c
+                JOIN {Client._meta.db_table} cl ON cl.id = c.client_id
+                WHERE c.created_at >= %s AND c.created_at < %s
+                  AND cl.lead_id IN (SELECT id FROM filtered)
+            )
+        FROM filtered
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (*filtered_params, start, end, list(rdv_status_ids), start, end))
+        total, rdv_today, contracts_today = cursor.fetchone()
+    return {"total": total, "rdv_today": rdv_today, "contracts_today": contracts_today}
+
+
 # ---------- View ----------
 
-class LeadSearchView(APIView):
+class LeadSearchView(AsyncAPIView):
+    """
+    Vue async : une requête KPI (total inclus) et la page de résultats, exécutées en
+    parallèle (gather_queries). Réponse mise en cache par filtres normalisés
+    (search_cache), invalidée à chaque broadcast WebSocket sur les leads.
+    """
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        params = request.query_params
+    async def get(self, request):
+        params = request.GET
 
         # --- Query params ---
         date_from = _to_aware(_parse_iso_any(params.get("date_from")))
@@ -77,101 +129,84 @@ class LeadSearchView(APIView):
         # MODIFICATION ICI : On passe de 20 à 6 par défaut, et on réduit le max à 50
         page_size = min(max(_to_int_or_none(params.get("page_size")) or 6, 1), 50)
 
-        # --- Base queryset ---
-        ThroughConseiller = Lead.assigned_to.through
-        ThroughJurist = Lead.jurist_assigned.through
-
-        qs = (
-            Lead.objects
-            .select_related("status", "statut_dossier")
-            .prefetch_related("jurist_assigned", "assigned_to")
-            .annotate(
-                has_conseiller=Exists(
-                    ThroughConseiller.objects.filter(lead_id=OuterRef("pk"))
-                ),
-                has_jurist=Exists(
-                    ThroughJurist.objects.filter(lead_id=OuterRef("pk"))
-                ),
-
-                # 🔥 AJOUT CRUCIAL
-                client_id=Subquery(
-                    Client.objects
-                    .filter(lead_id=OuterRef("pk"))
-                    .values("id")[:1]
-                ),
+        # MODIFICATION : Si on filtre sur les dates de RDV, on trie par date de RDV chronologique
+        if appt_from or appt_to:
+            ordering = "appointment_date"  # Tri chronologique des RDV à venir
+        else:
+            ordering = params.get("ordering", "-created_at")
 
-                lead_status_code=F("status__code"),
-                lead_status_label=F("status__label"),
-                lead_status_color=F("status__color"),
-                statut_dossier_code=F("statut_dossier__code"),
-                statut_dossier_label=F("statut_dossier__label"),
-                statut_dossier_color=F("statut_dossier__color"),
-            )
-        )
+        # --- Cache (clé = filtres normalisés) ---
+        cache_key = await search_cache.akey(request.user, {
+            "date_from": to_day(date_from), "date_to": to_day(date_to),
+            "appt_from": to_day(appt_from), "appt_to": to_day(appt_to),
+            "status_code": status_code, "status_id": status_id,
+            "dossier_code": dossier_code, "dossier_id": dossier_id,
+            "has_jurist": has_jurist, "has_conseiller": has_conseiller,
+            "page": page, "page_size": page_size, "ordering": ordering,
+        })
+        cached = await search_cache.aget(cache_key)
+        if cached is not None:
+            return JSONResponse(cached)
+
+        # --- Filtres (sans annotation : KPI et total ne les recalculent pas) ---
+        qs = Lead.objects.all()
 
         # --- Avocat specific filter ---
         if request.user.is_authenticated and request.user.role == UserRoles.AVOCAT:
-            qs = qs.filter(assigned_to=request.user)
-
-        # --- Filters ---
-        if date_from and date_to:
-            qs = qs.filter(created_at__date__range=(date_from.date(), date_to.date()))
-        elif date_from:
-            qs = qs.filter(created_at__date__gte=date_from.date())
-        elif date_to:
-            qs = qs.filter(created_at__date__lte=date_to.date())
-        if appt_from and appt_to:
-            qs = qs.filter(appointment_date__date__range=(appt_from.date(), appt_to.date()))
-        elif appt_from:
-            qs = qs.filter(appointment_date__date__gte=appt_from.date())
-        elif appt_to:
-            qs = qs.filter(appointment_date__date__lte=appt_to.date())
+            qs = qs.filter(LeadFilterCompiler.has_member("assigned_to", [request.user.pk]))
+
+        qs = qs.filter(LeadFilterCompiler.date_range("created_at", date_from, date_to))
+        qs = qs.filter(LeadFilterCompiler.date_range("appointment_date", appt_from, appt_to))
 
         if status_id is not None:
             qs = qs.filter(status_id=status_id)
         elif status_code:
-            qs = qs.filter(status__code=status_code)
+            qs = qs.filter(status_id__in=await lead_statuses.aids_for(status_code))
         if dossier_id is not None:
             qs = qs.filter(statut_dossier_id=dossier_id)
         elif dossier_code:
-            qs = qs.filter(statut_dossier__code=dossier_code)
+            qs = qs.filter(statut_dossier_id__in=await statuts_dossier.aids_for(dossier_code))
 
         if has_jurist == "avec":
-            qs = qs.filter(has_jurist=True)
+            qs = qs.filter(LeadFilterCompiler.has_member("jurist_assigned"))
         elif has_jurist == "sans":
-            qs = qs.filter(has_jurist=False)
+            qs = qs.exclude(LeadFilterCompiler.has_member("jurist_assigned"))
         if has_conseiller == "avec":
-            qs = qs.filter(has_conseiller=True)
+            qs = qs.filter(LeadFilterCompiler.has_member("assigned_to"))
         elif has_conseiller == "sans":
-            qs = qs.filter(has_conseiller=False)
+            qs = qs.exclude(LeadFilterCompiler.has_member("assigned_to"))
 
-        total = qs.count()
+        # --- KPI : total, rdv_today et contracts_today en une seule requête (CTE) ---
+        rdv_statuses = await lead_statuses.aids_for(RDV_PLANIFIE, RDV_CONFIRME)
 
-        # --- KPI ---
-        today = now()
-        start_today = today.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_today = today.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-        rdv_today = qs.filter(
-            appointment_date__range=(start_today, end_today),
-            status__code__in=[RDV_PLANIFIE, RDV_CONFIRME],
-        ).count()
+        # --- Page : annotations évaluées sur les seules lignes retournées ---
+        start = (page - 1) * page_size
+        page_qs = (
+            qs
+            .select_related("status", "statut_dossier")
+            .prefetch_related("jurist_assigned", "assigned_to")
+            .annotate(
+                has_conseiller=LeadFilterCompiler.has_member("assigned_to"),
+                has_jurist=LeadFilterCompiler.has_member("jurist_assigned"),
 
-        contracts_today = Contract.objects.filter(
-            client__lead_id__in=Subquery(qs.values("id")),
-            created_at__range=(start_today, end_today),
-        ).count()
+                # 🔥 AJOUT CRUCIAL
+                client_id=Subquery(
+                    Client.objects
+                    .filter(lead_id=OuterRef("pk"))
+                    .values("id")[:1]
+                ),
 
-        # --- Pagination ---
-        # MODIFICATION : Si on filtre sur les dates de RDV, on trie par date de RDV chronologique
-        if appt_from or appt_to:
-            ordering = "appointment_date"  # Tri chronologique des RDV à venir
-        else:
-            ordering = params.get("ordering", "-created_at")
+                lead_status_code=F("status__code"),
+                lead_status_label=F("status__label"),
+                lead_status_color=F("status__color"),
+                statut_dossier_code=F("statut_dossier__code"),
+                statut_dossier_label=F("statut_dossier__label"),
+                statut_dossier_color=F("statut_dossier__color"),
+            )
+            .order_by(ordering)
+        )[start:start + page_size]
 
-        qs = qs.order_by(ordering)
-        start = (page - 1) * page_size
-        leads = qs[start:start + page_size]
+        kpis, leads = await gather_queries(lambda: _kpis(qs, localdate(), rdv_statuses), lambda: list(page_qs))
 
         items = [
             {
@@ -214,14 +249,16 @@ class LeadSearchView(APIView):
             for lead in leads
         ]
 
-        return Response({
-            "total": total,
+        data = {
+            "total": kpis["total"],
             "page": page,
             "page_size": page_size,
             "ordering": ordering,
             "items": items,
             "kpi": {
-                "rdv_today": rdv_today,
-                "contracts_today": contracts_today,
+                "rdv_today": kpis["rdv_today"],
+                "contracts_today": kpis["contracts_today"],
             },
-        })
\ No newline at end of file
+        }
+        await search_cache.aset(cache_key, data)
+        return JSONResponse(data)
\ No newline at end of file
@@ -1,89 +1,89 @@
-from rest_framework.views import APIView
-from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 
+from api.analytics.services import LeadRollupService
+from api.core.reference_data import lead_task_types
 from api.leads.models import Lead
 from api.leads_task.constants import LeadTaskStatus
+from api.utils.async_views import AsyncAPIView, JSONResponse, gather_queries
 
 
-class LeadStatsTodayView(APIView):
+class LeadStatsTodayView(AsyncAPIView):
+    """Vue async : les six comptages sont indépendants et exécutés en parallèle."""
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
+    async def get(self, request):
         today = timezone.localdate()
         user  = request.user
 
         all_leads = Lead.objects.all()
-
-        # ─────────────────────────────────────────
-        # LEADS
-        # ─────────────────────────────────────────
-
-        total_leads = all_leads.count()
-
-        rdv_confirme_today = all_leads.filter(
-            appointment_date__date=today,
-            status__code__in=["RDV_CONFIRME", "CONFIRME"],
-        ).count()
-
-        rdv_a_confirmer_today = all_leads.filter(
-            appointment_date__date=today,
-            status__code__in=["RDV_A_CONFIRMER", "A_CONFIRMER"],
-        ).count()
-
-        presents_today = all_leads.filter(
-            appointment_date__date=today,
-            status__code__in=["PRESENT", "RDV_PRESENT"],
-        ).count()
-
-        # ─────────────────────────────────────────
-        # ABSENTS (brut)
-        # ─────────────────────────────────────────
-
-        absents_today = all_leads.filter(
-            appointment_date__date=today,
-            status__code__in=["ABSENT", "NON_PRESENT", "NO_SHOW", "RDV_ABSENT"],
-        ).count()
+        relance_absent_ids = await lead_task_types.aids_for("RELANCE_ABSENT")
 
         # ─────────────────────────────────────────
         # 🔥 À RAPPELER (LOGIQUE MÉTIER)
         # ─────────────────────────────────────────
 
-        a_rappeler_today = all_leads.filter(
-            tasks__task_type__code="RELANCE_ABSENT",
+        a_rappeler_today_qs = all_leads.filter(
+            tasks__task_type_id__in=relance_absent_ids,
             tasks__status=LeadTaskStatus.TODO,
             tasks__due_at__date=today,
-        ).distinct().count()
+        ).distinct()
 
         # 🔥 BONUS (optionnel mais recommandé)
-        a_rappeler_overdue = all_leads.filter(
-            tasks__task_type__code="RELANCE_ABSENT",
+        a_rappeler_overdue_qs = all_leads.filter(
+            tasks__task_type_id__in=relance_absent_ids,
             tasks__status=LeadTaskStatus.TODO,
             tasks__due_at__date__lt=today,
-        ).distinct().count()
+        ).distinct()
 
         # ─────────────────────────────────────────
         # TÂCHES UTILISATEUR
         # ─────────────────────────────────────────
 
-        tasks_today = all_leads.filter(
+        tasks_today_qs = all_leads.filter(
             tasks__due_at__date=today,
             tasks__completed_at__isnull=True,
             tasks__assigned_to=user,
-        ).distinct().count()
+        ).distinct()
 
-        total_overdue_tasks = all_leads.filter(
+        total_overdue_tasks_qs = all_leads.filter(
             tasks__due_at__date__lt=today,
             tasks__completed_at__isnull=True,
             tasks__assigned_to=user,
-        ).distinct().count()
+        ).distinct()
+
+        # ─────────────────────────────────────────
+        # LEADS (agrégats journaliers, rafraîchis chaque minute) + COMPTAGES
+        # ─────────────────────────────────────────
+
+        (
+            total_leads, rdv_today,
+            a_rappeler_today, a_rappeler_overdue, tasks_today, total_overdue_tasks,
+        ) = await gather_queries(
+            LeadRollupService.count,
+            lambda: LeadRollupService.appointments_by_status(today),
+            a_rappeler_today_qs.count, a_rappeler_overdue_qs.count,
+            tasks_today_qs.count, total_overdue_tasks_qs.count,
+        )
+
+        def _count(*codes):
+            return sum(rdv_today.get(code, 0) for code in codes)
+
+        rdv_confirme_today = _count("RDV_CONFIRME", "CONFIRME")
+        rdv_a_confirmer_today = _count("RDV_A_CONFIRMER", "A_CONFIRMER")
+        presents_today = _count("PRESENT", "RDV_PRESENT")
+
+        # ─────────────────────────────────────────
+        # ABSENTS (brut)
+        # ─────────────────────────────────────────
+
+        absents_today = _count("ABSENT", "NON_PRESENT", "NO_SHOW", "RDV_ABSENT")
 
         # ─────────────────────────────────────────
         # RESPONSE
         # ─────────────────────────────────────────
 
-        return Response({
+        return JSONResponse({
             "total_leads": total_leads,
             "rdv_confirme_today": rdv_confirme_today,
             "rdv_a_confirmer_today": rdv_a_confirmer_today,
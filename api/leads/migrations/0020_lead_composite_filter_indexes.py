@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-19 02:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('creators', '0007_creatorcontract'),
+        ('lead_status', '0002_alter_leadstatus_label'),
+        ('leads', '0019_lead_promo_code'),
+        ('statut_dossier', '0002_alter_statutdossier_label'),
+        ('statut_dossier_interne', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['status', 'appointment_date'], name='lead_status_appt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['created_at', 'status'], name='lead_created_status_idx'),
+        ),
+    ]
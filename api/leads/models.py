@@ -10,9 +10,11 @@ from api.leads.constants import (
     RDV_PLANIFIE,
     LeadSource,
     BlockingDurationBucket, LeadService,
+    HOT_BLOCKING_BUCKETS,
 )
 
 from api.lead_status.models import LeadStatus
+from api.core.reference_data import lead_statuses
 
 
 class Lead(models.Model):
@@ -148,6 +150,9 @@ class Lead(models.Model):
             models.Index(fields=["department_code"], name="lead_department_idx"),
             models.Index(fields=["source"], name="lead_source_idx"),
             models.Index(fields=["blocking_duration_bucket"], name="lead_blocking_bucket_idx"),
+            # Combinaisons fréquentes des filtres (cf. filter_compiler)
+            models.Index(fields=["status", "appointment_date"], name="lead_status_appt_idx"),
+            models.Index(fields=["created_at", "status"], name="lead_created_status_idx"),
         ]
 
     # 🧠 Validation
@@ -164,7 +169,7 @@ class Lead(models.Model):
         # Statut par défaut uniquement à la création (pas encore de PK)
         if not self.pk and not self.status_id:
             try:
-                default_status = LeadStatus.objects.get(code=RDV_PLANIFIE)
+                default_status = lead_statuses.get(RDV_PLANIFIE)
                 self.status = default_status
             except LeadStatus.DoesNotExist:
                 pass
@@ -182,11 +187,7 @@ class Lead(models.Model):
         if self.is_urgent:
             return True
 
-        if self.blocking_duration_bucket in [
-            BlockingDurationBucket.THREE_TO_SIX_MONTHS,
-            BlockingDurationBucket.SIX_TO_TWELVE_MONTHS,
-            BlockingDurationBucket.MORE_THAN_ONE_YEAR,
-        ]:
+        if self.blocking_duration_bucket in HOT_BLOCKING_BUCKETS:
             return True
 
         return False
@@ -0,0 +1,82 @@
+"""
+Cache court des réponses de LeadSearchView.
+
+La même recherche (liste par défaut, filtres favoris) est relancée par chaque
+onglet ouvert à chaque rafraîchissement. La réponse complète est conservée
+SEARCH_CACHE_TTL secondes sous une clé dérivée :
+
+  - des filtres normalisés (valeurs parsées, vides ignorées, ordre stable)
+  - du périmètre de l'utilisateur (un avocat ne voit que ses leads)
+  - du jour courant (KPI « aujourd'hui »)
+  - d'une génération stockée dans Redis
+
+Chaque broadcast WebSocket vers les groupes leads (création, mise à jour,
+suppression, assignation, contrat…) incrémente la génération : toutes les
+entrées deviennent inaccessibles d'un coup, au moment même où les écrans sont
+notifiés. Les QuerySet.update() sans broadcast sont couverts par le TTL.
+"""
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from api.users.roles import UserRoles
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_TTL = 30  # secondes
+KEY_PREFIX = "leads:search:"
+GENERATION_KEY = f"{KEY_PREFIX}generation"
+
+
+def _scope(user) -> str:
+    return f"user:{user.pk}" if getattr(user, "role", None) == UserRoles.AVOCAT else "all"
+
+
+async def akey(user, filters: dict) -> Optional[str]:
+    """Clé de cache des filtres `filters` (valeurs vides ignorées) pour `user`, None si Redis est indisponible."""
+    try:
+        generation = await cache.aget(GENERATION_KEY, 0)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache recherche leads indisponible : {e}")
+        return None
+
+    normalized = sorted((name, value) for name, value in filters.items() if value not in (None, ""))
+    raw = json.dumps([_scope(user), timezone.localdate(), normalized], cls=DjangoJSONEncoder)
+    return f"{KEY_PREFIX}{generation}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+async def aget(key: Optional[str]):
+    if key is None:
+        return None
+    try:
+        return await cache.aget(key)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache recherche leads indisponible : {e}")
+        return None
+
+
+async def aset(key: Optional[str], data: dict) -> None:
+    if key is None:
+        return
+    try:
+        await cache.aset(key, data, SEARCH_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache recherche leads indisponible : {e}")
+
+
+def invalidate() -> None:
+    """Rend toutes les réponses en cache obsolètes (web et workers)."""
+    try:
+        cache.set(GENERATION_KEY, time.time_ns(), None)
+    except Exception as e:
+        logger.warning(f"⚠️ Invalidation cache recherche leads impossible : {e}")
+
+
+def is_lead_group(group: str) -> bool:
+    return group == "leads" or group.startswith("leads_")
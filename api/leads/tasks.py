@@ -1,19 +1,19 @@
 import logging
 from datetime import timedelta
-from itertools import cycle
 
 from django.utils import timezone
 from django.db import transaction
 from django.core.mail import EmailMultiAlternatives
-from django_q.tasks import async_task
 
+from api.analytics.models import RollupFact
+from api.analytics.rollups import local_day, mark_dirty
 from api.leads.models import Lead
 from api.lead_status.models import LeadStatus
-from api.leads_task.models import LeadTask
-from api.leads_task_type.models import LeadTaskType
+from api.core.reference_data import lead_statuses, lead_task_types
+from api.leads_task.generation import generate_absent_followup_tasks
 from api.users.models import User
 from api.users.roles import UserRoles
-from api.leads_task.constants import LeadTaskStatus, LeadTaskPriority
+from api.leads_task.constants import LeadTaskPriority
 from api.leads.constants import (
     PRESENT,
     ABSENT,
@@ -22,15 +22,7 @@ from api.leads.constants import (
     RDV_PLANIFIE, WHATSAPP_ENVOYE, RDV_A_CONFIRMER,
 )
 
-from api.sms.tasks import (
-    send_absent_urgency_sms_task,
-    send_appointment_reminder_48h_sms_task,
-    send_appointment_reminder_24h_sms_task,
-)
-from api.utils.email.leads.tasks import (
-    send_appointment_absent_email_task,
-    send_appointment_reminder_email_task,
-)
+from api.notification_outbox.services import NotificationOutbox
 
 logger = logging.getLogger(__name__)
 
@@ -46,7 +38,7 @@ def mark_missed_appointments_as_absent():
     now = timezone.now()
 
     try:
-        absent_status = LeadStatus.objects.get(code=ABSENT)
+        absent_status = lead_statuses.get(ABSENT)
     except LeadStatus.DoesNotExist:
         logger.error("❌ Status ABSENT non trouvé dans la base")
         return "0 leads updated - Status ABSENT missing"
@@ -55,10 +47,11 @@ def mark_missed_appointments_as_absent():
         appointment_date__isnull=False,
         appointment_date__lt=now,
     ).exclude(
-        status__code__in=[PRESENT, ABSENT, ANNULE]
+        status_id__in=lead_statuses.ids_for(PRESENT, ABSENT, ANNULE)
     )
 
-    lead_ids = list(leads_qs.values_list("id", flat=True))
+    lead_rows = list(leads_qs.values_list("id", "created_at", "appointment_date"))
+    lead_ids = [row[0] for row in lead_rows]
 
     if not lead_ids:
         logger.info("✅ Aucun nouveau rendez-vous manqué détecté.")
@@ -67,11 +60,14 @@ def mark_missed_appointments_as_absent():
     try:
         with transaction.atomic():
             updated_count = leads_qs.update(status=absent_status)
+            # update() ne déclenche pas les signaux : on signale les jours impactés aux agrégats
+            mark_dirty(RollupFact.LEADS, *(local_day(row[1]) for row in lead_rows))
+            mark_dirty(RollupFact.APPOINTMENTS, *(local_day(row[2]) for row in lead_rows))
+            # Outbox : notifications annulées avec le passage en ABSENT en cas d'échec
+            NotificationOutbox.enqueue_many("sms.absent_urgency", lead_ids)
+            NotificationOutbox.enqueue_many("email.appointment_absent", lead_ids)
 
-        for lead_id in lead_ids:
-            async_task(send_absent_urgency_sms_task, lead_id)
-            async_task(send_appointment_absent_email_task, lead_id)
-            logger.info(f"📢 Notifications d'absence mises en file pour le lead #{lead_id}")
+        logger.info(f"📢 Notifications d'absence mises en file pour {len(lead_ids)} lead(s)")
 
         return f"{updated_count} leads passés en ABSENT."
 
@@ -85,10 +81,8 @@ def mark_missed_appointments_as_absent():
 # =========================================================
 
 def create_absent_followup_tasks(limit_per_user_per_day=20):
-    now = timezone.now()
-
-    task_type, _ = LeadTaskType.objects.get_or_create(
-        code="RELANCE_ABSENT",
+    task_type = lead_task_types.get_or_create(
+        "RELANCE_ABSENT",
         defaults={
             "label": "Relance client absent",
             "description": "Appeler le client pour reprogrammer un rendez-vous.",
@@ -100,43 +94,24 @@ def create_absent_followup_tasks(limit_per_user_per_day=20):
         logger.warning("⚠️ Aucun agent d'accueil actif.")
         return "Abort: No active ACCUEIL users"
 
-    active_tasks_leads = LeadTask.objects.filter(
-        task_type=task_type,
-        status=LeadTaskStatus.TODO
-    ).values_list('lead_id', flat=True)
+    def describe(first_name, last_name, appointment_date):
+        return (
+            f"Relancer {first_name} {last_name}",
+            f"Rendez-vous manqué le {appointment_date.strftime('%d/%m/%Y')}.",
+        )
 
-    leads_to_process = Lead.objects.filter(
-        status__code=ABSENT,
-        appointment_date__isnull=False,
-    ).exclude(id__in=active_tasks_leads).order_by('-appointment_date')
+    result = generate_absent_followup_tasks(
+        task_type,
+        agents=accueil_users,
+        limit_per_agent_per_day=limit_per_user_per_day,
+        describe=describe,
+        priority=LeadTaskPriority.MEDIUM,
+    )
 
-    if not leads_to_process.exists():
+    if not result["created"] and not result["skipped"]:
         return "No new tasks to create"
 
-    num_agents = len(accueil_users)
-    user_pool = cycle(accueil_users)
-    daily_capacity = num_agents * limit_per_user_per_day
-    created_count = 0
-
-    with transaction.atomic():
-        for index, lead in enumerate(leads_to_process):
-            days_offset = index // daily_capacity
-            scheduled_date = now + timedelta(days=days_offset)
-            agent = next(user_pool)
-
-            LeadTask.objects.create(
-                lead=lead,
-                task_type=task_type,
-                title=f"Relancer {lead.first_name} {lead.last_name}",
-                description=f"Rendez-vous manqué le {lead.appointment_date.strftime('%d/%m/%Y')}.",
-                due_at=scheduled_date,
-                assigned_to=agent,
-                status=LeadTaskStatus.TODO,
-                priority=LeadTaskPriority.MEDIUM,
-            )
-            created_count += 1
-
-    return f"{created_count} internal tasks created."
+    return f"{result['created']} internal tasks created."
 
 
 # =========================================================
@@ -144,37 +119,38 @@ def create_absent_followup_tasks(limit_per_user_per_day=20):
 # =========================================================
 
 def send_appointment_reminders():
+    """
+    Rappels SMS + e-mail 48h et 24h avant le RDV. Anti-doublon : clé outbox
+    (lead, rappel, date du RDV) — un RDV déplacé reçoit de nouveaux rappels.
+    """
     now = timezone.now()
     tolerance = timedelta(minutes=10)
 
     reminder_windows = [
-        (timedelta(hours=48), "48h", send_appointment_reminder_48h_sms_task),
-        (timedelta(hours=24), "24h", send_appointment_reminder_24h_sms_task),
+        (timedelta(hours=48), "48h", "sms.appointment_reminder_48h"),
+        (timedelta(hours=24), "24h", "sms.appointment_reminder_24h"),
     ]
 
     total_sent = 0
 
-    for delta, label, sms_task_func in reminder_windows:
+    for delta, label, sms_template in reminder_windows:
         target_time = now + delta
 
-        leads = Lead.objects.filter(
+        lead_ids = list(Lead.objects.filter(
             appointment_date__gte=target_time - tolerance,
             appointment_date__lte=target_time + tolerance,
-            status__code__in=[RDV_CONFIRME, RDV_PLANIFIE, WHATSAPP_ENVOYE, RDV_A_CONFIRMER],
-        )
+            status_id__in=lead_statuses.ids_for(RDV_CONFIRME, RDV_PLANIFIE, WHATSAPP_ENVOYE, RDV_A_CONFIRMER),
+        ).values_list("id", flat=True))
 
-        for lead in leads:
-            if lead.last_reminder_sent and (now - lead.last_reminder_sent) < timedelta(hours=20):
-                continue
-
-            async_task(sms_task_func, lead.id)
-            async_task(send_appointment_reminder_email_task, lead.id)
-
-            lead.last_reminder_sent = now
-            lead.save(update_fields=["last_reminder_sent"])
+        with transaction.atomic():
+            queued = NotificationOutbox.enqueue_many(sms_template, lead_ids)
+            NotificationOutbox.enqueue_many("email.appointment_reminder", lead_ids, window=label)
+            # Suivi du rapport journalier
+            Lead.objects.filter(id__in=queued).update(last_reminder_sent=now)
 
-            total_sent += 1
-            logger.info(f"✅ Rappel {label} mis en file pour le lead #{lead.id}")
+        total_sent += len(queued)
+        if queued:
+            logger.info(f"✅ Rappel {label} mis en file pour {len(queued)} lead(s)")
 
     return f"{total_sent} reminders sent"
 
@@ -196,7 +172,7 @@ def send_daily_report():
 
     # ── Absents détectés aujourd'hui ─────────────────────────
     absents = Lead.objects.filter(
-        status__code=ABSENT,
+        status_id__in=lead_statuses.ids_for(ABSENT),
         appointment_date__gte=since,
         appointment_date__lt=now,
     ).select_related("status")
@@ -0,0 +1,92 @@
+"""
+Vues async (LeadSearchView, LeadStatsTodayView) : authentification par
+session et requêtes indépendantes exécutées en parallèle sur le pool.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from api.contracts.models import Contract
+from api.clients.models import Client as ClientModel
+from api.lead_status.models import LeadStatus
+from api.leads.constants import RDV_CONFIRME
+from api.leads.models import Lead
+from api.services.models import Service
+from api.users.models import User
+from api.users.roles import UserRoles
+from api.utils import async_views
+from api.utils.async_views import close_query_pool_connections, gather_queries
+
+
+@pytest.fixture
+def http(transactional_db):
+    # transactional_db : les threads du pool utilisent leurs propres connexions
+    user = User.objects.create_user(
+        email="async@example.com", password="pwd", first_name="A", last_name="Sync", role=UserRoles.ADMIN,
+    )
+    client = Client()
+    client.force_login(user)
+    yield client
+    close_query_pool_connections()
+
+
+def test_search_runs_independent_queries_on_the_pool(http, monkeypatch):
+    confirme = LeadStatus.objects.create(code=RDV_CONFIRME, label="Confirmé")
+    today = timezone.now().replace(hour=12)
+    lead = Lead.objects.create(first_name="Ana", last_name="Lyse", status=confirme, appointment_date=today)
+    Lead.objects.create(first_name="Bob", last_name="Lyse", status=confirme, appointment_date=today + timedelta(days=3))
+    service = Service.objects.create(code="ASYNC_SERVICE", label="Service", price=Decimal("100.00"))
+    Contract.objects.create(client=ClientModel.objects.create(lead=lead), service=service, amount_due=Decimal("100.00"))
+
+    threads = []
+    run_isolated = async_views._run_isolated
+    monkeypatch.setattr(async_views, "_run_isolated", lambda func: threads.append(1) or run_isolated(func))
+
+    res = http.get(reverse("lead-search"), {"page_size": 1, "ordering": "first_name"})
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["total"] == 2
+    assert body["kpi"] == {"rdv_today": 1, "contracts_today": 1}
+    assert [item["first_name"] for item in body["items"]] == ["Ana"]
+    assert len(threads) == 2  # agrégat KPI + page
+
+
+def test_search_rejects_impossible_dates(http):
+    res = http.get(reverse("lead-search"), {"date_from": "2025-02-30"})
+
+    assert res.status_code == 400
+    assert res.json() == ["Date invalide : 2025-02-30"]
+
+
+def test_stats_today(http):
+    res = http.get(reverse("lead-stats-today"))
+
+    assert res.status_code == 200
+    assert res.json()["tasks_today"] == 0
+
+
+def test_anonymous_is_rejected(transactional_db):
+    res = Client().get(reverse("lead-search"))
+
+    assert res.status_code == 403
+    assert "detail" in res.json()
+
+
+@pytest.mark.django_db
+def test_gather_queries_stays_on_request_connection_in_transaction():
+    """Dans un bloc atomic, les lignes non commitées restent visibles."""
+    from asgiref.sync import async_to_sync
+
+    status = LeadStatus.objects.create(code="NOUVEAU", label="Nouveau")
+    Lead.objects.create(first_name="Tx", last_name="Only", status=status)
+    assert connection.in_atomic_block
+
+    counts = async_to_sync(gather_queries)(Lead.objects.count, LeadStatus.objects.count)
+
+    assert counts == [1, 1]
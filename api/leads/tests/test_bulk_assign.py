@@ -0,0 +1,116 @@
+"""
+Tests de l'assignation en masse (BulkAssignmentService + actions bulk-assign* de LeadViewSetV2).
+"""
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.lead_status.models import LeadStatus
+from api.leads.assignment import AVOCATS, BulkAssignmentService
+from api.leads.models import Lead
+from api.leads_events.models import LeadEvent
+from api.notification_outbox.models import OutboxMessage
+from api.users.models import User
+from api.users.roles import UserRoles
+
+pytestmark = pytest.mark.django_db
+
+BULK_ASSIGN_URL = "/api/v2/leads/bulk-assign/"
+BULK_ASSIGN_JURISTS_URL = "/api/v2/leads/bulk-assign-jurists/"
+
+
+@pytest.fixture
+def admin_user():
+    return User.objects.create_user(
+        email="admin-bulk@test.com", password="123", role=UserRoles.ADMIN,
+        first_name="Admin", last_name="Bulk",
+    )
+
+
+@pytest.fixture
+def client_api(admin_user):
+    client = APIClient()
+    client.force_authenticate(user=admin_user)
+    return client
+
+
+@pytest.fixture
+def avocats():
+    return [
+        User.objects.create_user(
+            email=f"avocat{i}@test.com", password="123", role=UserRoles.AVOCAT,
+            first_name="Avocat", last_name=str(i),
+        )
+        for i in range(2)
+    ]
+
+
+@pytest.fixture
+def make_leads():
+    status = LeadStatus.objects.create(code="BULK_TEST", label="Bulk")
+
+    def _make(n):
+        return Lead.objects.bulk_create([
+            Lead(first_name="Lead", last_name=str(i), phone=f"06{i:08d}", status=status)
+            for i in range(n)
+        ])
+
+    return _make
+
+
+def test_bulk_assign_applies_set_semantics(make_leads, avocats, admin_user):
+    leads = make_leads(3)
+    leads[0].assigned_to.add(admin_user)
+    leads[1].assigned_to.add(avocats[0])
+
+    with patch.object(BulkAssignmentService, "_notify_avocats") as notify:
+        result = BulkAssignmentService.assign(
+            Lead.objects.filter(id__in=[l.id for l in leads]), [a.id for a in avocats], relation=AVOCATS,
+        )
+
+    for lead in leads:
+        assert set(lead.assigned_to.values_list("id", flat=True)) == {a.id for a in avocats}
+    assert result.updated == 3
+    assert len(result.added) == 5
+    assert result.removed == [(leads[0].id, admin_user.id)]
+    assert LeadEvent.objects.filter(event_type__code="LEAD_ASSIGNED").count() == 3
+    # Outbox : notifications écrites dans la transaction de l'assignation
+    notify.assert_called_once_with(result.added)
+
+
+def test_bulk_assign_query_count_is_constant(client_api, make_leads, avocats, django_capture_on_commit_callbacks):
+    leads = make_leads(1000)
+    payload = {"lead_ids": [l.id for l in leads], "user_ids": [a.id for a in avocats]}
+
+    with patch("api.notification_outbox.services.NotificationOutbox.kick") as kick, \
+            patch("api.websocket.signals.base.broadcast"), \
+            django_capture_on_commit_callbacks(execute=True):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client_api.post(BULK_ASSIGN_URL, payload, format="json")
+
+    assert response.status_code == 200
+    assert response.data["updated"] == 1000
+    # Outbox comprise (2 SELECT + INSERT par lots de 1 000, par canal), indépendant du nombre de leads
+    assert len(ctx.captured_queries) < 25
+    # 2 000 couples (lead, avocat) → 2 000 SMS + 2 000 e-mails dans l'outbox, un seul relais
+    assert OutboxMessage.objects.filter(channel="sms").count() == 2000
+    assert OutboxMessage.objects.filter(channel="email").count() == 2000
+    kick.assert_called_once()
+
+
+def test_bulk_assign_jurists_stamps_assignment_date(client_api, make_leads, admin_user):
+    leads = make_leads(5)
+
+    response = client_api.post(
+        BULK_ASSIGN_JURISTS_URL,
+        {"lead_ids": [l.id for l in leads], "user_ids": [admin_user.id]},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert response.data["updated"] == 5
+    assert not Lead.objects.filter(juriste_assigned_at__isnull=True).exists()
+    assert Lead.jurist_assigned.through.objects.filter(user_id=admin_user.id).count() == 5
@@ -0,0 +1,148 @@
+"""
+Non-régression des plans : les filtres compilés doivent rester sargables.
+
+`enable_seqscan = off` (limité à la transaction du test) force le planner à
+choisir un index dès qu'un prédicat le permet, même sur une table quasi vide :
+un `Index Cond` sur la colonne filtrée prouve que l'index est exploitable.
+"""
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.lead_status.models import LeadStatus
+from api.leads.filter_compiler import LeadFilterCompiler, day_bounds, to_day
+from api.leads.lead_filter import LeadFilterView
+from api.leads.models import Lead
+from api.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def force_index_scans():
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+
+
+def _plan(qs) -> str:
+    return qs.order_by().explain()
+
+
+def _paris(day: date, hour: int, minute: int = 0) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)), timezone.get_current_timezone())
+
+
+# ──────────────────────────────────────────────
+# PLANS
+# ──────────────────────────────────────────────
+
+def test_date_cast_defeats_index_but_compiled_range_uses_it(force_index_scans):
+    legacy = _plan(Lead.objects.filter(created_at__date__gte="2025-08-01", created_at__date__lte="2025-08-31"))
+    compiled = _plan(Lead.objects.filter(LeadFilterCompiler.date_range("created_at", "2025-08-01", "2025-08-31")))
+
+    assert "Index Cond: ((created_at" not in legacy
+    assert "lead_created" in compiled
+    assert "Index Cond: ((created_at >=" in compiled
+
+
+def test_appointment_range_uses_appointment_index(force_index_scans):
+    plan = _plan(Lead.objects.filter(LeadFilterCompiler.date_range("appointment_date", "2025-08-01", "2025-08-31")))
+
+    assert "lead_appointment_idx" in plan or "lead_status_appt_idx" in plan
+    assert "Index Cond:" in plan and "appointment_date >=" in plan
+
+
+@pytest.mark.parametrize("field, indexes", [
+    ("appointment_date", ("lead_appointment_idx", "lead_status_appt_idx")),
+    ("created_at", ("lead_created_idx", "lead_created_status_idx")),
+])
+def test_status_and_date_filter_is_an_index_range(force_index_scans, field, indexes):
+    # Volume réaliste (10 statuts, 4 ans de leads) puis ANALYZE : le planner
+    # choisit parmi tous les index de la table sur des statistiques à jour
+    statuses = LeadStatus.objects.bulk_create([
+        LeadStatus(code=f"S{i}", label=f"Statut {i}", color="#000") for i in range(10)
+    ])
+    start = _paris(date(2023, 1, 1), 9)
+    Lead.objects.bulk_create([
+        Lead(first_name="L", last_name=str(i), status=statuses[i % 10],
+             created_at=start + timedelta(hours=7 * i), appointment_date=start + timedelta(hours=7 * i + 3))
+        for i in range(5000)
+    ])
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {Lead._meta.db_table}")
+    plan = _plan(Lead.objects.filter(
+        LeadFilterCompiler.date_range(field, "2025-08-01", "2025-08-31"),
+        status_id=statuses[3].pk,
+    ))
+
+    assert any(f"using {index} " in plan for index in indexes)
+    assert f"{field} >=" in plan.split("Index Cond:", 1)[1].split("\n", 1)[0]
+
+
+def test_assigned_to_filter_is_exists_without_distinct():
+    qs = Lead.objects.filter(LeadFilterCompiler.assigned_to_any([1, 2]))
+    sql = str(qs.query).upper()
+
+    assert "DISTINCT" not in sql
+    assert sql.count("EXISTS") == 2
+    assert "INNER JOIN" not in sql
+
+
+# ──────────────────────────────────────────────
+# SÉMANTIQUE
+# ──────────────────────────────────────────────
+
+def test_day_bounds_are_half_open_in_paris():
+    lower, upper = day_bounds("2025-08-25", date(2025, 8, 26))
+
+    assert lower == _paris(date(2025, 8, 25), 0)
+    assert upper == _paris(date(2025, 8, 27), 0)
+    assert day_bounds(None, "") == (None, None)
+
+
+def test_compiled_range_matches_date_cast_at_paris_midnight(lead_status):
+    day = date(2025, 8, 25)
+    inside_early = Lead.objects.create(first_name="A", last_name="A", status=lead_status, appointment_date=_paris(day, 0, 0))
+    inside_late = Lead.objects.create(first_name="B", last_name="B", status=lead_status, appointment_date=_paris(day, 23, 59))
+    Lead.objects.create(first_name="C", last_name="C", status=lead_status, appointment_date=_paris(date(2025, 8, 24), 23, 59))
+    Lead.objects.create(first_name="D", last_name="D", status=lead_status, appointment_date=_paris(date(2025, 8, 26), 0, 0))
+
+    legacy = set(Lead.objects.filter(appointment_date__date=day).values_list("pk", flat=True))
+    compiled = set(Lead.objects.filter(LeadFilterCompiler.on_day("appointment_date", day)).values_list("pk", flat=True))
+
+    assert compiled == legacy == {inside_early.pk, inside_late.pk}
+
+
+def test_filter_view_assigned_to_returns_each_lead_once(lead_status):
+    conseiller = User.objects.create_user(email="c@test.com", password="pwd", role="CONSEILLER", first_name="C", last_name="C")
+    juriste = User.objects.create_user(email="j@test.com", password="pwd", role="JURISTE", first_name="J", last_name="J")
+    both = Lead.objects.create(first_name="Both", last_name="X", status=lead_status)
+    both.assigned_to.add(conseiller)
+    both.jurist_assigned.add(juriste)
+    other = Lead.objects.create(first_name="Other", last_name="Y", status=lead_status)
+    other.jurist_assigned.add(juriste)
+    Lead.objects.create(first_name="None", last_name="Z", status=lead_status)
+
+    request = APIRequestFactory().get("/", {"assigned_to": [conseiller.pk, juriste.pk]})
+    force_authenticate(request, user=conseiller)
+    response = LeadFilterView.as_view()(request)
+
+    assert response.status_code == 200
+    assert sorted(row["id"] for row in response.data["results"]) == sorted([both.pk, other.pk])
+
+
+@pytest.mark.parametrize("value", ["2025-02-30", "2025-13-01T10:00:00", "hier"])
+def test_invalid_dates_are_rejected_with_400(lead_status, value):
+    user = User.objects.create_user(email="d@test.com", password="pwd", role="ADMIN", first_name="D", last_name="D")
+    request = APIRequestFactory().get("/", {"created_from": value})
+    force_authenticate(request, user=user)
+
+    response = LeadFilterView.as_view()(request)
+
+    assert response.status_code == 400
+    with pytest.raises(ValidationError):
+        to_day(value)
@@ -188,3 +188,47 @@ def test_ordering_and_pagination(authenticated_client, lead_status):
     assert res.data["page"] == 1
     assert res.data["page_size"] == 1
     assert res.data["total"] >= 2
+
+
+def test_kpis_come_from_a_single_aggregate(authenticated_client, lead_status):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.utils import timezone
+
+    Lead.objects.create(first_name="Kpi", last_name="Today", status=lead_status, appointment_date=timezone.now())
+    Lead.objects.create(first_name="Kpi", last_name="Later", status=lead_status)
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = authenticated_client.get(reverse("lead-search"))
+
+    assert response.status_code == 200
+    assert response.data["total"] == 2
+    assert response.data["kpi"]["rdv_today"] == 1
+    lead_queries = [q["sql"] for q in ctx.captured_queries if 'FROM "leads_lead"' in q["sql"]]
+    assert len(lead_queries) == 2  # KPI (CTE) + page
+    kpi_sql = next(sql for sql in lead_queries if sql.lstrip().startswith("WITH"))
+    assert "EXISTS" not in kpi_sql  # annotations de page absentes des KPI
+
+
+def test_responses_are_cached_until_a_lead_broadcast(authenticated_client, lead_status):
+    from unittest.mock import AsyncMock, MagicMock, patch
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from api.websocket.signals.base import broadcast
+
+    Lead.objects.create(first_name="Cache", last_name="One", status=lead_status)
+    url = reverse("lead-search")
+    assert authenticated_client.get(url, {"page": "1"}).data["total"] == 1
+
+    Lead.objects.create(first_name="Cache", last_name="Two", status=lead_status)
+    with CaptureQueriesContext(connection) as ctx:
+        # Même recherche normalisée (page=1 par défaut, paramètre vide ignoré)
+        cached = authenticated_client.get(url, {"status_code": ""})
+    assert cached.data["total"] == 1
+    assert not [q for q in ctx.captured_queries if "leads_lead" in q["sql"]]
+
+    with patch("api.websocket.signals.base.get_channel_layer", return_value=MagicMock(group_send=AsyncMock())):
+        broadcast(["leads"], {"event": "lead_created"})
+    assert authenticated_client.get(url).data["total"] == 2
@@ -13,6 +13,7 @@ from rest_framework.response import Response
 
 from api.booking.models import SlotQuota
 from api.lead_status.models import LeadStatus
+from api.core.reference_data import lead_statuses
 from api.leads.constants import RDV_CONFIRME, RDV_A_CONFIRMER, A_RAPPELER, ABSENT
 from api.leads.models import Lead
 from api.leads.permissions import IsLeadCreator, CanAssignLead, CanDeleteLead
@@ -99,12 +100,14 @@ class LeadViewSet(viewsets.ModelViewSet):
     # =====================
 
     def perform_create(self, serializer):
-        lead = serializer.save(status=self._get_default_status())
-        self._send_notifications(lead)
+        # Notifications dans l'outbox : écrites avec le lead, annulées avec lui
+        with transaction.atomic():
+            lead = serializer.save(status=self._get_default_status())
+            self._send_notifications(lead)
 
     def _get_default_status(self):
         try:
-            return LeadStatus.objects.get(code=RDV_A_CONFIRMER)
+            return lead_statuses.get(RDV_A_CONFIRMER)
         except LeadStatus.DoesNotExist:
             raise NotFound("Le statut RDV_A_CONFIRMER n'existe pas en base.")
 
@@ -119,6 +122,7 @@ class LeadViewSet(viewsets.ModelViewSet):
         if lead.phone:
             send_appointment_confirmation_sms_task(lead.id)
 
+    @transaction.atomic
     def perform_update(self, serializer):
         before = self.get_object()
         after = serializer.save()
@@ -172,8 +176,8 @@ class LeadViewSet(viewsets.ModelViewSet):
                 )
 
             lead = serializer.save(status=self._get_default_status())
+            self._send_notifications(lead)
 
-        self._send_notifications(lead)
         return Response(
             self.get_serializer(lead).data,
             status=drf_status.HTTP_201_CREATED,
@@ -186,13 +190,10 @@ class LeadViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"], url_path="count-by-status")
     def count_by_status(self, request):
         statuses = [RDV_A_CONFIRMER, A_RAPPELER, RDV_CONFIRME, ABSENT]
-        status_qs = LeadStatus.objects.filter(code__in=statuses)
-        status_map = {s.code: s for s in status_qs}
-
         data = {}
         for code in statuses:
-            status_obj = status_map.get(code)
-            data[code] = Lead.objects.filter(status=status_obj).count() if status_obj else 0
+            status_id = lead_statuses.id_for(code)
+            data[code] = Lead.objects.filter(status_id=status_id).count() if status_id else 0
 
         return Response(data)
 
@@ -206,7 +207,7 @@ class LeadViewSet(viewsets.ModelViewSet):
         if not parsed_date:
             return Response({"detail": "Format de date invalide."}, status=400)
 
-        status = LeadStatus.objects.filter(code=RDV_CONFIRME).first()
+        status = lead_statuses.get_or_none(RDV_CONFIRME)
         if not status:
             return Response({"detail": "Le statut RDV_CONFIRME n'existe pas."}, status=500)
 
@@ -7,6 +7,7 @@ from django.db.models import Case, When, F, DateTimeField, IntegerField, Q
 from rest_framework import status
 
 from api.core.pagination import CRMLeadPagination
+from api.leads.assignment import AVOCATS, JURISTES, BulkAssignmentService
 from api.leads.models import Lead
 from api.leads.serializers import LeadSerializer
 from api.leads_events.models import LeadEvent
@@ -234,16 +235,11 @@ class LeadViewSetV2(viewsets.ModelViewSet):
         if not isinstance(lead_ids, list) or not isinstance(user_ids, list):
             return Response({"detail": "lead_ids et user_ids doivent être des listes"}, status=400)
 
-        leads = self.get_queryset().filter(id__in=lead_ids)
-        users_to_assign = list(User.objects.filter(id__in=user_ids, role=UserRoles.AVOCAT))
-
-        for lead in leads:
-            lead.assigned_to.set(user_ids)
-            for avocat in users_to_assign:
-                send_avocat_assigned_sms_task(lead.id, avocat.id)
-                send_avocat_assigned_notification_task(lead.id, avocat.id)
+        result = BulkAssignmentService.assign(
+            self.get_queryset().filter(id__in=lead_ids), user_ids, relation=AVOCATS, actor=request.user,
+        )
 
-        return Response({"success": True, "updated": leads.count()})
+        return Response({"success": True, "updated": result.updated})
 
     # ==========================
     # BULK ASSIGN JURISTS
@@ -257,14 +253,11 @@ class LeadViewSetV2(viewsets.ModelViewSet):
         if not isinstance(lead_ids, list) or not isinstance(user_ids, list):
             return Response({"detail": "lead_ids et user_ids doivent être des listes"}, status=400)
 
-        leads = self.get_queryset().filter(id__in=lead_ids)
-
-        for lead in leads:
-            lead.jurist_assigned.set(user_ids)
-            lead.juriste_assigned_at = timezone.now()
-            lead.save(update_fields=["juriste_assigned_at"])
+        result = BulkAssignmentService.assign(
+            self.get_queryset().filter(id__in=lead_ids), user_ids, relation=JURISTES, actor=request.user,
+        )
 
-        return Response({"success": True, "updated": leads.count()})
+        return Response({"success": True, "updated": result.updated})
 
     # ==========================
     # CREATE
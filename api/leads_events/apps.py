@@ -8,3 +8,4 @@ class LeadsEventsConfig(AppConfig):
 
     def ready(self):
         import api.leads_events.audit_signals
+        import api.leads_events.signals
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-19 04:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_add_document_type'),
+        ('leads', '0020_lead_composite_filter_indexes'),
+        ('leads_event_type', '0001_initial'),
+        ('leads_events', '0002_leadevent_attachments_leadevent_parent_event_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='leadevent',
+            name='attachments',
+            field=models.ManyToManyField(blank=True, db_constraint=False, related_name='events', to='documents.document', verbose_name='documents liés'),
+        ),
+        migrations.AlterField(
+            model_name='leadevent',
+            name='parent_event',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text="Événement parent dans l'arbre du cycle de vie", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='leads_events.leadevent', verbose_name='événement parent'),
+        ),
+        migrations.CreateModel(
+            name='LeadEventArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('parent_event_id', models.BigIntegerField(blank=True, null=True)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('note', models.TextField(blank=True)),
+                ('occurred_at', models.DateTimeField()),
+                ('position_x', models.FloatField(default=0.0)),
+                ('position_y', models.FloatField(default=0.0)),
+                ('actor', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('event_type', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='leads_event_type.leadeventtype')),
+                ('lead', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_events', to='leads.lead')),
+            ],
+            options={
+                'verbose_name': 'événement lead archivé',
+                'verbose_name_plural': 'événements lead archivés',
+                'indexes': [models.Index(fields=['lead', 'occurred_at'], name='leads_event_lead_id_e8fb01_idx')],
+            },
+        ),
+    ]
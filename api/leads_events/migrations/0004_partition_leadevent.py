@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def partition_events(apps, schema_editor):
+    from api.core.partitioning import convert_to_partitioned
+
+    convert_to_partitioned(schema_editor.connection, "leads_events_leadevent", "occurred_at")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads_events', '0003_leadevent_archive'),
+        # Plus aucune contrainte de clé étrangère ne vise la table
+        ('leads_task', '0006_alter_leadtask_triggered_by_event'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_events, migrations.RunPython.noop),
+    ]
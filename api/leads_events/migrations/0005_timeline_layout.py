@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2026-10-19 04:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0020_lead_composite_filter_indexes'),
+        ('leads_events', '0004_partition_leadevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leadevent',
+            name='layout_level',
+            field=models.PositiveIntegerField(blank=True, help_text="Vide tant que le nœud n'a pas été placé par le layout incrémental", null=True, verbose_name="niveau dans l'arbre"),
+        ),
+        migrations.AddField(
+            model_name='leadeventarchive',
+            name='layout_level',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='LeadTimelineLevel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveIntegerField()),
+                ('width', models.PositiveIntegerField(default=0)),
+                ('lead', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='timeline_levels', to='leads.lead')),
+            ],
+            options={
+                'verbose_name': 'niveau de timeline',
+                'verbose_name_plural': 'niveaux de timeline',
+                'constraints': [models.UniqueConstraint(fields=('lead', 'level'), name='unique_lead_timeline_level')],
+            },
+        ),
+    ]
@@ -7,6 +7,11 @@ Enrichissements :
     - parent_event  : FK self → permet de construire un arbre de causalité
     - attachments   : M2M → Document (pièces jointes à l'événement)
     - position_x/y  : coordonnées pour le canvas interactif (React Flow)
+    - layout_level  : profondeur dans l'arbre, fixée au placement (api.leads_events.timeline)
+
+Table partitionnée par mois sur occurred_at (api.core.partitioning) : les
+clés étrangères vers LeadEvent n'ont pas de contrainte en base, et les mois
+au-delà de la rétention sont compactés dans LeadEventArchive.
 """
 
 from django.db import models
@@ -14,6 +19,7 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from api.leads_event_type.models import LeadEventType
+from api.core.reference_data import lead_event_types
 from api.leads.automation.engine import AutomationEngine
 
 
@@ -30,7 +36,7 @@ class LeadEvent(models.Model):
                         └── "Accusé de réception reçu"
 
     IMPORTANT : Un LeadEvent est IMMUTABLE une fois créé.
-    Exception : position_x / position_y (UI uniquement, pas de données métier).
+    Exception : position_x / position_y / layout_level (UI uniquement, pas de données métier).
     """
 
     lead = models.ForeignKey(
@@ -63,6 +69,7 @@ class LeadEvent(models.Model):
         null=True,
         blank=True,
         related_name="children",
+        db_constraint=False,
         verbose_name=_("événement parent"),
         help_text=_("Événement parent dans l'arbre du cycle de vie"),
     )
@@ -72,6 +79,7 @@ class LeadEvent(models.Model):
         "documents.Document",
         blank=True,
         related_name="events",
+        db_constraint=False,
         verbose_name=_("documents liés"),
     )
 
@@ -101,6 +109,12 @@ class LeadEvent(models.Model):
         default=0.0,
         verbose_name=_("position Y"),
     )
+    layout_level = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("niveau dans l'arbre"),
+        help_text=_("Vide tant que le nœud n'a pas été placé par le layout incrémental"),
+    )
 
     class Meta:
         verbose_name = _("événement lead")
@@ -121,7 +135,7 @@ class LeadEvent(models.Model):
     # IMMUTABILITÉ (sauf position UI)
     # ─────────────────────────────────────
 
-    MUTABLE_FIELDS = {"position_x", "position_y"}
+    MUTABLE_FIELDS = {"position_x", "position_y", "layout_level"}
 
     def save(self, *args, **kwargs):
         """
@@ -159,8 +173,8 @@ class LeadEvent(models.Model):
                 attachment_ids=[42, 43],
             )
         """
-        event_type, _ = LeadEventType.objects.get_or_create(
-            code=event_code,
+        event_type = lead_event_types.get_or_create(
+            event_code,
             defaults={"label": event_code.replace("_", " ").title()},
         )
 
@@ -185,4 +199,116 @@ class LeadEvent(models.Model):
             logger = logging.getLogger(__name__)
             logger.error(f"Erreur automation pour event {event_code}: {e}")
 
-        return event
\ No newline at end of file
+        return event
+
+    @classmethod
+    def bulk_log(cls, event_code, entries, actor=None, batch_size=1000):
+        """
+        Insère un lot d'événements en une requête par `batch_size`.
+        `entries` : itérable de (lead_id, data).
+
+        Contrairement à log(), ne déclenche pas les automatisations ni le
+        layout incrémental (nœuds placés à la prochaine lecture de la timeline) :
+        réservé aux traitements de masse (assignations, générateurs, imports).
+        """
+        from functools import partial
+        from django.db import transaction
+        from api.leads_events import timeline
+
+        entries = list(entries)
+        if not entries:
+            return []
+
+        event_type = lead_event_types.get_or_create(
+            event_code,
+            defaults={"label": event_code.replace("_", " ").title()},
+        )
+        actor = actor if actor is not None and getattr(actor, "is_authenticated", False) else None
+
+        events = cls.objects.bulk_create(
+            [
+                cls(lead_id=lead_id, event_type=event_type, actor=actor, data=data or {})
+                for lead_id, data in entries
+            ],
+            batch_size=batch_size,
+        )
+        lead_ids = {lead_id for lead_id, _ in entries}
+        timeline.invalidate(*lead_ids)
+        transaction.on_commit(partial(timeline.invalidate, *lead_ids))
+        return events
+
+
+class LeadEventArchive(models.Model):
+    """
+    Événements des partitions compactées (au-delà de PARTITION_RETENTION_MONTHS).
+
+    Mêmes colonnes et mêmes id que LeadEvent ; seul l'index par lead est
+    conservé. Les pièces jointes restent dans la table de liaison de LeadEvent.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    lead = models.ForeignKey(
+        "leads.Lead",
+        on_delete=models.CASCADE,
+        related_name="archived_events",
+        db_index=False,
+    )
+    event_type = models.ForeignKey(LeadEventType, on_delete=models.PROTECT, related_name="+", db_index=False)
+    actor = models.ForeignKey(
+        "users.User",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        db_index=False,
+    )
+    parent_event_id = models.BigIntegerField(null=True, blank=True)
+    data = models.JSONField(default=dict, blank=True)
+    note = models.TextField(blank=True)
+    occurred_at = models.DateTimeField()
+    position_x = models.FloatField(default=0.0)
+    position_y = models.FloatField(default=0.0)
+    layout_level = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("événement lead archivé")
+        verbose_name_plural = _("événements lead archivés")
+        indexes = [
+            models.Index(fields=["lead", "occurred_at"]),
+        ]
+
+    def as_event(self) -> LeadEvent:
+        """LeadEvent équivalent (lecture seule), avec le type et l'acteur déjà chargés."""
+        event = LeadEvent(**{field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields})
+        event._state.adding = False
+        for name in ("event_type", "actor"):
+            if self._meta.get_field(name).is_cached(self):
+                setattr(event, name, getattr(self, name))
+        return event
+
+
+
+class LeadTimelineLevel(models.Model):
+    """
+    Largeur de chaque niveau de l'arbre d'un lead : prochain emplacement libre
+    pour le layout incrémental (un UPSERT par nœud ajouté).
+    """
+
+    lead = models.ForeignKey(
+        "leads.Lead",
+        on_delete=models.CASCADE,
+        related_name="timeline_levels",
+        db_index=False,
+    )
+    level = models.PositiveIntegerField()
+    width = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = _("niveau de timeline")
+        verbose_name_plural = _("niveaux de timeline")
+        constraints = [
+            models.UniqueConstraint(fields=["lead", "level"], name="unique_lead_timeline_level"),
+        ]
+
+    def __str__(self):
+        return f"Lead {self.lead_id} — niveau {self.level} : {self.width}"
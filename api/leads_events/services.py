@@ -4,8 +4,14 @@ api/leads/events/services.py
 Service de construction du tree pour React Flow.
 """
 
-import math
-from .models import LeadEvent
+from functools import partial
+
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+
+from . import timeline
+from .models import LeadEvent, LeadEventArchive
+from .timeline import TimelineLayout
 
 
 class LeadEventService:
@@ -24,35 +30,84 @@ class LeadEventService:
         )
 
     @staticmethod
-    def get_timeline_for_react_flow(lead_id: int) -> dict:
+    def get_timeline_for_react_flow(lead_id: int, since: int = None, before: int = None, limit: int = None) -> dict:
         """
-        Retourne { nodes, edges } au format React Flow pour un lead donné.
+        Retourne { nodes, edges, cursor } au format React Flow pour un lead donné.
+
+            - sans paramètre             : graphe complet, servi depuis le cache
+            - since=<event_id>           : delta, événements d'id supérieur
+            - limit=N [before=<event_id>] : fenêtre des N événements les plus récents
+              (d'id inférieur à before) ; hasMore / before pour la fenêtre précédente
 
-        Calcule automatiquement les positions si position_x/y sont à 0.
-        Utilise un layout en arbre hiérarchique (Reingold–Tilford simplifié).
+        `cursor` est le plus grand id renvoyé, à repasser en `since` au prochain appel.
+        Les positions sont celles du layout incrémental (api.leads_events.timeline).
         """
-        events = (
+        lead_id = int(lead_id)
+        if since is None and before is None and limit is None:
+            graph = timeline.get_cached(lead_id)
+            if graph is None:
+                events, archived_ids, _ = LeadEventService._load(lead_id)
+                TimelineLayout.catch_up(lead_id, events, archived_ids)
+                graph = LeadEventService._serialize(events)
+                timeline.set_cached(lead_id, graph)
+            return graph
+
+        events, archived_ids, has_more = LeadEventService._load(lead_id, since, before, limit)
+        if any(e.layout_level is None for e in events):
+            # Nœuds jamais placés : le layout se calcule sur l'arbre complet, une seule fois
+            LeadEventService.get_timeline_for_react_flow(lead_id)
+            events, archived_ids, has_more = LeadEventService._load(lead_id, since, before, limit)
+
+        graph = LeadEventService._serialize(events)
+        graph["cursor"] = graph["cursor"] or since
+        if limit is not None:
+            graph["hasMore"] = has_more
+            graph["before"] = min((e.id for e in events), default=before)
+        return graph
+
+    @staticmethod
+    def _load(lead_id: int, since: int = None, before: int = None, limit: int = None):
+        """
+        Événements du lead (partitions chaudes puis mois compactés dans
+        LeadEventArchive ; pendant l'archivage, la ligne chaude prime), triés
+        par date. Retourne (événements, ids archivés, reste-t-il plus ancien).
+        """
+        filters = {"lead_id": lead_id}
+        if since is not None:
+            filters["id__gt"] = since
+        if before is not None:
+            filters["id__lt"] = before
+
+        hot = (
             LeadEvent.objects
-            .filter(lead_id=lead_id)
+            .filter(**filters)
             .select_related("event_type", "actor")
-            .prefetch_related("attachments", "children")
-            .order_by("occurred_at")
+            .prefetch_related("attachments__document_type")
+            .order_by("-id")
         )
+        archive = LeadEventArchive.objects.filter(**filters).select_related("event_type", "actor").order_by("-id")
+        if limit is not None:
+            hot, archive = hot[:limit + 1], archive[:limit + 1]
+
+        events = list(hot)
+        hot_ids = {e.id for e in events}
+        archived = [row.as_event() for row in archive if row.id not in hot_ids]
+        if archived:
+            prefetch_related_objects(archived, "attachments__document_type")
+            events = sorted(events + archived, key=lambda e: e.id, reverse=True)
+
+        has_more = limit is not None and len(events) > limit
+        if has_more:
+            events = events[:limit]
+        events.sort(key=lambda e: (e.occurred_at, e.id))
+        return events, {e.id for e in archived}, has_more
 
-        events_list = list(events)
-
-        if not events_list:
-            return {"nodes": [], "edges": []}
-
-        # ── Auto-layout si aucune position n'a été définie ──
-        needs_layout = all(e.position_x == 0.0 and e.position_y == 0.0 for e in events_list)
-        if needs_layout:
-            LeadEventService._auto_layout(events_list)
-
+    @staticmethod
+    def _serialize(events: list) -> dict:
         nodes = []
         edges = []
 
-        for event in events_list:
+        for event in events:
             actor_name = event.actor.get_full_name() if event.actor else "Système"
             attachments_data = [
                 {
@@ -101,50 +156,7 @@ class LeadEventService:
                     },
                 })
 
-        return {"nodes": nodes, "edges": edges}
-
-    @staticmethod
-    def _auto_layout(events: list) -> None:
-        """
-        Calcule un layout hiérarchique simple (top→down).
-        Modifie les positions en mémoire (pas de sauvegarde DB ici).
-
-        Algorithme :
-            - Niveau 0 : racines (pas de parent)
-            - Niveau N : enfants du niveau N-1
-            - Espacement horizontal : 280px, vertical : 180px
-        """
-        NODE_W = 280
-        NODE_H = 180
-
-        # Index par id
-        by_id = {e.id: e for e in events}
-
-        # Calcul des niveaux
-        levels: dict[int, list] = {}
-
-        def get_level(event_id: int, visited=None) -> int:
-            if visited is None:
-                visited = set()
-            if event_id in visited:
-                return 0
-            visited.add(event_id)
-            event = by_id.get(event_id)
-            if not event or not event.parent_event_id:
-                return 0
-            return get_level(event.parent_event_id, visited) + 1
-
-        for e in events:
-            lvl = get_level(e.id)
-            levels.setdefault(lvl, []).append(e)
-
-        # Assignation positions
-        for lvl, lvl_events in levels.items():
-            total_width = len(lvl_events) * NODE_W
-            start_x = -total_width / 2
-            for i, event in enumerate(lvl_events):
-                event.position_x = start_x + i * NODE_W + NODE_W / 2
-                event.position_y = lvl * NODE_H
+        return {"nodes": nodes, "edges": edges, "cursor": max((e.id for e in events), default=None)}
 
     @staticmethod
     def update_node_position(event_id: int, x: float, y: float) -> None:
@@ -152,7 +164,16 @@ class LeadEventService:
         Met à jour la position d'un nœud dans le canvas React Flow.
         Seule modification autorisée sur un LeadEvent immuable.
         """
-        LeadEvent.objects.filter(pk=event_id).update(
+        model = LeadEvent
+        updated = LeadEvent.objects.filter(pk=event_id).update(
             position_x=x,
             position_y=y,
-        )
\ No newline at end of file
+        )
+        if not updated:
+            model = LeadEventArchive
+            LeadEventArchive.objects.filter(pk=event_id).update(position_x=x, position_y=y)
+
+        lead_id = model.objects.filter(pk=event_id).values_list("lead_id", flat=True).first()
+        if lead_id:
+            timeline.invalidate(lead_id)
+            transaction.on_commit(partial(timeline.invalidate, lead_id))
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+Layout incrémental et invalidation du cache de la timeline (api.leads_events.timeline).
+
+Invalidation immédiate, puis à nouveau après commit : une lecture concurrente
+qui relirait l'état avant commit ne peut pas remettre un graphe périmé en cache.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, pre_save
+from django.dispatch import receiver
+
+from api.leads_events import timeline
+from api.leads_events.models import LeadEvent
+
+
+@receiver(pre_save, sender=LeadEvent)
+def lead_event_place_node(sender, instance, **kwargs):
+    if instance._state.adding:
+        timeline.TimelineLayout.place(instance)
+
+
+@receiver(post_save, sender=LeadEvent)
+def lead_event_invalidate_timeline(sender, instance, **kwargs):
+    timeline.invalidate(instance.lead_id)
+    transaction.on_commit(partial(timeline.invalidate, instance.lead_id))
+
+
+@receiver(m2m_changed, sender=LeadEvent.attachments.through)
+def lead_event_attachments_invalidate_timeline(sender, instance, reverse=False, **kwargs):
+    if not reverse:
+        timeline.invalidate(instance.lead_id)
+        transaction.on_commit(partial(timeline.invalidate, instance.lead_id))
@@ -0,0 +1,136 @@
+"""
+Tests de la timeline React Flow : layout incrémental, delta, fenêtres et cache
+(api.leads_events.timeline).
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.core.reference_data import lead_event_types
+from api.lead_status.models import LeadStatus
+from api.leads.models import Lead
+from api.leads_events.models import LeadEvent, LeadTimelineLevel
+from api.leads_events.services import LeadEventService
+from api.leads_events.timeline import NODE_H, NODE_W
+from api.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def lead():
+    status = LeadStatus.objects.create(code="TIMELINE_TEST", label="Timeline")
+    return Lead.objects.create(first_name="Awa", last_name="Diallo", phone="0612345678", status=status)
+
+
+@pytest.fixture
+def client():
+    user = User.objects.create_user(email="timeline@test.com", password="pwd", role="ADMIN",
+                                    first_name="A", last_name="B")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def _positions(graph) -> dict:
+    return {int(n["id"]): (n["position"]["x"], n["position"]["y"]) for n in graph["nodes"]}
+
+
+def _chain(lead, size) -> list:
+    """`size` événements chaînés, insérés en lot (sans signal, donc non placés)."""
+    event_type = lead_event_types.get_or_create("TIMELINE_STEP", defaults={"label": "Étape"})
+    events = LeadEvent.objects.bulk_create([LeadEvent(lead=lead, event_type=event_type) for _ in range(size)])
+    for parent, child in zip(events, events[1:]):
+        child.parent_event_id = parent.id
+    LeadEvent.objects.bulk_update(events[1:], ["parent_event"], batch_size=1000)
+    return events
+
+
+def test_appended_events_are_placed_on_insert(lead):
+    root = LeadEvent.log(lead, "TIMELINE_ROOT")
+    first = LeadEvent.log(lead, "TIMELINE_A", parent_event=root)
+    second = LeadEvent.log(lead, "TIMELINE_B", parent_event=root)
+    grandchild = LeadEvent.log(lead, "TIMELINE_C", parent_event=second)
+
+    assert (first.layout_level, first.position_x, first.position_y) == (1, 0, NODE_H)
+    assert (second.layout_level, second.position_x, second.position_y) == (1, NODE_W, NODE_H)
+    assert (grandchild.layout_level, grandchild.position_y) == (2, 2 * NODE_H)
+    assert dict(LeadTimelineLevel.objects.filter(lead=lead).values_list("level", "width")) == {0: 1, 1: 2, 2: 1}
+
+    graph = LeadEventService.get_timeline_for_react_flow(lead.id)
+    assert _positions(graph)[second.id] == (NODE_W, NODE_H)
+
+
+def test_unplaced_chain_of_5k_events_is_laid_out_once(lead):
+    events = _chain(lead, 5000)
+
+    graph = LeadEventService.get_timeline_for_react_flow(lead.id)
+
+    positions = _positions(graph)
+    assert len(graph["nodes"]) == 5000 and len(graph["edges"]) == 4999
+    assert positions[events[-1].id] == (0, 4999 * NODE_H)
+    assert LeadEvent.objects.filter(lead=lead, layout_level__isnull=True).count() == 0
+    assert LeadEvent.objects.get(id=events[-1].id).layout_level == 4999
+
+    appended = LeadEvent.log(lead, "TIMELINE_NEXT", parent_event=LeadEvent.objects.get(id=events[-1].id))
+    assert (appended.layout_level, appended.position_y) == (5000, 5000 * NODE_H)
+
+
+def test_wide_lead_with_5k_events_keeps_reads_constant(lead, client):
+    event_type = lead_event_types.get_or_create("TIMELINE_WIDE", defaults={"label": "Large"})
+    LeadEvent.objects.bulk_create([LeadEvent(lead=lead, event_type=event_type) for _ in range(5000)])
+    url = reverse("lead-events-timeline")
+
+    full = client.get(url, {"lead": lead.id}).json()
+    assert len(full["nodes"]) == 5000
+    assert len(set(_positions(full).values())) == 5000
+
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get(url, {"lead": lead.id}).json() == full
+    assert not [q for q in queries.captured_queries if "leads_events_leadevent" in q["sql"]]
+
+    with CaptureQueriesContext(connection) as queries:
+        window = client.get(url, {"lead": lead.id, "limit": 100}).json()
+    assert len(queries.captured_queries) < 15
+    assert len(window["nodes"]) == 100 and window["hasMore"]
+    assert window["cursor"] == full["cursor"]
+
+
+def test_delta_and_windows(lead, client):
+    url = reverse("lead-events-timeline")
+    LeadEvent.log(lead, "TIMELINE_ROOT")
+    full = client.get(url, {"lead": lead.id}).json()
+    events = [LeadEvent.log(lead, f"TIMELINE_{i}") for i in range(5)]
+
+    delta = client.get(url, {"lead": lead.id, "since": full["cursor"]}).json()
+    assert [n["data"]["id"] for n in delta["nodes"]] == [e.id for e in events]
+    assert delta["cursor"] == events[-1].id
+    empty = client.get(url, {"lead": lead.id, "since": delta["cursor"]}).json()
+    assert (empty["nodes"], empty["cursor"]) == ([], events[-1].id)
+
+    page = client.get(url, {"lead": lead.id, "limit": 4}).json()
+    assert [n["data"]["id"] for n in page["nodes"]] == [e.id for e in events[1:]]
+    assert page["hasMore"] and page["before"] == events[1].id
+    older = client.get(url, {"lead": lead.id, "limit": 4, "before": page["before"]}).json()
+    assert [n["data"]["id"] for n in older["nodes"]] == [full["cursor"], events[0].id]
+    assert not older["hasMore"]
+
+    assert client.get(url, {"lead": lead.id, "limit": 0}).status_code == 400
+    assert client.get(url, {"lead": lead.id, "since": "abc"}).status_code == 400
+
+
+def test_cache_is_invalidated_by_new_events_and_moves(lead):
+    root_id = LeadEvent.log(lead, "TIMELINE_ROOT").id
+    assert LeadEventService.get_timeline_for_react_flow(lead.id)["cursor"] == root_id
+
+    event = LeadEvent.log(lead, "TIMELINE_NEW")
+    assert LeadEventService.get_timeline_for_react_flow(lead.id)["cursor"] == event.id
+
+    LeadEventService.update_node_position(root_id, 12.0, 34.0)
+    assert _positions(LeadEventService.get_timeline_for_react_flow(lead.id))[root_id] == (12.0, 34.0)
+
+    LeadEvent.bulk_log("TIMELINE_BULK", [(lead.id, {})])
+    assert len(LeadEventService.get_timeline_for_react_flow(lead.id)["nodes"]) == 3
+
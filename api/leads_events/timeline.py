@@ -0,0 +1,186 @@
+"""
+Layout incrémental et cache de la timeline React Flow d'un lead.
+
+Layout : chaque nœud est placé une seule fois, à l'insertion (signal pre_save),
+sur la ligne de son niveau (profondeur du parent + 1) et dans le prochain
+emplacement libre de ce niveau. La largeur de chaque niveau est tenue dans
+LeadTimelineLevel et réservée par un UPSERT : coût constant par nœud ajouté,
+quelle que soit la taille de l'arbre. Les nœuds insérés sans signal
+(bulk_log, COPY du jeu de bench) ou antérieurs au layout incrémental sont
+placés à la première lecture (catch_up, linéaire), puis enregistrés.
+
+Cache : le graphe sérialisé complet est conservé TIMELINE_CACHE_TTL secondes
+par lead. Tout nouvel événement, pièce jointe ou déplacement de nœud supprime
+l'entrée du lead ; les changements de libellés (types d'événement, documents)
+sont couverts par le TTL.
+"""
+import logging
+import time
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from django.db import connection
+
+from .models import LeadEvent, LeadEventArchive, LeadTimelineLevel
+
+logger = logging.getLogger(__name__)
+
+NODE_W = 280
+NODE_H = 180
+CATCH_UP_BATCH_SIZE = 1000
+
+TIMELINE_CACHE_TTL = 600  # secondes ; chaque écriture supprime l'entrée du lead
+KEY_PREFIX = "leads_events:timeline:"
+GENERATION_KEY = f"{KEY_PREFIX}generation"
+
+
+class TimelineLayout:
+
+    @staticmethod
+    def place(event: LeadEvent) -> None:
+        """
+        Place un nouvel événement avant son INSERT (position et niveau).
+        Un parent pas encore placé laisse l'événement à catch_up.
+        """
+        if event.layout_level is not None or event.position_x or event.position_y:
+            return
+        level = TimelineLayout._parent_level(event)
+        if level is None:
+            return
+        slot = TimelineLayout.reserve(event.lead_id, level + 1)
+        event.position_x, event.position_y = slot * NODE_W, (level + 1) * NODE_H
+        event.layout_level = level + 1
+
+    @staticmethod
+    def _parent_level(event: LeadEvent) -> Optional[int]:
+        """Niveau du parent, -1 pour une racine, None si le parent n'est pas placé."""
+        if not event.parent_event_id:
+            return -1
+        if LeadEvent.parent_event.is_cached(event) and event.parent_event is not None:
+            return event.parent_event.layout_level
+        for model in (LeadEvent, LeadEventArchive):
+            found = list(model.objects.filter(pk=event.parent_event_id).values_list("layout_level", flat=True))
+            if found:
+                return found[0]
+        return -1  # parent supprimé : le nœud devient une racine
+
+    @staticmethod
+    def reserve(lead_id: int, level: int, count: int = 1) -> int:
+        """Réserve `count` emplacements sur le niveau `level` ; retourne le premier."""
+        table = connection.ops.quote_name(LeadTimelineLevel._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (lead_id, level, width) VALUES (%s, %s, %s) "
+                f"ON CONFLICT (lead_id, level) DO UPDATE SET width = {table}.width + EXCLUDED.width "
+                f"RETURNING width",
+                [lead_id, level, count],
+            )
+            return cursor.fetchone()[0] - count
+
+    @staticmethod
+    def levels(events: list) -> dict:
+        """
+        Niveau de chaque événement : celui enregistré, sinon celui du parent + 1
+        (parent hors de la liste ou cycle → racine). Chaque nœud n'est visité
+        qu'une fois, même sur une chaîne de plusieurs milliers d'événements.
+        """
+        by_id = {e.id: e for e in events}
+        levels = {e.id: e.layout_level for e in events if e.layout_level is not None}
+        for event in events:
+            chain, seen = [], set()
+            current = event
+            while current.id not in levels:
+                chain.append(current)
+                seen.add(current.id)
+                parent = by_id.get(current.parent_event_id)
+                if parent is None or parent.id in seen:
+                    base = -1
+                    break
+                current = parent
+            else:
+                base = levels[current.id]
+            for depth, e in enumerate(reversed(chain), start=base + 1):
+                levels[e.id] = depth
+        return levels
+
+    @classmethod
+    def catch_up(cls, lead_id: int, events: list, archived_ids: Iterable[int] = ()) -> int:
+        """
+        Place les événements sans niveau (dans l'ordre de `events`) et enregistre
+        leur position. Une position déjà déplacée à la main est conservée.
+        """
+        pending = [e for e in events if e.layout_level is None]
+        if not pending:
+            return 0
+
+        levels = cls.levels(events)
+        by_level = defaultdict(list)
+        for event in pending:
+            event.layout_level = levels[event.id]
+            if not event.position_x and not event.position_y:
+                by_level[event.layout_level].append(event)
+        for level, placed in by_level.items():
+            first = cls.reserve(lead_id, level, len(placed))
+            for slot, event in enumerate(placed, start=first):
+                event.position_x, event.position_y = slot * NODE_W, level * NODE_H
+
+        archived_ids = set(archived_ids)
+        cls._save(LeadEvent, lead_id, [e for e in pending if e.id not in archived_ids])
+        cls._save(LeadEventArchive, lead_id, [e for e in pending if e.id in archived_ids])
+        return len(pending)
+
+    @staticmethod
+    def _save(model, lead_id: int, events: list) -> None:
+        """UPDATE … FROM (VALUES …) par lot : bulk_update (CASE WHEN) est trop lent sur 5k nœuds."""
+        table = connection.ops.quote_name(model._meta.db_table)
+        for start in range(0, len(events), CATCH_UP_BATCH_SIZE):
+            batch = events[start:start + CATCH_UP_BATCH_SIZE]
+            values = ", ".join(["(%s::bigint, %s::float8, %s::float8, %s::integer)"] * len(batch))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {table} AS e
+                       SET position_x = v.x, position_y = v.y, layout_level = v.level
+                      FROM (VALUES {values}) AS v(id, x, y, level)
+                     WHERE e.lead_id = %s AND e.id = v.id
+                    """,
+                    [v for e in batch for v in (e.id, e.position_x, e.position_y, e.layout_level)] + [lead_id],
+                )
+
+
+# ──────────────────────────────────────────────
+# CACHE DU GRAPHE SÉRIALISÉ
+# ──────────────────────────────────────────────
+
+def _key(lead_id, generation) -> str:
+    return f"{KEY_PREFIX}{generation}:{lead_id}"
+
+
+def get_cached(lead_id) -> Optional[dict]:
+    try:
+        generation = cache.get(GENERATION_KEY, 0)
+        return cache.get(_key(lead_id, generation))
+    except Exception as e:  # Redis indisponible : on reconstruit le graphe
+        logger.warning(f"⚠️ Cache timeline indisponible : {e}")
+        return None
+
+
+def set_cached(lead_id, graph: dict) -> None:
+    try:
+        generation = cache.get(GENERATION_KEY, 0)
+        cache.set(_key(lead_id, generation), graph, TIMELINE_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"⚠️ Cache timeline indisponible : {e}")
+
+
+def invalidate(*lead_ids) -> None:
+    """Supprime le graphe en cache des leads `lead_ids` ; sans argument, de tous les leads."""
+    try:
+        if not lead_ids:
+            cache.set(GENERATION_KEY, time.time_ns(), None)
+            return
+        generation = cache.get(GENERATION_KEY, 0)
+        cache.delete_many([_key(lead_id, generation) for lead_id in set(lead_ids)])
+    except Exception as e:
+        logger.warning(f"⚠️ Invalidation cache timeline impossible : {e}")
@@ -6,6 +6,8 @@ Endpoints :
     POST   /lead-events/                      → créer un événement
     GET    /lead-events/{id}/                 → détail
     GET    /lead-events/timeline/?lead={id}   → nodes + edges React Flow
+           &since={event_id}                  → delta depuis le dernier cursor
+           &limit={n}[&before={event_id}]     → fenêtre des n événements les plus récents
     PATCH  /lead-events/{id}/position/        → mise à jour position canvas
 """
 
@@ -18,6 +20,8 @@ from .models import LeadEvent
 from .serializers import LeadEventSerializer
 from .services import LeadEventService
 
+TIMELINE_MAX_WINDOW = 1000
+
 
 class LeadEventViewSet(viewsets.ModelViewSet):
     """
@@ -49,9 +53,11 @@ class LeadEventViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"], url_path="timeline")
     def timeline(self, request):
         """
-        GET /lead-events/timeline/?lead=<id>
+        GET /lead-events/timeline/?lead=<id>[&since=<event_id>][&limit=<n>&before=<event_id>]
 
-        Retourne { nodes, edges } prêt à consommer par React Flow.
+        Retourne { nodes, edges, cursor } prêt à consommer par React Flow :
+        graphe complet (en cache), delta depuis `since`, ou fenêtre de `limit`
+        événements (plus hasMore / before pour charger la précédente).
         """
         lead_id = request.query_params.get("lead")
         if not lead_id:
@@ -60,7 +66,25 @@ class LeadEventViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        result = LeadEventService.get_timeline_for_react_flow(lead_id)
+        params = {}
+        for name in ("lead", "since", "before", "limit"):
+            value = request.query_params.get(name)
+            if value in (None, ""):
+                continue
+            try:
+                params[name] = int(value)
+            except ValueError:
+                return Response(
+                    {"detail": f"Paramètre '{name}' invalide."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        if "limit" in params and not 1 <= params["limit"] <= TIMELINE_MAX_WINDOW:
+            return Response(
+                {"detail": f"'limit' doit être compris entre 1 et {TIMELINE_MAX_WINDOW}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        result = LeadEventService.get_timeline_for_react_flow(params.pop("lead"), **params)
         return Response(result)
 
     # ─────────────────────────────────────────────────
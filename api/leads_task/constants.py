@@ -29,4 +29,7 @@ class LeadTaskPriority:
     COLOR_MAP = {
         MEDIUM: "#1677ff",
         URGENT: "#ff4d4f",
-    }
\ No newline at end of file
+    }
+
+# Marqueur (metadata["generator"]) des tâches créées automatiquement par les générateurs
+ABSENT_FOLLOWUP_GENERATOR = "absent_followup"
@@ -0,0 +1,139 @@
+"""
+Génération ensembliste des tâches de relance des leads ABSENT.
+
+  - anti-jointure SQL (NOT EXISTS) : leads ABSENT sans tâche ouverte du même type
+  - répartition round-robin des agents et décalage en jours calculés en mémoire
+  - insertion par lots (bulk_create, sans signaux par tâche)
+  - l'index unique partiel `uniq_open_generated_task_per_lead_type` écarte les
+    doublons si deux exécutions se chevauchent (ignore_conflicts)
+  - audit : un événement TASK_CREATED par lead, inséré en une requête par lot,
+    et non un événement de synthèse par exécution : l'historique d'audit est la
+    timeline du lead (LeadEvent.lead obligatoire) et chaque lead y garde l'entrée
+    que le signal post_save de LeadTask écrivait avant la génération par lots
+"""
+import logging
+import uuid
+from datetime import timedelta
+from typing import Callable, List, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from api.leads.constants import ABSENT
+from api.leads.models import Lead
+from api.core.reference_data import lead_event_types, lead_statuses
+from api.leads_events import timeline
+from api.leads_events.models import LeadEvent
+from api.leads_task.constants import ABSENT_FOLLOWUP_GENERATOR, LeadTaskPriority, LeadTaskStatus
+from api.leads_task.models import LeadTask
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+AUDIT_EVENT_CODE = "TASK_CREATED"
+
+
+def absent_leads_without_open_task(task_type):
+    """Leads ABSENT avec RDV et sans tâche TODO du type donné (NOT EXISTS, sans liste d'ids)."""
+    open_task = LeadTask.objects.filter(
+        lead=OuterRef("pk"),
+        task_type=task_type,
+        status=LeadTaskStatus.TODO,
+    )
+    return (
+        Lead.objects.filter(status_id__in=lead_statuses.ids_for(ABSENT), appointment_date__isnull=False)
+        .filter(~Exists(open_task))
+        .order_by("-appointment_date")
+    )
+
+
+def generate_absent_followup_tasks(
+    task_type,
+    agents: Sequence,
+    limit_per_agent_per_day: int,
+    describe: Callable[[str, str, object], Tuple[str, str]],
+    priority: str = LeadTaskPriority.MEDIUM,
+) -> dict:
+    """
+    Crée les tâches de relance manquantes.
+
+    `describe(first_name, last_name, appointment_date)` retourne (titre, description).
+    Retourne {"created", "skipped", "days", "run"}.
+    """
+    now = timezone.now()
+    run = uuid.uuid4().hex
+    num_agents = len(agents)
+    daily_capacity = num_agents * max(int(limit_per_agent_per_day), 1)
+
+    rows = (
+        absent_leads_without_open_task(task_type)
+        .values_list("id", "first_name", "last_name", "appointment_date")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+
+    candidates = 0
+    inserted: List[int] = []
+    batch: List[LeadTask] = []
+    for index, (lead_id, first_name, last_name, appointment_date) in enumerate(rows):
+        title, description = describe(first_name, last_name, appointment_date)
+        batch.append(LeadTask(
+            lead_id=lead_id,
+            task_type=task_type,
+            title=title,
+            description=description,
+            due_at=now + timedelta(days=index // daily_capacity),
+            assigned_to=agents[index % num_agents],
+            status=LeadTaskStatus.TODO,
+            priority=priority,
+            metadata={"generator": ABSENT_FOLLOWUP_GENERATOR, "run": run},
+        ))
+        candidates += 1
+        if len(batch) >= BATCH_SIZE:
+            inserted += _insert(batch, run)
+            batch = []
+    if batch:
+        inserted += _insert(batch, run)
+
+    created = _log_created(task_type, run, inserted)
+    days = ((created - 1) // daily_capacity) + 1 if created else 0
+
+    logger.info(
+        "🗂️ Relances ABSENT (run %s) : %d créée(s), %d doublon(s) ignoré(s), %d jour(s)",
+        run, created, candidates - created, days,
+    )
+    return {"created": created, "skipped": candidates - created, "days": days, "run": run}
+
+
+def _insert(batch: List[LeadTask], run: str) -> List[int]:
+    """
+    Insère un lot (doublons ignorés) ; retourne les leads dont la tâche vient
+    d'être insérée par ce run. Relecture limitée aux leads du lot (index lead).
+    """
+    LeadTask.objects.bulk_create(batch, ignore_conflicts=True)
+    return list(
+        LeadTask.objects.filter(lead_id__in=[task.lead_id for task in batch], metadata__run=run)
+        .values_list("lead_id", flat=True)
+    )
+
+
+def _log_created(task_type, run: str, lead_ids: List[int]) -> int:
+    """
+    Audit des tâches réellement insérées par ce run, un événement par lead
+    (timeline du lead) ; la synthèse du run est dans le log et le résultat de
+    la tâche. Retourne leur nombre.
+    """
+    if not lead_ids:
+        return 0
+
+    event_type = lead_event_types.get_or_create(
+        AUDIT_EVENT_CODE,
+        defaults={"label": AUDIT_EVENT_CODE.replace("_", " ").title()},
+    )
+    data = {"task_type": task_type.code, "generator": ABSENT_FOLLOWUP_GENERATOR, "run": run}
+    LeadEvent.objects.bulk_create(
+        [LeadEvent(lead_id=lead_id, event_type=event_type, data=data) for lead_id in lead_ids],
+        batch_size=BATCH_SIZE,
+    )
+    transaction.on_commit(lambda: timeline.invalidate(*lead_ids))
+    return len(lead_ids)
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-19 01:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0019_lead_promo_code'),
+        ('leads_events', '0002_leadevent_attachments_leadevent_parent_event_and_more'),
+        ('leads_task', '0004_remove_leadtask_estimated_duration_and_more'),
+        ('leads_task_type', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='leadtask',
+            constraint=models.UniqueConstraint(condition=models.Q(('metadata__generator', 'absent_followup'), ('status', 'todo')), fields=('lead', 'task_type'), name='uniq_open_generated_task_per_lead_type'),
+        ),
+    ]
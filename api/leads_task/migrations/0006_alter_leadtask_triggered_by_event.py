@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-19 04:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads_events', '0003_leadevent_archive'),
+        ('leads_task', '0005_open_generated_task_unique'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='leadtask',
+            name='triggered_by_event',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='triggered_tasks', to='leads_events.leadevent', verbose_name="déclenchée par l'événement"),
+        ),
+    ]
@@ -10,7 +10,7 @@ from django.utils.translation import gettext_lazy as _
 
 from api.leads_events.models import LeadEvent
 from api.leads_task_type.models import LeadTaskType
-from api.leads_task.constants import LeadTaskStatus, LeadTaskPriority
+from api.leads_task.constants import ABSENT_FOLLOWUP_GENERATOR, LeadTaskStatus, LeadTaskPriority
 
 
 class LeadTask(models.Model):
@@ -109,6 +109,7 @@ class LeadTask(models.Model):
         null=True,
         blank=True,
         related_name="triggered_tasks",
+        db_constraint=False,
         verbose_name=_("déclenchée par l'événement"),
     )
 
@@ -128,6 +129,17 @@ class LeadTask(models.Model):
             models.Index(fields=["assigned_to", "status"]),
             models.Index(fields=["priority", "status"]),
         ]
+        constraints = [
+            # Une seule relance automatique ouverte par lead et type (runs concurrents)
+            models.UniqueConstraint(
+                fields=["lead", "task_type"],
+                condition=models.Q(
+                    status=LeadTaskStatus.TODO,
+                    metadata__generator=ABSENT_FOLLOWUP_GENERATOR,
+                ),
+                name="uniq_open_generated_task_per_lead_type",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.task_type.label} — {self.lead}"
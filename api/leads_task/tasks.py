@@ -1,13 +1,5 @@
-from datetime import timedelta
-
-from django.db import transaction, IntegrityError
-from django.utils import timezone
-
-from api.leads.constants import ABSENT
-from api.leads.models import Lead
-from api.leads_task.constants import LeadTaskStatus
-from api.leads_task.models import LeadTask
-from api.leads_task_type.models import LeadTaskType
+from api.leads_task.generation import generate_absent_followup_tasks
+from api.core.reference_data import lead_task_types
 from api.users.models import User
 from api.users.roles import UserRoles
 
@@ -25,8 +17,8 @@ def get_emma_accueil_user():
 
 
 def get_relance_absent_task_type():
-    task_type, _ = LeadTaskType.objects.get_or_create(
-        code=RELANCE_ABSENT_CODE,
+    task_type = lead_task_types.get_or_create(
+        RELANCE_ABSENT_CODE,
         defaults={
             "label": "Relance client absent",
             "description": "Contacter le client pour reprogrammer suite à son absence au RDV.",
@@ -45,9 +37,6 @@ def create_absent_followup_tasks(limit_per_user_per_day=20):
     - Si une tâche existe déjà, elle n'est pas recréée.
     - Les tâches sont réparties sur plusieurs jours selon la limite journalière.
     """
-    now = timezone.now()
-    daily_capacity = max(int(limit_per_user_per_day), 1)
-
     try:
         assigned_user = get_emma_accueil_user()
     except User.DoesNotExist:
@@ -55,74 +44,33 @@ def create_absent_followup_tasks(limit_per_user_per_day=20):
 
     task_type = get_relance_absent_task_type()
 
-    leads_with_active_tasks = LeadTask.objects.filter(
-        task_type=task_type,
-        status=LeadTaskStatus.TODO,
-    ).values_list("lead_id", flat=True)
-
-    leads_to_process = (
-        Lead.objects.filter(
-            status__code=ABSENT,
-            appointment_date__isnull=False,
+    def describe(first_name, last_name, appointment_date):
+        appointment_label = (
+            appointment_date.strftime("%d/%m/%Y à %H:%M")
+            if appointment_date
+            else "date inconnue"
         )
-        .exclude(id__in=leads_with_active_tasks)
-        .order_by("-appointment_date")
+        title = f"Relancer {first_name} {last_name}"
+        description = (
+            f"Le client {first_name} {last_name} n'était pas présent "
+            f"à son rendez-vous du {appointment_label}.\n\n"
+            f"👉 Action : Recontacter pour reprogrammer un rendez-vous.\n"
+        )
+        return title, description
+
+    result = generate_absent_followup_tasks(
+        task_type,
+        agents=[assigned_user],
+        limit_per_agent_per_day=limit_per_user_per_day,
+        describe=describe,
     )
 
-    if not leads_to_process.exists():
+    if not result["created"] and not result["skipped"]:
         return "Info : Aucun nouveau lead absent à planifier."
 
-    created_count = 0
-    skipped_count = 0
-
-    with transaction.atomic():
-        for index, lead in enumerate(leads_to_process):
-            days_offset = index // daily_capacity
-            scheduled_date = now + timedelta(days=days_offset)
-
-            appointment_label = (
-                lead.appointment_date.strftime("%d/%m/%Y à %H:%M")
-                if lead.appointment_date
-                else "date inconnue"
-            )
-
-            title = f"Relancer {lead.first_name} {lead.last_name}"
-            description = (
-                f"Le client {lead.first_name} {lead.last_name} n'était pas présent "
-                f"à son rendez-vous du {appointment_label}.\n\n"
-                f"👉 Action : Recontacter pour reprogrammer un rendez-vous.\n"
-            )
-
-            existing_task = LeadTask.objects.filter(
-                lead=lead,
-                task_type=task_type,
-                status=LeadTaskStatus.TODO,
-            ).first()
-
-            if existing_task:
-                skipped_count += 1
-                continue
-
-            try:
-                LeadTask.objects.create(
-                    lead=lead,
-                    task_type=task_type,
-                    title=title,
-                    description=description,
-                    due_at=scheduled_date,
-                    assigned_to=assigned_user,
-                    status=LeadTaskStatus.TODO,
-                )
-                created_count += 1
-
-            except IntegrityError:
-                skipped_count += 1
-
-    total_days = ((created_count - 1) // daily_capacity) + 1 if created_count else 0
-
     return (
-        f"Succès : {created_count} tâche(s) ABSENT créée(s), "
-        f"{skipped_count} doublon(s) ignoré(s), "
+        f"Succès : {result['created']} tâche(s) ABSENT créée(s), "
+        f"{result['skipped']} doublon(s) ignoré(s), "
         f"assignée(s) à {assigned_user.get_full_name()} "
-        f"et répartie(s) sur {total_days} jour(s)."
-    )
\ No newline at end of file
+        f"et répartie(s) sur {result['days']} jour(s)."
+    )
@@ -0,0 +1,98 @@
+"""
+Tests du générateur ensembliste des relances ABSENT.
+"""
+from datetime import timedelta
+
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.lead_status.models import LeadStatus
+from api.leads.constants import ABSENT
+from api.leads.models import Lead
+from api.leads.tasks import create_absent_followup_tasks
+from api.leads_events.models import LeadEvent
+from api.leads_task.constants import ABSENT_FOLLOWUP_GENERATOR, LeadTaskStatus
+from api.leads_task.models import LeadTask
+from api.users.models import User
+from api.users.roles import UserRoles
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def agents():
+    return [
+        User.objects.create_user(
+            email=f"accueil{i}@test.com", password="123", role=UserRoles.ACCUEIL,
+            first_name="Accueil", last_name=str(i),
+        )
+        for i in range(2)
+    ]
+
+
+@pytest.fixture
+def make_absents():
+    status, _ = LeadStatus.objects.get_or_create(code=ABSENT, defaults={"label": "Absent"})
+    appointment = timezone.now() - timedelta(days=1)
+
+    def _make(n):
+        return Lead.objects.bulk_create([
+            Lead(
+                first_name="Absent", last_name=str(i), phone=f"07{i:08d}", status=status,
+                appointment_date=appointment - timedelta(minutes=i),
+            )
+            for i in range(n)
+        ])
+
+    return _make
+
+
+def test_tasks_are_spread_round_robin_over_days(agents, make_absents):
+    make_absents(5)
+
+    assert create_absent_followup_tasks(limit_per_user_per_day=1) == "5 internal tasks created."
+
+    tasks = list(LeadTask.objects.order_by("lead__appointment_date").reverse())
+    first, second = tasks[0].assigned_to_id, tasks[1].assigned_to_id
+    assert {first, second} == {a.id for a in agents}
+    assert [t.assigned_to_id for t in tasks] == [first, second, first, second, first]
+    offsets = [(t.due_at - tasks[0].due_at).days for t in tasks]
+    assert offsets == [0, 0, 1, 1, 2]
+    assert LeadEvent.objects.filter(event_type__code="TASK_CREATED").count() == 5
+
+    # Deuxième passage : l'anti-jointure écarte les leads déjà relancés
+    assert create_absent_followup_tasks() == "No new tasks to create"
+    assert LeadTask.objects.count() == 5
+
+
+def test_partial_unique_index_blocks_duplicate_open_task(agents, make_absents):
+    make_absents(1)
+    create_absent_followup_tasks()
+    task = LeadTask.objects.get()
+
+    with pytest.raises(IntegrityError), transaction.atomic():
+        LeadTask.objects.create(
+            lead=task.lead, task_type=task.task_type, title="Doublon", due_at=task.due_at,
+            metadata={"generator": ABSENT_FOLLOWUP_GENERATOR},
+        )
+
+    task.status = LeadTaskStatus.DONE
+    task.save(update_fields=["status"])
+    assert create_absent_followup_tasks() == "1 internal tasks created."
+
+
+def test_generation_query_count_does_not_grow_with_leads(agents, make_absents):
+    make_absents(5000)
+
+    with CaptureQueriesContext(connection) as ctx:
+        create_absent_followup_tasks(limit_per_user_per_day=100)
+
+    assert LeadTask.objects.count() == 5000
+    # 5 lots de tâches (insertion + relecture par lead) + 5 lots d'audit + lectures :
+    # indépendant du nombre de leads
+    assert len(ctx.captured_queries) < 30
+    # Relecture des tâches du run : toujours restreinte aux leads du lot
+    run_reads = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT") and "metadata" in q["sql"]]
+    assert run_reads and all('"lead_id" IN' in sql for sql in run_reads)
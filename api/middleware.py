@@ -1,8 +1,20 @@
 # api/middleware.py
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.backends.signals import connection_created
 from django.utils.deprecation import MiddlewareMixin
 from django.utils.functional import SimpleLazyObject, empty
+from api.core import query_instrumentation
 from api.utils.context import set_current_user
 
+perf_logger = logging.getLogger("api.perf")
+
 
 class CookieToHeaderMiddleware(MiddlewareMixin):
     def process_request(self, request):
@@ -15,6 +27,33 @@ class CookieToHeaderMiddleware(MiddlewareMixin):
             )
 
 
+class ThrottledSessionMiddleware(SessionMiddleware):
+    """
+    SessionMiddleware avec renouvellement glissant limité.
+
+    SESSION_SAVE_EVERY_REQUEST réécrit la ligne django_session à chaque appel
+    API. Ici, une session lue n'est réenregistrée (expiration et cookie
+    prolongés) que si son dernier renouvellement date de plus de
+    SESSION_RENEW_INTERVAL secondes : au plus une écriture par intervalle et
+    par utilisateur, au lieu d'une par requête.
+    """
+
+    RENEWED_AT_KEY = "_renewed_at"
+
+    def process_response(self, request, response):
+        session = getattr(request, "session", None)
+        if session is not None and not settings.SESSION_SAVE_EVERY_REQUEST:
+            try:
+                if session.accessed and not session.modified and not session.is_empty():
+                    now = int(time.time())
+                    renewed_at = session.get(self.RENEWED_AT_KEY) or 0
+                    if now - renewed_at >= settings.SESSION_RENEW_INTERVAL:
+                        session[self.RENEWED_AT_KEY] = now
+            except AttributeError:
+                pass
+        return super().process_response(request, response)
+
+
 class CurrentUserMiddleware(MiddlewareMixin):
     """
     Middleware pour capturer l'utilisateur de la requête et le rendre accessible
@@ -58,3 +97,88 @@ class CurrentUserMiddleware(MiddlewareMixin):
     def process_response(self, request, response):
         set_current_user(None)
         return response
+
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Mesure les requêtes SQL de chaque requête HTTP (api.core.query_instrumentation) :
+    en-tête Server-Timing, log structuré (logger « api.perf »), avertissements
+    pour les requêtes lentes et les suspicions de N+1, synthèse par route dans Redis.
+
+    Activé par QUERY_INSTRUMENTATION_ENABLED ; sinon retiré de la chaîne au
+    démarrage (MiddlewareNotUsed).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_INSTRUMENTATION_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(
+            query_instrumentation.install_on_connection_created, dispatch_uid="query-instrumentation",
+        )
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        query_instrumentation.install(connection)  # connexion déjà ouverte avant l'activation
+        started = time.perf_counter()
+        profile, token = query_instrumentation.start_profile()
+        try:
+            response = self.get_response(request)
+        finally:
+            query_instrumentation.stop_profile(token)
+        return self._report(request, response, profile, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        profile, token = query_instrumentation.start_profile()
+        try:
+            response = await self.get_response(request)
+        finally:
+            query_instrumentation.stop_profile(token)
+        return await sync_to_async(self._report, thread_sensitive=False)(request, response, profile, started)
+
+    @staticmethod
+    def _route(request) -> str:
+        match = getattr(request, "resolver_match", None)
+        return f"{request.method} /{match.route}" if match is not None else f"{request.method} <non résolue>"
+
+    def _report(self, request, response, profile, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        route = self._route(request)
+        suspects = profile.n_plus_one_suspects()
+
+        timing = [
+            f'db;dur={profile.db_ms:.1f};desc="{profile.count} queries"',
+            f"app;dur={max(total_ms - profile.db_ms, 0):.1f}",
+        ]
+        if suspects:
+            timing.append(f'nplusone;desc="{len(suspects)} suspect(s)"')
+        response["Server-Timing"] = ", ".join(filter(None, [response.get("Server-Timing"), *timing]))
+
+        perf_logger.info(
+            "⏱️ Requête HTTP | route=%s | status=%s | queries=%d | db_ms=%.1f | total_ms=%.1f | slow=%d | n_plus_one=%d",
+            route, response.status_code, profile.count, profile.db_ms, total_ms, len(profile.slow), len(suspects),
+            extra={"perf": {
+                "route": route, "path": request.path, "status": response.status_code,
+                "queries": profile.count, "db_ms": round(profile.db_ms, 1), "total_ms": round(total_ms, 1),
+                "slow_queries": profile.slow, "n_plus_one": suspects,
+            }},
+        )
+        for slow in profile.slow:
+            perf_logger.warning("🐢 Requête SQL lente | route=%s | ms=%.1f | sql=%s", route, slow["ms"], slow["sql"])
+        for suspect in suspects:
+            perf_logger.warning(
+                "🔁 N+1 suspecté | route=%s | répétitions=%d | ms=%.1f | sql=%s",
+                route, suspect["count"], suspect["ms"], suspect["sql"],
+            )
+
+        query_instrumentation.RouteStats.record(route, profile, total_ms, suspects)
+        return response
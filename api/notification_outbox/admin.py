@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from api.notification_outbox.models import OutboxMessage
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("template", "lead", "window", "status", "attempts", "provider_id", "available_at", "sent_at")
+    list_filter = ("channel", "status", "template")
+    search_fields = ("provider_id", "last_error")
+    raw_id_fields = ("lead",)
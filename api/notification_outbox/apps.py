@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class NotificationOutboxConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "api.notification_outbox"
+    verbose_name = "File d'envoi des notifications"
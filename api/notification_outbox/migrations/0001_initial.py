@@ -0,0 +1,43 @@
+# Generated by Django 5.1.7 on 2026-10-19 03:57
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('leads', '0020_lead_composite_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('template', models.CharField(max_length=60, verbose_name='modèle')),
+                ('window', models.CharField(blank=True, max_length=100, verbose_name="fenêtre d'unicité")),
+                ('channel', models.CharField(choices=[('sms', 'SMS'), ('email', 'e-mail'), ('whatsapp', 'WhatsApp')], max_length=10, verbose_name='canal')),
+                ('args', models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='arguments')),
+                ('status', models.CharField(choices=[('pending', 'en attente'), ('sending', "en cours d'envoi"), ('sent', 'envoyée'), ('skipped', 'ignorée'), ('failed', 'en échec')], default='pending', max_length=10, verbose_name='statut')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='tentatives')),
+                ('last_error', models.TextField(blank=True, verbose_name='dernière erreur')),
+                ('provider_id', models.CharField(blank=True, max_length=255, verbose_name='identifiant fournisseur')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='envoi prévu le')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='bail du relais')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='créée le')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='envoyée le')),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_messages', to='leads.lead', verbose_name='lead')),
+            ],
+            options={
+                'verbose_name': 'notification en file',
+                'verbose_name_plural': 'notifications en file',
+                'indexes': [models.Index(fields=['status', 'available_at'], name='notificatio_status_e7f2ea_idx')],
+                'constraints': [models.UniqueConstraint(fields=('lead', 'template', 'window'), name='unique_outbox_notification')],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class OutboxMessage(models.Model):
+    """
+    Notification (SMS, e-mail, WhatsApp) à envoyer à un lead.
+
+    Écrite dans la même transaction que le changement métier qui la déclenche :
+    un rollback annule aussi la notification. La clé (lead, template, fenêtre)
+    est unique : une même notification ne peut être mise en file qu'une fois
+    par fenêtre (date du RDV, statut du dossier, jour…). Le relais envoie les
+    messages dus par lots et garde l'identifiant du fournisseur.
+    """
+
+    class Channel(models.TextChoices):
+        SMS = "sms", _("SMS")
+        EMAIL = "email", _("e-mail")
+        WHATSAPP = "whatsapp", _("WhatsApp")
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("en attente")
+        SENDING = "sending", _("en cours d'envoi")
+        SENT = "sent", _("envoyée")
+        SKIPPED = "skipped", _("ignorée")  # destinataire sans téléphone / e-mail
+        FAILED = "failed", _("en échec")
+
+    lead = models.ForeignKey(
+        "leads.Lead", on_delete=models.CASCADE, related_name="outbox_messages", verbose_name=_("lead"),
+    )
+    template = models.CharField(max_length=60, verbose_name=_("modèle"))
+    window = models.CharField(max_length=100, blank=True, verbose_name=_("fenêtre d'unicité"))
+    channel = models.CharField(max_length=10, choices=Channel.choices, verbose_name=_("canal"))
+    args = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder, verbose_name=_("arguments"))
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING, verbose_name=_("statut"))
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_("tentatives"))
+    last_error = models.TextField(blank=True, verbose_name=_("dernière erreur"))
+    provider_id = models.CharField(max_length=255, blank=True, verbose_name=_("identifiant fournisseur"))
+    available_at = models.DateTimeField(default=timezone.now, verbose_name=_("envoi prévu le"))
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name=_("bail du relais"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("créée le"))
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name=_("envoyée le"))
+
+    class Meta:
+        verbose_name = _("notification en file")
+        verbose_name_plural = _("notifications en file")
+        constraints = [
+            models.UniqueConstraint(fields=["lead", "template", "window"], name="unique_outbox_notification"),
+        ]
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.template} → lead #{self.lead_id} [{self.window}] ({self.status})"
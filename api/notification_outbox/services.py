@@ -0,0 +1,355 @@
+"""
+Outbox transactionnelle des notifications (SMS, e-mail, WhatsApp).
+
+  - NotificationOutbox.enqueue(...)      → écrit la notification dans la transaction
+                                           de l'appelant (clé unique lead / modèle /
+                                           fenêtre) et déclenche le relais après le commit
+  - NotificationOutbox.enqueue_many(...) → idem pour un lot de leads (un INSERT)
+  - NotificationOutbox.relay()           → envoie les notifications dues par lots,
+                                           garde l'identifiant fournisseur, replanifie
+                                           les échecs avec backoff et reporte les envois
+                                           limités (api.core.rate_limit) à l'échéance
+  - NotificationOutbox.lag()             → retard de la file, par canal (/api/perf/outbox/)
+
+Un rollback annule la notification avec le changement métier. Une clé déjà en
+file est ignorée à l'insertion et une notification envoyée n'est jamais reprise.
+Seul un relais tué entre l'appel au fournisseur et l'écriture du statut renvoie
+la notification, à l'expiration de son bail (LEASE).
+
+Le relais tourne sur la voie realtime (timeout 30 s) : il prend des lots courts
+et s'arrête au bout de RELAY_TIME_BUDGET ; les notifications prises mais pas
+encore envoyées sont rendues aussitôt et le relais se relance.
+"""
+import logging
+import threading
+import time
+from functools import partial
+from collections import Counter
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from api.core.rate_limit import RateLimited, RateLimiter
+from api.leads.models import Lead
+from api.notification_outbox.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+RELAY_BATCH_SIZE = 10
+RELAY_MAX_BATCHES = 20     # ≤ 200 envois par exécution du relais
+RELAY_TIME_BUDGET = 20     # secondes, sous le timeout de la voie realtime (30 s)
+MAX_ATTEMPTS = 5
+LEASE = timedelta(minutes=2)  # > timeout de la voie realtime : seul un relais tué le laisse expirer
+RETENTION = timedelta(days=90)
+
+# Fenêtre d'unicité de base, complétée par `window` et les arguments du modèle
+APPOINTMENT = "appointment"  # date du RDV : nouvelle date → nouvel envoi
+DOSSIER = "dossier"          # statut du dossier : nouveau statut → nouvel envoi
+DAY = "day"                  # au plus un envoi par jour
+ONCE = "once"                # un seul envoi (par valeur des arguments)
+
+
+@dataclass(frozen=True)
+class Template:
+    channel: str
+    worker: str  # worker(lead_id, *args) → identifiant fournisseur, None si rien à envoyer
+    window: str = DAY
+    args_in_window: bool = True
+
+
+SMS, EMAIL, WHATSAPP = OutboxMessage.Channel.SMS, OutboxMessage.Channel.EMAIL, OutboxMessage.Channel.WHATSAPP
+
+TEMPLATES: Dict[str, Template] = {
+    "sms.appointment_confirmation": Template(SMS, "api.sms.tasks._run_send_appointment_confirmation_sms", APPOINTMENT),
+    "sms.appointment_reminder": Template(SMS, "api.sms.tasks._run_send_appointment_reminder_sms", APPOINTMENT),
+    "sms.appointment_reminder_48h": Template(SMS, "api.sms.tasks._run_send_appointment_reminder_48h_sms", APPOINTMENT),
+    "sms.appointment_reminder_24h": Template(SMS, "api.sms.tasks._run_send_appointment_reminder_24h_sms", APPOINTMENT),
+    "sms.absent_urgency": Template(SMS, "api.sms.tasks._run_send_absent_urgency_sms", APPOINTMENT),
+    "sms.absent_followup": Template(SMS, "api.sms.tasks._run_send_absent_followup_sms", APPOINTMENT),
+    "sms.present_no_contract": Template(SMS, "api.sms.tasks._run_send_present_no_contract_sms", APPOINTMENT),
+    "sms.confirm_presence": Template(SMS, "api.sms.tasks._run_send_confirm_presence_sms", APPOINTMENT),
+    "sms.contract_signed": Template(SMS, "api.sms.tasks._run_send_contract_signed_sms", DAY),
+    "sms.dossier_status_updated": Template(SMS, "api.sms.tasks._run_send_dossier_status_updated_sms", DOSSIER),
+    "sms.avocat_assigned": Template(SMS, "api.sms.tasks._run_send_avocat_assigned_sms", ONCE),
+    "email.appointment_confirmation": Template(
+        EMAIL, "api.utils.email.leads.tasks._run_send_appointment_confirmation", APPOINTMENT),
+    "email.appointment_planned": Template(EMAIL, "api.utils.email.leads.tasks._run_send_appointment_planned", APPOINTMENT),
+    "email.appointment_reminder": Template(EMAIL, "api.utils.email.leads.tasks._run_send_appointment_reminder", APPOINTMENT),
+    "email.appointment_absent": Template(EMAIL, "api.utils.email.leads.tasks._run_send_appointment_absent", APPOINTMENT),
+    "email.dossier_status": Template(EMAIL, "api.utils.email.leads.tasks._run_send_dossier_status_notification", DOSSIER),
+    "email.formulaire": Template(EMAIL, "api.utils.email.leads.tasks._run_send_formulaire", DAY),
+    "email.visio_payment": Template(EMAIL, "api.utils.email.leads.tasks._run_send_visio_payment", DAY),
+    "email.jurist_assigned": Template(EMAIL, "api.utils.email.leads.tasks._run_send_jurist_assigned_notification", ONCE),
+    "email.avocat_assigned": Template(EMAIL, "api.utils.email.leads.tasks._run_send_avocat_assigned_notification", ONCE),
+    "whatsapp.message": Template(WHATSAPP, "api.whatsapp.tasks._run_send_whatsapp_message", ONCE, args_in_window=False),
+}
+
+
+def _backoff(attempts: int) -> timedelta:
+    """1, 2, 4 … minutes, plafonné à 1h."""
+    return timedelta(minutes=min(2 ** max(attempts - 1, 0), 60))
+
+
+# Dernière transaction dont le commit a déclenché le relais (par thread)
+_kicked = threading.local()
+
+
+class NotificationOutbox:
+
+    # ─────────────────────────────────────
+    # MISE EN FILE (transaction de l'appelant)
+    # ─────────────────────────────────────
+
+    @classmethod
+    def enqueue(cls, template: str, lead_id: int, *args, window: str = "", countdown: int = 0) -> bool:
+        """Met une notification en file ; False si sa clé y est déjà (ou lead introuvable)."""
+        return bool(cls.enqueue_many(template, [(lead_id, list(args))], window=window, countdown=countdown))
+
+    @classmethod
+    def enqueue_many(cls, template: str, entries: Iterable, window: str = "", countdown: int = 0) -> List[int]:
+        """
+        `entries` : identifiants de leads, ou couples (lead_id, args).
+        Retourne les leads dont la notification vient d'être mise en file.
+        """
+        spec = TEMPLATES[template]
+        entries = [entry if isinstance(entry, (list, tuple)) else (entry, []) for entry in entries]
+        if not entries:
+            return []
+
+        bases = cls._base_windows(spec, {lead_id for lead_id, _ in entries})
+        rows: Dict[tuple, OutboxMessage] = {}
+        for lead_id, args in entries:
+            if lead_id not in bases:
+                logger.warning("[outbox] %s : lead #%s introuvable — ignoré", template, lead_id)
+                continue
+            parts = [bases[lead_id], window, *(args if spec.args_in_window else [])]
+            key = (lead_id, "|".join(str(part) for part in parts if part not in ("", None)))
+            rows[key] = OutboxMessage(
+                lead_id=lead_id, template=template, window=key[1], channel=spec.channel, args=list(args),
+                available_at=timezone.now() + timedelta(seconds=countdown),
+            )
+        if not rows:
+            return []
+
+        existing = set(
+            OutboxMessage.objects.filter(template=template, lead_id__in={lead_id for lead_id, _ in rows})
+            .values_list("lead_id", "window")
+        )
+        new = [row for key, row in rows.items() if key not in existing]
+        if new:
+            OutboxMessage.objects.bulk_create(new, batch_size=BATCH_SIZE, ignore_conflicts=True)
+            if not countdown:
+                cls._relay_on_commit()
+        return [row.lead_id for row in new]
+
+    @staticmethod
+    def _base_windows(spec: Template, lead_ids: set) -> Dict[int, str]:
+        leads = Lead.objects.filter(id__in=lead_ids)
+        if spec.window == APPOINTMENT:
+            return {
+                lead_id: appointment_date.isoformat() if appointment_date else ""
+                for lead_id, appointment_date in leads.values_list("id", "appointment_date")
+            }
+        if spec.window == DOSSIER:
+            return {
+                lead_id: str(statut_dossier_id or "")
+                for lead_id, statut_dossier_id in leads.values_list("id", "statut_dossier_id")
+            }
+        base = timezone.localdate().isoformat() if spec.window == DAY else ""
+        return {lead_id: base for lead_id in leads.values_list("id", flat=True)}
+
+    @classmethod
+    def _relay_on_commit(cls) -> None:
+        """
+        Un seul déclenchement du relais par transaction, quel que soit le nombre
+        de notifications : chaque rappel porte l'identifiant de la transaction
+        et seul le premier exécuté au commit relance. Les rappels d'un savepoint
+        annulé disparaissent avec lui.
+        """
+        if not connection.in_atomic_block:
+            transaction.on_commit(cls.kick)  # autocommit : exécuté immédiatement
+            return
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_current_xact_id()::text")
+            xact = cursor.fetchone()[0]
+        transaction.on_commit(partial(cls._kick_once, xact))
+
+    @classmethod
+    def _kick_once(cls, xact: str) -> None:
+        if getattr(_kicked, "xact", None) == xact:
+            return
+        _kicked.xact = xact
+        cls.kick()
+
+    @staticmethod
+    def kick() -> None:
+        from api.core.task_lanes import async_task
+        async_task("api.notification_outbox.tasks.relay_notification_outbox", group="outbox")
+
+    # ─────────────────────────────────────
+    # RELAIS
+    # ─────────────────────────────────────
+
+    @classmethod
+    def relay(cls, batch_size: int = RELAY_BATCH_SIZE, max_batches: int = RELAY_MAX_BATCHES,
+              time_budget: float = RELAY_TIME_BUDGET) -> Dict[str, int]:
+        """
+        Envoie les notifications dues ; retourne le nombre d'envois par issue.
+        Budget épuisé : les notifications prises et pas encore envoyées sont
+        rendues et le relais se relance pour la suite de la file.
+        """
+        deadline = time.monotonic() + time_budget
+        totals: Counter = Counter()
+        for _ in range(max_batches):
+            batch = cls._claim(batch_size)
+            if not batch:
+                break
+            while batch and time.monotonic() < deadline:
+                totals[cls._deliver(batch.pop(0))] += 1
+            if time.monotonic() >= deadline:
+                cls._release(batch)
+                cls.kick()
+                break
+        return {outcome: totals[outcome] for outcome in ("sent", "skipped", "deferred", "retried", "failed")}
+
+    @staticmethod
+    def _claim(limit: int) -> List[OutboxMessage]:
+        """
+        Prend un bail sur les notifications dues (et celles d'un relais mort) :
+        deux relais concurrents ne prennent jamais la même ligne.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                OutboxMessage.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=OutboxMessage.Status.PENDING, available_at__lte=now)
+                    | Q(status=OutboxMessage.Status.SENDING, locked_until__lt=now)
+                )
+                .order_by("available_at")
+                .values_list("id", flat=True)[:limit]
+            )
+            if not ids:
+                return []
+            OutboxMessage.objects.filter(id__in=ids).update(
+                status=OutboxMessage.Status.SENDING, locked_until=now + LEASE, attempts=F("attempts") + 1,
+            )
+        return list(OutboxMessage.objects.filter(id__in=ids).order_by("available_at"))
+
+    @staticmethod
+    def _release(messages: List[OutboxMessage]) -> None:
+        """Rend des notifications prises mais non envoyées, sans tentative comptée."""
+        if not messages:
+            return
+        OutboxMessage.objects.filter(id__in=[m.id for m in messages], status=OutboxMessage.Status.SENDING).update(
+            status=OutboxMessage.Status.PENDING, attempts=F("attempts") - 1, locked_until=None,
+        )
+
+    @staticmethod
+    def _deliver(message: OutboxMessage) -> str:
+        spec = TEMPLATES.get(message.template)
+        try:
+            if spec is None:
+                raise LookupError(f"modèle de notification inconnu : {message.template}")
+            provider_id: Optional[str] = import_string(spec.worker)(message.lead_id, *message.args)
+        except RateLimited as e:
+            # Débit du fournisseur atteint : report à l'échéance du prochain jeton, sans tentative comptée
+            OutboxMessage.objects.filter(id=message.id).update(
+                status=OutboxMessage.Status.PENDING,
+                available_at=timezone.now() + timedelta(seconds=e.retry_after),
+                attempts=F("attempts") - 1,
+                locked_until=None,
+            )
+            RateLimiter.record_deferral(e.provider)
+            return "deferred"
+        except Exception as e:
+            retry = spec is not None and message.attempts < MAX_ATTEMPTS
+            OutboxMessage.objects.filter(id=message.id).update(
+                status=OutboxMessage.Status.PENDING if retry else OutboxMessage.Status.FAILED,
+                available_at=timezone.now() + _backoff(message.attempts),
+                locked_until=None,
+                last_error=str(e)[:1000],
+            )
+            log = logger.warning if retry else logger.error
+            log("[outbox] %s (lead #%s), tentative %d : %s", message.template, message.lead_id, message.attempts, e)
+            return "retried" if retry else "failed"
+
+        status = OutboxMessage.Status.SKIPPED if provider_id is None else OutboxMessage.Status.SENT
+        OutboxMessage.objects.filter(id=message.id).update(
+            status=status, provider_id=provider_id or "", sent_at=timezone.now(), locked_until=None, last_error="",
+        )
+        return "skipped" if provider_id is None else "sent"
+
+    @staticmethod
+    def purge(retention: timedelta = RETENTION) -> int:
+        """
+        Supprime les notifications traitées depuis plus de `retention` (la clé
+        d'unicité disparaît avec elles : la fenêtre la plus longue est ONCE).
+        """
+        deleted, _ = OutboxMessage.objects.filter(
+            status__in=[OutboxMessage.Status.SENT, OutboxMessage.Status.SKIPPED, OutboxMessage.Status.FAILED],
+            created_at__lt=timezone.now() - retention,
+        ).delete()
+        return deleted
+
+    # ─────────────────────────────────────
+    # RETARD
+    # ─────────────────────────────────────
+
+    @staticmethod
+    def lag() -> Dict[str, dict]:
+        """
+        Par canal : notifications dues non envoyées, âge de la plus ancienne,
+        échecs définitifs, envois de la dernière heure et délai moyen entre
+        l'échéance et l'envoi.
+        """
+        now = timezone.now()
+        due = Q(status__in=[OutboxMessage.Status.PENDING, OutboxMessage.Status.SENDING], available_at__lte=now)
+        failed = Q(status=OutboxMessage.Status.FAILED)
+        recent = Q(status=OutboxMessage.Status.SENT, sent_at__gte=now - timedelta(hours=1))
+
+        rows = {
+            row["channel"]: row
+            for row in OutboxMessage.objects.filter(due | failed | recent).values("channel").annotate(
+                due=Count("id", filter=due),
+                oldest=Min("available_at", filter=due),
+                failed=Count("id", filter=failed),
+                sent_last_hour=Count("id", filter=recent),
+                delay=Avg(F("sent_at") - F("available_at"), filter=recent),
+            )
+        }
+        lag = {}
+        for channel in OutboxMessage.Channel.values:
+            row = rows.get(channel, {})
+            lag[channel] = {
+                "due": row.get("due", 0),
+                "oldest_age_seconds": round((now - row["oldest"]).total_seconds(), 1) if row.get("oldest") else None,
+                "failed": row.get("failed", 0),
+                "sent_last_hour": row.get("sent_last_hour", 0),
+                "avg_delivery_seconds": round(row["delay"].total_seconds(), 1) if row.get("delay") else None,
+            }
+        return lag
+
+    @classmethod
+    def prometheus(cls, lag: Optional[Dict[str, dict]] = None) -> str:
+        lag = lag if lag is not None else cls.lag()
+        gauges = [
+            ("papex_outbox_due", "Notifications dues non envoyées.", "due"),
+            ("papex_outbox_oldest_age_seconds", "Retard de la plus ancienne notification due.", "oldest_age_seconds"),
+            ("papex_outbox_failed", "Notifications en échec définitif.", "failed"),
+            ("papex_outbox_sent_last_hour", "Notifications envoyées sur la dernière heure.", "sent_last_hour"),
+            ("papex_outbox_avg_delivery_seconds", "Délai moyen échéance → envoi (dernière heure).",
+             "avg_delivery_seconds"),
+        ]
+        lines = []
+        for metric, help_text, key in gauges:
+            lines.extend([f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"])
+            for channel, state in lag.items():
+                lines.append(f'{metric}{{channel="{channel}"}} {state[key] or 0}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,18 @@
+from api.notification_outbox.services import NotificationOutbox
+
+
+def relay_notification_outbox():
+    """
+    Envoie les notifications dues. Déclenché après chaque commit qui en met en
+    file, et toutes les minutes pour les envois différés et les relances.
+    """
+    result = NotificationOutbox.relay()
+    return (
+        f"{result['sent']} notifications sent, {result['skipped']} skipped, {result['deferred']} deferred, "
+        f"{result['retried']} retried, {result['failed']} failed"
+    )
+
+
+def purge_notification_outbox():
+    """Purge nocturne des notifications traitées depuis plus de 90 jours."""
+    return f"{NotificationOutbox.purge()} outbox notifications purged"
@@ -0,0 +1,181 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.core import mail
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.lead_status.models import LeadStatus
+from api.leads.constants import RDV_CONFIRME
+from api.leads.models import Lead
+from api.leads.tasks import send_appointment_reminders
+from api.notification_outbox import services
+from api.notification_outbox.models import OutboxMessage
+from api.notification_outbox.services import NotificationOutbox
+from api.sms.tasks import send_appointment_confirmation_sms_task
+from api.users.models import User
+from api.utils.email.leads.tasks import send_appointment_confirmation_task
+
+pytestmark = pytest.mark.django_db
+
+OVH = "api.sms.notifications.leads.ovh_send_sms"
+
+
+@pytest.fixture
+def lead():
+    status = LeadStatus.objects.create(code="OUTBOX_TEST", label="Outbox", color="#C1E8FF")
+    return Lead.objects.create(
+        first_name="Awa", last_name="Diallo", phone="0612345678", email="awa@test.com", status=status,
+        appointment_date=timezone.now() + timedelta(days=3),
+    )
+
+
+def _due():
+    """Rend exigibles les notifications différées (backoff, countdown)."""
+    OutboxMessage.objects.update(available_at=timezone.now() - timedelta(seconds=1))
+
+
+def test_rollback_discards_the_notification(lead, django_capture_on_commit_callbacks):
+    with patch.object(NotificationOutbox, "kick") as kick, django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError), transaction.atomic():
+            send_appointment_confirmation_sms_task(lead.id)
+            raise RuntimeError("rollback")
+
+    assert not OutboxMessage.objects.exists()
+    kick.assert_not_called()
+
+
+def test_one_notification_per_key_and_one_relay_per_commit(lead, django_capture_on_commit_callbacks):
+    with patch.object(NotificationOutbox, "kick") as kick, django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            send_appointment_confirmation_sms_task(lead.id)
+            send_appointment_confirmation_sms_task(lead.id)
+            send_appointment_confirmation_task(lead.id)
+
+    assert OutboxMessage.objects.count() == 2
+    kick.assert_called_once()
+
+    # Nouvelle date de RDV → nouvelle fenêtre, nouvelle confirmation
+    lead.appointment_date += timedelta(days=1)
+    lead.save(update_fields=["appointment_date"])
+    send_appointment_confirmation_sms_task(lead.id)
+    assert OutboxMessage.objects.filter(template="sms.appointment_confirmation").count() == 2
+
+
+def test_rolled_back_savepoint_does_not_swallow_the_relay(lead, django_capture_on_commit_callbacks):
+    with patch.object(NotificationOutbox, "kick") as kick, django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            with pytest.raises(RuntimeError), transaction.atomic():
+                send_appointment_confirmation_sms_task(lead.id)
+                raise RuntimeError("rollback du savepoint")
+            send_appointment_confirmation_task(lead.id)
+
+    assert list(OutboxMessage.objects.values_list("channel", flat=True)) == ["email"]
+    kick.assert_called_once()
+
+
+def test_relay_sends_once_and_records_provider_ids(lead):
+    send_appointment_confirmation_sms_task(lead.id)
+    send_appointment_confirmation_task(lead.id)
+
+    with patch(OVH, return_value={"ids": [987654]}) as ovh:
+        assert NotificationOutbox.relay() == {"sent": 2, "skipped": 0, "deferred": 0, "retried": 0, "failed": 0}
+        assert NotificationOutbox.relay()["sent"] == 0
+
+    ovh.assert_called_once()
+    sms = OutboxMessage.objects.get(channel="sms")
+    email = OutboxMessage.objects.get(channel="email")
+    assert (sms.status, sms.provider_id, sms.attempts) == ("sent", "987654", 1)
+    assert email.status == "sent"
+    assert len(mail.outbox) == 1 and mail.outbox[0].extra_headers["Message-ID"] == email.provider_id
+
+
+def test_failures_back_off_then_give_up(lead):
+    send_appointment_confirmation_sms_task(lead.id)
+
+    with patch(OVH, side_effect=RuntimeError("OVH indisponible")) as ovh:
+        assert NotificationOutbox.relay()["retried"] == 1
+        message = OutboxMessage.objects.get()
+        assert message.status == "pending" and message.available_at > timezone.now()
+        assert NotificationOutbox.relay()["retried"] == 0  # pas encore exigible
+
+        for _ in range(services.MAX_ATTEMPTS - 1):
+            _due()
+            NotificationOutbox.relay()
+
+    message.refresh_from_db()
+    assert ovh.call_count == services.MAX_ATTEMPTS
+    assert (message.status, message.attempts, message.last_error) == ("failed", services.MAX_ATTEMPTS, "OVH indisponible")
+
+
+def test_recipient_without_phone_is_skipped_and_dead_relay_lease_is_reclaimed(lead):
+    Lead.objects.filter(id=lead.id).update(phone="")
+    send_appointment_confirmation_sms_task(lead.id)
+    assert NotificationOutbox.relay()["skipped"] == 1
+
+    # Relais tué après la prise du bail : la notification est reprise à son échéance
+    Lead.objects.filter(id=lead.id).update(phone="0612345678")
+    OutboxMessage.objects.update(status="sending", locked_until=timezone.now() - timedelta(seconds=1))
+    with patch(OVH, return_value={"ids": [1]}):
+        assert NotificationOutbox.relay()["sent"] == 1
+
+
+def test_relay_hands_back_unsent_notifications_when_its_time_budget_runs_out(lead):
+    for index in range(3):
+        other = Lead.objects.create(first_name=f"Lead {index}", last_name="Budget", phone="0612345678",
+                                    status=lead.status, appointment_date=lead.appointment_date)
+        send_appointment_confirmation_sms_task(other.id)
+
+    clock = [0.0]
+
+    def slow_send(*args, **kwargs):
+        clock[0] += 6  # chaque envoi consomme 6 s du budget
+        return {"ids": [1]}
+
+    with patch.object(services.time, "monotonic", side_effect=lambda: clock[0]), \
+            patch(OVH, side_effect=slow_send) as ovh, patch.object(NotificationOutbox, "kick") as kick:
+        assert NotificationOutbox.relay(time_budget=10)["sent"] == 2
+
+    assert ovh.call_count == 2
+    kick.assert_called_once()  # la suite de la file est relancée
+    pending = OutboxMessage.objects.get(status="pending")
+    assert (pending.attempts, pending.locked_until) == (0, None)
+
+
+def test_reminders_are_deduplicated_by_appointment(lead):
+    confirmed = LeadStatus.objects.create(code=RDV_CONFIRME, label="RDV confirmé", color="#00FF00")
+    Lead.objects.filter(id=lead.id).update(status=confirmed, appointment_date=timezone.now() + timedelta(hours=24))
+
+    assert send_appointment_reminders() == "1 reminders sent"
+    assert send_appointment_reminders() == "0 reminders sent"
+    assert sorted(OutboxMessage.objects.values_list("template", flat=True)) == [
+        "email.appointment_reminder", "sms.appointment_reminder_24h",
+    ]
+    lead.refresh_from_db()
+    assert lead.last_reminder_sent is not None
+
+
+def test_lag_metrics(lead):
+    send_appointment_confirmation_sms_task(lead.id)
+    OutboxMessage.objects.update(available_at=timezone.now() - timedelta(minutes=2))
+
+    lag = NotificationOutbox.lag()
+    assert lag["sms"]["due"] == 1 and lag["sms"]["oldest_age_seconds"] >= 120
+    assert lag["email"] == {"due": 0, "oldest_age_seconds": None, "failed": 0,
+                            "sent_last_hour": 0, "avg_delivery_seconds": None}
+
+    with patch(OVH, return_value={"ids": [1]}):
+        NotificationOutbox.relay()
+    assert NotificationOutbox.lag()["sms"]["sent_last_hour"] == 1
+    assert NotificationOutbox.lag()["sms"]["avg_delivery_seconds"] >= 120
+
+    admin = User.objects.create_user(email="outbox@test.com", password="pwd", role="ADMIN",
+                                     first_name="A", last_name="B")
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    assert client.get(reverse("perf-outbox")).data["sms"]["due"] == 0
+    metrics = client.get(reverse("perf-tasks-metrics")).content.decode()
+    assert 'papex_outbox_sent_last_hour{channel="sms"} 1' in metrics
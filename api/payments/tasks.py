@@ -4,9 +4,9 @@
 import logging
 from datetime import timedelta
 
-from django_q.tasks import async_task
 from django.utils import timezone
 
+from api.core.task_lanes import async_task
 from api.payments.models import PaymentReceipt
 from api.utils.email.recus.notifications import send_payment_due_email
 
@@ -1,7 +1,7 @@
 from django.urls import path
 from django.http import JsonResponse
 
-def ping_view(request):
+async def ping_view(request):
     return JsonResponse({"status": "ok", "message": "API online"})
 
 urlpatterns = [
@@ -5,8 +5,12 @@ from django.conf import settings
 
 
 def get_ovh_sms_client() -> ovh.Client:
+    endpoint = getattr(settings, "OVH_SMS_ENDPOINT", None) or "ovh-eu"
+    if endpoint.startswith("http"):
+        # URL explicite (faux serveur OVH du harnais de charge) : déclarée comme région
+        ovh.client.ENDPOINTS.setdefault(endpoint, endpoint)
     return ovh.Client(
-        endpoint="ovh-eu",
+        endpoint=endpoint,
         application_key=settings.OVH_SMS_APP_KEY,
         application_secret=settings.OVH_SMS_APP_SECRET,
         consumer_key=settings.OVH_SMS_CONSUMER_KEY,
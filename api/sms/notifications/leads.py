@@ -1,7 +1,9 @@
 # api/sms/notifications/leads.py
 
 import logging
+from typing import Optional
 
+from api.core.rate_limit import RateLimited
 from api.sms.sender import send_sms as ovh_send_sms
 from api.sms.templates.leads import (
     tpl_appointment_confirmation,
@@ -27,31 +29,41 @@ logger = logging.getLogger(__name__)
 # Envoi SMS centralisé (ULTRA IMPORTANT)
 # ----------------------------------------------------------------
 
-def _send_sms(phone: str, message: str, lead=None) -> None:
+def _send_sms(phone: str, message: str, lead=None) -> Optional[str]:
     """
     Point d'envoi unique des SMS via OVH.
     - Normalise le numéro
     - Applique le pipeline SMS (GSM + 1 crédit)
+
+    Retourne l'identifiant du job OVH ("" si OVH n'en renvoie pas), None si le
+    numéro est invalide. Les erreurs OVH remontent : le relais de l'outbox
+    (api.notification_outbox) replanifie l'envoi.
     """
 
     phone = normalize_phone(phone)
 
     if not phone:
         logger.warning("[sms] téléphone invalide — SMS ignoré")
-        return
+        return None
 
-    try:
-        # 🔥 PIPELINE FINAL (GARANTIE 1 SMS)
-        message = build_sms(message)
+    # 🔥 PIPELINE FINAL (GARANTIE 1 SMS)
+    message = build_sms(message)
 
-        ovh_send_sms(
+    try:
+        result = ovh_send_sms(
             message=message,
             receivers=[phone]
-        )
+        ) or {}
+    except RateLimited:
+        raise  # reporté par le relais de l'outbox
+    except Exception as e:
+        logger.error("[sms] Échec envoi à %s : %s", phone, str(e))
+        raise
 
-        logger.info("[sms] envoi réussi → %s", phone)
+    logger.info("[sms] envoi réussi → %s", phone)
 
-        if lead:
+    if lead:
+        try:
             from api.leads_events.models import LeadEvent
             LeadEvent.log(
                 lead=lead,
@@ -62,43 +74,46 @@ def _send_sms(phone: str, message: str, lead=None) -> None:
                     "body_preview": message[:50] + "..." if len(message) > 50 else message
                 }
             )
+        except Exception as e:
+            logger.error("[sms] Journalisation SMS_SENT (lead #%s) : %s", lead.id, e)
 
-    except Exception as e:
-        logger.error("[sms] Échec envoi à %s : %s", phone, str(e))
+    job_ids = result.get("ids") or []
+    job_id = job_ids[0] if job_ids else result.get("id")
+    return str(job_id) if job_id else ""
 
 
 # ============================================================
 # 1. CONFIRMATION RDV
 # ============================================================
 
-def send_appointment_confirmation_sms(lead) -> None:
+def send_appointment_confirmation_sms(lead) -> Optional[str]:
     message = tpl_appointment_confirmation(lead)
 
-    _send_sms(
+    return _send_sms(
         phone=lead.phone,
         message=message,
         lead=lead,
     )
 
 
-def send_appointment_reminder_48h_sms(lead) -> None:
+def send_appointment_reminder_48h_sms(lead) -> Optional[str]:
     message = tpl_appointment_reminder_48h(lead)
-    _send_sms(phone=lead.phone, message=message, lead=lead)
+    return _send_sms(phone=lead.phone, message=message, lead=lead)
 
 
-def send_appointment_reminder_24h_sms(lead) -> None:
+def send_appointment_reminder_24h_sms(lead) -> Optional[str]:
     message = tpl_appointment_reminder_24h(lead)
-    _send_sms(phone=lead.phone, message=message, lead=lead)
+    return _send_sms(phone=lead.phone, message=message, lead=lead)
 
 
 # ============================================================
 # 2. RAPPEL RDV
 # ============================================================
 
-def send_appointment_reminder_sms(lead) -> None:
+def send_appointment_reminder_sms(lead) -> Optional[str]:
     message = tpl_appointment_reminder(lead)
 
-    _send_sms(
+    return _send_sms(
         phone=lead.phone,
         message=message,
         lead=lead,
@@ -109,10 +124,10 @@ def send_appointment_reminder_sms(lead) -> None:
 # 3. ABSENT — URGENCE
 # ============================================================
 
-def send_absent_urgency_sms(lead) -> None:
+def send_absent_urgency_sms(lead) -> Optional[str]:
     message = tpl_absent_urgency(lead)
 
-    _send_sms(
+    return _send_sms(
         phone=lead.phone,
         message=message,
         lead=lead,
@@ -123,13 +138,13 @@ def send_absent_urgency_sms(lead) -> None:
 # 4. ABSENT — RELANCE HEBDOMADAIRE
 # ============================================================
 
-def send_absent_followup_sms(lead, week: int = 1) -> None:
+def send_absent_followup_sms(lead, week: int = 1) -> Optional[str]:
     message = tpl_absent_followup(
         lead,
         week=week,
     )
 
-    _send_sms(
+    return _send_sms(
         phone=lead.phone,
         message=message,
         lead=lead,
@@ -140,10 +155,10 @@ def send_absent_followup_sms(lead, week: int = 1) -> None:
 # 5. PRÉSENT SANS CONTRAT
 # ============================================================
 
-def send_present_no_contract_sms(lead) -> None:
+def send_present_no_contract_sms(lead) -> Optional[str]:
     message = tpl_present_no_contract(lead)
 
-    _send_sms(
+    return _send_sms(
         phone=lead.phone,
         message=message,
         lead=lead,
@@ -154,10 +169,10 @@ def send_present_no_contract_sms(lead) -> None:
 # 6. CONTRAT SIGNÉ
 # ============================================================
 
-def send_contract_signed_sms(lead) -> None:
+def send_contract_signed_sms(lead) -> Optional[str]:
     message = tpl_contract_signed(lead)
 
-    _send_sms(
+    return _send_sms(
         phone=lead.phone,
         message=message,
         lead=lead,
@@ -168,10 +183,10 @@ def send_contract_signed_sms(lead) -> None:
 # 7. DEMANDE CONFIRMATION PRESENCE
 # ============================================================
 
-def send_confirm_presence_sms(lead) -> None:
+def send_confirm_presence_sms(lead) -> Optional[str]:
     message = tpl_confirm_presence(lead)
 
-    _send_sms(
+    return _send_sms(
         phone=lead.phone,
         message=message,
         lead=lead,
@@ -182,14 +197,14 @@ def send_confirm_presence_sms(lead) -> None:
 # 8. DOSSIER STATUS UPDATED 🔥
 # ============================================================
 
-def send_dossier_status_updated_sms(lead) -> None:
+def send_dossier_status_updated_sms(lead) -> Optional[str]:
     """
     Envoyé lors d’un changement de statut dossier.
     """
 
     message = tpl_dossier_status_updated(lead)
 
-    _send_sms(
+    return _send_sms(
         phone=lead.phone,
         message=message,
         lead=lead,
@@ -200,16 +215,16 @@ def send_dossier_status_updated_sms(lead) -> None:
 # 9. AVOCAT ASSIGNÉ
 # ============================================================
 
-def send_avocat_assigned_sms(lead, avocat) -> None:
+def send_avocat_assigned_sms(lead, avocat) -> Optional[str]:
     """
     Envoyé à l'avocat lorsqu'un dossier lui est assigné.
     """
     if not avocat.phone:
-        return
+        return None
 
     message = tpl_avocat_assigned(lead)
 
-    _send_sms(
+    return _send_sms(
         phone=avocat.phone,
         message=message,
         lead=lead,
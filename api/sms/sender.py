@@ -4,6 +4,7 @@ import logging
 import ovh
 from django.conf import settings
 from .client import get_ovh_sms_client
+from api.core.rate_limit import OVH_SMS, RateLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -13,14 +14,21 @@ def send_sms(
         message: str,
         receivers: list[str],
         sender: str | None = None,
+        reserved: bool = False,
 ):
     """
     Envoie un SMS via l'API OVH et logue la réponse complète pour le débugging.
+
+    Réserve d'abord un jeton OVH (global + par destinataire) : lève
+    RateLimited si le débit est atteint, sauf si l'appelant l'a déjà réservé.
     """
     if not receivers:
         logger.warning("📵 Aucun destinataire SMS fourni")
         return
 
+    if not reserved:
+        RateLimiter.reserve(OVH_SMS, *receivers)
+
     client = get_ovh_sms_client()
     service_name = settings.OVH_SMS_SERVICE_NAME
     sender_id = sender or settings.OVH_SMS_SENDER
@@ -5,10 +5,13 @@ from datetime import timedelta
 
 from django.utils import timezone
 from django.db import transaction
-from django_q.tasks import async_task
 
+from api.analytics.models import RollupFact
+from api.analytics.rollups import local_day, mark_dirty
 from api.leads.models import Lead
+from api.notification_outbox.services import NotificationOutbox
 from api.lead_status.models import LeadStatus
+from api.core.reference_data import lead_statuses
 from api.leads.constants import (
     PRESENT, ABSENT, RDV_A_CONFIRMER,
     A_RAPPELER, RDV_CONFIRME, RDV_PLANIFIE
@@ -28,12 +31,6 @@ from api.sms.notifications.leads import (
     send_avocat_assigned_sms,
 )
 
-# ✅ IMPORT DES EMAILS AJOUTÉ
-from api.utils.email.leads.tasks import (
-    send_appointment_absent_email_task,
-    send_appointment_reminder_email_task,
-)
-
 logger = logging.getLogger(__name__)
 
 
@@ -74,86 +71,96 @@ def _run_send_appointment_confirmation_sms(lead_id: int, **kwargs):
     lead = _get_lead(lead_id, "sms_confirmation")
     if not lead or not _has_valid_phone(lead, "sms_confirmation"):
         return
-    send_appointment_confirmation_sms(lead)
+    job_id = send_appointment_confirmation_sms(lead)
     logger.info("[sms_confirmation] → %s (lead #%s)", lead.phone, lead.id)
+    return job_id
 
 
 def _run_send_appointment_reminder_sms(lead_id: int, **kwargs):
     lead = _get_lead(lead_id, "sms_reminder")
     if not lead or not _has_valid_phone(lead, "sms_reminder"):
         return
-    send_appointment_reminder_sms(lead)
+    job_id = send_appointment_reminder_sms(lead)
     logger.info("[sms_reminder] → %s (lead #%s)", lead.phone, lead.id)
+    return job_id
 
 
 def _run_send_appointment_reminder_48h_sms(lead_id: int, **kwargs):
     lead = _get_lead(lead_id, "sms_reminder_48h")
     if not lead or not _has_valid_phone(lead, "sms_reminder_48h"):
         return
-    send_appointment_reminder_48h_sms(lead)
+    job_id = send_appointment_reminder_48h_sms(lead)
     logger.info("[sms_reminder_48h] → %s (lead #%s)", lead.phone, lead.id)
+    return job_id
 
 
 def _run_send_appointment_reminder_24h_sms(lead_id: int, **kwargs):
     lead = _get_lead(lead_id, "sms_reminder_24h")
     if not lead or not _has_valid_phone(lead, "sms_reminder_24h"):
         return
-    send_appointment_reminder_24h_sms(lead)
+    job_id = send_appointment_reminder_24h_sms(lead)
     logger.info("[sms_reminder_24h] → %s (lead #%s)", lead.phone, lead.id)
+    return job_id
 
 
 def _run_send_absent_urgency_sms(lead_id: int, **kwargs):
     lead = _get_lead(lead_id, "sms_absent_urgency")
     if not lead or not _has_valid_phone(lead, "sms_absent_urgency"):
         return
-    send_absent_urgency_sms(lead)
+    job_id = send_absent_urgency_sms(lead)
     logger.info("[sms_absent_urgency] → %s (lead #%s)", lead.phone, lead.id)
+    return job_id
 
 
 def _run_send_absent_followup_sms(lead_id: int, week: int = 1, **kwargs):
     lead = _get_lead(lead_id, "sms_absent_followup")
     if not lead or not _has_valid_phone(lead, "sms_absent_followup"):
         return
-    send_absent_followup_sms(lead, week=week)
+    job_id = send_absent_followup_sms(lead, week=week)
     logger.info(
         "[sms_absent_followup] semaine=%s → %s (lead #%s)",
         week, lead.phone, lead.id,
     )
+    return job_id
 
 
 def _run_send_present_no_contract_sms(lead_id: int, **kwargs):
     lead = _get_lead(lead_id, "sms_present_no_contract")
     if not lead or not _has_valid_phone(lead, "sms_present_no_contract"):
         return
-    send_present_no_contract_sms(lead)
+    job_id = send_present_no_contract_sms(lead)
     logger.info("[sms_present_no_contract] → %s (lead #%s)", lead.phone, lead.id)
+    return job_id
 
 
 def _run_send_contract_signed_sms(lead_id: int, **kwargs):
     lead = _get_lead(lead_id, "sms_contract_signed")
     if not lead or not _has_valid_phone(lead, "sms_contract_signed"):
         return
-    send_contract_signed_sms(lead)
+    job_id = send_contract_signed_sms(lead)
     logger.info("[sms_contract_signed] → %s (lead #%s)", lead.phone, lead.id)
+    return job_id
 
 
 def _run_send_confirm_presence_sms(lead_id: int, **kwargs):
     lead = _get_lead(lead_id, "sms_confirm_presence")
     if not lead or not _has_valid_phone(lead, "sms_confirm_presence"):
         return
-    send_confirm_presence_sms(lead)
+    job_id = send_confirm_presence_sms(lead)
     logger.info("[sms_confirm_presence] → %s (lead #%s)", lead.phone, lead.id)
+    return job_id
 
 
 def _run_send_dossier_status_updated_sms(lead_id: int, **kwargs):
     lead = _get_lead(lead_id, "sms_dossier_status_updated")
     if not lead or not _has_valid_phone(lead, "sms_dossier_status_updated"):
         return
-    send_dossier_status_updated_sms(lead)
+    job_id = send_dossier_status_updated_sms(lead)
     logger.info(
         "[sms_dossier_status_updated] → %s (lead #%s)",
         lead.phone, lead.id,
     )
+    return job_id
 
 
 def _run_send_avocat_assigned_sms(lead_id: int, avocat_id: int, **kwargs):
@@ -162,116 +169,66 @@ def _run_send_avocat_assigned_sms(lead_id: int, avocat_id: int, **kwargs):
     avocat = User.objects.filter(id=avocat_id).first()
     if not lead or not avocat or not avocat.phone:
         return
-    send_avocat_assigned_sms(lead, avocat)
+    job_id = send_avocat_assigned_sms(lead, avocat)
     logger.info("[sms_avocat_assigned] → %s (lead #%s)", avocat.phone, lead.id)
+    return job_id
 
 
 # ================================================================
 # DISPATCHERS
+# Écrivent la notification dans l'outbox, dans la transaction de
+# l'appelant ; le relais l'envoie après le commit, une fois par fenêtre.
 # ================================================================
 
 def send_appointment_confirmation_sms_task(lead_id: int):
-    async_task(
-        "api.sms.tasks._run_send_appointment_confirmation_sms",
-        lead_id,
-        group="sms",
-    )
+    NotificationOutbox.enqueue("sms.appointment_confirmation", lead_id)
 
 
 def send_appointment_reminder_sms_task(lead_id: int):
-    async_task(
-        "api.sms.tasks._run_send_appointment_reminder_sms",
-        lead_id,
-        group="sms",
-    )
+    NotificationOutbox.enqueue("sms.appointment_reminder", lead_id)
 
 
 def send_appointment_reminder_48h_sms_task(lead_id: int):
-    async_task(
-        "api.sms.tasks._run_send_appointment_reminder_48h_sms",
-        lead_id,
-        group="sms",
-    )
+    NotificationOutbox.enqueue("sms.appointment_reminder_48h", lead_id)
 
 
 def send_appointment_reminder_24h_sms_task(lead_id: int):
-    async_task(
-        "api.sms.tasks._run_send_appointment_reminder_24h_sms",
-        lead_id,
-        group="sms",
-    )
+    NotificationOutbox.enqueue("sms.appointment_reminder_24h", lead_id)
 
 
 def send_absent_urgency_sms_task(lead_id: int):
-    async_task(
-        "api.sms.tasks._run_send_absent_urgency_sms",
-        lead_id,
-        group="sms",
-    )
+    NotificationOutbox.enqueue("sms.absent_urgency", lead_id)
 
 
 def send_absent_followup_sms_task(lead_id: int, week: int = 1):
-    async_task(
-        "api.sms.tasks._run_send_absent_followup_sms",
-        lead_id,
-        week,
-        group="sms",
-    )
+    NotificationOutbox.enqueue("sms.absent_followup", lead_id, week)
 
 
 def send_present_no_contract_sms_task(lead_id: int, countdown: int = 0):
-    kwargs = {"group": "sms"}
-
-    if countdown:
-        kwargs["scheduled"] = timezone.now() + timedelta(seconds=countdown)
-
-    async_task(
-        "api.sms.tasks._run_send_present_no_contract_sms",
-        lead_id,
-        **kwargs,
-    )
+    NotificationOutbox.enqueue("sms.present_no_contract", lead_id, countdown=countdown)
 
 
 def send_contract_signed_sms_task(lead_id: int, countdown: int = 0):
-    kwargs = {"group": "sms"}
-
-    if countdown:
-        kwargs["scheduled"] = timezone.now() + timedelta(seconds=countdown)
-
-    async_task(
-        "api.sms.tasks._run_send_contract_signed_sms",
-        lead_id,
-        **kwargs,
-    )
+    NotificationOutbox.enqueue("sms.contract_signed", lead_id, countdown=countdown)
 
 
 def send_confirm_presence_sms_task(lead_id: int, countdown: int = 0):
-    kwargs = {"group": "sms"}
-
-    if countdown:
-        kwargs["scheduled"] = timezone.now() + timedelta(seconds=countdown)
-
-    async_task(
-        "api.sms.tasks._run_send_confirm_presence_sms",
-        lead_id,
-        **kwargs,
-    )
+    NotificationOutbox.enqueue("sms.confirm_presence", lead_id, countdown=countdown)
 
 
 def send_dossier_status_updated_sms_task(lead_id: int):
-    async_task(
-        "api.sms.tasks._run_send_dossier_status_updated_sms",
-        lead_id,
-        group="sms",
-    )
+    NotificationOutbox.enqueue("sms.dossier_status_updated", lead_id)
 
 
 def send_avocat_assigned_sms_task(lead_id: int, avocat_id: int):
-    async_task(
-        "api.sms.tasks._run_send_avocat_assigned_sms",
-        lead_id,
-        avocat_id,
-        group="sms",
+    NotificationOutbox.enqueue("sms.avocat_assigned", lead_id, avocat_id)
+
+
+def send_avocat_assigned_sms_batch_task(pairs):
+    """Un seul INSERT pour un lot de couples (lead_id, avocat_id)"""
+    NotificationOutbox.enqueue_many(
+        "sms.avocat_assigned",
+        [(lead_id, [avocat_id]) for lead_id, avocat_id in pairs],
     )
 
 
@@ -285,7 +242,7 @@ def mark_missed_appointments_as_absent():
     now = timezone.now()
 
     try:
-        absent_status = LeadStatus.objects.get(code=ABSENT)
+        absent_status = lead_statuses.get(ABSENT)
     except LeadStatus.DoesNotExist:
         logger.error("Status ABSENT non trouvé")
         return "0 leads updated - Status ABSENT missing"
@@ -294,10 +251,11 @@ def mark_missed_appointments_as_absent():
         appointment_date__isnull=False,
         appointment_date__lt=now,
     ).exclude(
-        status__code__in=[PRESENT, ABSENT]
+        status_id__in=lead_statuses.ids_for(PRESENT, ABSENT)
     )
 
-    lead_ids = list(leads_qs.values_list("id", flat=True))
+    lead_rows = list(leads_qs.values_list("id", "created_at", "appointment_date"))
+    lead_ids = [row[0] for row in lead_rows]
 
     if not lead_ids:
         logger.info("Aucun lead à marquer comme absent")
@@ -305,11 +263,13 @@ def mark_missed_appointments_as_absent():
 
     with transaction.atomic():
         updated_count = leads_qs.update(status=absent_status)
+        # update() ne déclenche pas les signaux : on signale les jours impactés aux agrégats
+        mark_dirty(RollupFact.LEADS, *(local_day(row[1]) for row in lead_rows))
+        mark_dirty(RollupFact.APPOINTMENTS, *(local_day(row[2]) for row in lead_rows))
 
-    # 🚀 Notifications async (SMS + EMAIL)
-    for lead_id in lead_ids:
-        send_absent_urgency_sms_task(lead_id)
-        send_appointment_absent_email_task(lead_id)  # ✅ ACTIVÉ
+        # 🚀 Notifications (SMS + EMAIL) dans l'outbox, même transaction
+        NotificationOutbox.enqueue_many("sms.absent_urgency", lead_ids)
+        NotificationOutbox.enqueue_many("email.appointment_absent", lead_ids)
 
     logger.info(f"{updated_count} leads marqués absents, notifications envoyées")
     return f"{updated_count} leads marked as ABSENT + SMS + EMAIL sent"
@@ -321,46 +281,35 @@ def send_appointment_reminders():
     - 48h avant → SMS + EMAIL
     - 24h avant → SMS + EMAIL
 
-    Anti-doublon inclus
+    Anti-doublon : clé outbox (lead, rappel, date du RDV)
     """
 
     now = timezone.now()
     reminder_windows = [
-        (timedelta(hours=48), "48h", send_appointment_reminder_48h_sms_task),
-        (timedelta(hours=24), "24h", send_appointment_reminder_24h_sms_task),
+        (timedelta(hours=48), "48h", "sms.appointment_reminder_48h"),
+        (timedelta(hours=24), "24h", "sms.appointment_reminder_24h"),
     ]
 
     tolerance = timedelta(minutes=5)
     total_sent = 0
 
-    for delta, label, sms_task_func in reminder_windows:
+    for delta, label, sms_template in reminder_windows:
         target_time = now + delta
-        window_start = target_time - tolerance
-        window_end = target_time + tolerance
-
-        leads = Lead.objects.filter(
-            appointment_date__gte=window_start,
-            appointment_date__lte=window_end,
-            status__code__in=[RDV_CONFIRME, RDV_PLANIFIE],
-        )
-
-        for lead in leads:
-            # 🔒 Anti doublon
-            if lead.last_reminder_sent:
-                if (now - lead.last_reminder_sent) < timedelta(hours=20):
-                    logger.debug(f"Lead #{lead.id} - anti-doublon actif")
-                    continue
 
-            # 🚀 Envoi SMS + EMAIL
-            sms_task_func(lead.id)
-            send_appointment_reminder_email_task(lead.id)  # ✅ ACTIVÉ
+        lead_ids = list(Lead.objects.filter(
+            appointment_date__gte=target_time - tolerance,
+            appointment_date__lte=target_time + tolerance,
+            status_id__in=lead_statuses.ids_for(RDV_CONFIRME, RDV_PLANIFIE),
+        ).values_list("id", flat=True))
 
-            # 🧠 Tracking
-            lead.last_reminder_sent = now
-            lead.save(update_fields=["last_reminder_sent"])
+        # 🚀 SMS + EMAIL + 🧠 Tracking, dans une seule transaction
+        with transaction.atomic():
+            queued = NotificationOutbox.enqueue_many(sms_template, lead_ids)
+            NotificationOutbox.enqueue_many("email.appointment_reminder", lead_ids, window=label)
+            Lead.objects.filter(id__in=queued).update(last_reminder_sent=now)
 
-            total_sent += 1
-            logger.info(f"Rappel {label} envoyé (SMS+EMAIL) pour lead #{lead.id}")
+        total_sent += len(queued)
+        logger.info(f"Rappel {label} mis en file (SMS+EMAIL) pour {len(queued)} lead(s)")
 
     logger.info(f"Total rappels envoyés : {total_sent}")
-    return f"{total_sent} reminders sent (SMS+EMAIL)"
\ No newline at end of file
+    return f"{total_sent} reminders sent (SMS+EMAIL)"
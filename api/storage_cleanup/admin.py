@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from api.storage_cleanup.models import PendingS3Deletion
+
+
+@admin.register(PendingS3Deletion)
+class PendingS3DeletionAdmin(admin.ModelAdmin):
+    list_display = ("bucket_key", "key", "attempts", "next_attempt_at", "created_at")
+    list_filter = ("bucket_key",)
+    search_fields = ("key", "last_error")
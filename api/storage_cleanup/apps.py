@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class StorageCleanupConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "api.storage_cleanup"
+    verbose_name = "Nettoyage du stockage S3"
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from api.storage_cleanup.services import OrphanSweeper
+
+
+class Command(BaseCommand):
+    help = "Compare le contenu des buckets aux URLs en base et planifie la suppression des orphelins."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bucket",
+            choices=OrphanSweeper.SWEEPABLE_BUCKETS,
+            action="append",
+            help="Bucket(s) à réconcilier (par défaut : tous).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Liste les orphelins sans planifier leur suppression.",
+        )
+        parser.add_argument(
+            "--min-age-days",
+            type=int,
+            default=None,
+            help="Âge minimal des objets à considérer (par défaut : 2 jours).",
+        )
+
+    def handle(self, *args, **options):
+        min_age = timedelta(days=options["min_age_days"]) if options["min_age_days"] is not None else None
+
+        for bucket_key in options["bucket"] or OrphanSweeper.SWEEPABLE_BUCKETS:
+            result = OrphanSweeper.sweep(bucket_key, dry_run=options["dry_run"], min_age=min_age)
+            if options["dry_run"]:
+                for key in result["keys"]:
+                    self.stdout.write(f"  {key}")
+            self.stdout.write(self.style.SUCCESS(
+                f"{bucket_key}: {result['listed']} objet(s), {result['orphans']} orphelin(s)"
+            ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-19 01:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingS3Deletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_key', models.CharField(max_length=30, verbose_name='bucket (clé SCW_BUCKETS)')),
+                ('key', models.CharField(max_length=1024, verbose_name='clé S3')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='tentatives')),
+                ('last_error', models.TextField(blank=True, verbose_name='dernière erreur')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='prochaine tentative')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='demandée le')),
+            ],
+            options={
+                'verbose_name': 'suppression S3 en attente',
+                'verbose_name_plural': 'suppressions S3 en attente',
+                'indexes': [models.Index(fields=['next_attempt_at'], name='storage_cle_next_at_5ce78c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('bucket_key', 'key'), name='unique_pending_s3_deletion')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class PendingS3Deletion(models.Model):
+    """
+    File durable des objets S3 à supprimer.
+
+    Les lignes sont écrites dans la même transaction que la suppression en base :
+    un rollback annule aussi la demande de suppression. Le worker supprime par lots
+    (delete_objects) et replanifie les échecs avec un délai croissant.
+    """
+
+    bucket_key = models.CharField(max_length=30, verbose_name=_("bucket (clé SCW_BUCKETS)"))
+    key = models.CharField(max_length=1024, verbose_name=_("clé S3"))
+
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_("tentatives"))
+    last_error = models.TextField(blank=True, verbose_name=_("dernière erreur"))
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name=_("prochaine tentative"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("demandée le"))
+
+    class Meta:
+        verbose_name = _("suppression S3 en attente")
+        verbose_name_plural = _("suppressions S3 en attente")
+        constraints = [
+            models.UniqueConstraint(fields=["bucket_key", "key"], name="unique_pending_s3_deletion"),
+        ]
+        indexes = [
+            models.Index(fields=["next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.bucket_key}:{self.key} ({self.attempts} tentative(s))"
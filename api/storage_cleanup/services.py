@@ -0,0 +1,211 @@
+"""
+Suppression des fichiers S3 par lots.
+
+  - S3DeletionService.schedule(...)   → enregistre les clés dans la file durable
+                                        (même transaction que la suppression en base)
+                                        et déclenche le worker après le commit
+  - S3DeletionService.process_pending → delete_objects par bucket (≤ 1000 clés / appel),
+                                        replanifie les échecs avec backoff
+  - OrphanSweeper.sweep(bucket_key)   → réconcilie le listing du bucket avec les URLs
+                                        connues en base et planifie les orphelins
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.storage_cleanup.models import PendingS3Deletion
+from api.utils.cloud.scw.s3_client import get_s3_client
+from api.utils.cloud.scw.utils import extract_bucket_key_from_url
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 1000   # limite S3 de delete_objects
+MAX_ATTEMPTS = 8
+PROCESS_LIMIT = 10000
+LEASE = timedelta(minutes=10)  # réservation d'un lot pendant les appels S3
+
+
+def _backoff(attempts: int) -> timedelta:
+    """1, 2, 4 … minutes, plafonné à 12h."""
+    return timedelta(minutes=min(2 ** max(attempts - 1, 0), 12 * 60))
+
+
+class S3DeletionService:
+
+    @staticmethod
+    def schedule(urls_by_bucket: Dict[str, Iterable[str]]) -> int:
+        """
+        Planifie la suppression d'URLs (ou de clés) regroupées par bucket.
+        Retourne le nombre de clés planifiées.
+        """
+        rows = []
+        for bucket_key, urls in urls_by_bucket.items():
+            for url in urls:
+                key = extract_bucket_key_from_url(bucket_key, url) if url else None
+                if key:
+                    rows.append(PendingS3Deletion(bucket_key=bucket_key, key=key))
+
+        if not rows:
+            return 0
+
+        PendingS3Deletion.objects.bulk_create(rows, ignore_conflicts=True)
+        transaction.on_commit(S3DeletionService.enqueue)
+        return len(rows)
+
+    @staticmethod
+    def enqueue() -> None:
+        from api.core.task_lanes import async_task
+        async_task("api.storage_cleanup.tasks.process_pending_s3_deletions", group="storage")
+
+    @staticmethod
+    def process_pending(limit: int = PROCESS_LIMIT) -> dict:
+        """
+        Supprime les clés dues ; retourne {"deleted", "failed"}.
+        Les lignes sont réservées (bail LEASE) dans une transaction courte, les
+        appels S3 se font hors transaction, puis le résultat est écrit dans une
+        seconde transaction courte. Un worker tué en cours de route laisse ses
+        lignes redevenir dues à l'expiration du bail.
+        """
+        pending = S3DeletionService._claim(limit)
+        if not pending:
+            return {"deleted": 0, "failed": 0}
+
+        by_bucket: Dict[str, List[PendingS3Deletion]] = defaultdict(list)
+        for row in pending:
+            by_bucket[row.bucket_key].append(row)
+
+        s3 = get_s3_client()
+        done_ids: List[int] = []
+        failed: List[PendingS3Deletion] = []
+
+        for bucket_key, rows in by_bucket.items():
+            bucket = settings.SCW_BUCKETS[bucket_key]
+            for i in range(0, len(rows), DELETE_BATCH_SIZE):
+                chunk = rows[i:i + DELETE_BATCH_SIZE]
+                errors = _delete_chunk(s3, bucket, [row.key for row in chunk])
+                now = timezone.now()
+                for row in chunk:
+                    if row.key in errors:
+                        row.attempts += 1
+                        row.last_error = errors[row.key][:1000]
+                        row.next_attempt_at = now + _backoff(row.attempts)
+                        failed.append(row)
+                    else:
+                        done_ids.append(row.id)
+
+        with transaction.atomic():
+            PendingS3Deletion.objects.filter(id__in=done_ids).delete()
+            PendingS3Deletion.objects.bulk_update(failed, ["attempts", "last_error", "next_attempt_at"])
+
+        if failed:
+            logger.warning("⚠️ Suppression S3 : %d clé(s) en échec, replanifiée(s)", len(failed))
+        logger.info("🗑️ Suppression S3 : %d clé(s) supprimée(s)", len(done_ids))
+        return {"deleted": len(done_ids), "failed": len(failed)}
+
+    @staticmethod
+    def _claim(limit: int) -> List[PendingS3Deletion]:
+        """Réserve les clés dues en repoussant leur prochaine tentative de LEASE."""
+        now = timezone.now()
+        with transaction.atomic():
+            pending = list(
+                PendingS3Deletion.objects.select_for_update(skip_locked=True)
+                .filter(next_attempt_at__lte=now, attempts__lt=MAX_ATTEMPTS)
+                .order_by("next_attempt_at")[:limit]
+            )
+            PendingS3Deletion.objects.filter(id__in=[row.id for row in pending]).update(
+                next_attempt_at=now + LEASE,
+            )
+        return pending
+
+
+def _delete_chunk(s3, bucket: str, keys: List[str]) -> Dict[str, str]:
+    """Un appel delete_objects ; retourne {clé: erreur} pour les clés non supprimées."""
+    try:
+        response = s3.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+        )
+    except (BotoCoreError, ClientError) as e:
+        return {key: str(e) for key in keys}
+    return {
+        error["Key"]: f"{error.get('Code', '')} {error.get('Message', '')}".strip()
+        for error in response.get("Errors", [])
+    }
+
+
+# ──────────────────────────────────────────────
+# ORPHELINS
+# ──────────────────────────────────────────────
+
+def _referenced_urls(bucket_key: str):
+    """URLs (ou clés) connues en base pour un bucket."""
+    from api.candidate.models import Candidate
+    from api.contracts.models import Contract
+    from api.documents.models import Document
+    from api.payments.models import PaymentReceipt
+    from api.users.models import User
+
+    sources = {
+        "documents": [(Document, "url")],
+        "receipts": [(PaymentReceipt, "receipt_url")],
+        "contracts": [(Contract, "contract_url")],
+        "invoices": [(Contract, "invoice_url")],
+        "candidates": [(Candidate, "cv_url")],
+        "avatars": [(User, "avatar")],
+    }
+    for model, field in sources.get(bucket_key, []):
+        yield from (
+            model.objects.exclude(**{f"{field}__isnull": True}).exclude(**{field: ""})
+            .values_list(field, flat=True).iterator(chunk_size=5000)
+        )
+
+
+class OrphanSweeper:
+    SWEEPABLE_BUCKETS = ("documents", "receipts", "contracts", "invoices", "candidates", "avatars")
+
+    # Laisse le temps aux uploads directs d'être finalisés (jeton valable 24h)
+    MIN_AGE = timedelta(days=2)
+
+    @classmethod
+    def sweep(cls, bucket_key: str, dry_run: bool = False, min_age: timedelta = None) -> dict:
+        """
+        Liste le bucket et planifie la suppression des objets qu'aucune ligne
+        ne référence et plus anciens que `min_age`.
+        """
+        if bucket_key not in cls.SWEEPABLE_BUCKETS:
+            raise ValueError(f"Bucket non réconciliable : {bucket_key}")
+
+        referenced = {
+            key for key in (extract_bucket_key_from_url(bucket_key, url) for url in _referenced_urls(bucket_key))
+            if key
+        }
+        referenced |= set(
+            PendingS3Deletion.objects.filter(bucket_key=bucket_key).values_list("key", flat=True)
+        )
+
+        cutoff = timezone.now() - (cls.MIN_AGE if min_age is None else min_age)
+        s3 = get_s3_client()
+        paginator = s3.get_paginator("list_objects_v2")
+
+        listed = 0
+        orphans: List[str] = []
+        for page in paginator.paginate(Bucket=settings.SCW_BUCKETS[bucket_key]):
+            for obj in page.get("Contents", []):
+                listed += 1
+                if obj["Key"] not in referenced and obj["LastModified"] < cutoff:
+                    orphans.append(obj["Key"])
+
+        if orphans and not dry_run:
+            S3DeletionService.schedule({bucket_key: orphans})
+
+        logger.info(
+            "🧹 Orphelins S3 %s : %d objet(s) listé(s), %d orphelin(s)%s",
+            bucket_key, listed, len(orphans), " (simulation)" if dry_run else "",
+        )
+        return {"listed": listed, "orphans": len(orphans), "keys": orphans}
@@ -0,0 +1,25 @@
+import logging
+
+from api.storage_cleanup.services import OrphanSweeper, S3DeletionService
+
+logger = logging.getLogger(__name__)
+
+
+def process_pending_s3_deletions():
+    """
+    Vide la file des suppressions S3. Déclenché après chaque commit qui planifie
+    des suppressions, et toutes les 10 minutes pour rejouer les échecs.
+    """
+    result = S3DeletionService.process_pending()
+    return f"{result['deleted']} S3 objects deleted, {result['failed']} failed"
+
+
+def sweep_s3_orphans():
+    """Réconciliation nocturne : planifie la suppression des objets non référencés."""
+    total = 0
+    for bucket_key in OrphanSweeper.SWEEPABLE_BUCKETS:
+        try:
+            total += OrphanSweeper.sweep(bucket_key)["orphans"]
+        except Exception as e:
+            logger.error("❌ Réconciliation S3 %s : %s", bucket_key, e)
+    return f"{total} orphan S3 objects scheduled for deletion"
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.db import connection
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.clients.models import Client
+from api.documents.models import Document
+from api.lead_status.models import LeadStatus
+from api.leads.models import Lead
+from api.storage_cleanup.models import PendingS3Deletion
+from api.storage_cleanup.services import OrphanSweeper, S3DeletionService
+from api.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def client_obj():
+    status = LeadStatus.objects.create(code="NOUVEAU", label="Nouveau", color="#C1E8FF")
+    lead = Lead.objects.create(first_name="Marc", last_name="Nkue", status=status)
+    return Client.objects.create(lead=lead)
+
+
+def _put(s3, bucket, keys):
+    for key in keys:
+        s3.put_object(Bucket=bucket, Key=key, Body=b"x")
+
+
+def test_bulk_delete_schedules_then_deletes_in_batches(s3, settings, client_obj, django_capture_on_commit_callbacks):
+    bucket = settings.SCW_BUCKETS["documents"]
+    keys = [f"doc_{i}.pdf" for i in range(1500)]
+    _put(s3, bucket, keys)
+    docs = Document.objects.bulk_create([
+        Document(client=client_obj, url=f"{settings.AWS_S3_ENDPOINT_URL}/{bucket}/{key}") for key in keys
+    ])
+    user = User.objects.create_user(email="del@test.com", password="pwd", role="ADMIN", first_name="A", last_name="B")
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+
+    with patch.object(S3DeletionService, "enqueue") as enqueue, \
+            django_capture_on_commit_callbacks(execute=True):
+        resp = api_client.delete(reverse("document-bulk-delete"), {"ids": [d.pk for d in docs]}, format="json")
+
+    assert resp.status_code == 204
+    assert not Document.objects.exists()
+    assert PendingS3Deletion.objects.count() == 1500
+    enqueue.assert_called_once()
+
+    with patch("api.storage_cleanup.services.get_s3_client", return_value=s3), \
+            patch.object(s3, "delete_objects", wraps=s3.delete_objects) as delete_objects:
+        result = S3DeletionService.process_pending()
+
+    assert result == {"deleted": 1500, "failed": 0}
+    assert delete_objects.call_count == 2
+    assert s3.list_objects_v2(Bucket=bucket).get("KeyCount") == 0
+    assert not PendingS3Deletion.objects.exists()
+
+
+def test_failed_keys_are_kept_with_backoff(s3, settings):
+    settings.SCW_BUCKETS = {**settings.SCW_BUCKETS, "documents": "bucket-inexistant"}
+    S3DeletionService.schedule({"documents": ["a.pdf", "b.pdf"]})
+
+    result = S3DeletionService.process_pending()
+
+    assert result == {"deleted": 0, "failed": 2}
+    row = PendingS3Deletion.objects.get(key="a.pdf")
+    assert row.attempts == 1
+    assert row.last_error
+    assert row.next_attempt_at > timezone.now()
+    # Pas encore dû : le passage suivant l'ignore
+    assert S3DeletionService.process_pending() == {"deleted": 0, "failed": 0}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_s3_calls_run_outside_the_claim_transaction(s3, settings):
+    S3DeletionService.schedule({"documents": ["a.pdf", "b.pdf"]})
+    seen = []
+
+    def delete_chunk(s3_client, bucket, keys):
+        # Lignes réservées et transaction de réservation déjà committée
+        seen.append((connection.in_atomic_block, PendingS3Deletion.objects.filter(
+            next_attempt_at__lte=timezone.now()).count()))
+        raise RuntimeError("worker tué")
+
+    with patch("api.storage_cleanup.services._delete_chunk", side_effect=delete_chunk):
+        with pytest.raises(RuntimeError):
+            S3DeletionService.process_pending()
+
+    assert seen == [(False, 0)]
+    # Worker tué : les lignes redeviennent dues à l'expiration du bail
+    with patch("api.storage_cleanup.services.timezone.now", return_value=timezone.now() + timedelta(hours=1)):
+        assert S3DeletionService.process_pending() == {"deleted": 2, "failed": 0}
+    assert not PendingS3Deletion.objects.exists()
+
+
+def test_orphan_sweeper_schedules_only_unreferenced_objects(s3, settings, client_obj):
+    bucket = settings.SCW_BUCKETS["documents"]
+    _put(s3, bucket, ["kept.pdf", "orphan.pdf"])
+    Document.objects.create(client=client_obj, url=f"{settings.AWS_S3_ENDPOINT_URL}/{bucket}/kept.pdf")
+
+    assert OrphanSweeper.sweep("documents")["orphans"] == 0  # trop récents
+
+    result = OrphanSweeper.sweep("documents", min_age=timedelta(0))
+
+    assert result["keys"] == ["orphan.pdf"]
+    assert list(PendingS3Deletion.objects.values_list("key", flat=True)) == ["orphan.pdf"]
@@ -46,6 +46,8 @@ api_urlpatterns = [
     path("phone/", include("api.phone.urls")),
     path("candidates/", include("api.candidate.urls")),
     path("ping/", include("api.ping.urls")),
+    # Instrumentation SQL par route (admin)
+    path("perf/", include("api.core.urls")),
 
     path("lead-task-types/", include("api.leads_task_type.urls")),
 
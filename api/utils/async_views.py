@@ -0,0 +1,221 @@
+"""
+Vues async natives pour le déploiement ASGI (gunicorn + UvicornWorker).
+
+Une vue DRF synchrone servie en ASGI passe par un saut sync_to_async complet
+(authentification, requêtes, rendu), limité par la taille de l'executor. Les
+endpoints de lecture les plus sollicités utilisent plutôt :
+
+  - AsyncAPIView / @async_api_view : authentification (session via
+    request.auser(), puis les autres classes DRF configurées), permissions et
+    throttling DRF habituels, réponse JSON uniquement (406 si l'en-tête Accept
+    l'exclut), handlers `async def` (lecture seule : GET/HEAD/OPTIONS) ; une
+    APIException levée par le handler est rendue comme par DRF
+  - JSONResponse : même encodage que le JSONRenderer DRF, expose `.data`
+  - gather_queries(...) : requêtes ORM indépendantes exécutées en parallèle,
+    chacune sur la connexion persistante d'un thread du pool dédié
+"""
+import asyncio
+import contextvars
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.db import close_old_connections, connection, connections
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+QUERY_POOL_SIZE = 4
+
+# Threads persistants : chaque thread garde sa propre connexion, recyclée
+# selon CONN_MAX_AGE / CONN_HEALTH_CHECKS ; le contexte de l'appelant est
+# copié à chaque soumission (gather_queries).
+_query_pool = ThreadPoolExecutor(max_workers=QUERY_POOL_SIZE, thread_name_prefix="async-query")
+
+
+class JSONResponse(JsonResponse):
+    """JsonResponse encodée comme le JSONRenderer DRF (dates, Decimal, UUID, UTF-8)."""
+
+    def __init__(self, data, status=200, **kwargs):
+        kwargs.setdefault("json_dumps_params", {"ensure_ascii": False, "separators": (",", ":")})
+        super().__init__(data, encoder=JSONEncoder, safe=False, status=status, **kwargs)
+        self.data = data
+
+
+# ──────────────────────────────────────────────
+# AUTHENTIFICATION / PERMISSIONS
+# ──────────────────────────────────────────────
+
+async def aauthenticate(request):
+    """Résout l'utilisateur avec les classes DRF configurées, sans bloquer la boucle."""
+    forced = getattr(request, "_force_auth_user", None)  # APIClient.force_authenticate
+    if forced is not None:
+        return forced
+
+    for auth_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        if issubclass(auth_class, SessionAuthentication):
+            # Lecture seule : pas de contrôle CSRF (méthodes sûres uniquement)
+            user = await request.auser()
+            if user.is_authenticated and user.is_active:
+                return user
+            continue
+        result = await sync_to_async(auth_class().authenticate)(request)
+        if result is not None:
+            return result[0]
+    return AnonymousUser()
+
+
+def _error_response(request, exc: exceptions.APIException) -> JSONResponse:
+    status = exc.status_code
+    header = None
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        header = classes[0]().authenticate_header(request) if classes else None
+        status = 401 if header else 403  # même règle que DRF
+
+    # Même corps que l'exception handler DRF (ValidationError : liste ou dict tels quels)
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    response = JSONResponse(data, status=status)
+    if header:
+        response["WWW-Authenticate"] = header
+    return response
+
+
+def _throttled(request, view, throttle_classes):
+    """Même règle qu'APIView.check_throttles : None si autorisé, sinon l'exception Throttled."""
+    waits = [throttle.wait() for throttle in (cls() for cls in throttle_classes)
+             if not throttle.allow_request(request, view)]
+    if not waits:
+        return None
+    return exceptions.Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+
+async def _check_access(request, view, permission_classes, throttle_classes):
+    """Retourne une réponse d'erreur, ou None si l'accès est autorisé."""
+    if not request.accepts("application/json"):
+        return _error_response(request, exceptions.NotAcceptable())
+
+    try:
+        request.user = await aauthenticate(request)
+    except exceptions.APIException as exc:
+        return _error_response(request, exc)
+
+    for permission_class in permission_classes:
+        permission = permission_class()
+        if not permission.has_permission(request, view):
+            if not request.user.is_authenticated:
+                return _error_response(request, exceptions.NotAuthenticated())
+            return _error_response(request, exceptions.PermissionDenied(getattr(permission, "message", None)))
+
+    if throttle_classes:
+        # Historique des throttles dans le cache Django (accès synchrone)
+        throttled = await sync_to_async(_throttled)(request, view, throttle_classes)
+        if throttled is not None:
+            response = _error_response(request, throttled)
+            if throttled.wait is not None:
+                response["Retry-After"] = str(math.ceil(throttled.wait))
+            return response
+    return None
+
+
+class AsyncAPIView(View):
+    """Équivalent async (lecture seule) d'APIView : handlers `async def get(...)`."""
+
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    http_method_names = ["get", "head", "options"]
+
+    async def dispatch(self, request, *args, **kwargs):
+        denied = await _check_access(request, self, self.permission_classes, self.throttle_classes)
+        if denied is not None:
+            return denied
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return _error_response(request, exc)
+
+
+def async_api_view(permission_classes=None, throttle_classes=None, methods=("GET",)):
+    """Équivalent async de @api_view (+ @permission_classes / @throttle_classes) en lecture seule."""
+    allowed = {method.upper() for method in methods}
+
+    def decorator(func):
+        @wraps(func)
+        async def view(request, *args, **kwargs):
+            if request.method not in allowed:
+                return _error_response(request, exceptions.MethodNotAllowed(request.method))
+            denied = await _check_access(
+                request, None,
+                api_settings.DEFAULT_PERMISSION_CLASSES if permission_classes is None else permission_classes,
+                api_settings.DEFAULT_THROTTLE_CLASSES if throttle_classes is None else throttle_classes,
+            )
+            if denied is not None:
+                return denied
+            try:
+                return await func(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return _error_response(request, exc)
+        return view
+    return decorator
+
+
+# ──────────────────────────────────────────────
+# REQUÊTES CONCURRENTES
+# ──────────────────────────────────────────────
+
+def _run_isolated(func):
+    close_old_connections()
+    try:
+        return func()
+    finally:
+        close_old_connections()
+
+
+async def gather_queries(*funcs):
+    """
+    Exécute des fonctions ORM synchrones indépendantes en parallèle et
+    retourne leurs résultats dans l'ordre.
+
+    Si la connexion de la requête est dans un bloc atomic (tests, appel
+    depuis une transaction), les autres connexions ne verraient pas ses
+    écritures non commitées : exécution séquentielle sur cette connexion.
+    """
+    def run_in_transaction():
+        if not connection.in_atomic_block:
+            return None
+        return [func() for func in funcs]
+
+    # La connexion de la requête vit dans le thread sync_to_async, pas dans la boucle
+    results = await sync_to_async(run_in_transaction)()
+    if results is not None:
+        return results
+
+    # Une copie du contexte par fonction : profil SQL de la requête
+    # (QueryInstrumentationMiddleware), locale, etc. restent visibles dans le pool
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(
+        loop.run_in_executor(_query_pool, contextvars.copy_context().run, _run_isolated, func)
+        for func in funcs
+    ))
+
+
+def close_query_pool_connections(timeout: float = 5) -> None:
+    """Ferme la connexion de chaque thread du pool (arrêt du worker, fin de tests)."""
+    barrier = threading.Barrier(QUERY_POOL_SIZE)
+
+    def close():
+        try:
+            barrier.wait(timeout)  # un appel par thread
+        except threading.BrokenBarrierError:
+            pass
+        finally:
+            connections.close_all()
+
+    for future in [_query_pool.submit(close) for _ in range(QUERY_POOL_SIZE)]:
+        future.result()
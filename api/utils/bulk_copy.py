@@ -0,0 +1,83 @@
+"""
+Insertion massive par COPY … FROM STDIN (PostgreSQL), pour les volumes où
+bulk_create (INSERT multi-lignes, paramètres liés) devient le goulot.
+
+Les lignes sont des instances non sauvegardées : valeurs par défaut, auto_now
+et conversions de champ sont appliquées comme par bulk_create. Comme lui,
+aucun signal ni save() n'est exécuté.
+
+Clé primaire auto-incrémentée : reserve_ids() réserve les identifiants dans la
+séquence de la table, pour les référencer (FK) avant l'écriture.
+"""
+import io
+import json
+from typing import Iterable, List, Sequence
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, models
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(field, obj, conn) -> str:
+    value = field.pre_save(obj, add=True)
+    if value is None:
+        return "\\N"
+    if isinstance(field, models.JSONField):
+        return json.dumps(value, cls=field.encoder).translate(_ESCAPES)
+    value = field.get_db_prep_save(value, conn)
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).translate(_ESCAPES)
+
+
+def reserve_ids(model, count: int) -> List[int]:
+    """Réserve `count` identifiants dans la séquence de la clé primaire de `model`."""
+    if count <= 0:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+            [model._meta.db_table, model._meta.pk.column, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def copy_instances(model, objs: Sequence[models.Model]) -> int:
+    """Écrit `objs` en un COPY ; la clé primaire n'est envoyée que si elle est renseignée."""
+    if not objs:
+        return 0
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not (field.primary_key and getattr(objs[0], field.attname) is None)
+    ]
+    conn = connections[DEFAULT_DB_ALIAS]  # connexion réelle : évite le proxy à chaque valeur
+    columns = ", ".join(conn.ops.quote_name(field.column) for field in fields)
+    sql = f"COPY {conn.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN"
+
+    buffer = io.StringIO()
+    for obj in objs:
+        buffer.write("\t".join(_copy_value(field, obj, conn) for field in fields))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    with conn.cursor() as cursor:
+        if is_psycopg3:
+            with cursor.cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+        else:
+            cursor.cursor.copy_expert(sql, buffer)
+    return len(objs)
+
+
+def copy_in_batches(model, objs: Iterable[models.Model], batch_size: int = 50_000) -> int:
+    """copy_instances par lots de `batch_size`, pour les générateurs de lignes."""
+    written, batch = 0, []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            written += copy_instances(model, batch)
+            batch = []
+    return written + copy_instances(model, batch)
@@ -1,10 +1,17 @@
+import logging
 import mimetypes
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, Tuple
 from urllib.parse import urlparse, unquote
 
+from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
 
 from .s3_client import get_s3_client
 
+logger = logging.getLogger(__name__)
+
 
 def get_object(bucket_key: str, key: str) -> bytes:
     s3     = get_s3_client()
@@ -13,6 +20,61 @@ def get_object(bucket_key: str, key: str) -> bytes:
     return response["Body"].read()
 
 
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def iter_objects(
+    bucket_key: str,
+    keys: Iterable[str],
+    max_workers: int = 4,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[Tuple[str, Optional[Iterator[bytes]]]]:
+    """
+    Ouvre des objets en parallèle (pool borné) et les restitue dans l'ordre des
+    clés, sous forme d'itérateurs de morceaux de `chunk_size` octets
+    (Body.iter_chunks) : le contenu n'est jamais chargé en entier. Au plus
+    `max_workers` objets sont ouverts en avance. Un objet illisible est
+    restitué avec None.
+    """
+    s3     = get_s3_client()  # les clients boto3 sont thread-safe
+    bucket = settings.SCW_BUCKETS[bucket_key]
+
+    def open_body(key: str):
+        try:
+            return s3.get_object(Bucket=bucket, Key=key)["Body"]
+        except (BotoCoreError, ClientError) as e:
+            logger.warning("⚠️ S3 get_object %s/%s : %s", bucket, key, e)
+            return None
+
+    keys = iter(keys)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        for key in keys:
+            pending.append((key, pool.submit(open_body, key)))
+            if len(pending) >= max_workers:
+                break
+        try:
+            while pending:
+                key, future = pending.popleft()
+                body = future.result()
+                next_key = next(keys, None)
+                if next_key is not None:
+                    pending.append((next_key, pool.submit(open_body, next_key)))
+                if body is None:
+                    yield key, None
+                    continue
+                try:
+                    yield key, body.iter_chunks(chunk_size)
+                finally:
+                    body.close()
+        finally:
+            # Arrêt anticipé (client déconnecté) : libère les connexions déjà ouvertes
+            for _, future in pending:
+                body = future.result()
+                if body is not None:
+                    body.close()
+
+
 def delete_object(bucket_key: str, key: str):
     s3     = get_s3_client()
     bucket = settings.SCW_BUCKETS[bucket_key]
@@ -1,4 +1,7 @@
 import logging
+
+from django.db import transaction
+
 from api.utils.cloud.scw.bucket_utils import delete_object
 from api.utils.cloud.scw.utils import extract_bucket_key_from_url
 
@@ -29,60 +32,47 @@ def delete_s3_file_safe(bucket_key: str, url: str, file_type: str = "fichier"):
 
 def cleanup_client_cascade_s3(client) -> dict:
     """
-    Supprime TOUS les fichiers S3 d'un client et ses relations.
-    Version simplifiée qui prend directement le client.
+    Planifie la suppression de TOUS les fichiers S3 d'un client et ses relations.
+
+    Les clés sont enregistrées dans la file durable (api.storage_cleanup) :
+    à appeler dans la transaction qui supprime le client, les fichiers ne sont
+    supprimés (par lots, delete_objects) qu'après le commit.
     """
+    from api.storage_cleanup.services import S3DeletionService
+
+    documents = [url for url in client.documents.values_list("url", flat=True) if url]
+    receipts = [url for url in client.receipts.values_list("receipt_url", flat=True) if url]
+    contract_rows = list(client.contracts.values_list("contract_url", "invoice_url"))
+    contracts = [row[0] for row in contract_rows if row[0]]
+    invoices = [row[1] for row in contract_rows if row[1]]
+    avatars = [client.avatar_url] if getattr(client, "avatar_url", None) else []
+
     stats = {
-        'clients': 0,
-        'contracts': 0,
-        'receipts': 0,
-        'documents': 0,
-        'total': 0
+        'clients': len(avatars),
+        'contracts': len(contracts) + len(invoices),
+        'receipts': len(receipts),
+        'documents': len(documents),
+        'total': 0,
     }
+    stats['total'] = stats['clients'] + stats['contracts'] + stats['receipts'] + stats['documents']
 
     logger.info(f"🗑️ NETTOYAGE S3 pour Client #{client.pk}")
 
     try:
-        # 1️⃣ Documents du client
-        if hasattr(client, 'documents'):
-            for doc in client.documents.all():
-                if hasattr(doc, 'url') and doc.url:
-                    if delete_s3_file_safe('documents', doc.url, f"Document #{doc.pk}"):
-                        stats['documents'] += 1
-                        stats['total'] += 1
-
-        # 2️⃣ Reçus de paiement
-        for receipt in client.receipts.all():
-            if receipt.receipt_url:
-                if delete_s3_file_safe('receipts', receipt.receipt_url, f"Reçu #{receipt.pk}"):
-                    stats['receipts'] += 1
-                    stats['total'] += 1
-
-        # 3️⃣ Contrats (PDF contrat + facture)
-        for contract in client.contracts.all():
-            if contract.contract_url:
-                if delete_s3_file_safe('contracts', contract.contract_url, f"Contrat #{contract.pk}"):
-                    stats['contracts'] += 1
-                    stats['total'] += 1
-
-            if contract.invoice_url:
-                if delete_s3_file_safe('invoices', contract.invoice_url, f"Facture #{contract.pk}"):
-                    stats['contracts'] += 1
-                    stats['total'] += 1
-
-        # 4️⃣ Avatar du client (si applicable)
-        if hasattr(client, 'avatar_url') and client.avatar_url:
-            if delete_s3_file_safe('avatars', client.avatar_url, f"Avatar Client #{client.pk}"):
-                stats['clients'] += 1
-                stats['total'] += 1
-
+        with transaction.atomic():  # savepoint : un échec ne casse pas la transaction appelante
+            S3DeletionService.schedule({
+                "documents": documents,
+                "receipts": receipts,
+                "contracts": contracts,
+                "invoices": invoices,
+                "avatars": avatars,
+            })
         logger.info(
-            f"✅ Nettoyage S3 Client #{client.pk} terminé : {stats['total']} fichiers "
+            f"✅ Nettoyage S3 Client #{client.pk} planifié : {stats['total']} fichiers "
             f"(documents: {stats['documents']}, contrats: {stats['contracts']}, "
             f"reçus: {stats['receipts']}, avatars: {stats['clients']})"
         )
-
     except Exception as e:
         logger.error(f"❌ Erreur lors du nettoyage S3 Client #{client.pk} : {e}")
 
-    return stats
\ No newline at end of file
+    return stats
@@ -0,0 +1,229 @@
+"""
+Uploads directs navigateur → bucket (S3/Scaleway/MinIO) en deux temps.
+
+1. Le serveur émet une autorisation d'upload par fichier :
+     - POST présigné (policy : taille max + Content-Type imposés), ou
+     - upload multipart (gros scans) : une URL PUT présignée par part.
+   Chaque autorisation est accompagnée d'un jeton signé décrivant la clé attendue.
+2. Après l'upload, le client renvoie les jetons ; le serveur termine les
+   multiparts éventuels puis vérifie chaque objet (HEAD) avant d'enregistrer.
+
+Chaque usage (UPLOAD_PURPOSES) a son propre sel et son bucket : un jeton de CV
+est refusé par la finalisation des documents, et inversement. Un jeton reste
+rejouable jusqu'à TOKEN_MAX_AGE ; les vues rendent la finalisation idempotente
+(même clé d'objet → même enregistrement).
+
+Le serveur ne transporte plus les octets des fichiers.
+"""
+import logging
+import math
+import uuid
+from typing import Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+from django.conf import settings
+from django.core import signing
+
+from .s3_client import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_EXPIRES_IN = 900              # 15 min pour téléverser
+TOKEN_MAX_AGE = 24 * 3600            # jeton de finalisation valable 24h
+MULTIPART_THRESHOLD = 50 * 1024 * 1024
+PART_SIZE = 16 * 1024 * 1024         # S3 : 5 Mo minimum par part (hors dernière)
+MAX_PARTS = 10000
+
+_TOKEN_SALT = "api.utils.cloud.scw.uploads"
+
+# Usage du jeton → bucket autorisé
+DOCUMENT_UPLOAD = "document"
+CV_UPLOAD = "cv"
+UPLOAD_PURPOSES = {
+    DOCUMENT_UPLOAD: "documents",
+    CV_UPLOAD: "candidates",
+}
+
+
+def _salt(purpose: str) -> str:
+    return f"{_TOKEN_SALT}:{purpose}"
+
+
+class UploadError(Exception):
+    """Autorisation ou finalisation d'upload refusée."""
+
+
+def unique_key(filename: str) -> str:
+    """Ajoute un suffixe aléatoire : un upload direct ne doit jamais écraser un objet existant."""
+    base, ext = filename.rsplit(".", 1) if "." in filename else (filename, "")
+    suffix = uuid.uuid4().hex[:8]
+    return f"{base}_{suffix}.{ext}" if ext else f"{base}_{suffix}"
+
+
+def object_url(bucket_key: str, key: str) -> str:
+    """URL publique au même format que api.utils.cloud.storage."""
+    endpoint = getattr(settings, "AWS_S3_ENDPOINT_URL", "")
+    return f"{endpoint}/{settings.SCW_BUCKETS[bucket_key]}/{key}"
+
+
+# ──────────────────────────────────────────────
+# 1. AUTORISATIONS
+# ──────────────────────────────────────────────
+
+def issue_upload(
+    purpose: str,
+    key: str,
+    content_type: str,
+    size: int,
+    max_size: int,
+    payload: Optional[dict] = None,
+) -> dict:
+    """
+    Autorise l'upload d'un fichier de `size` octets sous `key`, dans le bucket
+    de `purpose` (UPLOAD_PURPOSES). Bascule en multipart au-delà de MULTIPART_THRESHOLD.
+    `payload` est recopié dans le jeton (ex : client, type de document).
+    """
+    bucket_key = UPLOAD_PURPOSES[purpose]
+    if size <= 0 or size > max_size:
+        raise UploadError(f"Taille invalide ({size} octets, maximum {max_size}).")
+
+    s3 = get_s3_client()
+    bucket = settings.SCW_BUCKETS[bucket_key]
+    claims = {
+        "bucket": bucket_key,
+        "key": key,
+        "content_type": content_type,
+        "max_size": max_size,
+        **(payload or {}),
+    }
+
+    if size <= MULTIPART_THRESHOLD:
+        post = s3.generate_presigned_post(
+            Bucket=bucket,
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_size],
+            ],
+            ExpiresIn=UPLOAD_EXPIRES_IN,
+        )
+        return {
+            "method": "POST",
+            "key": key,
+            "url": post["url"],
+            "fields": post["fields"],
+            "token": signing.dumps(claims, salt=_salt(purpose)),
+        }
+
+    part_count = math.ceil(size / PART_SIZE)
+    if part_count > MAX_PARTS:
+        raise UploadError("Fichier trop volumineux pour un upload multipart.")
+
+    upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)["UploadId"]
+    parts = [
+        {
+            "part_number": number,
+            "url": s3.generate_presigned_url(
+                "upload_part",
+                Params={"Bucket": bucket, "Key": key, "UploadId": upload_id, "PartNumber": number},
+                ExpiresIn=UPLOAD_EXPIRES_IN,
+            ),
+        }
+        for number in range(1, part_count + 1)
+    ]
+    claims["upload_id"] = upload_id
+    return {
+        "method": "MULTIPART",
+        "key": key,
+        "upload_id": upload_id,
+        "part_size": PART_SIZE,
+        "parts": parts,
+        "token": signing.dumps(claims, salt=_salt(purpose)),
+    }
+
+
+# ──────────────────────────────────────────────
+# 2. FINALISATION
+# ──────────────────────────────────────────────
+
+def read_token(token: str, purpose: str) -> dict:
+    """Claims d'un jeton émis pour `purpose` ; refuse les jetons d'un autre usage ou d'un autre bucket."""
+    if not isinstance(token, str) or not token:
+        raise UploadError("Jeton d'upload requis.")
+    try:
+        claims = signing.loads(token, salt=_salt(purpose), max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        raise UploadError("Jeton d'upload invalide ou expiré.")
+    if not isinstance(claims, dict) or claims.get("bucket") != UPLOAD_PURPOSES[purpose]:
+        raise UploadError("Jeton d'upload émis pour un autre usage.")
+    return claims
+
+
+def claims_url(claims: dict) -> str:
+    """URL de l'objet décrit par un jeton (clé de l'enregistrement, pour l'idempotence)."""
+    return object_url(claims["bucket"], claims["key"])
+
+
+def finalize_upload(claims: dict, parts: Optional[list] = None) -> dict:
+    """
+    Termine l'upload décrit par `claims` (read_token) et vérifie l'objet (HEAD).
+    `parts` : [{"part_number", "etag"}] pour un upload multipart.
+    Retourne les claims du jeton enrichies de `url` et `size`.
+    Un objet non conforme (taille, type) est supprimé du bucket.
+    """
+    s3 = get_s3_client()
+    bucket = settings.SCW_BUCKETS[claims["bucket"]]
+    key = claims["key"]
+
+    try:
+        if claims.get("upload_id"):
+            s3.complete_multipart_upload(
+                Bucket=bucket,
+                Key=key,
+                UploadId=claims["upload_id"],
+                MultipartUpload={"Parts": _completed_parts(parts)},
+            )
+        head = s3.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        raise UploadError(f"Objet introuvable ou upload incomplet ({key}) : {e}")
+    except BotoCoreError as e:
+        raise UploadError(f"Stockage indisponible : {e}")
+
+    size = head.get("ContentLength", 0)
+    content_type = head.get("ContentType", "")
+    if not 0 < size <= claims["max_size"] or content_type != claims["content_type"]:
+        try:
+            s3.delete_object(Bucket=bucket, Key=key)
+        except (BotoCoreError, ClientError) as e:
+            logger.warning("⚠️ Objet non conforme non supprimé %s/%s : %s", bucket, key, e)
+        raise UploadError(f"Objet non conforme ({key}) : {size} octets, type {content_type!r}.")
+
+    return {**claims, "url": claims_url(claims), "size": size}
+
+
+def _completed_parts(parts) -> list:
+    try:
+        completed = [{"PartNumber": int(p["part_number"]), "ETag": str(p["etag"])} for p in parts]
+    except (KeyError, TypeError, ValueError):
+        completed = []
+    if not completed:
+        raise UploadError("Liste des parts requise pour un upload multipart.")
+    return sorted(completed, key=lambda p: p["PartNumber"])
+
+
+def abort_upload(claims: dict) -> None:
+    """Abandonne un upload multipart (libère les parts déjà stockées)."""
+    if not claims.get("upload_id"):
+        return
+    s3 = get_s3_client()
+    try:
+        s3.abort_multipart_upload(
+            Bucket=settings.SCW_BUCKETS[claims["bucket"]],
+            Key=claims["key"],
+            UploadId=claims["upload_id"],
+        )
+    except ClientError as e:
+        raise UploadError(f"Upload multipart introuvable ({claims['key']}) : {e}")
+    except BotoCoreError as e:
+        raise UploadError(f"Stockage indisponible : {e}")
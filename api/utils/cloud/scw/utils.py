@@ -1,11 +1,14 @@
+import logging
 import mimetypes
 import os
-from urllib.parse import urlparse
+from urllib.parse import unquote, urlparse
 
 from django.conf import settings
 
 from api.utils.cloud.scw.s3_client import get_s3_client
 
+logger = logging.getLogger(__name__)
+
 
 def download_file_from_s3(bucket_key: str, key: str) -> tuple[bytes, str]:
     """
@@ -35,37 +38,31 @@ def extract_s3_key_from_url(url: str) -> str:
     raise ValueError("Impossible d’extraire la clé S3 depuis l’URL donnée")
 
 
-# Dans utils.py, ajoute des logs :
 def extract_bucket_key_from_url(bucket_key: str, url: str) -> str | None:
     """
     Extrait la clé S3 depuis une URL complète ou un chemin partiel.
+    Une valeur qui n'est pas une URL (ex : avatar) est déjà une clé.
     """
     if not url:
         return None
 
-    bucket_name = settings.SCW_BUCKETS[bucket_key]
-    parsed = urlparse(url)
-    path = parsed.path
+    if not url.startswith(("http://", "https://")):
+        return url.lstrip("/") or None
 
-    print(f"🔍 [DEBUG] URL reçue : {url}")
-    print(f"🔍 [DEBUG] Bucket attendu : {bucket_name}")
-    print(f"🔍 [DEBUG] Path extrait : {path}")
+    bucket_name = settings.SCW_BUCKETS[bucket_key]
+    path = unquote(urlparse(url).path)
 
     # Exemple : /contracts/nkue-takoumba_marc-junior_5/contrat_123.pdf
     # On veut : nkue-takoumba_marc-junior_5/contrat_123.pdf
-
     split_token = f"/{bucket_name}/"
     if split_token in path:
-        key = path.split(split_token, 1)[1]
-        print(f"✅ [DEBUG] Clé extraite : {key}")
-        return key.lstrip("/")
+        return path.split(split_token, 1)[1].lstrip("/")
 
     # Fallback : prendre tout après le premier /
     parts = path.strip("/").split("/", 1)
     if len(parts) >= 2:
-        key = parts[1]
-        print(f"⚠️ [DEBUG] Clé extraite (fallback) : {key}")
-        return key
+        logger.debug("Clé S3 extraite (fallback) : %s → %s", url, parts[1])
+        return parts[1]
 
-    print(f"❌ [DEBUG] Impossible d'extraire la clé")
+    logger.warning("⚠️ Impossible d'extraire la clé S3 de : %s", url)
     return None
@@ -0,0 +1,102 @@
+"""
+Écriture d'archives ZIP en flux.
+
+L'archive n'est jamais construite en mémoire : le contenu de chaque entrée
+(octets, ou itérable de morceaux comme Body.iter_chunks() de S3) est écrit
+dans un tampon vidé vers le client à chaque morceau (descripteurs de données
+ZIP, le flux n'a pas besoin d'être seekable). La mémoire consommée est bornée
+par la taille d'un morceau, pas par celle des entrées ni de l'archive.
+
+Sous ASGI, StreamingHttpResponse matérialise un itérateur synchrone en liste
+avant l'envoi : aiter_in_thread() le transforme en itérateur asynchrone qui
+avance d'un morceau à la fois dans un thread.
+
+Usage :
+    entries = [("a.pdf", b"..."), ("b.txt", body.iter_chunks())]
+    response = StreamingHttpResponse(stream_zip(entries), content_type="application/zip")
+"""
+import time
+import zipfile
+from typing import AsyncIterator, Iterable, Iterator, Tuple, Union
+
+from asgiref.sync import sync_to_async
+
+# Formats déjà compressés : les re-compresser coûte du CPU pour un gain nul
+STORED_EXTENSIONS = {
+    "pdf", "jpg", "jpeg", "png", "gif", "webp", "heic", "heif",
+    "zip", "gz", "7z", "rar", "docx", "xlsx", "pptx", "odt", "ods", "mp3", "mp4",
+}
+
+
+class _StreamSink:
+    """Fichier en écriture seule, non seekable : ZipFile y écrit, le générateur le vide."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def compression_for(filename: str) -> int:
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    return zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def stream_zip(entries: Iterable[Tuple[str, Union[bytes, Iterable[bytes]]]]) -> Iterator[bytes]:
+    """
+    Génère les octets d'une archive ZIP à partir de couples (nom, contenu),
+    dans l'ordre de `entries`. Les entrées et leurs morceaux sont consommés
+    paresseusement.
+    """
+    sink = _StreamSink()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(sink, mode="w", allowZip64=True) as zf:
+        for name, content in entries:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = compression_for(name)
+            info.external_attr = 0o644 << 16
+            if isinstance(content, (bytes, bytearray)):
+                info.file_size = len(content)
+                content = (content,)
+            # Taille inconnue d'avance : en-têtes ZIP64 pour les entrées > 4 Go
+            with zf.open(info, mode="w", force_zip64=not info.file_size) as entry:
+                for part in content:
+                    entry.write(part)
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    # Répertoire central, écrit à la fermeture
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+_DONE = object()
+
+
+async def aiter_in_thread(iterator: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Itérateur asynchrone sur un générateur bloquant (S3, compression), un morceau par appel."""
+    step = sync_to_async(next, thread_sensitive=False)
+    try:
+        while True:
+            chunk = await step(iterator, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=False)()
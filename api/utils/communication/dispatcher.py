@@ -1,6 +1,7 @@
 import logging
 from typing import Optional, Dict, Any
 from django.conf import settings
+from api.core.rate_limit import OVH_SMS, RateLimited, RateLimiter
 from api.sms.sender import send_sms
 from api.sms.utils import build_sms, normalize_phone
 from api.utils.email.config import send_html_email, _base_context
@@ -29,6 +30,15 @@ class CommunicationDispatcher:
         email_sent = False
         sms_sent = False
 
+        # 0. Double envoi : jeton SMS réservé avant l'email (RateLimited → tâche
+        # reportée sans avoir rien envoyé, pas d'email en double à la reprise)
+        sms_reserved = False
+        if force_both and lead.phone and sms_body:
+            clean_phone = normalize_phone(lead.phone)
+            if clean_phone:
+                RateLimiter.reserve(OVH_SMS, clean_phone)
+                sms_reserved = True
+
         # 1. Tentative EMAIL
         if lead.email:
             try:
@@ -69,7 +79,8 @@ class CommunicationDispatcher:
                     final_sms = build_sms(sms_body)
                     send_sms(
                         message=final_sms,
-                        receivers=[clean_phone]
+                        receivers=[clean_phone],
+                        reserved=sms_reserved,
                     )
                     sms_sent = True
                     logger.info(f"📲 Notification SMS envoyée à {clean_phone}")
@@ -91,6 +102,8 @@ class CommunicationDispatcher:
                     )
                 else:
                     logger.warning(f"⚠️ Numéro de téléphone invalide pour lead #{lead.id}: {lead.phone}")
+            except RateLimited:
+                raise
             except Exception as e:
                 logger.error(f"❌ Erreur envoi SMS ({template_prefix}) pour lead #{lead.id}: {e}")
 
@@ -2,7 +2,8 @@ import logging
 from datetime import timedelta
 from django.utils import timezone
 from django.db.models import Q
-from django_q.tasks import async_task
+from api.core.rate_limit import defer_when_limited
+from api.core.task_lanes import async_task
 from api.contracts.models import Contract
 from api.utils.communication.dispatcher import CommunicationDispatcher
 
@@ -31,6 +32,7 @@ def run_payment_reminders():
     logger.info(f"⏳ {count} rappels de paiement planifiés pour le {target_date}")
     return f"{count} reminders scheduled"
 
+@defer_when_limited
 def _run_send_payment_reminder(contract_id: int):
     contract = Contract.objects.select_related("client__lead").get(id=contract_id)
     lead = contract.client.lead
@@ -3,7 +3,7 @@
 
 import logging
 
-from django_q.tasks import async_task
+from api.core.task_lanes import async_task
 
 logger = logging.getLogger(__name__)
 
@@ -1,7 +1,9 @@
 import logging
+from email.utils import make_msgid
 
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
+from django.core.mail.utils import DNS_NAME
 from django.template.loader import render_to_string
 from django.utils import timezone
 
@@ -13,18 +15,21 @@ logger = logging.getLogger(__name__)
 def send_html_email(to_email, subject, template_name, context, attachments=None):
     """
     Envoie un email HTML à l'adresse fournie.
+    Retourne le Message-ID (identifiant fournisseur gardé par l'outbox), None sans adresse.
     """
     if not to_email:
         logger.warning("Aucun email fourni.")
-        return
+        return None
 
     html_content = render_to_string(template_name, context)
+    message_id = make_msgid(domain=str(DNS_NAME))
 
     msg = EmailMultiAlternatives(
         subject=subject,
         body="",
         from_email=settings.DEFAULT_FROM_EMAIL,
         to=[to_email],
+        headers={"Message-ID": message_id},
     )
     msg.attach_alternative(html_content, "text/html")
 
@@ -60,6 +65,8 @@ def send_html_email(to_email, subject, template_name, context, attachments=None)
     except Exception as e:
         logger.error(f"❌ Erreur lors du log de l'événement email : {e}")
 
+    return message_id
+
 
 # ================================
 # Branding : Papiers Express
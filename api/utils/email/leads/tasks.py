@@ -3,10 +3,12 @@
 import logging
 from datetime import timedelta
 
+from django.db import transaction
 from django.utils import timezone
-from django_q.tasks import async_task
 
 from api.leads.models import Lead
+from api.notification_outbox.services import NotificationOutbox
+from api.core.reference_data import lead_statuses
 from api.leads.constants import RDV_CONFIRME, RDV_PLANIFIE
 
 from api.utils.email import send_appointment_confirmation_email
@@ -55,8 +57,9 @@ def _run_send_appointment_confirmation(lead_id: int, **kwargs):
     """Worker - Envoi email confirmation RDV"""
     lead = _get_lead(lead_id, "email_confirmation")
     if lead and lead.email:
-        send_appointment_confirmation_email(lead)
+        message_id = send_appointment_confirmation_email(lead)
         logger.info("📧 Confirmation envoyée → %s (lead #%s)", lead.email, lead.id)
+        return message_id
     elif lead and not lead.email:
         logger.warning("📧 Lead #%s n'a pas d'email - confirmation ignorée", lead.id)
 
@@ -65,8 +68,9 @@ def _run_send_appointment_planned(lead_id: int, **kwargs):
     """Worker - Email RDV planifié"""
     lead = _get_lead(lead_id, "email_planned")
     if lead and lead.email:
-        send_appointment_planned_email(lead)
+        message_id = send_appointment_planned_email(lead)
         logger.info("📅 RDV planifié → %s (lead #%s)", lead.email, lead.id)
+        return message_id
     elif lead and not lead.email:
         logger.warning("📅 Lead #%s n'a pas d'email - RDV planifié ignoré", lead.id)
 
@@ -75,11 +79,12 @@ def _run_send_dossier_status_notification(lead_id: int, **kwargs):
     """Worker - Notification statut dossier"""
     lead = _get_lead(lead_id, "email_dossier_status")
     if lead and lead.statut_dossier and lead.email:
-        send_dossier_status_email(lead)
+        message_id = send_dossier_status_email(lead)
         logger.info(
             "📨 Statut dossier '%s' envoyé à %s (lead #%s)",
             lead.statut_dossier.label, lead.email, lead.id,
         )
+        return message_id
     elif lead and not lead.email:
         logger.warning("📨 Lead #%s n'a pas d'email - statut dossier ignoré", lead.id)
 
@@ -88,8 +93,9 @@ def _run_send_formulaire(lead_id: int, **kwargs):
     """Worker - Envoi formulaire"""
     lead = _get_lead(lead_id, "email_formulaire")
     if lead and lead.email:
-        send_formulaire_email(lead)
+        message_id = send_formulaire_email(lead)
         logger.info("📤 Formulaire envoyé à %s (lead #%s)", lead.email, lead.id)
+        return message_id
     elif lead and not lead.email:
         logger.warning("📤 Lead #%s n'a pas d'email - formulaire ignoré", lead.id)
 
@@ -102,8 +108,9 @@ def _run_send_jurist_assigned_notification(lead_id: int, jurist_id: int, **kwarg
     jurist = User.objects.filter(id=jurist_id).first()
 
     if lead and jurist and lead.email:
-        send_jurist_assigned_email(lead, jurist)
+        message_id = send_jurist_assigned_email(lead, jurist)
         logger.info("📩 Juriste %s assigné → %s (lead #%s)", jurist.email, lead.email, lead.id)
+        return message_id
     elif lead and not lead.email:
         logger.warning("📩 Lead #%s n'a pas d'email - assignation juriste ignorée", lead.id)
     elif lead and not jurist:
@@ -118,8 +125,9 @@ def _run_send_avocat_assigned_notification(lead_id: int, avocat_id: int, **kwarg
     avocat = User.objects.filter(id=avocat_id).first()
 
     if lead and avocat and avocat.email:
-        send_avocat_assigned_email(lead, avocat)
+        message_id = send_avocat_assigned_email(lead, avocat)
         logger.info("📩 Avocat %s assigné → Email envoyé à l'avocat (lead #%s)", avocat.email, lead.id)
+        return message_id
     elif not avocat:
         logger.warning("📩 Avocat #%s introuvable - assignation ignorée", avocat_id)
     elif not avocat.email:
@@ -130,8 +138,9 @@ def _run_send_appointment_absent(lead_id: int, **kwargs):
     """Worker - Email d'absence au rendez-vous"""
     lead = _get_lead(lead_id, "email_absent")
     if lead and lead.email:
-        send_appointment_absent_email(lead)
+        message_id = send_appointment_absent_email(lead)
         logger.info("❌ ABSENT email → %s (lead #%s)", lead.email, lead.id)
+        return message_id
     elif lead and not lead.email:
         logger.warning("❌ Lead #%s n'a pas d'email - email absent ignoré", lead.id)
 
@@ -140,8 +149,9 @@ def _run_send_appointment_reminder(lead_id: int, **kwargs):
     """Worker - Email de rappel de rendez-vous"""
     lead = _get_lead(lead_id, "email_reminder")
     if lead and lead.email:
-        send_appointment_reminder_email(lead)
+        message_id = send_appointment_reminder_email(lead)
         logger.info("⏰ Reminder email → %s (lead #%s)", lead.email, lead.id)
+        return message_id
     elif lead and not lead.email:
         logger.warning("⏰ Lead #%s n'a pas d'email - reminder ignoré", lead.id)
 
@@ -150,133 +160,71 @@ def _run_send_visio_payment(lead_id: int, **kwargs):
     """Worker - Email de paiement visio"""
     lead = _get_lead(lead_id, "email_visio_payment")
     if lead and lead.email:
-        send_visio_payment_email(lead)
+        message_id = send_visio_payment_email(lead)
         logger.info("💳 Paiement visio envoyé → %s (lead #%s)", lead.email, lead.id)
+        return message_id
     elif lead and not lead.email:
         logger.warning("💳 Lead #%s n'a pas d'email - paiement visio ignoré", lead.id)
 
 
 # ================================================================
 # DISPATCHERS (API PUBLIQUE)
+# Écrivent la notification dans l'outbox, dans la transaction de
+# l'appelant ; le relais l'envoie après le commit, une fois par fenêtre.
 # ================================================================
 
 def send_appointment_confirmation_task(lead_id: int, countdown: int = 0):
     """Planifie l'envoi d'email de confirmation"""
-    kwargs = {"group": "emails"}
-    if countdown:
-        kwargs["scheduled"] = timezone.now() + timedelta(seconds=countdown)
-
-    async_task(
-        "api.utils.email.leads.tasks._run_send_appointment_confirmation",
-        lead_id,
-        **kwargs,
-    )
+    NotificationOutbox.enqueue("email.appointment_confirmation", lead_id, countdown=countdown)
 
 
 def send_appointment_planned_task(lead_id: int, countdown: int = 0):
     """Planifie l'envoi d'email de RDV planifié"""
-    kwargs = {"group": "emails"}
-    if countdown:
-        kwargs["scheduled"] = timezone.now() + timedelta(seconds=countdown)
-
-    async_task(
-        "api.utils.email.leads.tasks._run_send_appointment_planned",
-        lead_id,
-        **kwargs,
-    )
+    NotificationOutbox.enqueue("email.appointment_planned", lead_id, countdown=countdown)
 
 
 def send_dossier_status_notification_task(lead_id: int, countdown: int = 0):
     """Planifie l'envoi de notification de statut dossier"""
-    kwargs = {"group": "emails"}
-    if countdown:
-        kwargs["scheduled"] = timezone.now() + timedelta(seconds=countdown)
-
-    async_task(
-        "api.utils.email.leads.tasks._run_send_dossier_status_notification",
-        lead_id,
-        **kwargs,
-    )
+    NotificationOutbox.enqueue("email.dossier_status", lead_id, countdown=countdown)
 
 
 def send_formulaire_task(lead_id: int, countdown: int = 0):
     """Planifie l'envoi de formulaire"""
-    kwargs = {"group": "emails"}
-    if countdown:
-        kwargs["scheduled"] = timezone.now() + timedelta(seconds=countdown)
-
-    async_task(
-        "api.utils.email.leads.tasks._run_send_formulaire",
-        lead_id,
-        **kwargs,
-    )
+    NotificationOutbox.enqueue("email.formulaire", lead_id, countdown=countdown)
 
 
 def send_jurist_assigned_notification_task(lead_id: int, jurist_id: int, countdown: int = 0):
     """Planifie la notification d'assignation de juriste"""
-    kwargs = {"group": "emails"}
-    if countdown:
-        kwargs["scheduled"] = timezone.now() + timedelta(seconds=countdown)
-
-    async_task(
-        "api.utils.email.leads.tasks._run_send_jurist_assigned_notification",
-        lead_id,
-        jurist_id,
-        **kwargs,
-    )
+    NotificationOutbox.enqueue("email.jurist_assigned", lead_id, jurist_id, countdown=countdown)
 
 
 def send_avocat_assigned_notification_task(lead_id: int, avocat_id: int, countdown: int = 0):
     """Planifie la notification d'assignation d'avocat"""
-    kwargs = {"group": "emails"}
-    if countdown:
-        kwargs["scheduled"] = timezone.now() + timedelta(seconds=countdown)
-
-    async_task(
-        "api.utils.email.leads.tasks._run_send_avocat_assigned_notification",
-        lead_id,
-        avocat_id,
-        **kwargs,
+    NotificationOutbox.enqueue("email.avocat_assigned", lead_id, avocat_id, countdown=countdown)
+
+
+def send_avocat_assigned_notification_batch_task(pairs, countdown: int = 0):
+    """Planifie les notifications d'assignation d'avocat d'un lot en un seul INSERT"""
+    NotificationOutbox.enqueue_many(
+        "email.avocat_assigned",
+        [(lead_id, [avocat_id]) for lead_id, avocat_id in pairs],
+        countdown=countdown,
     )
 
 
 def send_appointment_absent_email_task(lead_id: int, countdown: int = 0):
     """Planifie l'envoi d'email d'absence"""
-    kwargs = {"group": "emails"}
-    if countdown:
-        kwargs["scheduled"] = timezone.now() + timedelta(seconds=countdown)
-
-    async_task(
-        "api.utils.email.leads.tasks._run_send_appointment_absent",
-        lead_id,
-        **kwargs,
-    )
+    NotificationOutbox.enqueue("email.appointment_absent", lead_id, countdown=countdown)
 
 
-def send_appointment_reminder_email_task(lead_id: int, countdown: int = 0):
-    """Planifie l'envoi d'email de rappel"""
-    kwargs = {"group": "emails"}
-    if countdown:
-        kwargs["scheduled"] = timezone.now() + timedelta(seconds=countdown)
-
-    async_task(
-        "api.utils.email.leads.tasks._run_send_appointment_reminder",
-        lead_id,
-        **kwargs,
-    )
+def send_appointment_reminder_email_task(lead_id: int, countdown: int = 0, window: str = ""):
+    """Planifie l'envoi d'email de rappel (`window` : « 48h », « 24h »…)"""
+    NotificationOutbox.enqueue("email.appointment_reminder", lead_id, window=window, countdown=countdown)
 
 
 def send_visio_payment_task(lead_id: int, countdown: int = 0):
     """Planifie l'envoi d'email de paiement visio"""
-    kwargs = {"group": "emails"}
-    if countdown:
-        kwargs["scheduled"] = timezone.now() + timedelta(seconds=countdown)
-
-    async_task(
-        "api.utils.email.leads.tasks._run_send_visio_payment",
-        lead_id,
-        **kwargs,
-    )
+    NotificationOutbox.enqueue("email.visio_payment", lead_id, countdown=countdown)
 
 
 # ================================================================
@@ -286,39 +234,29 @@ def send_visio_payment_task(lead_id: int, countdown: int = 0):
 def send_mass_appointment_reminders():
     """
     Envoie des emails de rappel pour tous les RDV à venir
-    (48h et 24h avant)
+    (48h et 24h avant). Anti-doublon : clé outbox (lead, rappel, date du RDV).
     """
     now = timezone.now()
-    reminder_windows = [
-        (timedelta(hours=48), "48h", send_appointment_reminder_email_task),
-        (timedelta(hours=24), "24h", send_appointment_reminder_email_task),
-    ]
-
     tolerance = timedelta(minutes=5)
     total_sent = 0
 
-    for delta, label, task_func in reminder_windows:
+    for delta, label in ((timedelta(hours=48), "48h"), (timedelta(hours=24), "24h")):
         target_time = now + delta
-        window_start = target_time - tolerance
-        window_end = target_time + tolerance
-
-        leads = Lead.objects.filter(
-            appointment_date__gte=window_start,
-            appointment_date__lte=window_end,
-            status__code__in=[RDV_CONFIRME, RDV_PLANIFIE],
-            email__isnull=False,  # ⚠️ Important : filtre les emails null
-        ).exclude(email="")  # Exclut les emails vides
-
-        for lead in leads:
-            # Anti-doublon via last_reminder_sent
-            if lead.last_reminder_sent:
-                if (now - lead.last_reminder_sent) < timedelta(hours=20):
-                    continue
-
-            task_func(lead.id)
-            lead.last_reminder_sent = now
-            lead.save(update_fields=["last_reminder_sent"])
-            total_sent += 1
-            logger.info(f"Email rappel {label} envoyé pour lead #{lead.id}")
-
-    return f"{total_sent} emails de rappel envoyés"
\ No newline at end of file
+
+        lead_ids = list(
+            Lead.objects.filter(
+                appointment_date__gte=target_time - tolerance,
+                appointment_date__lte=target_time + tolerance,
+                status_id__in=lead_statuses.ids_for(RDV_CONFIRME, RDV_PLANIFIE),
+                email__isnull=False,  # ⚠️ Important : filtre les emails null
+            ).exclude(email="").values_list("id", flat=True)
+        )
+
+        with transaction.atomic():
+            queued = NotificationOutbox.enqueue_many("email.appointment_reminder", lead_ids, window=label)
+            Lead.objects.filter(id__in=queued).update(last_reminder_sent=now)
+
+        total_sent += len(queued)
+        logger.info("Email rappel %s mis en file pour %d lead(s)", label, len(queued))
+
+    return f"{total_sent} emails de rappel envoyés"
@@ -0,0 +1,25 @@
+"""
+Client Redis brut partagé (web et workers), pour les structures que l'API du
+cache Django n'expose pas (hash, scripts Lua, pipelines).
+"""
+from typing import Optional
+
+import redis
+from django.conf import settings
+
+_client: Optional[redis.Redis] = None
+
+
+def new_redis(**options) -> redis.Redis:
+    """Nouveau client sur REDIS_URL (options SSL du projet, `options` en surcharge)."""
+    if getattr(settings, "IS_REDIS_SSL", False):
+        options.setdefault("ssl_cert_reqs", None)
+    return redis.Redis.from_url(settings.REDIS_URL, **options)
+
+
+def get_redis() -> redis.Redis:
+    """Client unique par process (pool de connexions interne à redis-py)."""
+    global _client
+    if _client is None:
+        _client = new_redis(socket_timeout=2)
+    return _client
@@ -0,0 +1,11 @@
+# consumers/whatsapp.py
+
+from .base import BaseConsumer
+
+
+class WhatsAppConsumer(BaseConsumer):
+    """
+    Groupe unique 'whatsapp' : événements de la messagerie (ex. lot de statuts
+    de livraison « whatsapp_statuses_changed »).
+    """
+    group_prefix = "whatsapp"
@@ -6,6 +6,8 @@ from django.conf import settings
 import jwt
 from django.contrib.auth import get_user_model
 
+from api.custom_auth.user_cache import get_cached_user
+
 User = get_user_model()
 
 @database_sync_to_async
@@ -14,8 +16,8 @@ def get_user_from_token(token):
         # On utilise la clé secrète de Django pour décoder le JWT
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
         user_id = payload.get("user_id")
-        return User.objects.get(id=user_id)
-    except (jwt.ExpiredSignatureError, jwt.DecodeError, User.DoesNotExist):
+        return get_cached_user(user_id) or AnonymousUser()
+    except (jwt.ExpiredSignatureError, jwt.DecodeError):
         return AnonymousUser()
 
 class JWTAuthMiddleware:
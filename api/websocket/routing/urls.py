@@ -2,6 +2,7 @@ from django.urls import re_path
 from api.websocket.consumers.leads import LeadConsumer
 from api.websocket.consumers.clients import ClientRoomConsumer
 from api.websocket.consumers.health import HealthCheckConsumer
+from api.websocket.consumers.whatsapp import WhatsAppConsumer
 
 websocket_urlpatterns = [
     # 🔥 Health ping/pong
@@ -13,4 +14,7 @@ websocket_urlpatterns = [
 
     # 🔥 Client rooms
     re_path(r"^ws/client/(?P<client_id>\d+)/?$", ClientRoomConsumer.as_asgi()),
+
+    # 🔥 WhatsApp (statuts de livraison groupés)
+    re_path(r"^ws/whatsapp/?$", WhatsAppConsumer.as_asgi()),
 ]
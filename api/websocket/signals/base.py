@@ -4,6 +4,8 @@ from asgiref.sync import async_to_sync
 import json
 import logging
 
+from api.leads import search_cache
+
 logger = logging.getLogger(__name__)
 
 def safe_payload(event: str, instance, serializer_class, extra: dict = None):
@@ -14,6 +16,10 @@ def safe_payload(event: str, instance, serializer_class, extra: dict = None):
     }
 
 def broadcast(groups, payload: dict):
+    # Les écrans sont notifiés : les recherches de leads en cache sont périmées
+    if any(group and search_cache.is_lead_group(group) for group in groups):
+        search_cache.invalidate()
+
     channel_layer = get_channel_layer()
     text = json.dumps(payload)
 
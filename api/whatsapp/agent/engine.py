@@ -48,10 +48,11 @@ def _get_gemini_client():
     global _gemini_client
     if _gemini_client is None:
         from google import genai
+        from api.gemini.gemini_service import client_options
         api_key = getattr(settings, "GEMINI_API_KEY", None)
         if not api_key:
             raise ValueError("GEMINI_API_KEY manquante dans les settings Django")
-        _gemini_client = genai.Client(api_key=api_key)
+        _gemini_client = genai.Client(api_key=api_key, **client_options())
         logger.info("Client Gemini initialisé (singleton)")
     return _gemini_client
 
@@ -414,7 +415,7 @@ def _dispatch_lead_creation(data: dict, sender_phone: str) -> dict:
 
     if use_async:
         try:
-            from django_q.tasks import async_task
+            from api.core.task_lanes import async_task
             async_task(
                 "api.whatsapp.lead_service.create_lead_async",
                 first_name=first_name,
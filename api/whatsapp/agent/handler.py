@@ -13,6 +13,7 @@ from django.conf import settings
 from django.core.cache import cache
 from django.db import transaction
 
+from api.core.rate_limit import defer_when_limited
 from api.leads.models import Lead
 
 from .prompt import (
@@ -45,10 +46,11 @@ def _get_gemini_client():
     global _gemini_client
     if _gemini_client is None:
         from google import genai
+        from api.gemini.gemini_service import client_options
         api_key = getattr(settings, "GEMINI_API_KEY", None)
         if not api_key:
             raise ValueError("GEMINI_API_KEY manquante dans les settings Django")
-        _gemini_client = genai.Client(api_key=api_key)
+        _gemini_client = genai.Client(api_key=api_key, **client_options())
         logger.info("Client Gemini initialisé (singleton)")
     return _gemini_client
 
@@ -350,7 +352,7 @@ def _dispatch_lead_creation(data: dict, sender_phone: str) -> dict:
 
     if use_async:
         try:
-            from django_q.tasks import async_task
+            from api.core.task_lanes import async_task
             async_task(
                 "api.whatsapp.lead_service.create_lead_async",
                 first_name=first_name,
@@ -559,6 +561,42 @@ def _collect_recent_messages(sender_phone: str, lead, since_seconds: int = 8) ->
     return grouped
 
 
+# ─── Envoi de la réponse ──────────────────────────────────────────────────────
+
+@defer_when_limited
+def send_agent_reply(to_phone: str, reply_text: str, lead_id: Optional[int] = None):
+    """
+    Envoie la réponse Kemia via Meta puis l'enregistre. Débit Meta atteint :
+    l'envoi est replanifié à l'échéance du prochain jeton, sans bloquer le
+    worker ni régénérer la réponse.
+    """
+    meta_response = send_whatsapp_message(to_phone, reply_text)
+
+    outbound_wa_id = (
+        meta_response.get("messages", [{}])[0].get("id")
+        or f"out_{to_phone}"
+    )
+    logger.info("WhatsApp envoyé | wa_id=%s | to=%s", outbound_wa_id, to_phone)
+
+    with transaction.atomic():
+        saved = WhatsAppMessage.objects.create(
+            wa_id=outbound_wa_id,
+            lead_id=lead_id,
+            sender_phone=to_phone,
+            body=reply_text,
+            is_outbound=True,
+            is_read=True,
+            delivery_status="sent",
+        )
+
+    return {
+        "status": "sent",
+        "message_id": saved.id,
+        "wa_id": outbound_wa_id,
+        "lead_id": lead_id,
+    }
+
+
 # ─── Wrapper appelé par Django-Q2 ─────────────────────────────────────────────
 
 def trigger_agent_response(
@@ -577,7 +615,8 @@ def trigger_agent_response(
       3. Typing indicator.
       4. Regroupage burst.
       5. Génération réponse Gemini.
-      6. Envoi Meta + sauvegarde BDD.
+      6. Envoi Meta + sauvegarde BDD (send_agent_reply, replanifié si le
+         débit Meta est atteint).
     """
     logger.info(
         "trigger_agent_response START | phone=%s | lead_id=%s | wa_message_id=%s | debounce_token=%s",
@@ -698,7 +737,7 @@ def trigger_agent_response(
                     lead_result.get("lead_id"),
                 )
 
-        # ── 9) Envoi WhatsApp ─────────────────────────────────────────────────
+        # ── 9) Envoi WhatsApp + sauvegarde BDD ────────────────────────────────
         to_phone = normalize_phone_for_meta(sender_phone)
         logger.info("Envoi WhatsApp | to=%s | chars=%d", to_phone, len(reply_text))
 
@@ -716,37 +755,16 @@ def trigger_agent_response(
                 send_whatsapp_typing_indicator(wa_message_id or f"type_{to_phone}")
             time.sleep(1)
 
-        meta_response = send_whatsapp_message(to_phone, reply_text)
-
-        outbound_wa_id = (
-            meta_response.get("messages", [{}])[0].get("id")
-            or f"out_{to_phone}"
-        )
-        logger.info("WhatsApp envoyé | wa_id=%s | to=%s", outbound_wa_id, to_phone)
-
-        # ── 10) Sauvegarde BDD ────────────────────────────────────────────────
-        with transaction.atomic():
-            saved = WhatsAppMessage.objects.create(
-                wa_id=outbound_wa_id,
-                lead=lead,
-                sender_phone=to_phone,
-                body=reply_text,
-                is_outbound=True,
-                is_read=True,
-                delivery_status="sent",
-            )
+        sent = send_agent_reply(to_phone, reply_text, getattr(lead, "id", None))
+        if not isinstance(sent, dict):  # débit Meta atteint : envoi replanifié
+            logger.info("Réponse Kemia replanifiée | phone=%s | %s", to_phone, sent)
+            return {"status": "deferred", "lead_id": getattr(lead, "id", None)}
 
         logger.info(
             "trigger_agent_response SUCCESS | db_id=%s | wa_id=%s | phone=%s | lead_id=%s",
-            saved.id, outbound_wa_id, to_phone, getattr(lead, "id", None),
+            sent["message_id"], sent["wa_id"], to_phone, getattr(lead, "id", None),
         )
-
-        return {
-            "status": "sent",
-            "message_id": saved.id,
-            "wa_id": outbound_wa_id,
-            "lead_id": getattr(lead, "id", None),
-        }
+        return sent
 
     except Exception as exc:
         logger.exception(
@@ -235,6 +235,7 @@ def create_lead_from_kemora(
     Crée (ou met à jour) un Lead depuis les données collectées par Kemia.
     """
     try:
+        from api.core.reference_data import lead_statuses
         from api.lead_status.models import LeadStatus
         from api.leads.constants import LeadSource
         from api.leads.models import Lead
@@ -321,7 +322,7 @@ def create_lead_from_kemora(
 
             # ── Création ──────────────────────────────────────────────────────────
             try:
-                default_status = LeadStatus.objects.get(code=RDV_A_CONFIRMER)
+                default_status = lead_statuses.get(RDV_A_CONFIRMER)
             except LeadStatus.DoesNotExist:
                 default_status = LeadStatus.objects.order_by("id").first()
 
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.7 on 2026-10-19 04:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0020_lead_composite_filter_indexes'),
+        ('whatsapp', '0004_whatsappmessage_created_at_and_more'),
+    ]
+
+    operations = [
+        # Clé de partitionnement : jamais nulle
+        migrations.RunSQL(
+            "UPDATE whatsapp_whatsappmessage SET timestamp = coalesce(created_at, now()) WHERE timestamp IS NULL",
+            migrations.RunSQL.noop,
+        ),
+        migrations.CreateModel(
+            name='WhatsAppMessageArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('wa_id', models.CharField(max_length=255)),
+                ('sender_phone', models.CharField(max_length=30)),
+                ('body', models.TextField(blank=True, default='')),
+                ('is_outbound', models.BooleanField(default=False)),
+                ('is_read', models.BooleanField(default=False)),
+                ('media_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('media_mime_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('media_caption', models.TextField(blank=True, null=True)),
+                ('media_filename', models.CharField(blank=True, max_length=255, null=True)),
+                ('delivery_status', models.CharField(default='sent', max_length=20)),
+                ('timestamp', models.DateTimeField()),
+                ('created_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='whatsappmessage',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text='Timestamp réel du message (fourni par Meta ou auto au moment de la création)'),
+        ),
+        migrations.AlterField(
+            model_name='whatsappmessage',
+            name='wa_id',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name='whatsappmessage',
+            constraint=models.UniqueConstraint(fields=('wa_id', 'timestamp'), name='unique_whatsapp_message'),
+        ),
+        migrations.AddField(
+            model_name='whatsappmessagearchive',
+            name='lead',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_whatsapp_messages', to='leads.lead'),
+        ),
+        migrations.AddIndex(
+            model_name='whatsappmessagearchive',
+            index=models.Index(fields=['lead', 'timestamp'], name='whatsapp_wh_lead_id_a3e83c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='whatsappmessagearchive',
+            index=models.Index(fields=['sender_phone', 'timestamp'], name='whatsapp_wh_sender__3e554e_idx'),
+        ),
+    ]
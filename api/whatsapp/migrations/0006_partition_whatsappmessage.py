@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def partition_messages(apps, schema_editor):
+    from api.core.partitioning import convert_to_partitioned
+
+    convert_to_partitioned(schema_editor.connection, "whatsapp_whatsappmessage", "timestamp")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp', '0005_whatsappmessage_partition_key_and_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_messages, migrations.RunPython.noop),
+    ]
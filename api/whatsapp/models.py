@@ -1,9 +1,18 @@
 from django.db import models
+from django.utils import timezone
+
 from api.leads.models import Lead
 
 
 class WhatsAppMessage(models.Model):
-    wa_id = models.CharField(max_length=255, unique=True)
+    """
+    Table partitionnée par mois sur `timestamp` (api.core.partitioning) :
+    l'unicité de wa_id inclut donc la date (les renvois Meta d'un même message
+    portent le même horodatage), et les mois au-delà de la rétention sont
+    compactés dans WhatsAppMessageArchive.
+    """
+
+    wa_id = models.CharField(max_length=255)
 
     lead = models.ForeignKey(
         Lead,
@@ -63,12 +72,10 @@ class WhatsAppMessage(models.Model):
         ],
     )
 
-    # Timestamp réel du message selon Meta (peut différer de created_at)
-    # null=True permet la migration sur les lignes existantes ; le save() renseigne toujours la valeur.
+    # Timestamp réel du message selon Meta (peut différer de created_at) ; clé de partitionnement
     timestamp = models.DateTimeField(
+        default=timezone.now,
         db_index=True,
-        null=True,
-        blank=True,
         help_text="Timestamp réel du message (fourni par Meta ou auto au moment de la création)",
     )
     # created_at : null=True uniquement pour la migration, toujours renseigné en pratique
@@ -77,11 +84,13 @@ class WhatsAppMessage(models.Model):
     class Meta:
         app_label = "whatsapp"
         ordering = ["timestamp"]
+        constraints = [
+            models.UniqueConstraint(fields=["wa_id", "timestamp"], name="unique_whatsapp_message"),
+        ]
 
     def save(self, *args, **kwargs):
         # Si timestamp non défini (ex: message sortant créé manuellement), on met l'heure actuelle
         if not self.timestamp:
-            from django.utils import timezone
             self.timestamp = timezone.now()
         super().save(*args, **kwargs)
 
@@ -181,4 +190,47 @@ class WhatsAppConversationSettings(models.Model):
                 return cls.objects.get(lead__isnull=True, sender_phone=phone).agent_enabled
         except cls.DoesNotExist:
             pass
-        return True
\ No newline at end of file
+        return True
+
+class WhatsAppMessageArchive(models.Model):
+    """
+    Messages des partitions compactées (au-delà de PARTITION_RETENTION_MONTHS).
+
+    Mêmes colonnes et mêmes id que WhatsAppMessage, sans l'URL signée du média
+    (expirée) ; seuls les index de lecture par conversation sont conservés.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    wa_id = models.CharField(max_length=255)
+    lead = models.ForeignKey(
+        Lead,
+        on_delete=models.SET_NULL,
+        related_name="archived_whatsapp_messages",
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    sender_phone = models.CharField(max_length=30)
+    body = models.TextField(blank=True, default="")
+    is_outbound = models.BooleanField(default=False)
+    is_read = models.BooleanField(default=False)
+    media_id = models.CharField(max_length=255, blank=True, null=True)
+    media_mime_type = models.CharField(max_length=100, blank=True, null=True)
+    media_caption = models.TextField(blank=True, null=True)
+    media_filename = models.CharField(max_length=255, blank=True, null=True)
+    delivery_status = models.CharField(max_length=20, default="sent")
+    timestamp = models.DateTimeField()
+    created_at = models.DateTimeField(null=True)
+
+    class Meta:
+        app_label = "whatsapp"
+        indexes = [
+            models.Index(fields=["lead", "timestamp"]),
+            models.Index(fields=["sender_phone", "timestamp"]),
+        ]
+
+    def as_message(self) -> WhatsAppMessage:
+        """WhatsAppMessage équivalent (lecture seule), sérialisable comme un message chaud."""
+        message = WhatsAppMessage(**{field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields})
+        message._state.adding = False
+        return message
@@ -0,0 +1,186 @@
+"""
+Statuts de livraison WhatsApp (sent / delivered / read / failed) en écriture différée.
+
+Meta envoie plusieurs callbacks de statut par message sortant : c'est
+l'essentiel du trafic du webhook. Auparavant chaque callback faisait un
+get(wa_id) + save() (SELECT d'audit en pre_save, post_save, signaux).
+
+  - webhook → WhatsAppStatusBuffer.add() : statuts regroupés par wa_id dans un
+    hash Redis partagé, seul le statut de plus haute précédence est conservé
+    (script Lua, aucune requête SQL)
+  - le premier ajout d'une fenêtre planifie un vidage Django-Q (Schedule
+    ONCE, voie realtime-notifications) dans FLUSH_DELAY secondes au moins
+  - flush() : hash lu et supprimé atomiquement, un UPDATE … FROM (VALUES …)
+    par lot de BATCH_SIZE, puis UN événement websocket
+    « whatsapp_statuses_changed » pour tout le lot
+
+L'UPDATE ne fait jamais régresser un statut (callback « delivered » reçu
+après « read ») et contourne volontairement les signaux par ligne : l'audit
+ne journalise de toute façon que la création des messages.
+
+Redis indisponible : le lot du webhook est appliqué immédiatement (toujours
+en une requête). Échec SQL au vidage : le lot est remis dans le buffer.
+"""
+import logging
+from datetime import timedelta
+from typing import Dict, Iterable, List, Tuple
+
+import redis
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.utils.redis_client import get_redis
+from api.whatsapp.models import WhatsAppMessage
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = "whatsapp:status:pending"
+FLUSH_FLAG_KEY = "whatsapp:status:flush_scheduled"
+FLUSH_DELAY = 2       # secondes : fenêtre de regroupement
+FLUSH_TASK = "api.whatsapp.tasks.flush_status_updates"
+BATCH_SIZE = 1000     # lignes par UPDATE
+WS_GROUP = "whatsapp"
+
+# Précédence : un statut n'écrase jamais un statut de rang supérieur
+STATUS_RANK = {"sent": 1, "delivered": 2, "read": 3, "failed": 4}
+RANK_STATUS = {rank: status for status, rank in STATUS_RANK.items()}
+
+# KEYS[1] = hash ; ARGV = wa_id, rang, wa_id, rang…
+_MERGE_SCRIPT = """
+for i = 1, #ARGV, 2 do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    if not current or tonumber(current) < tonumber(ARGV[i + 1]) then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+end
+return #ARGV / 2
+"""
+
+def coalesce(statuses: Iterable[dict]) -> Dict[str, int]:
+    """Callbacks Meta → {wa_id: rang le plus élevé} ; statuts inconnus ignorés."""
+    ranks: Dict[str, int] = {}
+    for st in statuses:
+        wa_id, rank = st.get("id"), STATUS_RANK.get(st.get("status"))
+        if wa_id and rank and rank > ranks.get(wa_id, 0):
+            ranks[wa_id] = rank
+    return ranks
+
+
+class WhatsAppStatusBuffer:
+
+    # ──────────────────────────────────────────────
+    # ÉCRITURE (webhook)
+    # ──────────────────────────────────────────────
+
+    @classmethod
+    def add(cls, statuses: Iterable[dict]) -> int:
+        """Met en buffer les callbacks de statut d'un webhook ; retourne le nombre de wa_id."""
+        ranks = coalesce(statuses)
+        if not ranks:
+            return 0
+
+        try:
+            client = get_redis()
+            args = [value for wa_id, rank in ranks.items() for value in (wa_id, rank)]
+            client.eval(_MERGE_SCRIPT, 1, BUFFER_KEY, *args)
+            if client.set(FLUSH_FLAG_KEY, 1, nx=True, ex=FLUSH_DELAY * 30):
+                cls.enqueue()
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Buffer statuts WhatsApp indisponible, application directe : {e}")
+            cls.apply(ranks)
+        return len(ranks)
+
+    @staticmethod
+    def enqueue() -> None:
+        """
+        Vidage différé : Schedule ONCE (async_task n'a pas d'échéance), sur la
+        voie de la fonction comme defer_when_limited. Le scheduler Django-Q
+        scrute les Schedule toutes les ~30 s : le délai réel est au plus de cet ordre.
+        """
+        from django_q.models import Schedule
+        from django_q.tasks import schedule
+
+        from api.core import task_lanes
+
+        try:
+            schedule(
+                FLUSH_TASK,
+                schedule_type=Schedule.ONCE,
+                next_run=timezone.now() + timedelta(seconds=FLUSH_DELAY),
+                cluster=task_lanes.lane_for(FLUSH_TASK) if task_lanes.enabled() else None,
+            )
+        except Exception as e:
+            # Drapeau levé : le prochain webhook retente la planification
+            logger.error(f"❌ Vidage des statuts WhatsApp non planifié : {e}")
+            try:
+                get_redis().delete(FLUSH_FLAG_KEY)
+            except redis.RedisError:
+                pass
+
+    # ──────────────────────────────────────────────
+    # VIDAGE (worker)
+    # ──────────────────────────────────────────────
+
+    @classmethod
+    def flush(cls) -> int:
+        """Applique tout le buffer ; retourne le nombre de messages mis à jour."""
+        client = get_redis()
+        # Le drapeau est levé AVANT la lecture : un ajout concurrent planifie un nouveau vidage
+        client.delete(FLUSH_FLAG_KEY)
+        pending, _ = client.pipeline(transaction=True).hgetall(BUFFER_KEY).delete(BUFFER_KEY).execute()
+        if not pending:
+            return 0
+
+        ranks = {wa_id.decode(): int(rank) for wa_id, rank in pending.items()}
+        try:
+            return len(cls.apply(ranks))
+        except Exception:
+            args = [value for wa_id, rank in ranks.items() for value in (wa_id, rank)]
+            client.eval(_MERGE_SCRIPT, 1, BUFFER_KEY, *args)
+            raise
+
+    @classmethod
+    def apply(cls, ranks: Dict[str, int]) -> List[dict]:
+        """UPDATE groupé (sans régression de statut) puis un seul événement websocket."""
+        items = list(ranks.items())
+        changed: List[dict] = []
+        with transaction.atomic():
+            for start in range(0, len(items), BATCH_SIZE):
+                changed.extend(cls._update_batch(items[start:start + BATCH_SIZE]))
+
+        if changed:
+            logger.info("Statuts WhatsApp appliqués | reçus=%d | modifiés=%d", len(items), len(changed))
+            transaction.on_commit(lambda: cls._broadcast(changed))
+        return changed
+
+    @staticmethod
+    def _update_batch(batch: List[Tuple[str, int]]) -> List[dict]:
+        table = connection.ops.quote_name(WhatsAppMessage._meta.db_table)
+        current_rank = " ".join(f"WHEN '{status}' THEN {rank}" for status, rank in STATUS_RANK.items())
+        values = ", ".join(["(%s, %s, %s::integer)"] * len(batch))
+        sql = f"""
+            UPDATE {table} AS m
+               SET delivery_status = v.status,
+                   is_read = m.is_read OR v.status = 'read'
+              FROM (VALUES {values}) AS v(wa_id, status, status_rank)
+             WHERE m.wa_id = v.wa_id
+               AND (CASE m.delivery_status {current_rank} ELSE 0 END) < v.status_rank
+         RETURNING m.id, m.wa_id, m.lead_id, m.sender_phone, m.delivery_status, m.is_read
+        """
+        params = [value for wa_id, rank in batch for value in (wa_id, RANK_STATUS[rank], rank)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _broadcast(changed: List[dict]) -> None:
+        from api.websocket.signals.base import broadcast
+        try:
+            broadcast([WS_GROUP], {
+                "event": "whatsapp_statuses_changed",
+                "data": changed,
+                "extra": {"count": len(changed)},
+            })
+        except Exception as e:
+            logger.error(f"❌ Diffusion des statuts WhatsApp impossible : {e}")
@@ -0,0 +1,57 @@
+import logging
+
+from django.utils import timezone
+
+from api.whatsapp.status_buffer import WhatsAppStatusBuffer
+
+logger = logging.getLogger(__name__)
+
+
+def flush_status_updates():
+    """
+    Applique les statuts de livraison WhatsApp en attente. Planifié quelques
+    secondes après le premier callback d'une fenêtre (voie realtime-notifications).
+    """
+    updated = WhatsAppStatusBuffer.flush()
+    return f"{updated} WhatsApp delivery statuses applied"
+
+
+def _run_send_whatsapp_message(lead_id: int, body: str, **kwargs):
+    """
+    Worker de l'outbox : message texte WhatsApp au lead, historisé comme un
+    envoi depuis le CRM. Retourne l'identifiant Meta (wamid).
+    """
+    from api.leads.models import Lead
+    from api.whatsapp.models import WhatsAppMessage
+    from api.whatsapp.utils import normalize_phone_for_meta, send_whatsapp_message
+
+    lead = Lead.objects.filter(id=lead_id).first()
+    if not lead or not lead.phone:
+        logger.warning("[whatsapp] Lead #%s introuvable ou sans téléphone — message ignoré", lead_id)
+        return None
+
+    to_phone = normalize_phone_for_meta(lead.phone)
+    meta_response = send_whatsapp_message(to_phone, body)
+    wa_id = meta_response.get("messages", [{}])[0].get("id", "")
+
+    WhatsAppMessage.objects.create(
+        wa_id=wa_id or f"out_{to_phone}_{body[:8]}",
+        lead=lead,
+        sender_phone=to_phone,
+        body=body,
+        is_outbound=True,
+        is_read=True,
+        delivery_status="sent",
+        timestamp=timezone.now(),
+    )
+    return wa_id
+
+
+def send_whatsapp_message_task(lead_id: int, body: str, window: str, countdown: int = 0):
+    """
+    Met un message WhatsApp en file dans l'outbox (transaction de l'appelant).
+    `window` identifie l'envoi : le même (lead, window) n'est envoyé qu'une fois.
+    """
+    from api.notification_outbox.services import NotificationOutbox
+
+    NotificationOutbox.enqueue("whatsapp.message", lead_id, body, window=window, countdown=countdown)
@@ -0,0 +1,154 @@
+"""
+Vues async WhatsApp : liste des conversations (requêtes parallèles) et fils
+de messages.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.test import AsyncRequestFactory, Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.permissions import AllowAny
+
+from api.lead_status.models import LeadStatus
+from api.leads.models import Lead
+from api.utils.async_views import JSONResponse, async_api_view, close_query_pool_connections
+from api.whatsapp.models import WhatsAppConversationSettings, WhatsAppMessage, WhatsAppMessageArchive
+
+
+@pytest.fixture
+def http(transactional_db):
+    yield Client()
+    close_query_pool_connections()
+
+
+@pytest.fixture
+def lead_status(transactional_db):
+    return LeadStatus.objects.create(code="NOUVEAU", label="Nouveau")
+
+
+def _msg(wa_id, minutes_ago, **kwargs):
+    return WhatsAppMessage.objects.create(
+        wa_id=wa_id, timestamp=timezone.now() - timedelta(minutes=minutes_ago), **kwargs,
+    )
+
+
+def test_conversation_list_merges_known_and_unknown(http, lead_status):
+    lead = Lead.objects.create(first_name="Ana", last_name="Lyse", phone="+33600000001", status=lead_status)
+    _msg("k1", 30, lead=lead, sender_phone="33600000001", body="ancien")
+    _msg("k2", 20, lead=lead, sender_phone="33600000001", body="dernier")
+    _msg("k3", 25, lead=lead, sender_phone="33600000001", body="lu", is_read=True)
+    _msg("u1", 10, sender_phone="33700000000", body="inconnu")
+    _msg("u2", 5, sender_phone="33700000000", body="réponse", is_outbound=True)
+    WhatsAppConversationSettings.objects.create(sender_phone="33700000000", agent_enabled=False)
+
+    res = http.get(reverse("whatsapp_conversations"))
+
+    assert res.status_code == 200
+    assert res["Cache-Control"].startswith("no-store")
+    unknown, known = res.json()  # sans pagination demandée : liste historique
+    assert unknown["is_unknown"] and unknown["phone"] == "33700000000"
+    assert unknown["last_message"]["body"] == "réponse"
+    assert unknown["unread_count"] == 1
+    assert unknown["agent_enabled"] is False
+    assert known["id"] == lead.id
+    assert known["last_message"]["body"] == "dernier"
+    assert known["unread_count"] == 2
+    assert known["agent_enabled"] is True
+
+
+def test_conversation_list_is_paginated_by_last_message(http, lead_status):
+    for i in range(3):
+        lead = Lead.objects.create(first_name=f"L{i}", last_name="Lyse", phone=f"+3360000010{i}", status=lead_status)
+        _msg(f"p{i}", 10 * i + 10, lead=lead, sender_phone=f"3360000010{i}")
+    _msg("pu", 15, sender_phone="33700000009")  # s'intercale entre L0 et L1
+
+    first = http.get(reverse("whatsapp_conversations"), {"limit": 2}).json()
+    assert [c["first_name"] for c in first["results"]] == ["L0", "Inconnu"]
+    assert first["hasMore"] is True
+
+    second = http.get(reverse("whatsapp_conversations"),
+                      {"limit": 2, "before": first["before"], "before_key": first["beforeKey"]}).json()
+    assert [c["first_name"] for c in second["results"]] == ["L1", "L2"]
+    assert second["hasMore"] is False
+
+    assert http.get(reverse("whatsapp_conversations"), {"limit": 0}).status_code == 400
+    assert http.get(reverse("whatsapp_conversations"), {"before": "hier"}).status_code == 400
+    assert http.get(reverse("whatsapp_conversations"), {"before_key": "lead:1"}).status_code == 400
+
+
+def test_conversation_pages_do_not_skip_conversations_sharing_a_timestamp(http, lead_status):
+    # Horodatages Meta à la seconde : plusieurs conversations partagent le même dernier message
+    ts = timezone.now().replace(microsecond=0) - timedelta(minutes=5)
+    for i in range(3):
+        lead = Lead.objects.create(first_name=f"T{i}", last_name="Lyse", phone=f"+3360000020{i}", status=lead_status)
+        WhatsAppMessage.objects.create(wa_id=f"t{i}", timestamp=ts, lead=lead, sender_phone=f"3360000020{i}")
+    for i in range(2):
+        WhatsAppMessage.objects.create(wa_id=f"tu{i}", timestamp=ts, sender_phone=f"3370000002{i}")
+
+    seen, params = [], {"limit": 2}
+    while True:
+        page = http.get(reverse("whatsapp_conversations"), params).json()
+        seen += [c["id"] or c["sender_phone"] for c in page["results"]]
+        if not page["hasMore"]:
+            break
+        params = {"limit": 2, "before": page["before"], "before_key": page["beforeKey"]}
+
+    assert len(seen) == len(set(seen)) == 5
+    assert seen == [c["id"] or c["sender_phone"] for c in http.get(reverse("whatsapp_conversations")).json()]
+
+
+def test_async_views_apply_throttles_and_content_negotiation(http, lead_status, settings):
+    from rest_framework.throttling import AnonRateThrottle
+
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    with patch.object(AnonRateThrottle, "get_rate", return_value="1/min"):
+        view = async_api_view(permission_classes=[AllowAny], throttle_classes=[AnonRateThrottle])(
+            sync_to_async(lambda request: JSONResponse([]))
+        )
+        requests = [AsyncRequestFactory().get("/") for _ in range(2)]
+        for request in requests:
+            request._force_auth_user = AnonymousUser()
+        assert async_to_sync(view)(requests[0]).status_code == 200
+        throttled = async_to_sync(view)(requests[1])
+
+    assert throttled.status_code == 429
+    assert int(throttled["Retry-After"]) > 0
+    assert http.get(reverse("whatsapp_conversations"), HTTP_ACCEPT="text/html").status_code == 406
+
+
+def test_message_lists_are_chronological(http, lead_status):
+    lead = Lead.objects.create(first_name="Bob", last_name="Lyse", phone="+33600000002", status=lead_status)
+    _msg("m2", 1, lead=lead, sender_phone="33600000002", body="deux")
+    _msg("m1", 2, lead=lead, sender_phone="33600000002", body="un")
+    _msg("x1", 1, sender_phone="33700000001", body="seul")
+
+    res = http.get(reverse("whatsapp_messages", args=[lead.id]))
+    assert [m["body"] for m in res.json()] == ["un", "deux"]
+
+    res = http.get(reverse("whatsapp_messages_unknown", args=["33700000001"]))
+    assert [m["body"] for m in res.json()] == ["seul"]
+
+    assert http.post(reverse("whatsapp_messages", args=[lead.id])).status_code == 405
+
+
+def test_message_lists_read_archived_months_after_hot_ones(http, lead_status):
+    lead = Lead.objects.create(first_name="Eve", last_name="Lyse", phone="+33600000003", status=lead_status)
+    hot = _msg("h1", 1, lead=lead, sender_phone="33600000003", body="récent")
+    old = timezone.now() - timedelta(days=800)
+    WhatsAppMessageArchive.objects.create(id=hot.id + 1000, wa_id="a1", lead=lead, sender_phone="33600000003",
+                                          body="archivé", timestamp=old)
+    # Mois en cours d'archivage : déjà copié, encore à chaud → une seule fois
+    WhatsAppMessageArchive.objects.create(id=hot.id, wa_id="h1", lead=lead, sender_phone="33600000003",
+                                          body="copie", timestamp=hot.timestamp)
+    WhatsAppMessageArchive.objects.create(id=hot.id + 1001, wa_id="a2", sender_phone="33700000002",
+                                          body="inconnu archivé", timestamp=old)
+
+    res = http.get(reverse("whatsapp_messages", args=[lead.id]))
+    assert [m["body"] for m in res.json()] == ["archivé", "récent"]
+
+    res = http.get(reverse("whatsapp_messages_unknown", args=["33700000002"]))
+    assert [m["body"] for m in res.json()] == ["inconnu archivé"]
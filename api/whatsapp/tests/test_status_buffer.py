@@ -0,0 +1,178 @@
+"""
+Statuts de livraison WhatsApp en écriture différée : regroupement par wa_id,
+UPDATE groupé sans signaux, un seul événement websocket par lot.
+"""
+import json
+import time
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from django.db import connection
+from django.db.models.signals import post_save, pre_save
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from api.utils.redis_client import get_redis
+from api.whatsapp import status_buffer
+from api.whatsapp.models import WhatsAppMessage
+from api.whatsapp.status_buffer import WhatsAppStatusBuffer
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clean_buffer():
+    client = get_redis()
+    client.delete(status_buffer.BUFFER_KEY, status_buffer.FLUSH_FLAG_KEY)
+    yield client
+    client.delete(status_buffer.BUFFER_KEY, status_buffer.FLUSH_FLAG_KEY)
+
+
+@pytest.fixture
+def channel_layer():
+    layer = MagicMock(group_send=AsyncMock())
+    with patch("api.websocket.signals.base.get_channel_layer", return_value=layer):
+        yield layer
+
+
+def _outbound(count, **kwargs):
+    return WhatsAppMessage.objects.bulk_create([
+        WhatsAppMessage(
+            wa_id=f"wamid.{i}", sender_phone="33600000000", is_outbound=True,
+            is_read=True, delivery_status="sent", timestamp=timezone.now(), **kwargs,
+        )
+        for i in range(count)
+    ])
+
+
+def _webhook_body(statuses):
+    return {"entry": [{"changes": [{"value": {"statuses": statuses}}]}]}
+
+
+def test_coalesce_keeps_highest_precedence():
+    ranks = status_buffer.coalesce([
+        {"id": "a", "status": "read"},
+        {"id": "a", "status": "delivered"},
+        {"id": "b", "status": "sent"},
+        {"id": "b", "status": "delivered"},
+        {"id": "c", "status": "deleted"},
+        {"status": "read"},
+    ])
+    assert ranks == {"a": 3, "b": 2}
+
+
+def test_webhook_buffers_without_touching_the_database(clean_buffer):
+    _outbound(2)
+    statuses = [
+        {"id": "wamid.0", "status": "sent"},
+        {"id": "wamid.0", "status": "delivered"},
+        {"id": "wamid.1", "status": "read"},
+    ]
+
+    with patch.object(WhatsAppStatusBuffer, "enqueue") as enqueue, \
+            CaptureQueriesContext(connection) as queries:
+        res = Client().post(reverse("whatsapp_webhook"), json.dumps(_webhook_body(statuses)),
+                            content_type="application/json")
+        Client().post(reverse("whatsapp_webhook"), json.dumps(_webhook_body([{"id": "wamid.1", "status": "delivered"}])),
+                      content_type="application/json")
+
+    assert res.status_code == 200
+    assert len(queries) == 0
+    enqueue.assert_called_once()  # une planification par fenêtre
+    assert clean_buffer.hgetall(status_buffer.BUFFER_KEY) == {b"wamid.0": b"2", b"wamid.1": b"3"}
+    assert set(WhatsAppMessage.objects.values_list("delivery_status", flat=True)) == {"sent"}
+
+
+def _updates(queries):
+    return [q for q in queries if q["sql"].lstrip().startswith("UPDATE")]
+
+
+def test_flush_applies_one_update_without_signals(channel_layer, django_capture_on_commit_callbacks):
+    messages = _outbound(3)
+    WhatsAppMessage.objects.filter(pk=messages[2].pk).update(delivery_status="read")
+    with patch.object(WhatsAppStatusBuffer, "enqueue"):
+        WhatsAppStatusBuffer.add([
+            {"id": "wamid.0", "status": "delivered"},
+            {"id": "wamid.1", "status": "read"},
+            {"id": "wamid.2", "status": "delivered"},  # arrivé après « read » : ignoré
+            {"id": "wamid.inconnu", "status": "read"},
+        ])
+
+    receiver = MagicMock()
+    pre_save.connect(receiver, sender=WhatsAppMessage)
+    post_save.connect(receiver, sender=WhatsAppMessage)
+    try:
+        with django_capture_on_commit_callbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            assert WhatsAppStatusBuffer.flush() == 2
+    finally:
+        pre_save.disconnect(receiver, sender=WhatsAppMessage)
+        post_save.disconnect(receiver, sender=WhatsAppMessage)
+
+    assert len(_updates(queries)) == 1
+    receiver.assert_not_called()
+    assert dict(WhatsAppMessage.objects.values_list("wa_id", "delivery_status")) == {
+        "wamid.0": "delivered", "wamid.1": "read", "wamid.2": "read",
+    }
+    channel_layer.group_send.assert_awaited_once()
+    group, message = channel_layer.group_send.await_args.args
+    payload = json.loads(message["text"])
+    assert group == "whatsapp"
+    assert payload["event"] == "whatsapp_statuses_changed"
+    assert {row["wa_id"] for row in payload["data"]} == {"wamid.0", "wamid.1"}
+    assert WhatsAppStatusBuffer.flush() == 0
+
+
+def test_failed_flush_puts_statuses_back(clean_buffer):
+    _outbound(1)
+    with patch.object(WhatsAppStatusBuffer, "enqueue"):
+        WhatsAppStatusBuffer.add([{"id": "wamid.0", "status": "read"}])
+
+    with patch.object(WhatsAppStatusBuffer, "_update_batch", side_effect=RuntimeError("db down")):
+        with pytest.raises(RuntimeError):
+            WhatsAppStatusBuffer.flush()
+
+    assert clean_buffer.hgetall(status_buffer.BUFFER_KEY) == {b"wamid.0": b"3"}
+
+
+def test_throughput_of_batched_status_updates(channel_layer, django_capture_on_commit_callbacks):
+    """5 000 messages × 3 callbacks : 15 000 anciens get()+save() → 5 UPDATE."""
+    count = 5000
+    _outbound(count)
+    callbacks = [
+        {"id": f"wamid.{i}", "status": status}
+        for status in ("sent", "delivered", "read")
+        for i in range(count)
+    ]
+
+    started = time.perf_counter()
+    with patch.object(WhatsAppStatusBuffer, "enqueue"):
+        for start in range(0, len(callbacks), 50):  # webhooks de 50 statuts
+            WhatsAppStatusBuffer.add(callbacks[start:start + 50])
+    with django_capture_on_commit_callbacks(execute=True), CaptureQueriesContext(connection) as queries:
+        assert WhatsAppStatusBuffer.flush() == count
+    elapsed = time.perf_counter() - started
+
+    assert len(_updates(queries)) == count // status_buffer.BATCH_SIZE
+    assert WhatsAppMessage.objects.filter(delivery_status="read").count() == count
+    assert channel_layer.group_send.await_count == 1
+    assert elapsed < 10
+
+
+def test_flush_is_scheduled_after_the_window_on_the_realtime_lane(settings):
+    from django_q.models import Schedule
+
+    from api.core.task_lanes import REALTIME
+
+    settings.TASK_LANES_ENABLED = True
+    before = timezone.now()
+
+    WhatsAppStatusBuffer.add([{"id": "wamid.0", "status": "read"}])
+    WhatsAppStatusBuffer.add([{"id": "wamid.1", "status": "read"}])
+
+    (flush,) = Schedule.objects.filter(func=status_buffer.FLUSH_TASK)
+    assert flush.schedule_type == Schedule.ONCE
+    assert flush.cluster == REALTIME
+    assert flush.next_run >= before + timedelta(seconds=status_buffer.FLUSH_DELAY)
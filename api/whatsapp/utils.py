@@ -3,10 +3,19 @@ import logging
 import requests
 from django.conf import settings
 
+from api.core.rate_limit import META_WHATSAPP, RateLimiter
 from api.leads.models import Lead
 
 logger = logging.getLogger(__name__)
 
+GRAPH_API_URL = "https://graph.facebook.com/v25.0"
+
+
+def graph_api_url(path: str) -> str:
+    """URL Graph API ; WHATSAPP_GRAPH_API_URL la redirige (faux serveur du harnais de charge)."""
+    base = getattr(settings, "WHATSAPP_GRAPH_API_URL", None) or GRAPH_API_URL
+    return f"{base.rstrip('/')}/{path}"
+
 
 # ─────────────────────────────────────────────────────────────
 # Matching lead ← numéro Meta
@@ -58,6 +67,8 @@ def send_whatsapp_message(to_phone: str, body: str) -> dict:
       - WHATSAPP_PHONE_NUMBER_ID
       - WHATSAPP_ACCESS_TOKEN
 
+    Réserve d'abord un jeton Meta (global + par destinataire) : lève
+    RateLimited s'il en manque un.
     Retourne le JSON Meta ou lève une exception HTTP.
     """
     phone_number_id = getattr(settings, "WHATSAPP_PHONE_NUMBER_ID", None)
@@ -66,7 +77,9 @@ def send_whatsapp_message(to_phone: str, body: str) -> dict:
     if not phone_number_id or not access_token:
         raise ValueError("WHATSAPP_PHONE_NUMBER_ID ou WHATSAPP_ACCESS_TOKEN manquant")
 
-    url = f"https://graph.facebook.com/v25.0/{phone_number_id}/messages"
+    RateLimiter.reserve(META_WHATSAPP, to_phone)
+
+    url = graph_api_url(f"{phone_number_id}/messages")
 
     payload = {
         "messaging_product": "whatsapp",
@@ -130,7 +143,7 @@ def send_whatsapp_typing_indicator(wa_message_id: str) -> dict | None:
         logger.warning("Typing indicator ignoré | wa_message_id manquant")
         return None
 
-    url = f"https://graph.facebook.com/v25.0/{phone_number_id}/messages"
+    url = graph_api_url(f"{phone_number_id}/messages")
 
     headers = {
         "Authorization": f"Bearer {access_token}",
@@ -1,11 +1,15 @@
 import json
 import logging
+import math
 import uuid
+from functools import partial
 
 from django.conf import settings
 from django.core.cache import cache
-from django.db.models import Max, Prefetch
+from django.db.models import CharField, Count, Max, Q, Value
+from django.db.models.functions import Cast, Collate, Concat
 from django.http import HttpResponse
+from django.utils.dateparse import parse_datetime
 from django.views.decorators.cache import never_cache
 
 from rest_framework import status
@@ -15,20 +19,27 @@ from rest_framework.response import Response
 
 from api.leads.constants import RDV_CONFIRME
 from api.lead_status.models import LeadStatus
+from api.core.rate_limit import RateLimited
+from api.core.reference_data import lead_statuses
 from api.leads.models import Lead
 
-from .models import WhatsAppMessage, WhatsAppConversationSettings
+from api.utils.async_views import JSONResponse, async_api_view, gather_queries
+
+from .models import WhatsAppConversationSettings, WhatsAppMessage, WhatsAppMessageArchive
 from .serializers import (
-    ConversationPreviewSerializer,
     SendMessageSerializer,
     ToggleAgentSerializer,
     WhatsAppMessageSerializer,
 )
-from .utils import get_lead_by_phone, normalize_phone_for_meta, send_whatsapp_message
+from .status_buffer import WhatsAppStatusBuffer
+from .utils import get_lead_by_phone, graph_api_url, normalize_phone_for_meta, send_whatsapp_message
 
 logger = logging.getLogger(__name__)
 
 AGENT_DEBOUNCE_SECONDS = getattr(settings, "KEMORA_DEBOUNCE_SECONDS", 4)
+# Liste des conversations : taille de page par défaut / maximale
+CONVERSATIONS_PAGE_SIZE = 50
+CONVERSATIONS_MAX_PAGE_SIZE = 200
 
 # Types ignorés : pas de réponse IA ni de sauvegarde
 IGNORED_MESSAGE_TYPES = {"reaction", "unsupported"}
@@ -266,7 +277,7 @@ def _process_incoming_message(msg: dict):
 def _try_confirm_lead_status(lead: Lead):
     """Tente de passer le statut d'un lead à RDV_CONFIRME."""
     try:
-        status_confirme = LeadStatus.objects.get(code=RDV_CONFIRME)
+        status_confirme = lead_statuses.get(RDV_CONFIRME)
         if lead.status_id != status_confirme.id:
             old_status = lead.status.code if lead.status else "N/A"
             lead.status = status_confirme
@@ -320,7 +331,7 @@ def _dispatch_agent_q2(text_body, sender_phone, lead, wa_message_id=""):
     
     lead_id = getattr(lead, "id", None)
     try:
-        from django_q.tasks import async_task
+        from api.core.task_lanes import async_task
         task_id = async_task(
             "api.whatsapp.agent.handler.trigger_agent_response",
             incoming_body=text_body,
@@ -360,29 +371,6 @@ def _dispatch_agent_q2(text_body, sender_phone, lead, wa_message_id=""):
             )
 
 
-def _process_status_update(st: dict):
-    wa_id = st.get("id")
-    status_value = st.get("status")
-
-    if not wa_id or not status_value:
-        return
-
-    if status_value not in {"sent", "delivered", "read", "failed"}:
-        return
-
-    try:
-        msg_obj = WhatsAppMessage.objects.get(wa_id=wa_id)
-        msg_obj.delivery_status = status_value
-        if status_value == "read":
-            msg_obj.is_read = True
-        msg_obj.save(update_fields=["delivery_status", "is_read"])
-        logger.info("Statut sauvegardé | wa_id=%s | status=%s", wa_id, status_value)
-    except WhatsAppMessage.DoesNotExist:
-        logger.warning("Statut ignoré | message local introuvable pour wa_id=%s", wa_id)
-    except Exception as exc:
-        logger.exception("Échec sauvegarde statut | wa_id=%s | error=%s", wa_id, exc)
-
-
 # ─── Views ────────────────────────────────────────────────────────────────────
 
 @never_cache
@@ -404,117 +392,248 @@ def whatsapp_webhook(request):
 
     try:
         body = json.loads(request.body)
+        statuses = []
         for entry in body.get("entry", []):
             for change in entry.get("changes", []):
                 value = change.get("value", {})
                 for msg in value.get("messages", []):
                     _process_incoming_message(msg)
-                for st in value.get("statuses", []):
-                    _process_status_update(st)
+                # Statuts de livraison : écriture différée et groupée (status_buffer)
+                statuses.extend(value.get("statuses", []))
+        WhatsAppStatusBuffer.add(statuses)
         return _no_cache(HttpResponse("EVENT_RECEIVED", status=200))
     except Exception as exc:
         logger.exception("Erreur Webhook WhatsApp : %s", exc)
         return _no_cache(HttpResponse("EVENT_RECEIVED", status=200))
 
 
-@never_cache
-@api_view(["GET"])
-@permission_classes([AllowAny])
-def conversation_list(request):
-    leads = (
+def _conversation_key(prefix, field):
+    """
+    Départage des conversations de même dernier message : "lead:<id>" ou
+    "phone:<numéro>", comparé octet par octet (collation "C") comme en Python.
+    """
+    return Collate(Concat(Value(prefix), Cast(field, CharField())), "C")
+
+
+def _before_cursor(before, before_key):
+    """Conversations dont (last_msg_time, conv_key) précède strictement le curseur."""
+    if before_key is None:
+        return Q(last_msg_time__lt=before)
+    return Q(last_msg_time__lt=before) | Q(last_msg_time=before, conv_key__lt=before_key)
+
+
+def _known_conversations(before, before_key, limit):
+    unread = Q(whatsapp_messages__is_outbound=False, whatsapp_messages__is_read=False)
+    qs = (
         Lead.objects
         .filter(whatsapp_messages__isnull=False)
-        .annotate(last_msg_time=Max("whatsapp_messages__timestamp"))
-        .order_by("-last_msg_time")
-        .prefetch_related(
-            Prefetch(
-                "whatsapp_messages",
-                queryset=WhatsAppMessage.objects.order_by("-timestamp"),
-            )
+        .annotate(
+            conv_key=_conversation_key("lead:", "id"),
+            last_msg_time=Max("whatsapp_messages__timestamp"),
+            unread_count=Count("whatsapp_messages", filter=unread),
         )
         .select_related("whatsapp_settings")
-        .distinct()
+        .order_by("-last_msg_time", "-conv_key")
     )
-    known = ConversationPreviewSerializer(leads, many=True).data
+    if before is not None:
+        qs = qs.filter(_before_cursor(before, before_key))
+    return list(qs[:limit])
+
+
+def _last_message_by_lead(lead_ids):
+    return {
+        m.lead_id: m
+        for m in WhatsAppMessage.objects.filter(lead_id__in=lead_ids)
+        .order_by("lead_id", "-timestamp").distinct("lead_id")
+    }
 
-    unknown_phones_qs = (
+
+def _unknown_conversations(before, before_key, limit):
+    qs = (
         WhatsAppMessage.objects
         .filter(lead__isnull=True)
         .values("sender_phone")
-        .annotate(last_msg_time=Max("timestamp"))
-        .order_by("-last_msg_time")
+        .annotate(
+            conv_key=_conversation_key("phone:", "sender_phone"),
+            last_msg_time=Max("timestamp"),
+            unread_count=Count("id", filter=Q(is_outbound=False, is_read=False)),
+        )
+        .order_by("-last_msg_time", "-conv_key")
     )
-    unknown_phone_list = [e["sender_phone"] for e in unknown_phones_qs]
+    if before is not None:
+        qs = qs.filter(_before_cursor(before, before_key))
+    return list(qs[:limit])
 
-    if unknown_phone_list:
-        all_unknown_messages = (
-            WhatsAppMessage.objects
-            .filter(lead__isnull=True, sender_phone__in=unknown_phone_list)
-            .order_by("sender_phone", "-timestamp")
-        )
 
-        from collections import defaultdict
-        msgs_by_phone: dict = defaultdict(list)
-        for m in all_unknown_messages:
-            msgs_by_phone[m.sender_phone].append(m)
+def _last_message_by_unknown_phone(phones):
+    return {
+        m.sender_phone: m
+        for m in WhatsAppMessage.objects.filter(lead__isnull=True, sender_phone__in=phones)
+        .order_by("sender_phone", "-timestamp").distinct("sender_phone")
+    }
 
-        settings_qs = WhatsAppConversationSettings.objects.filter(
-            lead__isnull=True, sender_phone__in=unknown_phone_list
-        )
-        agent_by_phone = {s.sender_phone: s.agent_enabled for s in settings_qs}
-
-        unknown = []
-        for phone in unknown_phone_list:
-            phone_msgs = msgs_by_phone.get(phone, [])
-            last_msg = phone_msgs[0] if phone_msgs else None
-            unread = sum(1 for m in phone_msgs if not m.is_outbound and not m.is_read)
-            agent_on = agent_by_phone.get(phone, True)
-
-            unknown.append({
-                "id": None,
-                "sender_phone": phone,
-                "first_name": "Inconnu",
-                "last_name": phone,
-                "phone": phone,
-                "last_message": WhatsAppMessageSerializer(last_msg).data if last_msg else None,
-                "unread_count": unread,
-                "is_unknown": True,
-                "agent_enabled": agent_on,
-            })
-    else:
-        unknown = []
 
-    def get_ts(conv):
-        lm = conv.get("last_message")
-        return lm["timestamp"] if lm and lm.get("timestamp") else ""
+def _agent_enabled_by_unknown_phone(phones):
+    return dict(
+        WhatsAppConversationSettings.objects
+        .filter(lead__isnull=True, sender_phone__in=phones)
+        .values_list("sender_phone", "agent_enabled")
+    )
+
+
+def _agent_enabled(lead) -> bool:
+    try:
+        return lead.whatsapp_settings.agent_enabled
+    except WhatsAppConversationSettings.DoesNotExist:
+        return True
 
-    all_conversations = sorted(list(known) + unknown, key=get_ts, reverse=True)
+
+def _page_params(request):
+    """
+    (before, before_key, limit) de la requête ; limit None sans pagination
+    demandée. ValueError si un paramètre est invalide.
+    """
+    before = request.GET.get("before") or None
+    before_key = request.GET.get("before_key") or None
+    if before is not None:
+        before = parse_datetime(before)
+        if before is None:
+            raise ValueError("Paramètre 'before' invalide.")
+    elif before_key is not None:
+        raise ValueError("'before_key' nécessite 'before'.")
+    if before is None and not request.GET.get("limit"):
+        return None, None, None
+    try:
+        limit = int(request.GET.get("limit") or CONVERSATIONS_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("Paramètre 'limit' invalide.")
+    if not 1 <= limit <= CONVERSATIONS_MAX_PAGE_SIZE:
+        raise ValueError(f"'limit' doit être compris entre 1 et {CONVERSATIONS_MAX_PAGE_SIZE}.")
+    return before, before_key, limit
+
+
+@never_cache
+@async_api_view(permission_classes=[AllowAny])
+async def conversation_list(request):
+    """
+    GET /whatsapp/conversations/[?limit=<n>[&before=<last_msg_time>&before_key=<clé>]]
+
+    Vue async : conversations connues et inconnues confondues, de la plus
+    récente à la plus ancienne.
+      - sans paramètre : liste complète (réponse historique, une liste JSON)
+      - avec `limit` et/ou `before` : page { results, hasMore, before, beforeKey }
+        des `limit` conversations qui précèdent le curseur (dernier message,
+        puis clé de conversation pour départager les horodatages égaux).
+    Chaque source ne lit que `limit` + 1 conversations, puis les derniers
+    messages et réglages de la page seulement, en parallèle.
+    """
+    try:
+        before, before_key, limit = _page_params(request)
+    except ValueError as e:
+        return JSONResponse({"detail": str(e)}, status=400)
+
+    fetch = None if limit is None else limit + 1
+    known_leads, unknown_rows = await gather_queries(
+        partial(_known_conversations, before, before_key, fetch),
+        partial(_unknown_conversations, before, before_key, fetch),
+    )
+    page = sorted(
+        [((lead.last_msg_time, lead.conv_key), lead) for lead in known_leads]
+        + [((row["last_msg_time"], row["conv_key"]), row) for row in unknown_rows],
+        key=lambda item: item[0],
+        reverse=True,
+    )
+    has_more = limit is not None and len(page) > limit
+    page = page[:limit]
+
+    lead_ids = [conv.id for _, conv in page if isinstance(conv, Lead)]
+    phones = [conv["sender_phone"] for _, conv in page if not isinstance(conv, Lead)]
+    last_by_lead, last_by_phone, agent_by_phone = await gather_queries(
+        partial(_last_message_by_lead, lead_ids),
+        partial(_last_message_by_unknown_phone, phones),
+        partial(_agent_enabled_by_unknown_phone, phones),
+    )
+
+    results = []
+    for _, conv in page:
+        if isinstance(conv, Lead):
+            last_msg = last_by_lead.get(conv.id)
+            results.append({
+                "id": conv.id,
+                "first_name": conv.first_name,
+                "last_name": conv.last_name,
+                "phone": conv.phone,
+                "last_message": WhatsAppMessageSerializer(last_msg).data if last_msg else None,
+                "unread_count": conv.unread_count,
+                "is_unknown": False,
+                "agent_enabled": _agent_enabled(conv),
+            })
+            continue
+        phone = conv["sender_phone"]
+        last_msg = last_by_phone.get(phone)
+        results.append({
+            "id": None,
+            "sender_phone": phone,
+            "first_name": "Inconnu",
+            "last_name": phone,
+            "phone": phone,
+            "last_message": WhatsAppMessageSerializer(last_msg).data if last_msg else None,
+            "unread_count": conv["unread_count"],
+            "is_unknown": True,
+            "agent_enabled": agent_by_phone.get(phone, True),
+        })
 
     logger.info(
-        "Liste des conversations créée | connues=%d | inconnues=%d | total=%d",
-        len(known), len(unknown), len(all_conversations),
+        "Liste des conversations créée | connues=%d | inconnues=%d | suite=%s",
+        len(lead_ids), len(phones), has_more,
     )
 
-    return _no_cache(Response(all_conversations))
+    if limit is None:
+        return _no_cache(JSONResponse(results))
+    # Curseur en ISO complet (microsecondes) : l'encodeur JSON tronque à la milliseconde
+    cursor_time, cursor_key = page[-1][0] if page else (before, before_key)
+    return _no_cache(JSONResponse({
+        "results": results,
+        "hasMore": has_more,
+        "before": cursor_time.isoformat() if cursor_time else None,
+        "beforeKey": cursor_key,
+    }))
+
+
+async def _with_archived(messages: list, **filters) -> list:
+    """
+    Complète les messages des partitions chaudes par ceux des mois compactés
+    (WhatsAppMessageArchive) ; pendant l'archivage, la ligne chaude prime.
+    """
+    hot_ids = {m.id for m in messages}
+    archived = [
+        row.as_message() async for row in WhatsAppMessageArchive.objects.filter(**filters)
+        if row.id not in hot_ids
+    ]
+    if not archived:
+        return messages
+    return sorted(archived + messages, key=lambda m: m.timestamp)
 
 
 @never_cache
-@api_view(["GET"])
-@permission_classes([AllowAny])
-def message_list(request, lead_id: int):
-    messages = WhatsAppMessage.objects.filter(lead_id=lead_id).order_by("timestamp")
-    return _no_cache(Response(WhatsAppMessageSerializer(messages, many=True).data))
+@async_api_view(permission_classes=[AllowAny])
+async def message_list(request, lead_id: int):
+    messages = [m async for m in WhatsAppMessage.objects.filter(lead_id=lead_id).order_by("timestamp")]
+    messages = await _with_archived(messages, lead_id=lead_id)
+    return _no_cache(JSONResponse(WhatsAppMessageSerializer(messages, many=True).data))
 
 
 @never_cache
-@api_view(["GET"])
-@permission_classes([AllowAny])
-def message_list_unknown(request, phone: str):
-    messages = WhatsAppMessage.objects.filter(
-        lead__isnull=True,
-        sender_phone=phone,
-    ).order_by("timestamp")
-    return _no_cache(Response(WhatsAppMessageSerializer(messages, many=True).data))
+@async_api_view(permission_classes=[AllowAny])
+async def message_list_unknown(request, phone: str):
+    messages = [
+        m async for m in WhatsAppMessage.objects.filter(
+            lead__isnull=True,
+            sender_phone=phone,
+        ).order_by("timestamp")
+    ]
+    messages = await _with_archived(messages, lead__isnull=True, sender_phone=phone)
+    return _no_cache(JSONResponse(WhatsAppMessageSerializer(messages, many=True).data))
 
 
 @api_view(["POST"])
@@ -542,6 +661,13 @@ def send_message(request):
 
     try:
         meta_response = send_whatsapp_message(to_phone, body)
+    except RateLimited as exc:
+        response = Response(
+            {"detail": "Débit WhatsApp atteint, réessayez.", "retry_after": round(exc.retry_after, 1)},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        response["Retry-After"] = str(math.ceil(exc.retry_after))
+        return response
     except Exception as exc:
         logger.exception("Échec envoi WhatsApp via Meta | to=%s | error=%s", to_phone, exc)
         return Response(
@@ -603,7 +729,7 @@ def media_download(request, message_id: int):
     try:
         # Étape 1 : récupérer l'URL de téléchargement depuis l'API Meta Graph
         meta_info = req.get(
-            f"https://graph.facebook.com/v25.0/{msg.media_id}",
+            graph_api_url(msg.media_id),
             headers=auth_header,
             timeout=10,
         )
@@ -0,0 +1,121 @@
+"""
+Benchmarks (pytest-benchmark) des endpoints et jobs critiques, sur un jeu de
+données généré par `generate_bench_data` dans la base de test.
+
+Ignorés tant que BENCH_SCALE n'est pas défini (et si pytest-benchmark n'est
+pas installé) : la suite de tests habituelle ne les exécute pas.
+
+    # référence, résultats JSON dans .benchmarks/
+    BENCH_SCALE=0.1 pytest benchmarks --reuse-db --benchmark-autosave
+    # après modification : nouvelle sauvegarde + comparaison à la précédente
+    BENCH_SCALE=0.1 pytest benchmarks --reuse-db --benchmark-autosave --benchmark-compare
+    pytest-benchmark compare 0001 0002 --columns=median,ops,rounds
+
+--benchmark-json=fichier.json écrit les résultats d'une exécution ailleurs.
+BENCH_SCALE=1 reproduit les volumes de la production (1 M leads…) : la
+génération prend plusieurs dizaines de minutes, --reuse-db la conserve entre
+deux exécutions (elle n'est refaite que si la base ne contient aucun lead).
+
+Les caches applicatifs (recherche de leads, agrégats contrats) sont invalidés
+avant chaque mesure : on mesure le coût à froid, celui qui régresse.
+"""
+import os
+
+import pytest
+
+BENCH_SCALE = os.getenv("BENCH_SCALE")
+BENCH_SEED = int(os.getenv("BENCH_SEED", "42"))
+BENCH_ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    pytest_benchmark = None
+
+if not BENCH_SCALE or pytest_benchmark is None:
+    collect_ignore_glob = ["test_*.py"]
+
+
+@pytest.fixture(scope="session")
+def bench_data(django_db_setup, django_db_blocker):
+    """Volumes du jeu de données (générés une fois par base de test)."""
+    from django.core.management import call_command
+
+    from api.contracts.models import Contract
+    from api.leads.models import Lead
+    from api.leads_events.models import LeadEvent
+    from api.payments.models import PaymentReceipt
+    from api.users.models import User
+    from api.users.roles import UserRoles
+    from api.whatsapp.models import WhatsAppMessage
+
+    with django_db_blocker.unblock():
+        if not Lead.objects.exists():
+            call_command("generate_bench_data", scale=float(BENCH_SCALE), seed=BENCH_SEED, force=True)
+        User.objects.get_or_create(
+            email="bench.admin@bench.papiers-express.fr",
+            defaults={"first_name": "Bench", "last_name": "Admin", "role": UserRoles.ADMIN, "is_staff": True},
+        )
+        return {
+            "scale": float(BENCH_SCALE),
+            "leads": Lead.objects.count(),
+            "contracts": Contract.objects.count(),
+            "receipts": PaymentReceipt.objects.count(),
+            "whatsapp_messages": WhatsAppMessage.objects.count(),
+            "lead_events": LeadEvent.objects.count(),
+        }
+
+
+@pytest.fixture
+def admin_client(bench_data, db):
+    from rest_framework.test import APIClient
+
+    from api.users.models import User
+
+    client = APIClient()
+    client.force_authenticate(User.objects.get(email="bench.admin@bench.papiers-express.fr"))
+    return client
+
+
+def cold_caches():
+    from api.contracts import aggregates
+    from api.leads import search_cache
+
+    search_cache.invalidate()
+    aggregates.bump_version()
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _rolled_back(func):
+    """Exécute `func` dans un savepoint annulé : chaque tour de mesure part du même état."""
+    from django.db import transaction
+
+    def run(*args, **kwargs):
+        try:
+            with transaction.atomic():
+                result = func(*args, **kwargs)
+                raise _Rollback
+        except _Rollback:
+            return result
+
+    return run
+
+
+@pytest.fixture
+def run_benchmark(benchmark, bench_data):
+    """
+    benchmark.pedantic à froid ; les volumes sont joints aux résultats JSON.
+    rollback=True pour les jobs qui écrivent.
+    """
+    benchmark.extra_info.update(bench_data)
+
+    def run(func, *args, rollback=False, **kwargs):
+        return benchmark.pedantic(
+            _rolled_back(func) if rollback else func, args=args, kwargs=kwargs,
+            setup=cold_caches, rounds=BENCH_ROUNDS, warmup_rounds=1,
+        )
+
+    return run
@@ -0,0 +1,68 @@
+"""
+Endpoints critiques : recherche de leads (v1 async, v2), recherche et export
+CSV des contrats, liste des conversations WhatsApp, KPI agrégés des créateurs.
+"""
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from api.leads.constants import RDV_CONFIRME
+
+pytestmark = pytest.mark.django_db
+
+
+def _get(client, url, params=None):
+    response = client.get(url, params or {})
+    assert response.status_code == 200, response.content[:500]
+    return response
+
+
+def _days_ago(days):
+    return (timezone.localdate() - timedelta(days=days)).isoformat()
+
+
+@pytest.mark.parametrize("params", [
+    pytest.param({}, id="default"),
+    pytest.param({"status_code": RDV_CONFIRME, "ordering": "appointment_date"}, id="status"),
+    pytest.param({"date_from": _days_ago(90), "has_jurist": "sans", "page": 3}, id="created_range"),
+    pytest.param({"appt_from": _days_ago(0), "appt_to": _days_ago(-7), "page_size": 50}, id="upcoming_week"),
+])
+def test_lead_search(run_benchmark, admin_client, params):
+    run_benchmark(_get, admin_client, reverse("lead-search"), params)
+
+
+@pytest.mark.parametrize("params", [
+    pytest.param({}, id="default"),
+    pytest.param({"q": "martin"}, id="text"),
+    pytest.param({"q": "0600012"}, id="phone"),
+])
+def test_lead_search_v2(run_benchmark, admin_client, params):
+    run_benchmark(_get, admin_client, reverse("lead-search-v2"), params)
+
+
+@pytest.mark.parametrize("params", [
+    pytest.param({}, id="default"),
+    pytest.param({"search": "martin"}, id="text"),
+    pytest.param({"date_from": _days_ago(90), "date_to": _days_ago(0), "has_balance": "avec"}, id="balance"),
+])
+def test_contract_search_list(run_benchmark, admin_client, params):
+    run_benchmark(_get, admin_client, reverse("contract-search"), params)
+
+
+def test_contract_search_export_csv(run_benchmark, admin_client):
+    params = {"date_from": _days_ago(90), "date_to": _days_ago(0)}
+    run_benchmark(_get, admin_client, reverse("contract-search-export-csv"), params)
+
+
+def test_whatsapp_conversation_list(run_benchmark, admin_client):
+    run_benchmark(_get, admin_client, reverse("whatsapp_conversations"))
+
+
+@pytest.mark.parametrize("params", [
+    pytest.param({}, id="all_time"),
+    pytest.param({"leads_date_range_after": _days_ago(30), "leads_date_range_before": _days_ago(0)}, id="last_30_days"),
+])
+def test_creator_aggregate_kpis(run_benchmark, admin_client, params):
+    run_benchmark(_get, admin_client, reverse("creator-aggregate-kpis"), params)
@@ -0,0 +1,28 @@
+"""
+Jobs Django-Q critiques, exécutés en direct (sans worker) et annulés à chaque
+tour : rappels de RDV et tâches de relance des absents.
+"""
+from datetime import datetime, time, timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from api.leads.tasks import send_appointment_reminders
+from api.leads_task.tasks import create_absent_followup_tasks
+
+pytestmark = pytest.mark.django_db
+
+
+def test_send_appointment_reminders(run_benchmark):
+    # Midi : les fenêtres à +24 h / +48 h tombent en pleine journée de RDV
+    noon = timezone.make_aware(datetime.combine(timezone.localdate(), time(12)))
+    with patch("django.utils.timezone.now", return_value=noon - timedelta(minutes=1)), \
+            patch("api.leads.tasks.async_task"):
+        result = run_benchmark(send_appointment_reminders, rollback=True)
+    assert result.endswith("reminders sent")
+
+
+def test_create_absent_followup_tasks(run_benchmark):
+    result = run_benchmark(create_absent_followup_tasks, rollback=True)
+    assert result.startswith(("Succès", "Info"))
@@ -1,8 +1,9 @@
 import logging
 import psycopg2
-import redis
 from django.conf import settings
 
+from api.utils.redis_client import new_redis
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,7 +27,8 @@ def check_postgres():
 
 def check_redis():
     try:
-        client = redis.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=3)
+        # Client dédié : la vérification ouvre une vraie connexion
+        client = new_redis(socket_connect_timeout=3)
         client.ping()
         logger.info("🟢 Redis OK")
         return True
@@ -36,6 +36,7 @@ DJANGO_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 THIRD_PARTY_APPS = [
@@ -83,6 +84,9 @@ LOCAL_APPS = [
     "api.leads_task_status",
     "api.leads_task",
     "api.document_types",
+    "api.analytics",
+    "api.storage_cleanup",
+    "api.notification_outbox",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -96,11 +100,12 @@ MIDDLEWARE = [
     "django.middleware.gzip.GZipMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "api.middleware.ThrottledSessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "api.middleware.CurrentUserMiddleware",
+    "api.middleware.QueryInstrumentationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django.middleware.http.ConditionalGetMiddleware",
@@ -148,6 +153,7 @@ AUTHENTICATION_BACKENDS = [
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-pro")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")  # faux serveur du harnais de charge
 WHATSAPP_AGENT_ENABLED = os.getenv("WHATSAPP_AGENT_ENABLED", "False").lower() == "true"
 
 # Debounce Kemia en secondes (délai d'attente avant de traiter un burst de messages)
@@ -257,8 +263,12 @@ CHANNEL_LAYERS = {
 
 # -----------------------------------------------------------------------------
 # DJANGO-Q2
-# Broker : Postgres (pas de dépendance Redis supplémentaire pour les tâches)
+# Broker : Postgres par défaut ; TASK_BROKER=redis → api.core.redis_broker
+# (BRPOPLPUSH bloquant, plus de polling). Résultats et scheduler restent en
+# base. Bascule : manage.py migrate_task_broker, clusters arrêtés.
 # -----------------------------------------------------------------------------
+TASK_BROKER = os.getenv("TASK_BROKER", "orm").lower()
+
 Q_CLUSTER = {
     "name": "papex",
 
@@ -293,8 +303,29 @@ Q_CLUSTER = {
     "save_limit": 500,
 
     "log_level": "INFO",
+
+    # Voies (api.core.task_lanes) : une file et un qcluster par famille,
+    # lancé avec Q_CLUSTER_NAME=<voie> python manage.py qcluster.
+    # Les workers d'une voie plafonnent les appels simultanés à ses fournisseurs.
+    "ALT_CLUSTERS": {
+        # SMS OVH / e-mails unitaires : courts, relancés vite
+        "realtime-notifications": {"workers": 4, "queue_limit": 2, "timeout": 30, "retry": 45, "max_attempts": 3},
+        # Kemia : Gemini jusqu'à 120 s ; 4 appels Gemini simultanés au plus
+        "agent": {"workers": 4, "queue_limit": 1, "timeout": 150, "retry": 180, "max_attempts": 2},
+        # PDF tirés de S3 et joints aux e-mails, purge S3
+        "documents": {"workers": 2, "queue_limit": 2, "timeout": 120, "retry": 150, "max_attempts": 2},
+        # Traitements de masse et tâches planifiées (manage.py route_schedules)
+        "batch-reports": {"workers": 1, "queue_limit": 1, "timeout": 900, "retry": 960, "max_attempts": 1},
+    },
 }
 
+if TASK_BROKER == "redis":
+    Q_CLUSTER.pop("orm")
+    Q_CLUSTER["broker_class"] = "api.core.redis_broker.RedisBroker"
+
+# False tant que les qcluster des voies ne tournent pas : tout reste sur « papex »
+TASK_LANES_ENABLED = os.getenv("TASK_LANES_ENABLED", "false").lower() in ("true", "1")
+
 # -----------------------------------------------------------------------------
 # EMAIL (SMTP)
 # -----------------------------------------------------------------------------
@@ -323,6 +354,8 @@ OVH_SMS_APP_SECRET = os.getenv("OVH_SMS_APP_SECRET")
 OVH_SMS_CONSUMER_KEY = os.getenv("OVH_SMS_CONSUMER_KEY")
 OVH_SMS_SERVICE_NAME = os.getenv("OVH_SMS_SERVICE_NAME")
 OVH_SMS_SENDER = os.getenv("OVH_SMS_SENDER", "PAPEX")
+# Région python-ovh ou URL complète (faux serveur du harnais de charge)
+OVH_SMS_ENDPOINT = os.getenv("OVH_SMS_ENDPOINT", "ovh-eu")
 
 OVH_PHONE_APP_KEY = os.getenv("OVH_PHONE_APP_KEY")
 OVH_PHONE_APP_SECRET = os.getenv("OVH_PHONE_APP_SECRET")
@@ -369,14 +402,61 @@ SESSION_COOKIE_PATH = "/"
 CSRF_COOKIE_PATH = "/"
 
 SESSION_COOKIE_AGE = 60 * 60 * 8  # 8 heures
-SESSION_SAVE_EVERY_REQUEST = True
+# Pas de réécriture de la session à chaque requête : ThrottledSessionMiddleware
+# prolonge la session au plus une fois par SESSION_RENEW_INTERVAL.
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_RENEW_INTERVAL = 60 * 15  # 15 minutes
+# Lecture depuis Redis, écriture en base (survit à un flush du cache)
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 
+# Instrumentation SQL par requête (api.core.query_instrumentation) :
+# Server-Timing, logs « api.perf », synthèse par route sur /api/perf/routes/
+QUERY_INSTRUMENTATION_ENABLED = os.getenv("QUERY_INSTRUMENTATION_ENABLED", "false").lower() in ("true", "1")
+QUERY_SLOW_MS = int(os.getenv("QUERY_SLOW_MS", "100"))
+QUERY_N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "10"))
+QUERY_STATS_HOURS = 24
+
+# Télémétrie Django-Q (api.core.task_telemetry) : /api/perf/tasks/ et
+# /api/perf/tasks/metrics/ (Prometheus, « Authorization: Bearer METRICS_TOKEN »)
+TASK_TELEMETRY_ENABLED = os.getenv("TASK_TELEMETRY_ENABLED", "true").lower() in ("true", "1")
+TASK_QUEUE_LATENCY_SLO_SECONDS = int(os.getenv("TASK_QUEUE_LATENCY_SLO_SECONDS", "60"))
+TASK_LANE_LATENCY_SLO_SECONDS = {
+    "realtime-notifications": 15,
+    "agent": 60,
+    "documents": 300,
+    "batch-reports": 1800,
+}
+TASK_QUEUE_ALERT_EMAILS = [e.strip() for e in os.getenv("TASK_QUEUE_ALERT_EMAILS", "").split(",") if e.strip()]
+TASK_QUEUE_ALERT_COOLDOWN = 15 * 60
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Débit des fournisseurs d'envoi (api.core.rate_limit) : seaux à jetons Redis,
+# global et par destinataire ; rate = jetons / s, burst = capacité du seau
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("true", "1")
+PROVIDER_RATE_LIMITS = {
+    "ovh_sms": {
+        "rate": float(os.getenv("OVH_SMS_RATE", "5")), "burst": 20,
+        "destination_rate": 1 / 60, "destination_burst": 3,
+    },
+    "meta_whatsapp": {
+        "rate": float(os.getenv("META_WHATSAPP_RATE", "20")), "burst": 80,
+        "destination_rate": 1 / 6, "destination_burst": 6,  # « pair rate limit » Meta
+    },
+}
+
+# Partitionnement mensuel de LeadEvent / WhatsAppMessage (api.core.partitioning) :
+# mois créés à l'avance, puis compactés dans les tables d'archive après la rétention
+PARTITIONS_AHEAD_MONTHS = int(os.getenv("PARTITIONS_AHEAD_MONTHS", "3"))
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", "24"))
+
 
 # WhatsApp Meta Cloud API
 WHATSAPP_PHONE_NUMBER_ID = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
 WHATSAPP_ACCESS_TOKEN    = os.getenv("WHATSAPP_ACCESS_TOKEN")
 WHATSAPP_VERIFY_TOKEN    = os.getenv("WHATSAPP_VERIFY_TOKEN", "papex_secret_2026")
+# Faux serveur du harnais de charge (manage.py run_fake_providers)
+WHATSAPP_GRAPH_API_URL   = os.getenv("WHATSAPP_GRAPH_API_URL", "https://graph.facebook.com/v25.0")
 PAYPAL_VISIO_LINK        = os.getenv("PAYPAL_VISIO_LINK")
 
 SECURE_SSL_REDIRECT = False
@@ -0,0 +1,75 @@
+"""
+Test de charge des endpoints de lecture async (httpx, sans dépendance Django).
+
+Compare le débit d'une ou plusieurs instances (ex. : avant/après déploiement)
+sur les endpoints les plus sollicités, avec N clients concurrents.
+
+Usage :
+    python scripts/load_async_endpoints.py \\
+        --base-url http://localhost:8000 --base-url http://localhost:8001 \\
+        --sessionid <cookie sessionid> --concurrency 50 --duration 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = [
+    "/api/ping/",
+    "/api/leads/search/?page_size=6",
+    "/api/v2/leads/stats-today/",
+    "/api/whatsapp/conversations/",
+]
+
+
+async def _worker(client, path, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(base_url, path, cookies, concurrency, duration):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, cookies=cookies, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            _worker(client, path, deadline, latencies, errors) for _ in range(concurrency)
+        ))
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / duration,
+        "p50": statistics.median(latencies) * 1000 if latencies else 0,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", action="append", required=True)
+    parser.add_argument("--path", action="append", help="défaut : endpoints async principaux")
+    parser.add_argument("--sessionid", help="cookie de session d'un utilisateur connecté")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    cookies = {"sessionid": args.sessionid} if args.sessionid else {}
+    print(f"{'instance':<30} {'endpoint':<38} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'err':>5}")
+    for path in args.path or DEFAULT_PATHS:
+        for base_url in args.base_url:
+            r = asyncio.run(run(base_url, path, cookies, args.concurrency, args.duration))
+            print(f"{base_url:<30} {path:<38} {r['rps']:>8.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['errors']:>5}")
+
+
+if __name__ == "__main__":
+    main()
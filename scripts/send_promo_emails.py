@@ -21,29 +21,17 @@ from decimal import Decimal
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "papex.settings.prod")
 django.setup()
 
-from django.db.models import Count, Q, Sum, Avg
-from django.db.models.functions import TruncMonth
 from django.utils import timezone
 
-from api.leads.models import Lead
+from api.analytics.services import ContractRollupService, LeadRollupService, ReceiptRollupService
+from api.lead_status.models import LeadStatus
 from api.leads.constants import (
     RDV_CONFIRME, RDV_A_CONFIRMER, RDV_PLANIFIE,
     A_RAPPELER, ABSENT, PRESENT,
     RDV_PRESENTIEL, RDV_TELEPHONE, RDV_VISIO_CONFERENCE,
+    LeadService,
 )
 
-try:
-    from api.contracts.models import Contract
-    HAS_CONTRACTS = True
-except ImportError:
-    HAS_CONTRACTS = False
-
-try:
-    from api.payments.models import PaymentReceipt
-    HAS_PAYMENTS = True
-except ImportError:
-    HAS_PAYMENTS = False
-
 # ─── ReportLab ────────────────────────────────────────────────────────────────
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
@@ -220,20 +208,23 @@ def encadre_definition(texte, styles):
 
 # ─── Collecte des donnees ─────────────────────────────────────────────────────
 def collect_data():
+    """
+    Lit exclusivement les agrégats journaliers (api.analytics) : quelques
+    GROUP BY sur des tables de faits au lieu de dizaines de COUNT sur les
+    tables brutes. Lancer `manage.py check_rollups` en cas de doute.
+    """
     d = {}
     now = timezone.now()
     d["date_rapport"] = now.strftime("%d/%m/%Y a %H:%M")
 
     # ── Leads ──────────────────────────────────────────────────────────────────
-    tous_leads = Lead.objects.all()
-    total = tous_leads.count()
+    totaux = LeadRollupService.totals()
+    total = totaux["total"]
     d["total_leads"] = total
-    d["leads_avec_rdv"] = tous_leads.filter(appointment_date__isnull=False).count()
+    d["leads_avec_rdv"] = totaux["with_appointment"]
 
-    premier = tous_leads.order_by("created_at").values_list("created_at", flat=True).first()
-    dernier = tous_leads.order_by("-created_at").values_list("created_at", flat=True).first()
-    d["premier_lead"] = fmt_date(premier)
-    d["dernier_lead"] = fmt_date(dernier)
+    d["premier_lead"] = fmt_date(totaux["first_day"])
+    d["dernier_lead"] = fmt_date(totaux["last_day"])
 
     # ── Statuts exacts (source de verite) ─────────────────────────────────────
     # PRESENT  = le client s'est presente au RDV, RDV confirme et honore
@@ -243,42 +234,29 @@ def collect_data():
     # A_RAPPELER       = prospect a rappeler, pas de RDV fixe
     # RDV_PLANIFIE     = RDV enregistre (ancien statut)
 
-    leads_presents = tous_leads.filter(status__code=PRESENT)
-    leads_absents  = tous_leads.filter(status__code=ABSENT)
-    leads_confirmes = tous_leads.filter(status__code=RDV_CONFIRME)
-    leads_a_confirmer = tous_leads.filter(status__code=RDV_A_CONFIRMER)
-    leads_a_rappeler = tous_leads.filter(status__code=A_RAPPELER)
+    par_statut_type = LeadRollupService.by_status_and_type()
 
-    d["total_presents"] = leads_presents.count()
-    d["total_absents"]  = leads_absents.count()
-    d["total_confirmes"] = leads_confirmes.count()
-    d["total_a_confirmer"] = leads_a_confirmer.count()
-    d["total_a_rappeler"] = leads_a_rappeler.count()
+    def nb(code, appointment_type=None):
+        return sum(
+            n for (s, t), n in par_statut_type.items()
+            if s == code and (appointment_type is None or t == appointment_type)
+        )
+
+    d["total_presents"] = nb(PRESENT)
+    d["total_absents"]  = nb(ABSENT)
+    d["total_confirmes"] = nb(RDV_CONFIRME)
+    d["total_a_confirmer"] = nb(RDV_A_CONFIRMER)
+    d["total_a_rappeler"] = nb(A_RAPPELER)
 
     # ── RDV honores : filtre sur PRESENT (source fiable) ──────────────────────
-    # Presentiel : client venu physiquement + statut PRESENT
-    d["presents_presentiel"] = leads_presents.filter(
-        appointment_type=RDV_PRESENTIEL
-    ).count()
-    # Telephonique : client honore le RDV tel + statut PRESENT
-    d["presents_telephone"] = leads_presents.filter(
-        appointment_type=RDV_TELEPHONE
-    ).count()
-    # Visio : statut PRESENT + visio
-    d["presents_visio"] = leads_presents.filter(
-        appointment_type=RDV_VISIO_CONFERENCE
-    ).count()
+    d["presents_presentiel"] = nb(PRESENT, RDV_PRESENTIEL)
+    d["presents_telephone"] = nb(PRESENT, RDV_TELEPHONE)
+    d["presents_visio"] = nb(PRESENT, RDV_VISIO_CONFERENCE)
 
     # ── RDV manques : filtre sur ABSENT ───────────────────────────────────────
-    d["absents_presentiel"] = leads_absents.filter(
-        appointment_type=RDV_PRESENTIEL
-    ).count()
-    d["absents_telephone"] = leads_absents.filter(
-        appointment_type=RDV_TELEPHONE
-    ).count()
-    d["absents_visio"] = leads_absents.filter(
-        appointment_type=RDV_VISIO_CONFERENCE
-    ).count()
+    d["absents_presentiel"] = nb(ABSENT, RDV_PRESENTIEL)
+    d["absents_telephone"] = nb(ABSENT, RDV_TELEPHONE)
+    d["absents_visio"] = nb(ABSENT, RDV_VISIO_CONFERENCE)
 
     # ── Taux de presence par canal ────────────────────────────────────────────
     # Total des RDV passes (PRESENT + ABSENT) = RDV dont on connait l'issue
@@ -295,148 +273,104 @@ def collect_data():
     d["total_rdv_visio_issus"]      = total_rdv_visio_issus
 
     # ── RDV a venir : confirmes ou a confirmer (pas encore honores) ───────────
-    leads_rdv_futur = tous_leads.filter(
-        status__code__in=[RDV_CONFIRME, RDV_A_CONFIRMER],
-        appointment_date__isnull=False,
-    )
-    d["rdv_futur_total"]       = leads_rdv_futur.count()
-    d["rdv_futur_presentiel"]  = leads_rdv_futur.filter(appointment_type=RDV_PRESENTIEL).count()
-    d["rdv_futur_telephone"]   = leads_rdv_futur.filter(appointment_type=RDV_TELEPHONE).count()
-    d["rdv_futur_visio"]       = leads_rdv_futur.filter(appointment_type=RDV_VISIO_CONFERENCE).count()
+    rdv_futur = LeadRollupService.with_appointment_by_type([RDV_CONFIRME, RDV_A_CONFIRMER])
+    d["rdv_futur_total"]       = sum(rdv_futur.values())
+    d["rdv_futur_presentiel"]  = rdv_futur.get(RDV_PRESENTIEL, 0)
+    d["rdv_futur_telephone"]   = rdv_futur.get(RDV_TELEPHONE, 0)
+    d["rdv_futur_visio"]       = rdv_futur.get(RDV_VISIO_CONFERENCE, 0)
 
     # ── Prospects sans RDV fixe ───────────────────────────────────────────────
-    d["leads_sans_rdv"] = tous_leads.filter(appointment_date__isnull=True).count()
+    d["leads_sans_rdv"] = total - totaux["with_appointment"]
     d["leads_a_rappeler"] = d["total_a_rappeler"]
 
     # ── Leads urgents et prioritaires ─────────────────────────────────────────
-    d["leads_urgents"] = tous_leads.filter(is_urgent=True).count()
-    d["leads_chauds"]  = sum(1 for l in tous_leads if l.is_hot)
+    d["leads_urgents"] = totaux["urgent"]
+    d["leads_chauds"]  = totaux["hot"]
 
     # ── Par statut commercial (vue complete) ──────────────────────────────────
-    d["par_statut"] = list(
-        tous_leads.values("status__label", "status__code")
-        .annotate(n=Count("id"))
-        .order_by("-n")
+    labels_statut = dict(LeadStatus.objects.values_list("code", "label"))
+    d["par_statut"] = sorted(
+        (
+            {"status__code": code, "status__label": labels_statut.get(code), "n": n}
+            for code, n in LeadRollupService.by("status_code").items()
+        ),
+        key=lambda s: -s["n"],
     )
 
     # ── Par type de service demande ───────────────────────────────────────────
-    d["par_service"] = list(
-        tous_leads.values("service__label")
-        .annotate(n=Count("id"))
-        .order_by("-n")
+    labels_service = dict(LeadService.choices)
+    d["par_service"] = sorted(
+        (
+            {"service__label": labels_service.get(code), "n": n}
+            for code, n in LeadRollupService.by("service").items()
+        ),
+        key=lambda s: -s["n"],
     )
 
     # ── Par canal d acquisition ───────────────────────────────────────────────
-    d["par_source"] = list(
-        tous_leads.values("source")
-        .annotate(n=Count("id"))
-        .order_by("-n")
+    d["par_source"] = sorted(
+        ({"source": code, "n": n} for code, n in LeadRollupService.by("source").items()),
+        key=lambda s: -s["n"],
     )
 
     # ── Par departement (top 15) ──────────────────────────────────────────────
-    d["par_departement"] = list(
-        tous_leads.exclude(department_code="")
-        .values("department_code")
-        .annotate(n=Count("id"))
-        .order_by("-n")[:15]
-    )
+    d["par_departement"] = sorted(
+        (
+            {"department_code": code, "n": n}
+            for code, n in LeadRollupService.by("department_code").items()
+            if code
+        ),
+        key=lambda s: -s["n"],
+    )[:15]
 
     # ── Evolution mensuelle des leads entrants ────────────────────────────────
-    d["evolution_mensuelle"] = list(
-        tous_leads
-        .annotate(mois=TruncMonth("created_at"))
-        .values("mois")
-        .annotate(n=Count("id"))
-        .order_by("mois")
-    )
+    d["evolution_mensuelle"] = LeadRollupService.monthly()
 
     # ── Contrats ───────────────────────────────────────────────────────────────
-    if HAS_CONTRACTS:
-        tous_contrats = Contract.objects.all()
-        total_c = tous_contrats.count()
-        d["total_contrats"] = total_c
-
-        # Taux de conversion = contrats crees / leads totaux
-        d["taux_conversion"] = pct(total_c, total)
-
-        d["contrats_signes"]     = tous_contrats.filter(is_signed=True).count()
-        d["contrats_annules"]    = tous_contrats.filter(is_cancelled=True).count()
-        d["contrats_rembourses"] = tous_contrats.filter(is_refunded=True).count()
-        d["contrats_en_attente"] = tous_contrats.filter(
-            is_signed=False, is_cancelled=False
-        ).count()
-
-        # Montants
-        agg = tous_contrats.aggregate(
-            total_brut=Sum("amount_due"),
-            moyenne=Avg("amount_due"),
-        )
-        d["montant_total_brut"] = agg["total_brut"] or Decimal("0")
-        d["montant_moyen"]      = agg["moyenne"]    or Decimal("0")
-
-        # Contrats issus de leads PRESENT en presentiel vs telephone
-        # (base fiable : seuls les leads dont le RDV a vraiment eu lieu)
-        try:
-            d["contrats_depuis_presentiel"] = tous_contrats.filter(
-                client__lead__status__code=PRESENT,
-                client__lead__appointment_type=RDV_PRESENTIEL,
-            ).count()
-            d["contrats_depuis_telephone"] = tous_contrats.filter(
-                client__lead__status__code=PRESENT,
-                client__lead__appointment_type=RDV_TELEPHONE,
-            ).count()
-            d["contrats_depuis_visio"] = tous_contrats.filter(
-                client__lead__status__code=PRESENT,
-                client__lead__appointment_type=RDV_VISIO_CONFERENCE,
-            ).count()
-        except Exception:
-            d["contrats_depuis_presentiel"] = None
-            d["contrats_depuis_telephone"]  = None
-            d["contrats_depuis_visio"]      = None
-
-        # Par service
-        d["contrats_par_service"] = list(
-            tous_contrats.values("service__label")
-            .annotate(n=Count("id"), total=Sum("amount_due"))
-            .order_by("-n")
-        )
-
-        # Evolution mensuelle des contrats
-        d["contrats_mensuels"] = list(
-            tous_contrats
-            .annotate(mois=TruncMonth("created_at"))
-            .values("mois")
-            .annotate(n=Count("id"), total=Sum("amount_due"))
-            .order_by("mois")
-        )
-    else:
-        d["total_contrats"]  = None
-        d["taux_conversion"] = "-"
+    agg = ContractRollupService.totals()
+    total_c = agg["n"]
+    d["total_contrats"] = total_c
+
+    # Taux de conversion = contrats crees / leads totaux
+    d["taux_conversion"] = pct(total_c, total)
+
+    d["contrats_signes"]     = ContractRollupService.totals(is_signed=True)["n"]
+    d["contrats_annules"]    = ContractRollupService.totals(is_cancelled=True)["n"]
+    d["contrats_rembourses"] = ContractRollupService.totals(is_refunded=True)["n"]
+    d["contrats_en_attente"] = ContractRollupService.totals(
+        is_signed=False, is_cancelled=False
+    )["n"]
+
+    # Montants
+    d["montant_total_brut"] = agg["total"]
+    d["montant_moyen"]      = agg["total"] / total_c if total_c else Decimal("0")
+
+    # Contrats issus de leads PRESENT en presentiel vs telephone
+    # (base fiable : seuls les leads dont le RDV a vraiment eu lieu)
+    d["contrats_depuis_presentiel"] = ContractRollupService.totals(
+        lead_status_code=PRESENT, appointment_type=RDV_PRESENTIEL,
+    )["n"]
+    d["contrats_depuis_telephone"] = ContractRollupService.totals(
+        lead_status_code=PRESENT, appointment_type=RDV_TELEPHONE,
+    )["n"]
+    d["contrats_depuis_visio"] = ContractRollupService.totals(
+        lead_status_code=PRESENT, appointment_type=RDV_VISIO_CONFERENCE,
+    )["n"]
+
+    # Par service
+    d["contrats_par_service"] = ContractRollupService.by_service()
+
+    # Evolution mensuelle des contrats
+    d["contrats_mensuels"] = ContractRollupService.monthly()
 
     # ── Paiements ──────────────────────────────────────────────────────────────
-    if HAS_PAYMENTS:
-        tous_recus = PaymentReceipt.objects.all()
-        d["total_recus"] = tous_recus.count()
+    agg_p = ReceiptRollupService.totals()
+    d["total_recus"] = agg_p["n"]
+    d["total_encaisse"] = agg_p["total"]
 
-        agg_p = tous_recus.aggregate(total=Sum("amount"))
-        d["total_encaisse"] = agg_p["total"] or Decimal("0")
+    d["par_mode_paiement"] = ReceiptRollupService.by_mode()
 
-        d["par_mode_paiement"] = list(
-            tous_recus.values("mode")
-            .annotate(n=Count("id"), total=Sum("amount"))
-            .order_by("-total")
-        )
-
-        d["paiements_mensuels"] = list(
-            tous_recus
-            .annotate(mois=TruncMonth("payment_date"))
-            .values("mois")
-            .annotate(n=Count("id"), total=Sum("amount"))
-            .order_by("mois")
-        )
-    else:
-        d["total_recus"]    = None
-        d["total_encaisse"] = None
+    d["paiements_mensuels"] = ReceiptRollupService.monthly()
 
     return d
 
@@ -479,7 +413,7 @@ def build_pdf(d, filename):
     kpis_couverture = [
         (total, "Prospects recus"),
         (d["leads_avec_rdv"], "Rendez-vous planifies"),
-        (d["total_contrats"] if d["total_contrats"] is not None else "-", "Contrats crees"),
+        (d["total_contrats"], "Contrats crees"),
         (d["taux_conversion"], "Taux de conversion"),
     ]
     story.append(bloc_kpi(styles, kpis_couverture))
@@ -720,222 +654,220 @@ def build_pdf(d, filename):
     # ══════════════════════════════════════════════════════════════════════════
     # SECTION 2 — LES CONTRATS
     # ══════════════════════════════════════════════════════════════════════════
-    if HAS_CONTRACTS and d["total_contrats"] is not None:
-        story.append(PageBreak())
-        story.extend(en_tete_section("2. Les Contrats", styles))
-        story.append(encadre_definition(
-            "Un contrat est cree lorsqu'un prospect accepte la proposition commerciale. "
-            "Il formalise l'engagement du client envers l'entreprise et precise le montant du. "
-            "Un contrat peut etre : en attente de signature, signe, annule ou avoir fait l'objet d'un remboursement.",
-            styles,
-        ))
-        story.append(Spacer(1, 8))
+    story.append(PageBreak())
+    story.extend(en_tete_section("2. Les Contrats", styles))
+    story.append(encadre_definition(
+        "Un contrat est cree lorsqu'un prospect accepte la proposition commerciale. "
+        "Il formalise l'engagement du client envers l'entreprise et precise le montant du. "
+        "Un contrat peut etre : en attente de signature, signe, annule ou avoir fait l'objet d'un remboursement.",
+        styles,
+    ))
+    story.append(Spacer(1, 8))
 
-        total_c = d["total_contrats"]
+    total_c = d["total_contrats"]
 
-        # KPIs contrats
-        kpis_contrats = [
-            (total_c,                   "Contrats crees"),
-            (d["contrats_signes"],       "Signes"),
-            (d["contrats_en_attente"],   "En attente de signature"),
-            (d["contrats_annules"],      "Annules"),
-        ]
-        story.append(bloc_kpi(styles, kpis_contrats))
-        story.append(Spacer(1, 10))
+    # KPIs contrats
+    kpis_contrats = [
+        (total_c,                   "Contrats crees"),
+        (d["contrats_signes"],       "Signes"),
+        (d["contrats_en_attente"],   "En attente de signature"),
+        (d["contrats_annules"],      "Annules"),
+    ]
+    story.append(bloc_kpi(styles, kpis_contrats))
+    story.append(Spacer(1, 10))
 
-        # 2.1 — Synthese
-        story.append(Paragraph("2.1  Synthese des contrats", styles["titre_sous_section"]))
-        lignes_contrats = [
-            ["Contrats crees au total",
-             str(total_c), "100 %",
-             "Tous les contrats, quel que soit leur etat"],
-            ["Contrats signes par le client",
-             str(d["contrats_signes"]), pct(d["contrats_signes"], total_c),
-             "Le client a signe - engagement ferme"],
-            ["Contrats en attente de signature",
-             str(d["contrats_en_attente"]), pct(d["contrats_en_attente"], total_c),
-             "Contrat cree mais pas encore signe"],
-            ["Contrats annules",
-             str(d["contrats_annules"]), pct(d["contrats_annules"], total_c),
-             "Contrat cree puis abandonne"],
-            ["Contrats ayant fait l'objet d'un remboursement",
-             str(d["contrats_rembourses"]), pct(d["contrats_rembourses"], total_c),
-             "Un remboursement (total ou partiel) a ete applique"],
-            ["Montant total brut de tous les contrats",
-             fmt_euros(d["montant_total_brut"]), "-",
-             "Somme des montants dus avant remises"],
-            ["Montant moyen par contrat",
-             fmt_euros(d["montant_moyen"]), "-",
-             "Valeur typique d'un contrat"],
-            ["Taux de conversion prospects vers contrats",
-             d["taux_conversion"], "-",
-             str(total) + " prospects ont genere " + str(total_c) + " contrats"],
+    # 2.1 — Synthese
+    story.append(Paragraph("2.1  Synthese des contrats", styles["titre_sous_section"]))
+    lignes_contrats = [
+        ["Contrats crees au total",
+         str(total_c), "100 %",
+         "Tous les contrats, quel que soit leur etat"],
+        ["Contrats signes par le client",
+         str(d["contrats_signes"]), pct(d["contrats_signes"], total_c),
+         "Le client a signe - engagement ferme"],
+        ["Contrats en attente de signature",
+         str(d["contrats_en_attente"]), pct(d["contrats_en_attente"], total_c),
+         "Contrat cree mais pas encore signe"],
+        ["Contrats annules",
+         str(d["contrats_annules"]), pct(d["contrats_annules"], total_c),
+         "Contrat cree puis abandonne"],
+        ["Contrats ayant fait l'objet d'un remboursement",
+         str(d["contrats_rembourses"]), pct(d["contrats_rembourses"], total_c),
+         "Un remboursement (total ou partiel) a ete applique"],
+        ["Montant total brut de tous les contrats",
+         fmt_euros(d["montant_total_brut"]), "-",
+         "Somme des montants dus avant remises"],
+        ["Montant moyen par contrat",
+         fmt_euros(d["montant_moyen"]), "-",
+         "Valeur typique d'un contrat"],
+        ["Taux de conversion prospects vers contrats",
+         d["taux_conversion"], "-",
+         str(total) + " prospects ont genere " + str(total_c) + " contrats"],
+    ]
+    story.append(tableau(
+        styles,
+        ["Indicateur", "Valeur", "%", "Explication"],
+        lignes_contrats,
+        largeurs=[78 * mm, 28 * mm, 20 * mm, 54 * mm],
+    ))
+    story.append(Spacer(1, 10))
+
+    # 2.2 — Conversion presentiel vs telephone
+    if d["contrats_depuis_presentiel"] is not None:
+        story.append(Paragraph("2.2  Conversion en contrat par canal de RDV", styles["titre_sous_section"]))
+        story.append(encadre_definition(
+            "Cette analyse repond a la question : quel canal de rendez-vous "
+            "genere le plus de contrats signes ? "
+            "La base de calcul est uniquement les prospects dont le RDV a vraiment eu lieu "
+            "(statut Present), pour ne pas fausser les taux avec des RDV non honores.",
+            styles,
+        ))
+        story.append(Spacer(1, 6))
+        lignes_conv = [
+            ["Contrats apres RDV en personne",
+             str(d["contrats_depuis_presentiel"]),
+             pct(d["contrats_depuis_presentiel"], d["presents_presentiel"]),
+             str(d["presents_presentiel"]) + " clients presents en personne"],
+            ["Contrats apres RDV par telephone",
+             str(d["contrats_depuis_telephone"]),
+             pct(d["contrats_depuis_telephone"], d["presents_telephone"]),
+             str(d["presents_telephone"]) + " clients presents par telephone"],
+            ["Contrats apres RDV en visioconference",
+             str(d["contrats_depuis_visio"]),
+             pct(d["contrats_depuis_visio"], d["presents_visio"]),
+             str(d["presents_visio"]) + " clients presents en visio"],
         ]
         story.append(tableau(
             styles,
-            ["Indicateur", "Valeur", "%", "Explication"],
-            lignes_contrats,
-            largeurs=[78 * mm, 28 * mm, 20 * mm, 54 * mm],
+            ["Canal de rendez-vous", "Contrats signes", "Taux de conversion", "Base de calcul"],
+            lignes_conv,
+            largeurs=[72 * mm, 30 * mm, 32 * mm, 46 * mm],
         ))
         story.append(Spacer(1, 10))
 
-        # 2.2 — Conversion presentiel vs telephone
-        if d["contrats_depuis_presentiel"] is not None:
-            story.append(Paragraph("2.2  Conversion en contrat par canal de RDV", styles["titre_sous_section"]))
-            story.append(encadre_definition(
-                "Cette analyse repond a la question : quel canal de rendez-vous "
-                "genere le plus de contrats signes ? "
-                "La base de calcul est uniquement les prospects dont le RDV a vraiment eu lieu "
-                "(statut Present), pour ne pas fausser les taux avec des RDV non honores.",
-                styles,
-            ))
-            story.append(Spacer(1, 6))
-            lignes_conv = [
-                ["Contrats apres RDV en personne",
-                 str(d["contrats_depuis_presentiel"]),
-                 pct(d["contrats_depuis_presentiel"], d["presents_presentiel"]),
-                 str(d["presents_presentiel"]) + " clients presents en personne"],
-                ["Contrats apres RDV par telephone",
-                 str(d["contrats_depuis_telephone"]),
-                 pct(d["contrats_depuis_telephone"], d["presents_telephone"]),
-                 str(d["presents_telephone"]) + " clients presents par telephone"],
-                ["Contrats apres RDV en visioconference",
-                 str(d["contrats_depuis_visio"]),
-                 pct(d["contrats_depuis_visio"], d["presents_visio"]),
-                 str(d["presents_visio"]) + " clients presents en visio"],
+    # 2.3 — Par service
+    story.append(Paragraph("2.3  Contrats par type de service", styles["titre_sous_section"]))
+    story.append(encadre_definition(
+        "Repartition des contrats selon la prestation vendue. "
+        "Permet d'identifier les services les plus vendus en volume et en valeur.",
+        styles,
+    ))
+    story.append(Spacer(1, 6))
+    if d["contrats_par_service"]:
+        lignes = [
+            [
+                s["service__label"] or "Non precise",
+                str(s["n"]),
+                pct(s["n"], total_c),
+                fmt_euros(s["total"]),
             ]
-            story.append(tableau(
-                styles,
-                ["Canal de rendez-vous", "Contrats signes", "Taux de conversion", "Base de calcul"],
-                lignes_conv,
-                largeurs=[72 * mm, 30 * mm, 32 * mm, 46 * mm],
-            ))
-            story.append(Spacer(1, 10))
-
-        # 2.3 — Par service
-        story.append(Paragraph("2.3  Contrats par type de service", styles["titre_sous_section"]))
-        story.append(encadre_definition(
-            "Repartition des contrats selon la prestation vendue. "
-            "Permet d'identifier les services les plus vendus en volume et en valeur.",
+            for s in d["contrats_par_service"]
+        ]
+        story.append(tableau(
             styles,
+            ["Service vendu", "Nb contrats", "% du total", "Montant total du"],
+            lignes,
+            largeurs=[80 * mm, 28 * mm, 24 * mm, 48 * mm],
         ))
-        story.append(Spacer(1, 6))
-        if d["contrats_par_service"]:
-            lignes = [
-                [
-                    s["service__label"] or "Non precise",
-                    str(s["n"]),
-                    pct(s["n"], total_c),
-                    fmt_euros(s["total"]),
-                ]
-                for s in d["contrats_par_service"]
-            ]
-            story.append(tableau(
-                styles,
-                ["Service vendu", "Nb contrats", "% du total", "Montant total du"],
-                lignes,
-                largeurs=[80 * mm, 28 * mm, 24 * mm, 48 * mm],
-            ))
-        story.append(Spacer(1, 10))
+    story.append(Spacer(1, 10))
 
-        # 2.4 — Evolution mensuelle
-        story.append(Paragraph("2.4  Evolution mensuelle du nombre de contrats", styles["titre_sous_section"]))
-        story.append(encadre_definition(
-            "Ce tableau montre la progression des ventes mois par mois, "
-            "en nombre de contrats crees et en montant total facture.",
+    # 2.4 — Evolution mensuelle
+    story.append(Paragraph("2.4  Evolution mensuelle du nombre de contrats", styles["titre_sous_section"]))
+    story.append(encadre_definition(
+        "Ce tableau montre la progression des ventes mois par mois, "
+        "en nombre de contrats crees et en montant total facture.",
+        styles,
+    ))
+    story.append(Spacer(1, 6))
+    if d["contrats_mensuels"]:
+        lignes = []
+        for m in d["contrats_mensuels"]:
+            mois_label = m["mois"].strftime("%B %Y") if hasattr(m["mois"], "strftime") else str(m["mois"])
+            lignes.append([
+                mois_label.capitalize(),
+                str(m["n"]),
+                fmt_euros(m["total"]),
+                pct(m["n"], total_c),
+            ])
+        story.append(tableau(
             styles,
+            ["Mois", "Contrats crees", "Montant total facture", "% du total"],
+            lignes,
+            largeurs=[60 * mm, 36 * mm, 50 * mm, 34 * mm],
         ))
-        story.append(Spacer(1, 6))
-        if d["contrats_mensuels"]:
-            lignes = []
-            for m in d["contrats_mensuels"]:
-                mois_label = m["mois"].strftime("%B %Y") if hasattr(m["mois"], "strftime") else str(m["mois"])
-                lignes.append([
-                    mois_label.capitalize(),
-                    str(m["n"]),
-                    fmt_euros(m["total"]),
-                    pct(m["n"], total_c),
-                ])
-            story.append(tableau(
-                styles,
-                ["Mois", "Contrats crees", "Montant total facture", "% du total"],
-                lignes,
-                largeurs=[60 * mm, 36 * mm, 50 * mm, 34 * mm],
-            ))
 
     # ══════════════════════════════════════════════════════════════════════════
     # SECTION 3 — LES PAIEMENTS
     # ══════════════════════════════════════════════════════════════════════════
-    if HAS_PAYMENTS and d["total_recus"] is not None:
-        story.append(PageBreak())
-        story.extend(en_tete_section("3. Les Paiements et Encaissements", styles))
-        story.append(encadre_definition(
-            "Un paiement (ou recu) est enregistre chaque fois qu'un client regle tout ou partie "
-            "du montant de son contrat. Un meme contrat peut donner lieu a plusieurs paiements "
-            "si le client regle en plusieurs fois. "
-            "Cette section montre combien d'argent a reellement ete encaisse.",
-            styles,
-        ))
-        story.append(Spacer(1, 8))
+    story.append(PageBreak())
+    story.extend(en_tete_section("3. Les Paiements et Encaissements", styles))
+    story.append(encadre_definition(
+        "Un paiement (ou recu) est enregistre chaque fois qu'un client regle tout ou partie "
+        "du montant de son contrat. Un meme contrat peut donner lieu a plusieurs paiements "
+        "si le client regle en plusieurs fois. "
+        "Cette section montre combien d'argent a reellement ete encaisse.",
+        styles,
+    ))
+    story.append(Spacer(1, 8))
 
-        kpis_paiements = [
-            (d["total_recus"],              "Paiements enregistres"),
-            (fmt_euros(d["total_encaisse"]), "Total encaisse"),
-        ]
-        story.append(bloc_kpi(styles, kpis_paiements))
-        story.append(Spacer(1, 10))
+    kpis_paiements = [
+        (d["total_recus"],              "Paiements enregistres"),
+        (fmt_euros(d["total_encaisse"]), "Total encaisse"),
+    ]
+    story.append(bloc_kpi(styles, kpis_paiements))
+    story.append(Spacer(1, 10))
 
-        # 3.1 — Par mode de paiement
-        story.append(Paragraph("3.1  Repartition par mode de reglement", styles["titre_sous_section"]))
-        story.append(encadre_definition(
-            "Indique comment les clients paient : carte bancaire, virement, especes, cheque, etc. "
-            "Utile pour evaluer les preferences des clients et anticiper les delais d'encaissement.",
+    # 3.1 — Par mode de paiement
+    story.append(Paragraph("3.1  Repartition par mode de reglement", styles["titre_sous_section"]))
+    story.append(encadre_definition(
+        "Indique comment les clients paient : carte bancaire, virement, especes, cheque, etc. "
+        "Utile pour evaluer les preferences des clients et anticiper les delais d'encaissement.",
+        styles,
+    ))
+    story.append(Spacer(1, 6))
+    if d["par_mode_paiement"]:
+        lignes = [
+            [
+                m["mode"] or "Non precise",
+                str(m["n"]),
+                fmt_euros(m["total"]),
+                pct(m["n"], d["total_recus"]),
+                pct(float(m["total"] or 0), float(d["total_encaisse"] or 1)),
+            ]
+            for m in d["par_mode_paiement"]
+        ]
+        story.append(tableau(
             styles,
+            ["Mode de paiement", "Nb transactions", "Montant encaisse", "% en volume", "% en valeur"],
+            lignes,
+            largeurs=[50 * mm, 30 * mm, 40 * mm, 25 * mm, 35 * mm],
         ))
-        story.append(Spacer(1, 6))
-        if d["par_mode_paiement"]:
-            lignes = [
-                [
-                    m["mode"] or "Non precise",
-                    str(m["n"]),
-                    fmt_euros(m["total"]),
-                    pct(m["n"], d["total_recus"]),
-                    pct(float(m["total"] or 0), float(d["total_encaisse"] or 1)),
-                ]
-                for m in d["par_mode_paiement"]
-            ]
-            story.append(tableau(
-                styles,
-                ["Mode de paiement", "Nb transactions", "Montant encaisse", "% en volume", "% en valeur"],
-                lignes,
-                largeurs=[50 * mm, 30 * mm, 40 * mm, 25 * mm, 35 * mm],
-            ))
-        story.append(Spacer(1, 10))
+    story.append(Spacer(1, 10))
 
-        # 3.2 — Evolution mensuelle
-        story.append(Paragraph("3.2  Evolution mensuelle des encaissements", styles["titre_sous_section"]))
-        story.append(encadre_definition(
-            "Ce tableau montre, mois par mois, combien de paiements ont ete recus "
-            "et quel montant total a ete encaisse. "
-            "C'est l'indicateur le plus proche de la tresorerie reelle de l'entreprise.",
+    # 3.2 — Evolution mensuelle
+    story.append(Paragraph("3.2  Evolution mensuelle des encaissements", styles["titre_sous_section"]))
+    story.append(encadre_definition(
+        "Ce tableau montre, mois par mois, combien de paiements ont ete recus "
+        "et quel montant total a ete encaisse. "
+        "C'est l'indicateur le plus proche de la tresorerie reelle de l'entreprise.",
+        styles,
+    ))
+    story.append(Spacer(1, 6))
+    if d["paiements_mensuels"]:
+        lignes = []
+        for m in d["paiements_mensuels"]:
+            mois_label = m["mois"].strftime("%B %Y") if hasattr(m["mois"], "strftime") else str(m["mois"])
+            lignes.append([
+                mois_label.capitalize(),
+                str(m["n"]),
+                fmt_euros(m["total"]),
+            ])
+        story.append(tableau(
             styles,
+            ["Mois", "Nombre de paiements recus", "Montant total encaisse"],
+            lignes,
+            largeurs=[60 * mm, 60 * mm, 60 * mm],
         ))
-        story.append(Spacer(1, 6))
-        if d["paiements_mensuels"]:
-            lignes = []
-            for m in d["paiements_mensuels"]:
-                mois_label = m["mois"].strftime("%B %Y") if hasattr(m["mois"], "strftime") else str(m["mois"])
-                lignes.append([
-                    mois_label.capitalize(),
-                    str(m["n"]),
-                    fmt_euros(m["total"]),
-                ])
-            story.append(tableau(
-                styles,
-                ["Mois", "Nombre de paiements recus", "Montant total encaisse"],
-                lignes,
-                largeurs=[60 * mm, 60 * mm, 60 * mm],
-            ))
 
     # ══════════════════════════════════════════════════════════════════════════
     # PIED DE PAGE
@@ -978,13 +910,11 @@ def run():
     print(f"  Prospects a rappeler         : {d['total_a_rappeler']}")
     print(f"  Prospects urgents            : {d['leads_urgents']}")
     print(f"  Prospects prioritaires       : {d['leads_chauds']}")
-    if d["total_contrats"] is not None:
-        print(f"  Contrats crees               : {d['total_contrats']}")
-        print(f"  Contrats signes              : {d['contrats_signes']}")
-        print(f"  Taux de conversion           : {d['taux_conversion']}")
-        print(f"  Montant total brut           : {fmt_euros(d['montant_total_brut'])}")
-    if d["total_encaisse"] is not None:
-        print(f"  Total encaisse               : {fmt_euros(d['total_encaisse'])}")
+    print(f"  Contrats crees               : {d['total_contrats']}")
+    print(f"  Contrats signes              : {d['contrats_signes']}")
+    print(f"  Taux de conversion           : {d['taux_conversion']}")
+    print(f"  Montant total brut           : {fmt_euros(d['montant_total_brut'])}")
+    print(f"  Total encaisse               : {fmt_euros(d['total_encaisse'])}")
     print("────────────────────────────────────────────────────────────")
 
 
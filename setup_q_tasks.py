@@ -58,6 +58,66 @@ def setup_tasks():
             "hour": 8,
             "minute": 30,
         },
+        {
+            "name": "Agrégats analytiques (rafraîchissement incrémental)",
+            "func": "api.analytics.tasks.refresh_dirty_rollups",
+            "schedule_type": Schedule.MINUTES,
+            "minutes": 1,
+            "repeats": -1,
+        },
+        {
+            "name": "Agrégats analytiques (reconstruction nocturne)",
+            "func": "api.analytics.tasks.rebuild_all_rollups",
+            "schedule_type": Schedule.DAILY,
+            "repeats": -1,
+            "hour": 2,
+            "minute": 0,
+        },
+        {
+            "name": "Statuts WhatsApp (vidage du buffer)",
+            "func": "api.whatsapp.tasks.flush_status_updates",
+            "schedule_type": Schedule.MINUTES,
+            "minutes": 1,
+            "repeats": -1,
+        },
+        {
+            "name": "Suppressions S3 (reprise des échecs)",
+            "func": "api.storage_cleanup.tasks.process_pending_s3_deletions",
+            "schedule_type": Schedule.MINUTES,
+            "minutes": 10,
+            "repeats": -1,
+        },
+        {
+            "name": "Outbox des notifications (envois différés et relances)",
+            "func": "api.notification_outbox.tasks.relay_notification_outbox",
+            "schedule_type": Schedule.MINUTES,
+            "minutes": 1,
+            "repeats": -1,
+        },
+        {
+            "name": "Outbox des notifications (purge)",
+            "func": "api.notification_outbox.tasks.purge_notification_outbox",
+            "schedule_type": Schedule.DAILY,
+            "repeats": -1,
+            "hour": 4,
+            "minute": 0,
+        },
+        {
+            "name": "Partitions mensuelles (création et archivage)",
+            "func": "api.core.tasks.maintain_partitions",
+            "schedule_type": Schedule.DAILY,
+            "repeats": -1,
+            "hour": 4,
+            "minute": 30,
+        },
+        {
+            "name": "Suppressions S3 (réconciliation des orphelins)",
+            "func": "api.storage_cleanup.tasks.sweep_s3_orphans",
+            "schedule_type": Schedule.DAILY,
+            "repeats": -1,
+            "hour": 3,
+            "minute": 30,
+        },
     ]
 
     for t in tasks: